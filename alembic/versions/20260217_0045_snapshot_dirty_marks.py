@@ -0,0 +1,56 @@
+"""snapshot dirty-mark change journal
+
+Revision ID: 20260217_0045
+Revises: 20260216_0044
+Create Date: 2026-02-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision = "20260217_0045"
+down_revision = "20260216_0044"
+branch_labels = None
+depends_on = None
+
+
+def _indexes(table: str) -> set[str]:
+    bind = op.get_bind()
+    return {i["name"] for i in inspect(bind).get_indexes(table)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "snapshot_dirty_marks" not in set(inspector.get_table_names()):
+        op.create_table(
+            "snapshot_dirty_marks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("center_id", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("scope", sa.String(length=20), nullable=False),
+            sa.Column("entity_id", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("source", sa.String(length=60), nullable=False, server_default=""),
+            sa.Column("marked_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_snapshot_dirty_marks_id", "snapshot_dirty_marks", ["id"])
+        op.create_index("ix_snapshot_dirty_marks_center_id", "snapshot_dirty_marks", ["center_id"])
+        op.create_index("ix_snapshot_dirty_marks_scope", "snapshot_dirty_marks", ["scope"])
+        op.create_index("ix_snapshot_dirty_marks_center_id_id", "snapshot_dirty_marks", ["center_id", "id"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "snapshot_dirty_marks" in set(inspector.get_table_names()):
+        table_indexes = _indexes("snapshot_dirty_marks")
+        for name in (
+            "ix_snapshot_dirty_marks_center_id_id",
+            "ix_snapshot_dirty_marks_scope",
+            "ix_snapshot_dirty_marks_center_id",
+            "ix_snapshot_dirty_marks_id",
+        ):
+            if name in table_indexes:
+                op.drop_index(name, table_name="snapshot_dirty_marks")
+        op.drop_table("snapshot_dirty_marks")
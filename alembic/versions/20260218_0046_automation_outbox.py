@@ -0,0 +1,79 @@
+"""automation outbox for post-class side effects
+
+Revision ID: 20260218_0046
+Revises: 20260217_0045
+Create Date: 2026-02-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision = "20260218_0046"
+down_revision = "20260217_0045"
+branch_labels = None
+depends_on = None
+
+
+def _indexes(table: str) -> set[str]:
+    bind = op.get_bind()
+    return {i["name"] for i in inspect(bind).get_indexes(table)}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "automation_outbox" not in set(inspector.get_table_names()):
+        op.create_table(
+            "automation_outbox",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("center_id", sa.Integer(), nullable=False, server_default="1"),
+            sa.Column("event_type", sa.String(length=80), nullable=False),
+            sa.Column("aggregate_type", sa.String(length=50), nullable=False, server_default=""),
+            sa.Column("aggregate_id", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("idempotency_key", sa.String(length=160), nullable=False),
+            sa.Column("payload_json", sa.Text(), nullable=False, server_default="{}"),
+            sa.Column("status", sa.String(length=20), nullable=False, server_default="pending"),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+            sa.Column("locked_until", sa.DateTime(), nullable=True),
+            sa.Column("last_error", sa.Text(), nullable=False, server_default=""),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("processed_at", sa.DateTime(), nullable=True),
+            sa.UniqueConstraint("idempotency_key", name="uq_automation_outbox_idempotency_key"),
+        )
+        op.create_index("ix_automation_outbox_id", "automation_outbox", ["id"])
+        op.create_index("ix_automation_outbox_center_id", "automation_outbox", ["center_id"])
+        op.create_index("ix_automation_outbox_event_type", "automation_outbox", ["event_type"])
+        op.create_index("ix_automation_outbox_status", "automation_outbox", ["status"])
+        op.create_index("ix_automation_outbox_created_at", "automation_outbox", ["created_at"])
+        op.create_index(
+            "ix_automation_outbox_center_status_due",
+            "automation_outbox",
+            ["center_id", "status", "next_attempt_at"],
+        )
+        op.create_index(
+            "ix_automation_outbox_aggregate",
+            "automation_outbox",
+            ["aggregate_type", "aggregate_id", "id"],
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "automation_outbox" in set(inspector.get_table_names()):
+        table_indexes = _indexes("automation_outbox")
+        for name in (
+            "ix_automation_outbox_aggregate",
+            "ix_automation_outbox_center_status_due",
+            "ix_automation_outbox_created_at",
+            "ix_automation_outbox_status",
+            "ix_automation_outbox_event_type",
+            "ix_automation_outbox_center_id",
+            "ix_automation_outbox_id",
+        ):
+            if name in table_indexes:
+                op.drop_index(name, table_name="automation_outbox")
+        op.drop_table("automation_outbox")
@@ -0,0 +1,40 @@
+"""durable telegram getUpdates offset
+
+Revision ID: 20260219_0047
+Revises: 20260218_0046
+Create Date: 2026-02-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision = "20260219_0047"
+down_revision = "20260218_0046"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "telegram_poll_states" not in set(inspector.get_table_names()):
+        op.create_table(
+            "telegram_poll_states",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("bot_key", sa.String(length=64), nullable=False),
+            sa.Column("next_offset", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.UniqueConstraint("bot_key", name="uq_telegram_poll_states_bot_key"),
+        )
+        op.create_index("ix_telegram_poll_states_id", "telegram_poll_states", ["id"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "telegram_poll_states" in set(inspector.get_table_names()):
+        if "ix_telegram_poll_states_id" in {i["name"] for i in inspector.get_indexes("telegram_poll_states")}:
+            op.drop_index("ix_telegram_poll_states_id", table_name="telegram_poll_states")
+        op.drop_table("telegram_poll_states")
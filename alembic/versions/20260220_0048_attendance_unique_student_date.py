@@ -0,0 +1,59 @@
+"""unique attendance record per student and date
+
+Revision ID: 20260220_0048
+Revises: 20260219_0047
+Create Date: 2026-02-20
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20260220_0048"
+down_revision = "20260219_0047"
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx.get("name") == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "attendance_records" not in set(inspector.get_table_names()):
+        return
+    # Older submits could race into duplicate rows; keep the newest one per student and date.
+    op.execute(
+        """
+        DELETE FROM attendance_records
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM attendance_records GROUP BY student_id, attendance_date
+        )
+        """
+    )
+    if not _index_exists(inspector, "attendance_records", "uq_attendance_records_student_date"):
+        op.create_index(
+            "uq_attendance_records_student_date",
+            "attendance_records",
+            ["student_id", "attendance_date"],
+            unique=True,
+        )
+    if _index_exists(inspector, "attendance_records", "ix_attendance_records_student_date"):
+        op.drop_index("ix_attendance_records_student_date", table_name="attendance_records")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "attendance_records" not in set(inspector.get_table_names()):
+        return
+    if not _index_exists(inspector, "attendance_records", "ix_attendance_records_student_date"):
+        op.create_index(
+            "ix_attendance_records_student_date",
+            "attendance_records",
+            ["student_id", "attendance_date"],
+        )
+    if _index_exists(inspector, "attendance_records", "uq_attendance_records_student_date"):
+        op.drop_index("uq_attendance_records_student_date", table_name="attendance_records")
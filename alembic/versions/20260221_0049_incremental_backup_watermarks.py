@@ -0,0 +1,78 @@
+"""incremental backup watermarks
+
+Revision ID: 20260221_0049
+Revises: 20260220_0048
+Create Date: 2026-02-21
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20260221_0049"
+down_revision = "20260220_0048"
+branch_labels = None
+depends_on = None
+
+
+def _column_names(inspector, table_name: str) -> set[str]:
+    return {col["name"] for col in inspector.get_columns(table_name)}
+
+
+def _index_exists(inspector, table_name: str, index_name: str) -> bool:
+    return any(idx.get("name") == index_name for idx in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "backup_logs" in tables:
+        columns = _column_names(inspector, "backup_logs")
+        if "center_id" not in columns:
+            op.add_column("backup_logs", sa.Column("center_id", sa.Integer(), nullable=False, server_default="0"))
+        if "sink" not in columns:
+            op.add_column("backup_logs", sa.Column("sink", sa.String(length=20), nullable=False, server_default=""))
+        if "rows_written" not in columns:
+            op.add_column("backup_logs", sa.Column("rows_written", sa.Integer(), nullable=False, server_default="0"))
+        if "high_water_mark" not in columns:
+            op.add_column("backup_logs", sa.Column("high_water_mark", sa.DateTime(), nullable=True))
+        if not _index_exists(inspector, "backup_logs", "ix_backup_logs_center_id"):
+            op.create_index("ix_backup_logs_center_id", "backup_logs", ["center_id"])
+
+    if "attendance_records" in tables:
+        if "updated_at" not in _column_names(inspector, "attendance_records"):
+            op.add_column("attendance_records", sa.Column("updated_at", sa.DateTime(), nullable=True))
+            op.execute("UPDATE attendance_records SET updated_at = marked_at")
+        if not _index_exists(inspector, "attendance_records", "ix_attendance_records_updated_at"):
+            op.create_index("ix_attendance_records_updated_at", "attendance_records", ["updated_at"])
+
+    if "fee_records" in tables:
+        if "updated_at" not in _column_names(inspector, "fee_records"):
+            # Left NULL for existing rows: the first backup of a center has no watermark and exports everything.
+            op.add_column("fee_records", sa.Column("updated_at", sa.DateTime(), nullable=True))
+        if not _index_exists(inspector, "fee_records", "ix_fee_records_updated_at"):
+            op.create_index("ix_fee_records_updated_at", "fee_records", ["updated_at"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    for table_name in ("fee_records", "attendance_records"):
+        if table_name not in tables:
+            continue
+        if _index_exists(inspector, table_name, f"ix_{table_name}_updated_at"):
+            op.drop_index(f"ix_{table_name}_updated_at", table_name=table_name)
+        if "updated_at" in _column_names(inspector, table_name):
+            op.drop_column(table_name, "updated_at")
+
+    if "backup_logs" in tables:
+        if _index_exists(inspector, "backup_logs", "ix_backup_logs_center_id"):
+            op.drop_index("ix_backup_logs_center_id", table_name="backup_logs")
+        columns = _column_names(inspector, "backup_logs")
+        for column in ("high_water_mark", "rows_written", "sink", "center_id"):
+            if column in columns:
+                op.drop_column("backup_logs", column)
@@ -0,0 +1,41 @@
+"""scheduler leader lease
+
+Revision ID: 20260222_0050
+Revises: 20260221_0049
+Create Date: 2026-02-22
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision = "20260222_0050"
+down_revision = "20260221_0049"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "scheduler_leases" not in set(inspector.get_table_names()):
+        op.create_table(
+            "scheduler_leases",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(length=64), nullable=False),
+            sa.Column("holder", sa.String(length=160), nullable=False, server_default=""),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("heartbeat_at", sa.DateTime(), nullable=False),
+            sa.UniqueConstraint("name", name="uq_scheduler_leases_name"),
+        )
+        op.create_index("ix_scheduler_leases_id", "scheduler_leases", ["id"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if "scheduler_leases" in set(inspector.get_table_names()):
+        if "ix_scheduler_leases_id" in {i["name"] for i in inspector.get_indexes("scheduler_leases")}:
+            op.drop_index("ix_scheduler_leases_id", table_name="scheduler_leases")
+        op.drop_table("scheduler_leases")
@@ -1,15 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import logging
 import threading
-from dataclasses import dataclass
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from functools import wraps
 import inspect
 import typing
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable, Iterator
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import Response
 
 from app.config import settings
 from app.core.time_provider import default_time_provider
@@ -142,6 +150,9 @@ def bypass_cache(context: Any | None = None) -> bool:
 
 
 class CacheBackend:
+    # Whether every worker process sees the same keys (and so the same counters).
+    shared = False
+
     def get(self, key: str) -> Any | None:
         raise NotImplementedError
 
@@ -154,6 +165,25 @@ class CacheBackend:
     def delete_prefix(self, prefix: str) -> None:
         raise NotImplementedError
 
+    def acquire_fill_lock(self, key: str, ttl: int) -> str | None:
+        """Claim the right to recompute `key` across workers; None means another worker holds it."""
+        return 'local'
+
+    def release_fill_lock(self, key: str, token: str) -> None:
+        return None
+
+    def publish(self, channel: str, message: str) -> None:
+        return None
+
+    def listen(self, channel: str, handler: Callable[[str], None]) -> None:
+        return None
+
+    def incr(self, key: str, ttl: int) -> int:
+        """Add one to the integer at `key` (missing counts as 0) and refresh its TTL."""
+        value = int(self.get(key) or 0) + 1
+        self.set(key, value, ttl)
+        return value
+
 
 class MemoryCacheBackend(CacheBackend):
     def __init__(self) -> None:
@@ -186,8 +216,18 @@ class MemoryCacheBackend(CacheBackend):
             for key in keys:
                 self._store.pop(key, None)
 
+    def incr(self, key: str, ttl: int) -> int:
+        expires_at = _utc_now() + timedelta(seconds=max(1, int(ttl)))
+        with self._lock:
+            item = self._store.get(key)
+            current = int(item[1] or 0) if item and _utc_now() < item[0] else 0
+            self._store[key] = (expires_at, current + 1)
+            return current + 1
+
 
 class RedisCacheBackend(CacheBackend):
+    shared = True
+
     def __init__(self, redis_url: str) -> None:
         import redis  # type: ignore
 
@@ -219,10 +259,180 @@ class RedisCacheBackend(CacheBackend):
             if cursor == 0:
                 break
 
+    def acquire_fill_lock(self, key: str, ttl: int) -> str | None:
+        token = uuid.uuid4().hex
+        try:
+            ok = self._client.set(f"fill_lock:{key}", token, nx=True, ex=max(1, int(ttl)))
+        except Exception:
+            logger.exception('cache_fill_lock_acquire_failed', extra={'key': key})
+            return 'local'
+        return token if ok else None
+
+    def release_fill_lock(self, key: str, token: str) -> None:
+        lock_key = f"fill_lock:{key}"
+        try:
+            if str(self._client.get(lock_key) or '') == token:
+                self._client.delete(lock_key)
+        except Exception:
+            logger.exception('cache_fill_lock_release_failed', extra={'key': key})
+
+    def incr(self, key: str, ttl: int) -> int:
+        pipe = self._client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, max(1, int(ttl)))
+        value, _ = pipe.execute()
+        return int(value)
+
+    def publish(self, channel: str, message: str) -> None:
+        try:
+            self._client.publish(channel, message)
+        except Exception:
+            logger.exception('cache_invalidation_publish_failed', extra={'channel': channel})
+
+    def listen(self, channel: str, handler: Callable[[str], None]) -> None:
+        def _run() -> None:
+            while True:
+                try:
+                    pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(channel)
+                    for message in pubsub.listen():
+                        if message.get('type') == 'message':
+                            handler(str(message.get('data') or ''))
+                except Exception:
+                    logger.exception('cache_invalidation_listener_failed', extra={'channel': channel})
+                    time.sleep(5)
+
+        threading.Thread(target=_run, name='cache-invalidation', daemon=True).start()
+
+
+class LocalLRUCache:
+    """Bounded in-process LRU with a short TTL, kept in front of a shared backend."""
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max(1, int(max_entries))
+        self._ttl_seconds = max(0.0, float(ttl_seconds))
+        self._lock = threading.Lock()
+        self._store: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            item = self._store.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if time.monotonic() >= expires_at:
+                del self._store[key]
+                return None
+            self._store.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        lifetime = min(float(ttl), self._ttl_seconds)
+        if lifetime <= 0:
+            return
+        with self._lock:
+            self._store[key] = (time.monotonic() + lifetime, value)
+            self._store.move_to_end(key)
+            while len(self._store) > self._max_entries:
+                self._store.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._store.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._store if key.startswith(prefix)]:
+                del self._store[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._store)
+
+
+class _SingleFlight:
+    """Per-key locks so only one thread in this process recomputes a missing entry."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._locks: dict[str, list] = {}
+        self._async_locks: dict[str, asyncio.Lock] = {}
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(key, None)
+
+    def async_lock(self, key: str) -> asyncio.Lock:
+        with self._lock:
+            lock = self._async_locks.get(key)
+            if lock is None:
+                lock = self._async_locks[key] = asyncio.Lock()
+            return lock
+
+    def drop_async_lock(self, key: str, lock: asyncio.Lock) -> None:
+        with self._lock:
+            if self._async_locks.get(key) is lock and not lock.locked():
+                self._async_locks.pop(key, None)
+
 
 @dataclass
 class CacheManager:
+    """Center-scoped cache over `backend`, optionally fronted by a per-process L1.
+
+    With an L1, invalidations are published on `settings.cache_invalidation_channel`
+    so every worker evicts its local copy too.
+    """
+
     backend: CacheBackend
+    local: LocalLRUCache | None = None
+    _flights: _SingleFlight = field(default_factory=_SingleFlight, repr=False)
+    _origin: str = field(default_factory=lambda: uuid.uuid4().hex, repr=False)
+
+    def start_invalidation_listener(self) -> None:
+        if self.local is not None:
+            self.backend.listen(settings.cache_invalidation_channel, self._on_invalidation)
+
+    def _on_invalidation(self, raw: str) -> None:
+        try:
+            message = json.loads(raw)
+        except (TypeError, ValueError):
+            return
+        if not isinstance(message, dict) or message.get('origin') == self._origin or self.local is None:
+            return
+        target = str(message.get('key') or '')
+        if message.get('op') == 'prefix':
+            self.local.delete_prefix(target)
+        elif target:
+            self.local.delete(target)
+
+    def _broadcast(self, op: str, scoped: str) -> None:
+        if self.local is not None:
+            self.backend.publish(
+                settings.cache_invalidation_channel,
+                json.dumps({'origin': self._origin, 'op': op, 'key': scoped}),
+            )
+
+    def _read(self, scoped_key: str) -> Any | None:
+        if self.local is not None:
+            value = self.local.get(scoped_key)
+            if value is not None:
+                record_cache_event('cache_l1_hit')
+                return value
+        value = self.backend.get(scoped_key)
+        if value is not None and self.local is not None:
+            self.local.set(scoped_key, value, settings.cache_l1_ttl_seconds)
+        return value
 
     def bypass_cache(self, context: Any | None = None) -> bool:
         return bypass_cache(context)
@@ -243,7 +453,7 @@ class CacheManager:
             record_observability_event('cache_center_mismatch')
             return None
         scoped_key = _scope_cache_key(key)
-        value = self.backend.get(scoped_key)
+        value = self._read(scoped_key)
         if value is not None:
             record_cache_event('cache_hit')
             logger.debug('cache hit: %s', scoped_key)
@@ -270,20 +480,110 @@ class CacheManager:
             return
         scoped_key = _scope_cache_key(key)
         self.backend.set(scoped_key, value, ttl_value)
+        if self.local is not None:
+            self.local.set(scoped_key, value, ttl_value)
         logger.debug('cache set: %s ttl=%s', scoped_key, ttl_value)
 
     def invalidate(self, key: str) -> None:
         scoped_key = _scope_cache_key(key)
         self.backend.delete(scoped_key)
+        if self.local is not None:
+            self.local.delete(scoped_key)
+        self._broadcast('key', scoped_key)
         record_cache_event('cache_invalidate')
         logger.debug('cache invalidate: %s', scoped_key)
 
     def invalidate_prefix(self, prefix: str) -> None:
         scoped_prefix = _scope_cache_prefix(prefix)
         self.backend.delete_prefix(scoped_prefix)
+        if self.local is not None:
+            self.local.delete_prefix(scoped_prefix)
+        self._broadcast('prefix', scoped_prefix)
         record_cache_event('cache_invalidate')
         logger.debug('cache invalidate prefix: %s', scoped_prefix)
 
+    def incr_counter(self, key: str, ttl: int) -> int:
+        # Counters skip the L1: a stale local copy would hide the change it counts.
+        return self.backend.incr(_scope_cache_key(key), ttl)
+
+    def read_counter(self, key: str) -> int:
+        try:
+            return int(self.backend.get(_scope_cache_key(key)) or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def _wait_for_fill(self, scoped_key: str) -> Any | None:
+        deadline = time.monotonic() + max(0.0, float(settings.cache_fill_wait_seconds))
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = self._read(scoped_key)
+            if value is not None:
+                return value
+        return None
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: int | None = None) -> Any:
+        """Cached value for `key`, computing it at most once at a time per key.
+
+        Threads in this process queue on a per-key lock; other workers are held off by
+        the backend's fill lock and poll for the value for `cache_fill_wait_seconds`
+        before computing it themselves.
+        """
+        value = self.get_cached(key)
+        if value is not None:
+            return value
+        scoped_key = _scope_cache_key(key)
+        with self._flights.hold(scoped_key):
+            value = self._read(scoped_key)
+            if value is not None:
+                record_cache_event('cache_coalesced')
+                return value
+            token = self.backend.acquire_fill_lock(scoped_key, settings.cache_fill_lock_seconds)
+            if token is None:
+                value = self._wait_for_fill(scoped_key)
+                if value is not None:
+                    record_cache_event('cache_coalesced')
+                    return value
+            try:
+                value = compute()
+                if value is not None:
+                    self.set_cached(key, value, ttl)
+                return value
+            finally:
+                if token:
+                    self.backend.release_fill_lock(scoped_key, token)
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: int | None = None) -> Any:
+        value = self.get_cached(key)
+        if value is not None:
+            return value
+        scoped_key = _scope_cache_key(key)
+        lock = self._flights.async_lock(scoped_key)
+        try:
+            async with lock:
+                value = self._read(scoped_key)
+                if value is not None:
+                    record_cache_event('cache_coalesced')
+                    return value
+                token = self.backend.acquire_fill_lock(scoped_key, settings.cache_fill_lock_seconds)
+                if token is None:
+                    deadline = time.monotonic() + max(0.0, float(settings.cache_fill_wait_seconds))
+                    while value is None and time.monotonic() < deadline:
+                        await asyncio.sleep(0.05)
+                        value = self._read(scoped_key)
+                    if value is not None:
+                        record_cache_event('cache_coalesced')
+                        return value
+                try:
+                    value = await compute()
+                    if value is not None:
+                        self.set_cached(key, value, ttl)
+                    return value
+                finally:
+                    if token:
+                        self.backend.release_fill_lock(scoped_key, token)
+        finally:
+            self._flights.drop_async_lock(scoped_key, lock)
+
 
 def _build_cache_backend() -> CacheBackend:
     if settings.cache_backend == 'redis' and settings.cache_redis_url:
@@ -294,7 +594,19 @@ def _build_cache_backend() -> CacheBackend:
     return MemoryCacheBackend()
 
 
-cache = CacheManager(backend=_build_cache_backend())
+def _build_cache_manager() -> CacheManager:
+    backend = _build_cache_backend()
+    if isinstance(backend, MemoryCacheBackend) or not settings.cache_l1_enabled:
+        return CacheManager(backend=backend)
+    manager = CacheManager(
+        backend=backend,
+        local=LocalLRUCache(max_entries=settings.cache_l1_max_entries, ttl_seconds=settings.cache_l1_ttl_seconds),
+    )
+    manager.start_invalidation_listener()
+    return manager
+
+
+cache = _build_cache_manager()
 
 
 def _extract_request(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any | None:
@@ -331,46 +643,82 @@ def _resolved_signature(func: Callable[..., Any]) -> inspect.Signature:
     return sig.replace(parameters=parameters, return_annotation=return_annotation)
 
 
+def _etag_matches(request: Any | None, etag: str) -> bool:
+    header = request.headers.get('if-none-match') if request is not None else None
+    if not header:
+        return False
+    # If-None-Match uses weak comparison, so W/"x" matches "x".
+    candidates = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+def etag_response(request: Any | None, payload: Any, *, cache_control: str = 'private, no-cache') -> Any:
+    """JSON response with a strong ETag over its body, or a bodiless 304 when `If-None-Match` already has it.
+
+    `no-cache` lets browsers keep the body but makes them revalidate every time,
+    so unchanged polls cost a 304 instead of the full payload.
+    """
+    if isinstance(payload, Response):
+        return payload
+    body = json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(',', ':'),
+    ).encode('utf-8')
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+    if _etag_matches(request, etag):
+        record_cache_event('http_not_modified')
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
 def cached_view(
     ttl: int | None = None,
     key_builder: Callable[..., str] | None = None,
+    *,
+    etag: bool = False,
 ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Cache a GET endpoint's payload under `key_builder(...)`.
+
+    With `etag=True` the payload (cached or fresh) is returned through `etag_response`.
+    """
+
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
         if asyncio.iscoroutinefunction(func):
-            @wraps(func)
-            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            async def _resolve(*args: Any, **kwargs: Any) -> Any:
                 if _normalize_bool(kwargs.get('bypass_cache')) or bypass_cache(_extract_request(args, kwargs)):
                     record_cache_event('cache_bypass')
                     return await func(*args, **kwargs)
                 key = key_builder(*args, **kwargs) if key_builder else None
-                if key:
-                    cached = cache.get_cached(key)
-                    if cached is not None:
-                        return cached
-                result = await func(*args, **kwargs)
-                if key:
-                    cache.set_cached(key, result, ttl)
-                return result
+                if not key:
+                    return await func(*args, **kwargs)
+                return await cache.aget_or_compute(key, lambda: func(*args, **kwargs), ttl)
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                result = await _resolve(*args, **kwargs)
+                return etag_response(_extract_request(args, kwargs), result) if etag else result
 
             # Ensure FastAPI sees the original endpoint signature (not *args/**kwargs),
             # otherwise it will treat args/kwargs as required query params and 422.
             async_wrapper.__signature__ = _resolved_signature(func)  # type: ignore[attr-defined]
             return async_wrapper
 
-        @wraps(func)
-        def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+        def _resolve_sync(*args: Any, **kwargs: Any) -> Any:
             if _normalize_bool(kwargs.get('bypass_cache')) or bypass_cache(_extract_request(args, kwargs)):
                 record_cache_event('cache_bypass')
                 return func(*args, **kwargs)
             key = key_builder(*args, **kwargs) if key_builder else None
-            if key:
-                cached = cache.get_cached(key)
-                if cached is not None:
-                    return cached
-            result = func(*args, **kwargs)
-            if key:
-                cache.set_cached(key, result, ttl)
-            return result
+            if not key:
+                return func(*args, **kwargs)
+            return cache.get_or_compute(key, lambda: func(*args, **kwargs), ttl)
+
+        @wraps(func)
+        def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+            result = _resolve_sync(*args, **kwargs)
+            return etag_response(_extract_request(args, kwargs), result) if etag else result
 
         sync_wrapper.__signature__ = _resolved_signature(func)  # type: ignore[attr-defined]
         return sync_wrapper
@@ -67,6 +67,7 @@ async def shutdown_embedded_communication() -> None:
         try:
             if _ctx is not None:
                 await _ctx.worker.stop()
+                await _ctx.registry.aclose()
                 logger.info("embedded_communication_stopped", extra={"pid": os.getpid()})
         finally:
             _ctx = None
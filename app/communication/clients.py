@@ -15,6 +15,9 @@ logger = logging.getLogger(__name__)
 
 
 class BaseCommunicationClient:
+    # Whether independent emit_event_async calls may run concurrently on one loop.
+    supports_concurrent_emit = False
+
     def emit_event(self, event: str, payload: dict[str, Any]) -> dict[str, Any]:
         try:
             asyncio.get_running_loop()
@@ -148,6 +151,8 @@ class EmbeddedCommunicationClient(BaseCommunicationClient):
 
 
 class RemoteCommunicationClient(BaseCommunicationClient):
+    supports_concurrent_emit = True
+
     def __init__(self, base_url: str) -> None:
         self.base_url = base_url.rstrip("/")
 
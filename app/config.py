@@ -14,12 +14,17 @@ class Settings(BaseSettings):
     telegram_webhook_secret: str = ''
     telegram_link_polling_mode: str = 'auto'  # auto | on | off
     telegram_link_polling_interval_seconds: int = 20
+    telegram_long_poll_timeout_seconds: int = 25
     enable_telegram_notifications: bool = True
     app_base_url: str = 'http://127.0.0.1:8000'
     frontend_base_url: str = 'http://localhost:5173'
     default_upi_id: str = 'coach@upi'
     enable_sheets_backup: bool = False
     sheet_id: str = ''
+    backup_sink: str = 'sheets'  # sheets | csv | parquet
+    backup_local_dir: str = 'backups'
+    backup_chunk_size: int = 500
+    backup_overlap_seconds: int = 300
     google_credentials_json: str = ''
     google_oauth_client_id: str = ''
     google_oauth_client_secret: str = ''
@@ -40,14 +45,53 @@ class Settings(BaseSettings):
     attendance_auto_close_grace_minutes: int = 10
     cache_backend: str = 'memory'
     cache_redis_url: str | None = None
+    rate_limit_backend: str = 'auto'  # auto (redis, else db) | redis | db | memory (single process only)
     default_cache_ttl: int = 60
+    cache_l1_enabled: bool = True  # only used in front of a shared (redis) backend
+    cache_l1_max_entries: int = 2048
+    cache_l1_ttl_seconds: int = 5
+    cache_invalidation_channel: str = 'cache:invalidate'
+    cache_fill_lock_seconds: int = 30
+    cache_fill_wait_seconds: float = 5.0
     db_slow_query_ms: int = 100
+    query_profiler_enabled: bool = True
+    query_profiler_server_timing: bool = False
+    database_read_url: str = ''  # optional read replica for read-only services
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: int = 30
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 0  # 0 disables; Postgres only
+    sqlite_journal_mode: str = 'wal'
+    sqlite_busy_timeout_ms: int = 5000
     metrics_slow_ms: int = 200
+    metrics_token: str = ''  # /metrics requires "Authorization: Bearer <token>"; empty disables it (404)
+    change_feed_poll_seconds: float = 2.0
+    change_feed_keepalive_seconds: int = 15
+    change_feed_max_seconds: int = 300  # clients reconnect after this
+    snapshot_full_rebuild_minutes: int = 30  # bounds staleness of the time-based parts of today's snapshots
     communication_mode: str = 'embedded'
     communication_service_url: str = 'http://localhost:9000'
     communication_tenant_id: str = 'default'
+    communication_batch_concurrency: int = 8
+    occurrence_index_ttl_seconds: int = 60
+    occurrence_index_days_back: int = 7
+    occurrence_index_days_ahead: int = 42
+    automation_outbox_workers: int = 4
+    automation_outbox_batch_size: int = 50
+    automation_outbox_max_attempts: int = 5
+    automation_outbox_lease_seconds: int = 300
+    job_center_concurrency: int = 4
+    job_center_concurrency_overrides: dict[str, int] = {}
+    job_center_timeout_seconds: int = 600
+    job_budget_seconds: int = 0  # 0 = timeout x (centers / concurrency); queued centers are dropped past it
+    scheduler_mode: str = 'embedded'  # embedded | leader | off
+    scheduler_lease_ttl_seconds: int = 30
+    scheduler_heartbeat_seconds: int = 10
     dev_default_center_slug: str = 'default-center'
     tenant_base_domain: str = 'yourapp.com'
+    tenant_identity_cache_ttl_seconds: int = 60
 
 
 settings = Settings()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from app.config import settings
+from app.models import Center
+from app.services.auth_service import validate_session_token
+from app.services.onboarding_service import is_center_onboarding_incomplete
+
+
+_MISSING = object()
+
+
+class _TTLCache:
+    def __init__(self, ttl_seconds: int, max_entries: int = 1024) -> None:
+        self._ttl_seconds = max(0, int(ttl_seconds))
+        self._max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._store: dict[Any, tuple[float, Any]] = {}
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            item = self._store.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if time.monotonic() >= expires_at:
+                self._store.pop(key, None)
+                return _MISSING
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        if self._ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._store) >= self._max_entries and key not in self._store:
+                self._store.pop(next(iter(self._store)), None)
+            self._store[key] = (time.monotonic() + self._ttl_seconds, value)
+
+    def delete(self, key: Any) -> None:
+        with self._lock:
+            self._store.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+
+
+_center_by_slug = _TTLCache(settings.tenant_identity_cache_ttl_seconds)
+_onboarding_complete = _TTLCache(settings.tenant_identity_cache_ttl_seconds)
+
+
+def clear_request_identity_cache() -> None:
+    _center_by_slug.clear()
+    _onboarding_complete.clear()
+
+
+def invalidate_center_identity(*, slug: str | None = None, center_id: int | None = None) -> None:
+    if slug:
+        _center_by_slug.delete(str(slug).strip().lower())
+    if int(center_id or 0) > 0:
+        _onboarding_complete.delete(int(center_id))
+
+
+def extract_request_token(request: Request, *, allow_bearer: bool = True) -> str | None:
+    token = request.cookies.get('auth_session')
+    if token or not allow_bearer:
+        return token
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.lower().startswith('bearer '):
+        return auth_header.split(' ', 1)[1].strip()
+    return None
+
+
+def resolve_request_session(
+    request: Request,
+    token: str | None,
+    *,
+    validator: Callable[[str | None], dict | None] = validate_session_token,
+) -> dict | None:
+    """Decode a session token at most once per request.
+
+    Every middleware layer and dependency shares `request.state`, so the decoded
+    payload is memoized there by token and later lookups skip the JWT HMAC check.
+    """
+    if not token:
+        return None
+    memo = getattr(request.state, 'resolved_sessions', None)
+    if memo is None:
+        memo = {}
+        request.state.resolved_sessions = memo
+    if token not in memo:
+        memo[token] = validator(token)
+    session = memo[token]
+    return dict(session) if session else None
+
+
+def get_request_session(
+    request: Request,
+    *,
+    allow_bearer: bool = True,
+    validator: Callable[[str | None], dict | None] = validate_session_token,
+) -> dict | None:
+    token = extract_request_token(request, allow_bearer=allow_bearer)
+    return resolve_request_session(request, token, validator=validator)
+
+
+def resolve_center_by_slug(session_factory: Callable[[], Session], slug: str) -> tuple[int, str] | None:
+    clean_slug = str(slug or '').strip().lower()
+    if not clean_slug:
+        return None
+    cached = _center_by_slug.get(clean_slug)
+    if cached is not _MISSING:
+        return cached
+    db = session_factory()
+    try:
+        row = db.query(Center.id, Center.slug).filter(Center.slug == clean_slug).first()
+    finally:
+        db.close()
+    if not row:
+        # Misses are not cached so a freshly onboarded center resolves immediately.
+        return None
+    resolved = (int(row.id), str(row.slug))
+    _center_by_slug.set(clean_slug, resolved)
+    return resolved
+
+
+def is_onboarding_incomplete_cached(session_factory: Callable[[], Session], center_id: int) -> bool:
+    cid = int(center_id or 0)
+    if cid <= 0:
+        return False
+    # Only the completed state is cached: it never flips back, while an
+    # incomplete center must see its finish step take effect on the next request.
+    if _onboarding_complete.get(cid) is not _MISSING:
+        return False
+    db = session_factory()
+    try:
+        incomplete = is_center_onboarding_incomplete(db, cid)
+    finally:
+        db.close()
+    if not incomplete:
+        _onboarding_complete.set(cid, True)
+    return incomplete
@@ -5,6 +5,7 @@ from typing import Iterable
 from fastapi import HTTPException, Request
 from sqlalchemy.orm import Session
 
+from app.core.request_identity import resolve_request_session
 from app.models import TeacherBatchMap
 from app.services.auth_service import validate_session_token
 
@@ -20,8 +21,7 @@ def _resolve_token(request: Request) -> str | None:
 
 
 def require_auth_user(request: Request) -> dict:
-    token = _resolve_token(request)
-    session = validate_session_token(token)
+    session = resolve_request_session(request, _resolve_token(request), validator=validate_session_token)
     if not session:
         raise HTTPException(status_code=401, detail='Unauthorized')
     user_id = int(session.get('user_id') or 0)
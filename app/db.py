@@ -1,32 +1,190 @@
 import logging
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
 
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import Session, declarative_base, sessionmaker, with_loader_criteria
 
 from app.config import settings
+from app.query_profiler import record_query
 from app.request_context import current_endpoint
 
 
-engine = create_engine(settings.database_url, connect_args={'check_same_thread': False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@dataclass(frozen=True)
+class EngineProfile:
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout_seconds: int = 30
+    pool_recycle_seconds: int = 1800
+    pool_pre_ping: bool = True
+    statement_timeout_ms: int = 0
+    sqlite_journal_mode: str = 'wal'
+    sqlite_busy_timeout_ms: int = 5000
+
+    @classmethod
+    def from_settings(cls) -> 'EngineProfile':
+        return cls(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout_seconds=settings.db_pool_timeout_seconds,
+            pool_recycle_seconds=settings.db_pool_recycle_seconds,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            statement_timeout_ms=settings.db_statement_timeout_ms,
+            sqlite_journal_mode=settings.sqlite_journal_mode,
+            sqlite_busy_timeout_ms=settings.sqlite_busy_timeout_ms,
+        )
+
+
+def _apply_sqlite_pragmas(engine: Engine, profile: EngineProfile, *, in_memory: bool) -> None:
+    journal_mode = (profile.sqlite_journal_mode or '').strip().upper()
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # busy_timeout makes writers wait for the lock instead of failing with "database is locked".
+            cursor.execute(f'PRAGMA busy_timeout = {int(profile.sqlite_busy_timeout_ms)}')
+            if journal_mode and not in_memory:
+                # WAL lets request threads keep reading while the scheduler writes.
+                cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+                if journal_mode == 'WAL':
+                    cursor.execute('PRAGMA synchronous = NORMAL')
+        finally:
+            cursor.close()
+
+
+def build_engine(url: str, profile: EngineProfile | None = None) -> Engine:
+    """Create an engine for `url` with pooling, timeouts and pragmas from `profile`."""
+    profile = profile or EngineProfile.from_settings()
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite':
+        in_memory = parsed.database in (None, '', ':memory:')
+        engine = create_engine(
+            url,
+            connect_args={'check_same_thread': False, 'timeout': max(profile.sqlite_busy_timeout_ms, 0) / 1000.0},
+        )
+        _apply_sqlite_pragmas(engine, profile, in_memory=in_memory)
+        return engine
+
+    connect_args: dict = {}
+    if parsed.get_backend_name() == 'postgresql' and profile.statement_timeout_ms > 0:
+        connect_args['options'] = f'-c statement_timeout={int(profile.statement_timeout_ms)}'
+    return create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        pool_timeout=profile.pool_timeout_seconds,
+        pool_recycle=profile.pool_recycle_seconds,
+        pool_pre_ping=profile.pool_pre_ping,
+    )
+
+
+_read_intent: ContextVar[bool] = ContextVar('db_read_intent', default=False)
+_primary_pinned: ContextVar[bool] = ContextVar('db_primary_pinned', default=False)
+
+
+@contextmanager
+def read_replica():
+    """Route plain SELECTs issued inside this block to the read engine, when one is configured."""
+    token = _read_intent.set(True)
+    try:
+        yield
+    finally:
+        _read_intent.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Keep every read in this block on the primary, even inside nested `read_replica()` blocks.
+
+    Jobs and snapshot rebuilds write back what they read, so replica lag must not leak into them.
+    """
+    token = _primary_pinned.set(True)
+    try:
+        yield
+    finally:
+        _primary_pinned.reset(token)
+
+
+def reads_from_replica(fn):
+    @wraps(fn)
+    def _wrapper(*args, **kwargs):
+        with read_replica():
+            return fn(*args, **kwargs)
+
+    return _wrapper
+
+
+def reads_from_primary(fn):
+    @wraps(fn)
+    def _wrapper(*args, **kwargs):
+        with primary_reads():
+            return fn(*args, **kwargs)
+
+    return _wrapper
+
+
+class RoutingSession(Session):
+    """Session that sends read-intent SELECTs to `info['read_bind']`.
+
+    Locking reads, writes and anything after this transaction's first flush
+    stay on the primary so callers always see their own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        read_bind = self.info.get('read_bind')
+        if (
+            read_bind is not None
+            and _read_intent.get()
+            and not _primary_pinned.get()
+            and not self.info.get('_wrote')
+            and getattr(clause, 'is_select', False)
+            and getattr(clause, '_for_update_arg', None) is None
+        ):
+            return read_bind
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_session_wrote(session, flush_context):
+    session.info['_wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def _clear_session_wrote(session, *args):
+    session.info.pop('_wrote', None)
+
+
+def make_session_factory(primary: Engine, read: Engine | None = None) -> sessionmaker:
+    info = {'read_bind': read} if read is not None and read is not primary else {}
+    return sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=primary, info=info)
+
+
+engine = build_engine(settings.database_url)
+read_engine = build_engine(settings.database_read_url) if settings.database_read_url else engine
+SessionLocal = make_session_factory(engine, read_engine)
 Base = declarative_base()
 
 _SLOW_QUERY_MS = settings.db_slow_query_ms
 _slow_logger = logging.getLogger('app.db.slow_query')
 
 
-@event.listens_for(engine, 'before_cursor_execute')
 def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
     context._query_start_time = time.perf_counter()
 
 
-@event.listens_for(engine, 'after_cursor_execute')
 def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
     start = getattr(context, '_query_start_time', None)
     if start is None:
         return
     duration_ms = (time.perf_counter() - start) * 1000.0
+    record_query(statement, duration_ms)
     if duration_ms >= _SLOW_QUERY_MS:
         endpoint = current_endpoint.get()
         sql_text = (statement or '').replace('\n', ' ').strip()
@@ -38,6 +196,11 @@ def _after_cursor_execute(conn, cursor, statement, parameters, context, executem
         )
 
 
+# Registered on the Engine class so the read replica and any ad-hoc engine are timed too.
+event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -69,3 +232,36 @@ def _apply_center_tenant_filter(execute_state):
                 include_aliases=True,
             )
         )
+
+
+@event.listens_for(Session, 'before_flush')
+def _journal_snapshot_dependencies(session, flush_context, instances):
+    # Imported lazily (the service imports this module); a failure here must not
+    # quietly switch off dirty tracking, so it is left to raise.
+    from app.services.snapshot_journal_service import record_snapshot_dependencies
+
+    record_snapshot_dependencies(session)
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_occurrence_changes(session, flush_context, instances):
+    from app.services.occurrence_index_service import record_schedule_changes
+
+    record_schedule_changes(session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_occurrence_changes(execute_state):
+    if not (execute_state.is_update or execute_state.is_delete):
+        return
+    from app.services.occurrence_index_service import record_bulk_schedule_change
+
+    record_bulk_schedule_change(execute_state)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _settle_occurrence_changes(session):
+    from app.services.occurrence_index_service import flush_schedule_changes
+
+    flush_schedule_changes(session)
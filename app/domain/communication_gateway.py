@@ -1,26 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass
 from datetime import timedelta
 import logging
 
-from sqlalchemy import or_
+from sqlalchemy import or_, update
 
 from app.communication.client_factory import get_communication_client
+from app.communication.clients import BaseCommunicationClient
 from app.config import settings
-from app.domain.communication_guard import is_duplicate_send
 from app.core.time_provider import default_time_provider
+from app.metrics import registry
 from app.models import CommunicationLog, ProviderCircuitState
 from app.services.automation_failure_service import log_automation_failure
 from app.services.center_scope_service import get_current_center_id
-from app.services.rate_limit_service import SafeRateLimitError, check_rate_limit
+from app.services.rate_limit_service import SafeRateLimitError, check_rate_limit, try_rate_limit
 
 
 logger = logging.getLogger(__name__)
-__all__ = ['send_event']
+__all__ = ['send_event', 'send_event_batch']
 
 CIRCUIT_FAILURE_WINDOW_SECONDS = 300
 CIRCUIT_OPEN_THRESHOLD = 5
 CIRCUIT_OPEN_SECONDS = 600
+SEND_RATE_LIMIT_PER_MINUTE = 100
+
+_deliveries = registry.counter('gateway_deliveries', 'Gateway delivery outcomes by event type and status.')
 
 
 def _resolve_center_id(payload: dict) -> int:
@@ -127,277 +133,487 @@ def _mark_circuit_success(state_row: ProviderCircuitState, *, now):
         )
 
 
+# Recipient dict keys that override the shared payload for that recipient only, so
+# one batch can carry a different message or entity per student.
+_RECIPIENT_OVERRIDE_KEYS = (
+    'message',
+    'reply_markup',
+    'entity_id',
+    'entity_type',
+    'student_id',
+    'teacher_id',
+    'session_id',
+    'reference_id',
+    'notification_type',
+    'event_payload',
+    'delete_at',
+    'critical',
+    'priority',
+)
+_PREFETCH_CHUNK_SIZE = 500
+
+
+def _coerce_int(value) -> int:
+    try:
+        return int(value) if value is not None else 0
+    except Exception:
+        return 0
+
+
+@dataclass
+class _Delivery:
+    index: int
+    chat_id: str
+    user_id: str
+    receiver_id: str
+    data: dict
+    entity_id: int
+    log: CommunicationLog | None = None
+    # Plain copies of the log's id and attempts: the commit before dispatch expires
+    # the ORM rows, and reading them back would cost one SELECT per recipient.
+    log_id: int | None = None
+    attempts: int = 0
+    duplicate_of: _Delivery | None = None
+    result: dict | None = None
+
+
+def _prefetch_delivery_logs(db, *, event_type: str, deliveries: list[_Delivery], dedup_cutoff):
+    """Load the latest log and the recent-sent state for every (chat, entity) pair at once.
+
+    Mirrors the per-recipient log lookup and `is_duplicate_send` in one pass over
+    the rows for the batch's chats, newest first.
+    """
+    chat_ids = sorted({d.chat_id for d in deliveries} | {d.receiver_id for d in deliveries})
+    entity_ids = sorted({d.entity_id for d in deliveries})
+    wanted_entities = set(entity_ids)
+    latest: dict[tuple[str, int], CommunicationLog] = {}
+    recently_sent: set[tuple[str, int]] = set()
+    for start in range(0, len(chat_ids), _PREFETCH_CHUNK_SIZE):
+        chunk = chat_ids[start : start + _PREFETCH_CHUNK_SIZE]
+        rows = (
+            db.query(CommunicationLog)
+            .filter(
+                CommunicationLog.event_type == event_type,
+                CommunicationLog.telegram_chat_id.in_(chunk),
+                or_(
+                    CommunicationLog.reference_id.in_(entity_ids),
+                    CommunicationLog.session_id.in_(entity_ids),
+                    CommunicationLog.student_id.in_(entity_ids),
+                    CommunicationLog.teacher_id.in_(entity_ids),
+                ),
+            )
+            .order_by(CommunicationLog.created_at.desc(), CommunicationLog.id.desc())
+            .all()
+        )
+        for row in rows:
+            is_sent = (row.delivery_status in ('sent', 'duplicate_suppressed') or row.status == 'sent') and (
+                row.created_at is not None and row.created_at >= dedup_cutoff
+            )
+            matched = {row.reference_id, row.session_id, row.student_id, row.teacher_id} & wanted_entities
+            for entity_id in matched:
+                key = (str(row.telegram_chat_id), int(entity_id))
+                latest.setdefault(key, row)
+                if is_sent:
+                    recently_sent.add(key)
+    return latest, recently_sent
+
+
+def _emits_via_async(client) -> bool:
+    # Only clients whose sync emit_event is the stock asyncio.run wrapper can be
+    # driven through emit_event_async directly; fakes and patched instances keep
+    # their own emit_event.
+    return (
+        isinstance(client, BaseCommunicationClient)
+        and type(client).emit_event is BaseCommunicationClient.emit_event
+        and 'emit_event' not in getattr(client, '__dict__', {})
+    )
+
+
+def _log_emit_failure(entity_id: int, exc: Exception) -> None:
+    logger.error(
+        'automation_failure',
+        extra={
+            'job': 'communication_emit',
+            'center_id': None,
+            'entity_id': entity_id,
+            'error': str(exc),
+        },
+    )
+
+
+async def _emit_all_async(client, event_type, envelopes: list[tuple[int, dict]], concurrency: int) -> list[bool]:
+    semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def _emit(entity_id: int, envelope: dict) -> bool:
+        async with semaphore:
+            try:
+                response = await client.emit_event_async(event_type, envelope)
+                return bool((response or {}).get('queued', False))
+            except Exception as exc:
+                _log_emit_failure(entity_id, exc)
+                return False
+
+    return list(await asyncio.gather(*(_emit(entity_id, envelope) for entity_id, envelope in envelopes)))
+
+
+def _emit_all(event_type, envelopes: list[tuple[int, dict]]) -> list[bool]:
+    if not envelopes:
+        return []
+    try:
+        client = get_communication_client()
+    except Exception as exc:
+        for entity_id, _ in envelopes:
+            _log_emit_failure(entity_id, exc)
+        return [False] * len(envelopes)
+
+    if _emits_via_async(client):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # One event loop for the whole batch instead of asyncio.run per message.
+            # The embedded dispatcher shares loop-bound locks, so only clients that
+            # opt in are fanned out concurrently.
+            concurrency = settings.communication_batch_concurrency if client.supports_concurrent_emit else 1
+            return asyncio.run(_emit_all_async(client, event_type, envelopes, concurrency))
+
+    results: list[bool] = []
+    for entity_id, envelope in envelopes:
+        try:
+            response = client.emit_event(event_type, envelope)
+            results.append(bool(response.get('queued', False)))
+        except Exception as exc:
+            _log_emit_failure(entity_id, exc)
+            results.append(False)
+    return results
+
+
+def _build_envelope(delivery: _Delivery, *, tenant_id, preferred_providers) -> dict:
+    data = delivery.data
+    return {
+        'tenant_id': tenant_id,
+        'user_id': delivery.user_id,
+        'payload': {
+            **(data.get('event_payload') or {}),
+            'message': str(data.get('message') or ''),
+            'recipients': [delivery.chat_id],
+            'preferred_providers': preferred_providers,
+            'priority': data.get('priority'),
+            'entity_type': data.get('entity_type'),
+            'entity_id': data.get('entity_id'),
+            'reply_markup': data.get('reply_markup') or {},
+            'critical': bool(data.get('critical', False)),
+        },
+    }
+
+
+def _log_result(delivery: _Delivery, *, ok: bool, status: str, **extra) -> dict:
+    return {
+        'ok': ok,
+        'status': status,
+        'chat_id': delivery.chat_id,
+        'message_id': None,
+        'log_id': delivery.log_id,
+        **extra,
+    }
+
+
+def _log_retries_exhausted(db, delivery: _Delivery) -> None:
+    log_automation_failure(
+        db,
+        job_name='communication_delivery',
+        entity_type=str(delivery.data.get('entity_type') or '') or 'communication',
+        entity_id=delivery.entity_id if delivery.entity_id > 0 else delivery.log_id,
+        error_message='delivery retries exhausted',
+    )
+
+
+def _write_log_updates(db, rows: list[dict]) -> None:
+    # Bulk UPDATE by primary key: the rows were expired by the previous commit and
+    # per-object attribute writes would reload each one first.
+    if db is not None and rows:
+        db.execute(update(CommunicationLog), rows)
+
+
+def _apply_send_rate_limit(db, *, center_id: int, deliveries: list[_Delivery]) -> None:
+    """Take the whole batch from the center's send allowance in one check.
+
+    When the batch does not fit, fall back to one request per recipient so the
+    head of the batch still goes out, as the per-recipient path always did.
+    """
+
+    limit = {
+        'center_id': center_id,
+        'scope_type': 'center',
+        'scope_key': str(center_id),
+        'action_name': 'communication_send_event',
+        'max_requests': SEND_RATE_LIMIT_PER_MINUTE,
+        'window_seconds': 60,
+    }
+
+    def _check(cost: int) -> bool:
+        try:
+            return check_rate_limit(db, cost=cost, **limit)
+        except SafeRateLimitError:
+            return False
+
+    # The whole-batch probe is silent: falling back to per-recipient checks is not a block.
+    if len(deliveries) > 1 and try_rate_limit(db, cost=len(deliveries), **limit):
+        return
+    blocked = False
+    for delivery in deliveries:
+        # A blocked window stays blocked for the rest of the batch.
+        blocked = blocked or not _check(1)
+        if blocked:
+            delivery.result = {'ok': False, 'status': 'failed_backoff', 'chat_id': delivery.chat_id, 'message_id': None}
+
+
 def send_event(event_type, payload, recipients):
     """
     Unified communication gateway entrypoint.
 
     TODO: remove remaining legacy queue wrappers later.
     """
-    data = payload or {}
-    message = str(data.get('message') or '')
-    reply_markup = data.get('reply_markup') if isinstance(data, dict) else None
-    channels = data.get('channels') if isinstance(data, dict) else None
+    return send_event_batch(event_type, payload, recipients)
+
+
+def send_event_batch(event_type, payload, recipients):
+    """Send one event to many recipients with set-based bookkeeping.
+
+    Logs and duplicate state are prefetched in one query, new logs are inserted
+    in one flush, attempts are committed once before dispatch and statuses once
+    after. Recipient dicts may override message/entity fields per recipient.
+    Results are returned in recipient order.
+    """
+    shared = payload if isinstance(payload, dict) else {}
+    channels = shared.get('channels')
     preferred_providers = channels if isinstance(channels, list) and channels else ['telegram', 'whatsapp']
-    tenant_id = data.get('tenant_id') if isinstance(data, dict) else None
-    if not tenant_id:
-        tenant_id = settings.communication_tenant_id
-    db = data.get('db') if isinstance(data, dict) else None
+    tenant_id = shared.get('tenant_id') or settings.communication_tenant_id
+    db = shared.get('db')
     now = default_time_provider.now().replace(tzinfo=None)
-    entity_id_raw = data.get('entity_id') if isinstance(data, dict) else None
-    try:
-        entity_id = int(entity_id_raw) if entity_id_raw is not None else 0
-    except Exception:
-        entity_id = 0
-    retry_backoff_seconds = int(data.get('retry_backoff_seconds') or 300)
-    max_attempts = int(data.get('max_delivery_attempts') or 3)
-    entity_type = str(data.get('entity_type') or '')
-    center_id = _resolve_center_id(data if isinstance(data, dict) else {})
+    retry_backoff_seconds = int(shared.get('retry_backoff_seconds') or 300)
+    max_attempts = int(shared.get('max_delivery_attempts') or 3)
+    center_id = _resolve_center_id(shared)
+    event_name = str(event_type or '').strip()
 
-    out: list[dict] = []
+    out: list[dict | None] = []
+    deliveries: list[_Delivery] = []
     for recipient in recipients or []:
         if isinstance(recipient, dict):
             chat_id = str(recipient.get('chat_id') or '').strip()
-            user_id = str(recipient.get('user_id') or data.get('user_id') or 'system')
+            user_id = str(recipient.get('user_id') or shared.get('user_id') or 'system')
             receiver_id = str(recipient.get('receiver_id') or chat_id).strip()
+            data = {**shared, **{key: recipient[key] for key in _RECIPIENT_OVERRIDE_KEYS if key in recipient}}
         else:
             chat_id = str(recipient or '').strip()
-            user_id = str(data.get('user_id') or 'system')
+            user_id = str(shared.get('user_id') or 'system')
             receiver_id = chat_id
-
+            data = shared
         if not chat_id:
             out.append({'ok': False, 'status': 'skipped', 'chat_id': chat_id, 'error': 'missing_chat_id'})
             continue
-        if db is not None:
-            try:
-                check_rate_limit(
-                    db,
-                    center_id=center_id,
-                    scope_type='center',
-                    scope_key=str(center_id),
-                    action_name='communication_send_event',
-                    max_requests=100,
-                    window_seconds=60,
-                )
-            except SafeRateLimitError:
-                out.append({'ok': False, 'status': 'failed_backoff', 'chat_id': chat_id, 'message_id': None})
-                continue
-
-        delivery_log: CommunicationLog | None = None
-        if db is not None and str(event_type or '').strip():
-            delivery_log = (
-                db.query(CommunicationLog)
-                .filter(
-                    CommunicationLog.event_type == str(event_type),
-                    CommunicationLog.telegram_chat_id == chat_id,
-                    or_(
-                        CommunicationLog.reference_id == int(entity_id or 0),
-                        CommunicationLog.session_id == int(entity_id or 0),
-                        CommunicationLog.student_id == int(entity_id or 0),
-                        CommunicationLog.teacher_id == int(entity_id or 0),
-                    ),
-                )
-                .order_by(CommunicationLog.created_at.desc(), CommunicationLog.id.desc())
-                .first()
-            )
-
-        if db is not None and entity_id > 0 and str(event_type or '').strip():
-            if is_duplicate_send(
-                db,
-                event_type=str(event_type),
-                entity_id=entity_id,
+        out.append(None)
+        deliveries.append(
+            _Delivery(
+                index=len(out) - 1,
+                chat_id=chat_id,
+                user_id=user_id,
                 receiver_id=receiver_id,
-                window_seconds=300,
-            ):
-                if delivery_log is not None and delivery_log.delivery_status not in ('failed', 'pending'):
-                    delivery_log.delivery_status = 'duplicate_suppressed'
-                    db.commit()
-                    out.append(
-                        {
-                            'ok': True,
-                            'status': 'duplicate_suppressed',
-                            'chat_id': chat_id,
-                            'message_id': None,
-                            'suppressed': True,
-                            'log_id': int(delivery_log.id) if delivery_log is not None else None,
-                        }
-                    )
-                    continue
-
-        if delivery_log is None and db is not None:
-            delivery_log = CommunicationLog(
-                student_id=int(data.get('student_id') or 0) or None,
-                teacher_id=int(data.get('teacher_id') or 0) or None,
-                session_id=int(data.get('session_id') or 0) or None,
-                channel='telegram',
-                message=message,
-                status='queued',
-                telegram_chat_id=chat_id,
-                notification_type=str(data.get('notification_type') or ''),
-                event_type=str(event_type or ''),
-                reference_id=int(data.get('reference_id') or entity_id or 0) or None,
-                created_at=now,
-                delivery_attempts=0,
-                last_attempt_at=None,
-                delivery_status='pending',
-                delete_at=data.get('delete_at'),
-            )
-            db.add(delivery_log)
-            db.commit()
-            db.refresh(delivery_log)
-
-        if delivery_log is not None and delivery_log.delivery_status == 'permanently_failed':
-            out.append(
-                {
-                    'ok': False,
-                    'status': 'permanently_failed',
-                    'chat_id': chat_id,
-                    'message_id': None,
-                    'log_id': int(delivery_log.id),
-                }
+                data=data,
+                entity_id=_coerce_int(data.get('entity_id')),
             )
-            continue
+        )
 
-        if delivery_log is not None and delivery_log.delivery_status in ('failed', 'failed_backoff'):
-            last_attempt = delivery_log.last_attempt_at or delivery_log.created_at
-            wait_seconds = (now - last_attempt).total_seconds()
-            if int(delivery_log.delivery_attempts or 0) >= max_attempts:
-                delivery_log.delivery_status = 'permanently_failed'
-                db.commit()
-                log_automation_failure(
-                    db,
-                    job_name='communication_delivery',
-                    entity_type=entity_type or 'communication',
-                    entity_id=entity_id if entity_id > 0 else delivery_log.id,
-                    error_message='delivery retries exhausted',
-                )
-                db.commit()
-                logger.error(
-                    'automation_failure',
-                    extra={
-                        'job': 'communication_delivery',
-                        'center_id': None,
-                        'entity_id': entity_id,
-                        'error': 'delivery retries exhausted',
-                    },
-                )
-                out.append(
-                    {
-                        'ok': False,
-                        'status': 'permanently_failed',
-                        'chat_id': chat_id,
-                        'message_id': None,
-                        'log_id': int(delivery_log.id),
-                    }
-                )
-                continue
-            if wait_seconds < retry_backoff_seconds:
-                out.append(
-                    {
-                        'ok': False,
-                        'status': 'failed_backoff',
-                        'chat_id': chat_id,
-                        'message_id': None,
-                        'log_id': int(delivery_log.id),
-                    }
-                )
-                continue
+    if db is not None and deliveries:
+        _apply_send_rate_limit(db, center_id=center_id, deliveries=deliveries)
 
-        circuit_state = None
-        selected_provider = str((preferred_providers or ['telegram'])[0] or 'telegram').strip().lower()
-        if db is not None:
-            circuit_state, allowed = _circuit_allows_send(
+    pending = [d for d in deliveries if d.result is None]
+    suppressed: list[_Delivery] = []
+    if db is not None and pending:
+        latest: dict[tuple[str, int], CommunicationLog] = {}
+        recently_sent: set[tuple[str, int]] = set()
+        if event_name:
+            latest, recently_sent = _prefetch_delivery_logs(
                 db,
-                center_id=center_id,
-                provider_name=selected_provider,
-                now=now,
+                event_type=event_name,
+                deliveries=pending,
+                dedup_cutoff=now - timedelta(seconds=300),
             )
-            if not allowed:
-                logger.warning(
-                    'provider_circuit_open_blocked_send',
-                    extra={'center_id': int(center_id or 1), 'provider': selected_provider},
-                )
-                if delivery_log is not None:
-                    delivery_log.delivery_status = 'failed_backoff'
-                    delivery_log.status = 'failed_backoff'
-                    db.commit()
-                out.append(
-                    {
-                        'ok': False,
-                        'status': 'failed_backoff',
-                        'chat_id': chat_id,
-                        'message_id': None,
-                        'log_id': int(delivery_log.id) if delivery_log is not None else None,
-                    }
-                )
+        first_in_batch: dict[tuple[str, int], _Delivery] = {}
+        new_logs: list[CommunicationLog] = []
+        for delivery in pending:
+            key = (delivery.chat_id, delivery.entity_id)
+            deduplicable = delivery.entity_id > 0 and bool(event_name)
+            if deduplicable and key in first_in_batch:
+                # Same chat and entity twice in one batch: only the first is sent.
+                delivery.duplicate_of = first_in_batch[key]
+                suppressed.append(delivery)
                 continue
+            if deduplicable:
+                first_in_batch[key] = delivery
+            delivery.log = latest.get(key)
+            if (
+                deduplicable
+                and (delivery.receiver_id, delivery.entity_id) in recently_sent
+                and delivery.log is not None
+                and delivery.log.delivery_status not in ('failed', 'pending')
+            ):
+                delivery.log.delivery_status = 'duplicate_suppressed'
+                suppressed.append(delivery)
+                continue
+            if delivery.log is None:
+                data = delivery.data
+                delivery.log = CommunicationLog(
+                    student_id=int(data.get('student_id') or 0) or None,
+                    teacher_id=int(data.get('teacher_id') or 0) or None,
+                    session_id=int(data.get('session_id') or 0) or None,
+                    channel='telegram',
+                    message=str(data.get('message') or ''),
+                    status='queued',
+                    telegram_chat_id=delivery.chat_id,
+                    notification_type=str(data.get('notification_type') or ''),
+                    event_type=str(event_type or ''),
+                    reference_id=int(data.get('reference_id') or delivery.entity_id or 0) or None,
+                    created_at=now,
+                    delivery_attempts=0,
+                    last_attempt_at=None,
+                    delivery_status='pending',
+                    delete_at=data.get('delete_at'),
+                )
+                new_logs.append(delivery.log)
+        if new_logs:
+            db.add_all(new_logs)
+            db.flush()
 
-        if delivery_log is not None:
-            delivery_log.delivery_attempts = int(delivery_log.delivery_attempts or 0) + 1
-            delivery_log.last_attempt_at = now
-            delivery_log.delivery_status = 'pending'
+        for delivery in pending:
+            log = delivery.log
+            if log is None:
+                continue
+            delivery.log_id = int(log.id)
+            delivery.attempts = int(log.delivery_attempts or 0)
+            if delivery in suppressed:
+                continue
+            if log.delivery_status == 'permanently_failed':
+                delivery.result = _log_result(delivery, ok=False, status='permanently_failed')
+                continue
+            if log.delivery_status in ('failed', 'failed_backoff'):
+                last_attempt = log.last_attempt_at or log.created_at
+                if delivery.attempts >= max_attempts:
+                    log.delivery_status = 'permanently_failed'
+                    _log_retries_exhausted(db, delivery)
+                    logger.error(
+                        'automation_failure',
+                        extra={
+                            'job': 'communication_delivery',
+                            'center_id': None,
+                            'entity_id': delivery.entity_id,
+                            'error': 'delivery retries exhausted',
+                        },
+                    )
+                    delivery.result = _log_result(delivery, ok=False, status='permanently_failed')
+                    continue
+                if (now - last_attempt).total_seconds() < retry_backoff_seconds:
+                    delivery.result = _log_result(delivery, ok=False, status='failed_backoff')
+                    continue
+        for delivery in suppressed:
+            if delivery.duplicate_of is not None:
+                delivery.log_id = delivery.duplicate_of.log_id
+            delivery.result = _log_result(delivery, ok=True, status='duplicate_suppressed', suppressed=True)
+
+    sendable = [d for d in deliveries if d.result is None]
+    circuit_state = None
+    selected_provider = str((preferred_providers or ['telegram'])[0] or 'telegram').strip().lower()
+    blocked: list[_Delivery] = []
+    if db is not None and sendable:
+        circuit_state, allowed = _circuit_allows_send(
+            db,
+            center_id=center_id,
+            provider_name=selected_provider,
+            now=now,
+        )
+        if not allowed:
+            sendable, blocked = [], sendable
+
+    if sendable:
+        for delivery in sendable:
+            if delivery.log_id is not None:
+                delivery.attempts += 1
+        _write_log_updates(
+            db,
+            [
+                {'id': d.log_id, 'delivery_attempts': d.attempts, 'last_attempt_at': now, 'delivery_status': 'pending'}
+                for d in sendable
+                if d.log_id is not None
+            ],
+        )
+        if db is not None:
             db.commit()
 
-        ok = False
-        try:
-            client = get_communication_client()
-            response = client.emit_event(
-                event_type,
-                {
-                    'tenant_id': tenant_id,
-                    'user_id': user_id,
-                    'payload': {
-                        **(data.get('event_payload') or {}),
-                        'message': message,
-                        'recipients': [chat_id],
-                        'preferred_providers': preferred_providers,
-                        'priority': data.get('priority'),
-                        'entity_type': data.get('entity_type'),
-                        'entity_id': data.get('entity_id'),
-                        'reply_markup': reply_markup or {},
-                        'critical': bool(data.get('critical', False)),
-                    },
-                },
-            )
-            ok = bool(response.get('queued', False))
-        except Exception as exc:
-            logger.error(
-                'automation_failure',
-                extra={
-                    'job': 'communication_emit',
-                    'center_id': None,
-                    'entity_id': entity_id,
-                    'error': str(exc),
-                },
+    # Dispatch in chunks and look at the circuit between them, so a provider that
+    # starts failing mid-batch opens it and the rest of the batch is held back.
+    # Half-open admits a single probe; the rest follow only if it closes the circuit.
+    chunks: list[list[_Delivery]] = []
+    rest = sendable
+    if circuit_state is not None and rest and str(circuit_state.state or 'closed').lower() == 'half_open':
+        chunks.append(rest[:1])
+        rest = rest[1:]
+    chunks.extend(rest[start : start + CIRCUIT_OPEN_THRESHOLD] for start in range(0, len(rest), CIRCUIT_OPEN_THRESHOLD))
+
+    status_rows: list[dict] = []
+    for chunk_index, chunk in enumerate(chunks):
+        if chunk_index > 0 and circuit_state is not None and str(circuit_state.state or 'closed').lower() != 'closed':
+            for held in chunks[chunk_index:]:
+                for delivery in held:
+                    if delivery.log_id is not None:
+                        delivery.attempts -= 1  # never attempted
+                blocked.extend(held)
+            break
+
+        outcomes = _emit_all(
+            event_type,
+            [
+                (delivery.entity_id, _build_envelope(delivery, tenant_id=tenant_id, preferred_providers=preferred_providers))
+                for delivery in chunk
+            ],
+        )
+        for delivery, ok in zip(chunk, outcomes):
+            status = 'sent' if ok else 'failed'
+            if circuit_state is not None:
+                if ok:
+                    _mark_circuit_success(circuit_state, now=now)
+                else:
+                    _mark_circuit_failure(circuit_state, now=now)
+            delivery_status = status
+            if delivery.log_id is not None:
+                if not ok and delivery.attempts >= max_attempts:
+                    delivery_status = 'permanently_failed'
+                    _log_retries_exhausted(db, delivery)
+                status_rows.append({'id': delivery.log_id, 'delivery_status': delivery_status, 'status': status})
+            delivery.result = _log_result(
+                delivery,
+                ok=bool(ok),
+                status=delivery_status,
+                attempts=delivery.attempts if delivery.log_id is not None else None,
             )
 
-        status = 'sent' if ok else 'failed'
-        if db is not None and circuit_state is not None:
-            if ok:
-                _mark_circuit_success(circuit_state, now=now)
-            else:
-                _mark_circuit_failure(circuit_state, now=now)
-        if delivery_log is not None:
-            delivery_log.delivery_status = status
-            delivery_log.status = status
-            if not ok and int(delivery_log.delivery_attempts or 0) >= max_attempts:
-                delivery_log.delivery_status = 'permanently_failed'
-                log_automation_failure(
-                    db,
-                    job_name='communication_delivery',
-                    entity_type=entity_type or 'communication',
-                    entity_id=entity_id if entity_id > 0 else delivery_log.id,
-                    error_message='delivery retries exhausted',
-                )
-            db.commit()
-
-        out.append(
-            {
-                'ok': bool(ok),
-                'status': delivery_log.delivery_status if delivery_log is not None else status,
-                'chat_id': chat_id,
-                'message_id': None,
-                'attempts': int(delivery_log.delivery_attempts) if delivery_log is not None else None,
-                'log_id': int(delivery_log.id) if delivery_log is not None else None,
-            }
+    if blocked:
+        logger.warning(
+            'provider_circuit_open_blocked_send',
+            extra={'center_id': int(center_id or 1), 'provider': selected_provider, 'blocked': len(blocked)},
+        )
+        status_rows.extend(
+            {'id': d.log_id, 'delivery_attempts': d.attempts, 'delivery_status': 'failed_backoff', 'status': 'failed_backoff'}
+            for d in blocked
+            if d.log_id is not None
         )
+        for delivery in blocked:
+            delivery.result = _log_result(delivery, ok=False, status='failed_backoff')
+    _write_log_updates(db, status_rows)
+
+    if db is not None and deliveries:
+        db.commit()
+
+    for delivery in deliveries:
+        out[delivery.index] = delivery.result
+    for result in out:
+        _deliveries.inc(event=event_name or 'unknown', status=str((result or {}).get('status') or 'unknown'))
     return out
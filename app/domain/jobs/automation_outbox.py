@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from app.domain.jobs.runtime import run_job
+from app.services.automation_outbox_service import drain_automation_outbox
+
+
+def execute() -> None:
+    run_job('automation_outbox', lambda db, center_id: drain_automation_outbox(center_id=int(center_id or 1)))
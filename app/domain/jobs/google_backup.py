@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 from app.domain.jobs.runtime import run_job
-from app.services.google_sheets_backup import backup_daily_to_google_sheet
+from app.services.google_sheets_backup import run_incremental_backup
 
 
 def execute() -> None:
-    run_job('google_backup', lambda db, center_id: backup_daily_to_google_sheet(db, center_id=int(center_id or 0)))
+    run_job('google_backup', lambda db, center_id: run_incremental_backup(db, center_id=int(center_id or 0)))
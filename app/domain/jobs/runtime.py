@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 
-from app.db import SessionLocal
+from app.config import settings
+from app.db import SessionLocal, primary_reads
 from app.domain.jobs.job_lock import acquire_job_lock, release_job_lock
 from app.metrics import run_timed_job
 from app.models import Center
+from app.query_profiler import profile_scope
 from app.services.observability_counters import record_observability_event
 from app.services.center_scope_service import center_context
 
@@ -15,31 +19,119 @@ from app.services.center_scope_service import center_context
 logger = logging.getLogger(__name__)
 
 
-def with_db(task, *, job_label: str) -> None:
-    db: Session = SessionLocal()
+def _job_concurrency(job_label: str, concurrency: int | None) -> int:
+    if concurrency is None:
+        concurrency = settings.job_center_concurrency_overrides.get(job_label, settings.job_center_concurrency)
+    return max(1, int(concurrency or 1))
+
+
+def _list_center_ids(session_factory: sessionmaker) -> list[int]:
+    db: Session = session_factory()
     try:
         center_rows = db.query(Center.id).order_by(Center.id.asc()).all()
-        center_ids = [int(center_id) for (center_id,) in center_rows if int(center_id or 0) > 0] or [1]
-        for center_id in center_ids:
-            lock_token = acquire_job_lock(job_label, center_id)
-            if not lock_token:
-                logger.info('job_lock_skipped_concurrent job=%s center_id=%s', job_label, center_id)
-                record_observability_event(f'job_lock_skipped:{job_label}:{center_id}')
-                continue
-            logger.info('job_lock_acquired job=%s center_id=%s', job_label, center_id)
-            with center_context(center_id):
-                try:
-                    task(db, center_id)
-                    record_observability_event(f'job_success_count:{job_label}:{center_id}')
-                except Exception:
-                    db.rollback()
-                    logger.exception('job_center_failure center_id=%s job=%s', center_id, job_label)
-                    record_observability_event(f'job_failure_count:{job_label}:{center_id}')
-                finally:
-                    release_job_lock(job_label, center_id, lock_token)
+        return [int(center_id) for (center_id,) in center_rows if int(center_id or 0) > 0] or [1]
+    finally:
+        db.close()
+
+
+def _run_center(
+    task,
+    *,
+    job_label: str,
+    center_id: int,
+    session_factory: sessionmaker,
+    lock_ttl_seconds: int,
+    started: dict[int, float],
+) -> None:
+    started[center_id] = time.monotonic()
+    lock_token = acquire_job_lock(job_label, center_id, ttl_seconds=lock_ttl_seconds)
+    if not lock_token:
+        logger.info('job_lock_skipped_concurrent job=%s center_id=%s', job_label, center_id)
+        record_observability_event('job_lock_skipped', job=job_label, center_id=center_id)
+        return
+    logger.info('job_lock_acquired job=%s center_id=%s', job_label, center_id)
+    db: Session = session_factory()
+    try:
+        with center_context(center_id), profile_scope(f'job:{job_label}'), primary_reads():
+            try:
+                task(db, center_id)
+                record_observability_event('job_success', job=job_label, center_id=center_id)
+            except Exception:
+                db.rollback()
+                logger.exception('job_center_failure center_id=%s job=%s', center_id, job_label)
+                record_observability_event('job_failure', job=job_label, center_id=center_id)
     finally:
         db.close()
+        release_job_lock(job_label, center_id, lock_token)
+
+
+def with_db(
+    task,
+    *,
+    job_label: str,
+    concurrency: int | None = None,
+    timeout_seconds: int | None = None,
+    budget_seconds: int | None = None,
+    session_factory: sessionmaker | None = None,
+) -> None:
+    """Run `task(db, center_id)` for every center, each on its own session and `center_context`.
+
+    Centers fan out over a pool of `concurrency` threads. Each center gets `timeout_seconds`
+    from the moment it starts running; one still running at its deadline is counted as a
+    timeout and no longer waited for, but keeps its job lock until it actually finishes, so
+    the next tick cannot overlap it. Queued centers are only dropped once the job-wide
+    `budget_seconds` runs out, which by default allows every center its full timeout, so
+    it only trips when timed-out centers keep holding pool threads.
+    """
+    factory = session_factory or SessionLocal
+    center_ids = _list_center_ids(factory)
+    workers = min(_job_concurrency(job_label, concurrency), len(center_ids))
+    timeout = max(1, int(timeout_seconds or settings.job_center_timeout_seconds))
+    budget = int(budget_seconds or settings.job_budget_seconds or 0)
+    if budget <= 0:
+        budget = timeout * -(-len(center_ids) // workers)
+    lock_ttl_seconds = max(900, timeout * 2)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'job-{job_label}')
+    try:
+        started: dict[int, float] = {}
+        futures: dict[Future, int] = {}
+        for center_id in center_ids:
+            future = pool.submit(
+                _run_center,
+                task,
+                job_label=job_label,
+                center_id=center_id,
+                session_factory=factory,
+                lock_ttl_seconds=lock_ttl_seconds,
+                started=started,
+            )
+            futures[future] = center_id
+        budget_deadline = time.monotonic() + budget
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            for future in done:
+                if not future.cancelled() and future.exception() is not None:
+                    logger.error('job_center_worker_error center_id=%s job=%s', futures[future], job_label, exc_info=future.exception())
+            now = time.monotonic()
+            for future in list(pending):
+                center_id = futures[future]
+                started_at = started.get(center_id)
+                if started_at is not None and now >= started_at + timeout:
+                    pending.discard(future)
+                    logger.error('job_center_timeout center_id=%s job=%s timeout_seconds=%s', center_id, job_label, timeout)
+                    record_observability_event('job_timeout', job=job_label, center_id=center_id)
+                elif started_at is None and now >= budget_deadline and future.cancel():
+                    pending.discard(future)
+                    logger.error('job_center_budget_skipped center_id=%s job=%s budget_seconds=%s', center_id, job_label, budget)
+                    record_observability_event('job_budget_skipped', job=job_label, center_id=center_id)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
-def run_job(label: str, task) -> None:
-    run_timed_job(label, lambda: with_db(task, job_label=label))
+def run_job(label: str, task, *, concurrency: int | None = None, timeout_seconds: int | None = None) -> None:
+    run_timed_job(
+        label,
+        lambda: with_db(task, job_label=label, concurrency=concurrency, timeout_seconds=timeout_seconds),
+    )
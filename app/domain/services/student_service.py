@@ -7,6 +7,8 @@ from sqlalchemy.orm import Session
 from app.core.time_provider import default_time_provider
 from app.models import AttendanceRecord, Batch, FeeRecord, Parent, Student
 from app.services.batch_membership_service import ensure_active_student_batch_mapping
+from app.services.fee_analytics_service import invalidate_fee_dashboard
+from app.services.insights_service import invalidate_insights
 from app.services.fee_service import build_upi_link
 from app.services.parent_service import create_parent, link_parent_student
 
@@ -68,6 +70,8 @@ def create_student(
     db.add(attendance)
     db.commit()
     db.refresh(student)
+    invalidate_fee_dashboard(int(student.center_id or 1))
+    invalidate_insights(int(student.center_id or 1))
     batch = db.query(Batch).filter(Batch.id == batch_id).first()
     return student, batch
 
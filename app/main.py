@@ -9,16 +9,15 @@ from fastapi.staticfiles import StaticFiles
 
 from app.communication.bootstrap import shutdown_embedded_communication, startup_embedded_communication
 from app.config import settings
+from app.core.request_identity import get_request_session, is_onboarding_incomplete_cached
 from app.db import Base, SessionLocal, engine
-from app.routers import actions, activation, admin_allowlist, admin_ops, allowlist_admin, allowlist_admin_ui, attendance, attendance_manage_ui, attendance_session_api, attendance_session_ui, auth, batches_ui, brain, catalog, class_session, commands, communications, dashboard, dashboard_today, drive_oauth, fee, homework, inbox, integrations, notes, offers, onboarding, parents, referral, rules, session_summary_api, session_summary_ui, student_api, student_risk, student_ui, students_ui, teacher_automation_rules, teacher_brief, teacher_calendar, teacher_communication_settings, teacher_profile, telegram_linking, time_capacity, tokens, ui
+from app.routers import actions, activation, admin_allowlist, admin_ops, allowlist_admin, allowlist_admin_ui, attendance, attendance_manage_ui, attendance_session_api, attendance_session_ui, auth, batches_ui, brain, catalog, changes, class_session, commands, communications, dashboard, dashboard_today, drive_oauth, fee, homework, inbox, integrations, metrics, notes, offers, onboarding, parents, referral, rules, session_summary_api, session_summary_ui, student_api, student_risk, student_ui, students_ui, teacher_automation_rules, teacher_brief, teacher_calendar, teacher_communication_settings, teacher_profile, telegram_linking, time_capacity, tokens, ui
 from app.scheduler import start_scheduler, stop_scheduler
 from app.session_middleware import SessionAuthMiddleware
 from app.tenant_middleware import TenantResolutionMiddleware, get_request_center_id
 from app.route_logging import EndpointNameRoute
 from app.services.center_scope_service import center_context
-from app.services.auth_service import validate_session_token
 from app.services.bootstrap_service import run_bootstrap
-from app.services.onboarding_service import is_center_onboarding_incomplete
 from app.metrics import flush_cache_metrics
 
 logging.basicConfig(
@@ -66,28 +65,17 @@ async def slow_request_logger(request: Request, call_next):
     started = time.perf_counter()
     scoped_center_id = get_request_center_id(request)
     if scoped_center_id is None:
-        token = request.cookies.get('auth_session')
-        session = validate_session_token(token)
+        session = get_request_session(request, allow_bearer=False)
         scoped_center_id = session.get('center_id') if session else None
     path = request.url.path
     if path.startswith('/api') and not path.startswith('/api/onboard'):
         if not path.startswith('/api/tokens') and not path.startswith('/api/telegram/link'):
-            token = request.cookies.get('auth_session')
-            if not token:
-                auth_header = request.headers.get('Authorization', '')
-                if auth_header.lower().startswith('bearer '):
-                    token = auth_header.split(' ', 1)[1].strip()
-            session = validate_session_token(token)
+            session = get_request_session(request)
             center_id = int((session or {}).get('center_id') or 0)
-            if center_id > 0:
-                db = SessionLocal()
-                try:
-                    if is_center_onboarding_incomplete(db, center_id):
-                        from fastapi.responses import JSONResponse
-
-                        return JSONResponse(status_code=403, content={'detail': 'Onboarding incomplete'})
-                finally:
-                    db.close()
+            if center_id > 0 and is_onboarding_incomplete_cached(SessionLocal, center_id):
+                from fastapi.responses import JSONResponse
+
+                return JSONResponse(status_code=403, content={'detail': 'Onboarding incomplete'})
     with center_context(scoped_center_id):
         response = await call_next(request)
     duration_ms = (time.perf_counter() - started) * 1000.0
@@ -138,6 +126,7 @@ app.include_router(student_api.router)
 app.include_router(student_ui.router)
 app.include_router(teacher_brief.router)
 app.include_router(teacher_calendar.router)
+app.include_router(changes.router)
 app.include_router(time_capacity.router)
 app.include_router(teacher_profile.router)
 app.include_router(telegram_linking.router)
@@ -146,6 +135,7 @@ app.include_router(teacher_automation_rules.router)
 app.include_router(session_summary_ui.router)
 app.include_router(session_summary_api.router)
 app.include_router(tokens.router)
+app.include_router(metrics.router)
 
 
 @app.get('/')
@@ -4,7 +4,6 @@ import asyncio
 import logging
 import threading
 import time
-from datetime import datetime, timedelta, timezone
 from typing import Callable
 
 from app.config import settings
@@ -13,77 +12,248 @@ from app.config import settings
 logger = logging.getLogger('app.metrics')
 
 
-class MetricsExporter:
-    def export_cache_minute(self, *, minute_start: datetime, counts: dict[str, int]) -> None:
+DEFAULT_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, object]) -> LabelKey:
+    return tuple(sorted((str(name), str(value)) for name, value in labels.items()))
+
+
+def _matches(key: LabelKey, filters: LabelKey) -> bool:
+    present = dict(key)
+    return all(present.get(name) == value for name, value in filters)
+
+
+class _RollingWindow:
+    """Per-bucket event counts over a fixed horizon; memory is bounded by horizon / bucket width."""
+
+    __slots__ = ('_bucket_seconds', '_max_buckets', '_buckets')
+
+    def __init__(self, *, horizon_seconds: int, bucket_seconds: int) -> None:
+        self._bucket_seconds = max(1, int(bucket_seconds))
+        self._max_buckets = max(1, int(horizon_seconds) // self._bucket_seconds + 1)
+        self._buckets: dict[int, float] = {}
+
+    def add(self, amount: float, ts: float) -> None:
+        bucket = int(ts // self._bucket_seconds)
+        self._buckets[bucket] = self._buckets.get(bucket, 0.0) + amount
+        if len(self._buckets) > self._max_buckets:
+            floor = max(self._buckets) - self._max_buckets
+            for stale in [b for b in self._buckets if b <= floor]:
+                del self._buckets[stale]
+
+    def total_since(self, start_ts: float, end_ts: float) -> float:
+        lo = int(start_ts // self._bucket_seconds)
+        hi = int(end_ts // self._bucket_seconds)
+        return sum(count for bucket, count in self._buckets.items() if lo <= bucket <= hi)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str = '') -> None:
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._series: dict[LabelKey, object] = {}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def _exposition_name(self) -> str:
+        return self.name
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
         raise NotImplementedError
 
 
-class LogMetricsExporter(MetricsExporter):
-    def export_cache_minute(self, *, minute_start: datetime, counts: dict[str, int]) -> None:
-        logger.info(
-            'cache_metrics minute=%s cache_hit=%s cache_miss=%s cache_bypass=%s cache_invalidate=%s',
-            minute_start.isoformat(),
-            counts.get('cache_hit', 0),
-            counts.get('cache_miss', 0),
-            counts.get('cache_bypass', 0),
-            counts.get('cache_invalidate', 0),
-        )
+class Counter(_Metric):
+    """Monotonic labeled counter. With `window_seconds` it also answers "how many in the last N"."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str = '', *, window_seconds: int | None = None, bucket_seconds: int = 300) -> None:
+        super().__init__(name, help_text)
+        self._window_seconds = window_seconds
+        self._bucket_seconds = bucket_seconds
+
+    def inc(self, amount: float = 1.0, *, at: float | None = None, **labels: object) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                window = None
+                if self._window_seconds:
+                    window = _RollingWindow(horizon_seconds=self._window_seconds, bucket_seconds=self._bucket_seconds)
+                state = self._series[key] = [0.0, window]
+            state[0] += amount
+            if state[1] is not None:
+                state[1].add(amount, time.time() if at is None else at)
+
+    def value(self, **labels: object) -> float:
+        """Lifetime total summed over every series carrying `labels`."""
+        filters = _label_key(labels)
+        with self._lock:
+            return sum(state[0] for key, state in self._series.items() if _matches(key, filters))
+
+    def count_in_window(self, window_seconds: float, *, now: float | None = None, **labels: object) -> float:
+        if not self._window_seconds:
+            raise ValueError(f'counter {self.name} does not keep a rolling window')
+        end = time.time() if now is None else now
+        start = end - float(window_seconds)
+        filters = _label_key(labels)
+        with self._lock:
+            return sum(
+                state[1].total_since(start, end)
+                for key, state in self._series.items()
+                if _matches(key, filters)
+            )
+
+    def _exposition_name(self) -> str:
+        return self.name if self.name.endswith('_total') else f'{self.name}_total'
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        name = self._exposition_name()
+        with self._lock:
+            return [(name, key, state[0]) for key, state in self._series.items()]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels: object) -> None:
+        with self._lock:
+            self._series[_label_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._series[key] = float(self._series.get(key, 0.0)) + amount
 
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return float(self._series.get(_label_key(labels), 0.0))
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        with self._lock:
+            return [(self.name, key, float(value)) for key, value in self._series.items()]
 
-_exporter: MetricsExporter = LogMetricsExporter()
 
+class Histogram(_Metric):
+    kind = 'histogram'
 
-def set_metrics_exporter(exporter: MetricsExporter) -> None:
-    global _exporter
-    _exporter = exporter
+    def __init__(self, name: str, help_text: str = '', *, buckets: tuple[float, ...] = DEFAULT_DURATION_BUCKETS) -> None:
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
 
+    def observe(self, value: float, **labels: object) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                state = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][idx] += 1
+                    break
+            state['sum'] += float(value)
+            state['count'] += 1
+
+    def count(self, **labels: object) -> int:
+        filters = _label_key(labels)
+        with self._lock:
+            return sum(state['count'] for key, state in self._series.items() if _matches(key, filters))
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        rows: list[tuple[str, LabelKey, float]] = []
+        with self._lock:
+            for key, state in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, state['counts']):
+                    cumulative += count
+                    rows.append((f'{self.name}_bucket', key + (('le', _format_value(bound)),), float(cumulative)))
+                rows.append((f'{self.name}_bucket', key + (('le', '+Inf'),), float(state['count'])))
+                rows.append((f'{self.name}_sum', key, state['sum']))
+                rows.append((f'{self.name}_count', key, float(state['count'])))
+        return rows
 
-class _MinuteCounter:
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class MetricsRegistry:
     def __init__(self) -> None:
         self._lock = threading.Lock()
-        self._minute_start_epoch: int | None = None
-        self._counts: dict[str, int] = {}
-
-    def _minute_epoch(self, ts: float) -> int:
-        return int(ts // 60) * 60
-
-    def _flush_locked(self, minute_epoch: int) -> None:
-        if not self._counts:
-            return
-        minute_start = datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=minute_epoch)
-        try:
-            _exporter.export_cache_minute(minute_start=minute_start, counts=dict(self._counts))
-        except Exception:
-            logger.exception('metrics_export_failed minute=%s', minute_start.isoformat())
-        self._counts.clear()
-
-    def record(self, key: str) -> None:
-        now = time.time()
-        minute_epoch = self._minute_epoch(now)
+        self._metrics: dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs) -> _Metric:
         with self._lock:
-            if self._minute_start_epoch is None:
-                self._minute_start_epoch = minute_epoch
-            if minute_epoch != self._minute_start_epoch:
-                self._flush_locked(self._minute_start_epoch)
-                self._minute_start_epoch = minute_epoch
-            self._counts[key] = self._counts.get(key, 0) + 1
-
-    def flush(self) -> None:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f'metric {name} is already registered as a {metric.kind}')
+            return metric
+
+    def counter(self, name: str, help_text: str = '', **kwargs) -> Counter:
+        return self._get_or_create(Counter, name, help_text, **kwargs)
+
+    def gauge(self, name: str, help_text: str = '') -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = '', **kwargs) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, **kwargs)
+
+    def reset(self) -> None:
         with self._lock:
-            if self._minute_start_epoch is None:
-                return
-            self._flush_locked(self._minute_start_epoch)
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition (format 0.0.4) of every registered metric."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: list[str] = []
+        for metric in metrics:
+            name = metric._exposition_name()
+            if metric.help:
+                lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for sample_name, labels, value in metric.samples():
+                label_text = ','.join(f'{label}="{_escape_label(val)}"' for label, val in labels)
+                lines.append(f'{sample_name}{{{label_text}}} {_format_value(value)}' if label_text else f'{sample_name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
 
+registry = MetricsRegistry()
 
-_cache_counter = _MinuteCounter()
+_cache_events = registry.counter('cache_events', 'Cache operations by outcome.')
+_service_duration = registry.histogram('service_duration_seconds', 'Wall time of timed services and snapshots.')
+_job_runs = registry.counter('job_runs', 'Scheduled job runs by outcome.')
+_job_duration = registry.histogram('job_duration_seconds', 'Wall time of scheduled job runs.')
 
 
 def record_cache_event(event: str) -> None:
-    _cache_counter.record(event)
+    _cache_events.inc(event=str(event or '').removeprefix('cache_'))
 
 
 def flush_cache_metrics() -> None:
-    _cache_counter.flush()
+    logger.info(
+        'cache_metrics cache_hit=%s cache_miss=%s cache_bypass=%s cache_invalidate=%s',
+        int(_cache_events.value(event='hit')),
+        int(_cache_events.value(event='miss')),
+        int(_cache_events.value(event='bypass')),
+        int(_cache_events.value(event='invalidate')),
+    )
 
 
 def _timed(
@@ -102,6 +272,7 @@ def _timed(
                     return await func(*args, **kwargs)
                 finally:
                     duration_ms = (time.perf_counter() - started) * 1000.0
+                    _service_duration.observe(duration_ms / 1000.0, label=label, kind=log_label)
                     if duration_ms >= threshold_value:
                         logger.info(
                             'service_timer label=%s duration_ms=%.2f event=%s',
@@ -118,6 +289,7 @@ def _timed(
                 return func(*args, **kwargs)
             finally:
                 duration_ms = (time.perf_counter() - started) * 1000.0
+                _service_duration.observe(duration_ms / 1000.0, label=label, kind=log_label)
                 if duration_ms >= threshold_value:
                     logger.info(
                         'service_timer label=%s duration_ms=%.2f event=%s',
@@ -152,4 +324,6 @@ def run_timed_job(label: str, fn: Callable[[], object]) -> object:
         raise
     finally:
         duration_ms = (time.perf_counter() - start) * 1000.0
+        _job_runs.inc(job=label, status=status)
+        _job_duration.observe(duration_ms / 1000.0, job=label)
         logger.info('job_end name=%s status=%s duration_ms=%.2f', label, status, duration_ms)
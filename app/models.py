@@ -427,7 +427,7 @@ class Student(Base):
 class AttendanceRecord(Base):
     __tablename__ = 'attendance_records'
     __table_args__ = (
-        Index('ix_attendance_records_student_date', 'student_id', 'attendance_date'),
+        Index('uq_attendance_records_student_date', 'student_id', 'attendance_date', unique=True),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
@@ -436,6 +436,7 @@ class AttendanceRecord(Base):
     status: Mapped[str] = mapped_column(String(20))
     comment: Mapped[str] = mapped_column(Text, default='')
     marked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     student: Mapped['Student'] = relationship('Student', back_populates='attendances')
 
@@ -453,6 +454,7 @@ class FeeRecord(Base):
     paid_amount: Mapped[float] = mapped_column(Float, default=0)
     is_paid: Mapped[bool] = mapped_column(Boolean, default=False)
     upi_link: Mapped[str] = mapped_column(String(255), default='')
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     student: Mapped['Student'] = relationship('Student', back_populates='fees')
 
@@ -780,8 +782,13 @@ class BackupLog(Base):
     __tablename__ = 'backup_logs'
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    center_id: Mapped[int] = mapped_column(Integer, default=0, index=True)
     status: Mapped[str] = mapped_column(String(20), default='failed', index=True)  # success | failed
     message: Mapped[str] = mapped_column(Text, default='')
+    sink: Mapped[str] = mapped_column(String(20), default='')
+    rows_written: Mapped[int] = mapped_column(Integer, default=0)
+    # Rows updated at or before this instant were exported by this run.
+    high_water_mark: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
@@ -842,6 +849,25 @@ class ProviderCircuitState(Base):
     last_state_change_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
 
 
+class TelegramPollState(Base):
+    __tablename__ = 'telegram_poll_states'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    bot_key: Mapped[str] = mapped_column(String(64), unique=True)  # sha256 of the bot token
+    next_offset: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class SchedulerLease(Base):
+    __tablename__ = 'scheduler_leases'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String(64), unique=True)
+    holder: Mapped[str] = mapped_column(String(160), default='')  # host:pid:nonce of the current leader
+    expires_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    heartbeat_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
 class RateLimitState(Base):
     __tablename__ = 'rate_limit_states'
     __table_args__ = (
@@ -914,6 +940,43 @@ class StudentDashboardSnapshot(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
 
+class SnapshotDirtyMark(Base):
+    __tablename__ = 'snapshot_dirty_marks'
+    __table_args__ = (
+        Index('ix_snapshot_dirty_marks_center_id_id', 'center_id', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    center_id: Mapped[int] = mapped_column(Integer, default=0, index=True)
+    scope: Mapped[str] = mapped_column(String(20), index=True)  # teacher|student|batch|center
+    entity_id: Mapped[int] = mapped_column(Integer, default=0)
+    source: Mapped[str] = mapped_column(String(60), default='')
+    marked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class AutomationOutbox(Base):
+    __tablename__ = 'automation_outbox'
+    __table_args__ = (
+        Index('ix_automation_outbox_center_status_due', 'center_id', 'status', 'next_attempt_at'),
+        Index('ix_automation_outbox_aggregate', 'aggregate_type', 'aggregate_id', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    center_id: Mapped[int] = mapped_column(Integer, default=1, index=True)
+    event_type: Mapped[str] = mapped_column(String(80), index=True)
+    aggregate_type: Mapped[str] = mapped_column(String(50), default='')
+    aggregate_id: Mapped[int] = mapped_column(Integer, default=0)
+    idempotency_key: Mapped[str] = mapped_column(String(160), unique=True)
+    payload_json: Mapped[str] = mapped_column(Text, default='{}')
+    status: Mapped[str] = mapped_column(String(20), default='pending', index=True)  # pending|processing|done|dead
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[str] = mapped_column(Text, default='')
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
 class Room(Base):
     __tablename__ = 'rooms'
 
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from app.config import settings
+
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+_MAX_FINGERPRINTS_PER_LABEL = 50
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+|%s)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|%s))*\s*\)')
+_QMARK_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement: str) -> str:
+    """Statement text with literals and IN-lists collapsed, so repeats of one query compare equal."""
+    text = _STRING_LITERAL.sub('?', statement or '')
+    text = _NUMBER_LITERAL.sub('?', text)
+    text = _PLACEHOLDER_LIST.sub('(?)', text)
+    text = _QMARK_LIST.sub('(?)', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+class QueryProfile:
+    """Queries issued inside one request or job run."""
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.query_count = 0
+        self.db_ms = 0.0
+        self._fingerprints: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        key = fingerprint(statement)
+        with self._lock:
+            self.query_count += 1
+            self.db_ms += duration_ms
+            self._fingerprints[key] += 1
+
+    def duplicates(self) -> dict[str, int]:
+        with self._lock:
+            return {key: count for key, count in self._fingerprints.items() if count > 1}
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_ms:.1f};desc="{self.query_count} queries"'
+
+
+def _bucket_index(value: float, bounds: tuple) -> int:
+    for idx, bound in enumerate(bounds):
+        if value <= bound:
+            return idx
+    return len(bounds)
+
+
+class _LabelStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.max_queries = 0
+        self.query_histogram = [0] * (len(QUERY_COUNT_BUCKETS) + 1)
+        self.db_time_histogram = [0] * (len(DB_TIME_BUCKETS_MS) + 1)
+        self.duplicates: Counter[str] = Counter()
+
+    def add(self, profile: QueryProfile) -> None:
+        self.calls += 1
+        self.queries += profile.query_count
+        self.db_ms += profile.db_ms
+        self.max_queries = max(self.max_queries, profile.query_count)
+        self.query_histogram[_bucket_index(profile.query_count, QUERY_COUNT_BUCKETS)] += 1
+        self.db_time_histogram[_bucket_index(profile.db_ms, DB_TIME_BUCKETS_MS)] += 1
+        self.duplicates.update(profile.duplicates())
+        if len(self.duplicates) > _MAX_FINGERPRINTS_PER_LABEL * 2:
+            self.duplicates = Counter(dict(self.duplicates.most_common(_MAX_FINGERPRINTS_PER_LABEL)))
+
+    def as_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'queries': self.queries,
+            'avg_queries': round(self.queries / self.calls, 2) if self.calls else 0.0,
+            'max_queries': self.max_queries,
+            'db_ms': round(self.db_ms, 2),
+            'avg_db_ms': round(self.db_ms / self.calls, 2) if self.calls else 0.0,
+            'query_count_histogram': _histogram(QUERY_COUNT_BUCKETS, self.query_histogram),
+            'db_ms_histogram': _histogram(DB_TIME_BUCKETS_MS, self.db_time_histogram),
+            'duplicate_statements': [
+                {'fingerprint': key, 'repeats': count}
+                for key, count in self.duplicates.most_common(10)
+            ],
+        }
+
+
+def _histogram(bounds: tuple, counts: list[int]) -> dict[str, int]:
+    labels = [f'le_{bound}' for bound in bounds] + ['le_inf']
+    return dict(zip(labels, counts))
+
+
+_stats_lock = threading.Lock()
+_stats: dict[str, _LabelStats] = {}
+_active: ContextVar[QueryProfile | None] = ContextVar('query_profile', default=None)
+
+
+def record_query(statement: str, duration_ms: float) -> None:
+    profile = _active.get()
+    if profile is not None:
+        profile.record(statement, duration_ms)
+
+
+@contextmanager
+def profile_scope(label: str) -> Iterator[QueryProfile | None]:
+    """Collect the queries issued in this block and fold them into `label`'s histograms."""
+    if not settings.query_profiler_enabled:
+        yield None
+        return
+    profile = QueryProfile(label)
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+        with _stats_lock:
+            _stats.setdefault(label, _LabelStats()).add(profile)
+
+
+def profiler_snapshot() -> dict[str, dict]:
+    with _stats_lock:
+        rows = {label: stats.as_dict() for label, stats in _stats.items()}
+    return dict(sorted(rows.items(), key=lambda item: item[1]['db_ms'], reverse=True))
+
+
+def reset_profiler() -> None:
+    with _stats_lock:
+        _stats.clear()
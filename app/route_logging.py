@@ -3,6 +3,8 @@ from __future__ import annotations
 from fastapi.routing import APIRoute
 from starlette.requests import Request
 
+from app.config import settings
+from app.query_profiler import profile_scope
 from app.request_context import current_endpoint
 
 
@@ -14,7 +16,11 @@ class EndpointNameRoute(APIRoute):
             endpoint_label = f"{request.method} {self.path}"
             token = current_endpoint.set(endpoint_label)
             try:
-                return await original_handler(request)
+                with profile_scope(endpoint_label) as profile:
+                    response = await original_handler(request)
+                if profile is not None and settings.query_profiler_server_timing:
+                    response.headers.append('Server-Timing', profile.server_timing())
+                return response
             finally:
                 current_endpoint.reset(token)
 
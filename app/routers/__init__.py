@@ -1,4 +1,4 @@
-from app.routers import actions, activation, admin_allowlist, admin_ops, allowlist_admin, allowlist_admin_ui, attendance, attendance_manage_ui, attendance_session_api, attendance_session_ui, auth, batches_ui, brain, catalog, class_session, commands, communications, dashboard, dashboard_today, drive_oauth, fee, homework, inbox, integrations, notes, offers, onboard, onboarding, parents, referral, rules, session_summary_api, session_summary_ui, student_api, student_risk, student_ui, students_ui, teacher_automation_rules, teacher_brief, teacher_calendar, teacher_communication_settings, teacher_profile, telegram_linking, time_capacity, tokens, ui
+from app.routers import actions, activation, admin_allowlist, admin_ops, allowlist_admin, allowlist_admin_ui, attendance, attendance_manage_ui, attendance_session_api, attendance_session_ui, auth, batches_ui, brain, catalog, changes, class_session, commands, communications, dashboard, dashboard_today, drive_oauth, fee, homework, inbox, integrations, notes, offers, onboard, onboarding, parents, referral, rules, session_summary_api, session_summary_ui, student_api, student_risk, student_ui, students_ui, teacher_automation_rules, teacher_brief, teacher_calendar, teacher_communication_settings, teacher_profile, telegram_linking, time_capacity, tokens, ui
 
 __all__ = [
     'actions',
@@ -15,6 +15,7 @@ __all__ = [
     'batches_ui',
     'brain',
     'catalog',
+    'changes',
     'class_session',
     'commands',
     'communications',
@@ -12,6 +12,7 @@ from app.services.action_token_service import consume_token, create_action_token
 from app.services.access_scope_service import get_teacher_batch_ids
 from app.services.auth_service import validate_session_token
 from app.services.comms_service import queue_telegram_by_chat_id, send_fee_reminder
+from app.services.dashboard_today_service import clear_today_view_cache
 from app.services.fee_service import build_upi_link
 from app.services.integration_service import require_integration
 from app.services.operational_brain_service import clear_operational_brain_cache
@@ -424,7 +425,7 @@ def mark_resolved(payload: ActionTokenExecuteRequest, request: Request, db: Sess
     if not action_id:
         raise HTTPException(status_code=400, detail='Missing pending_action_id in token payload')
     row = resolve_action(db, action_id)
-    cache.invalidate_prefix('today_view')
+    clear_today_view_cache(teacher_id=int(row.teacher_id or 0) or None)
     cache.invalidate_prefix('inbox')
     cache.invalidate_prefix('admin_ops')
     clear_operational_brain_cache()
@@ -437,7 +438,7 @@ def _invalidate_action_caches(request: Request, *, teacher_id: int | None = None
         session = validate_session_token(request.cookies.get('auth_session'))
     except Exception:
         session = None
-    cache.invalidate_prefix('today_view')
+    clear_today_view_cache(teacher_id=teacher_id)
     cache.invalidate_prefix('inbox')
     cache.invalidate_prefix('admin_ops')
     clear_operational_brain_cache()
@@ -9,6 +9,7 @@ from app.cache import cache_key, cached_view
 from app.core.time_provider import default_time_provider
 from app.db import get_db
 from app.domain.services.system_health_service import get_system_health
+from app.query_profiler import profiler_snapshot, reset_profiler
 from app.services import snapshot_service
 from app.services.admin_ops_dashboard_service import get_admin_ops_dashboard
 from app.services.allowlist_admin_service import require_admin_session
@@ -70,3 +71,15 @@ def admin_system_health(
 ):
     scoped_center_id = int((actor or {}).get('center_id') or 0) or None
     return get_system_health(db, center_id=scoped_center_id)
+
+
+@router.get('/query-profile')
+def admin_query_profile(
+    reset: bool = Query(default=False),
+    actor: dict = Depends(_require_admin),
+):
+    """Per-endpoint and per-job query counts, DB time histograms and repeated statements since startup."""
+    payload = {'labels': profiler_snapshot()}
+    if reset:
+        reset_profiler()
+    return payload
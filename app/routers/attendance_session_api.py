@@ -23,6 +23,7 @@ from app.services.attendance_session_service import (
     resolve_web_attendance_session,
 )
 from app.services.auth_service import validate_session_token
+from app.services.dashboard_today_service import clear_today_view_cache
 from app.services.operational_brain_service import clear_operational_brain_cache
 from app.services.rate_limit_service import SafeRateLimitError, check_rate_limit
 
@@ -295,7 +296,7 @@ def attendance_session_submit_api(
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     if payload.token:
         consume_token(db, payload.token)
-    cache.invalidate_prefix('today_view')
+    clear_today_view_cache()
     cache.invalidate_prefix('inbox')
     cache.invalidate_prefix('admin_ops')
     cache.invalidate_prefix('student_dashboard')
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.models import Role
+from app.services.auth_service import validate_session_token
+from app.services.center_scope_service import get_current_center_id
+from app.services.change_feed_service import CHANGE_TOPICS, stream_changes
+
+
+router = APIRouter(prefix='/api/changes', tags=['Changes'])
+
+
+@router.get('/stream')
+async def change_stream(
+    request: Request,
+    topics: str = Query(default=','.join(CHANGE_TOPICS)),
+    teacher_id: int | None = Query(default=None),
+):
+    session = validate_session_token(request.cookies.get('auth_session'))
+    if not session:
+        raise HTTPException(status_code=403, detail='Unauthorized')
+    role = (session.get('role') or '').lower()
+    if role == Role.ADMIN.value:
+        scoped_teacher_id = int(teacher_id or 0) or None
+    else:
+        scoped_teacher_id = int(session.get('user_id') or 0) or None
+
+    requested = [topic.strip() for topic in topics.split(',') if topic.strip() in CHANGE_TOPICS]
+    if not requested:
+        raise HTTPException(status_code=400, detail=f'topics must include one of: {", ".join(CHANGE_TOPICS)}')
+    center_id = int(get_current_center_id() or session.get('center_id') or 0)
+
+    return StreamingResponse(
+        stream_changes(request.is_disconnected, center_id=center_id, topics=requested, teacher_id=scoped_teacher_id),
+        media_type='text/event-stream',
+        # X-Accel-Buffering stops nginx from holding events back until its buffer fills.
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
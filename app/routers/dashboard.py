@@ -1,18 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
 from app.db import get_db
-from app.services.insights_service import generate_insights
+from app.services.insights_service import DEFAULT_PAGE_SIZE, DEFAULT_WINDOW_DAYS, INSIGHT_WINDOWS, MAX_PAGE_SIZE, generate_insights
 from app.services.auth_service import validate_session_token
+from app.services.center_scope_service import get_current_center_id
 
 
 router = APIRouter(prefix='/dashboard', tags=['Dashboard'])
 
 
 @router.get('/teacher')
-def teacher_dashboard(request: Request, db: Session = Depends(get_db)):
+def teacher_dashboard(
+    request: Request,
+    window_days: int = Query(default=DEFAULT_WINDOW_DAYS),
+    attendance_after_id: int | None = Query(default=None, ge=0),
+    fees_after_id: int | None = Query(default=None, ge=0),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
     token = request.cookies.get('auth_session')
     session = validate_session_token(token)
     if not session or session['role'] not in ('teacher', 'admin'):
         raise HTTPException(status_code=401, detail='Unauthorized')
-    return generate_insights(db)
+    if window_days not in INSIGHT_WINDOWS:
+        raise HTTPException(status_code=400, detail=f'window_days must be one of {list(INSIGHT_WINDOWS)}')
+    return generate_insights(
+        db,
+        center_id=int(get_current_center_id() or session.get('center_id') or 0),
+        window_days=window_days,
+        attendance_after_id=attendance_after_id,
+        fees_after_id=fees_after_id,
+        limit=limit,
+    )
@@ -27,7 +27,7 @@ def _require_user(request: Request) -> dict:
 
 
 @router.get('/today')
-@cached_view(ttl=None, key_builder=lambda request, teacher_id=None, session=None, **_: _today_key(session, teacher_id))
+@cached_view(ttl=None, key_builder=lambda request, teacher_id=None, session=None, **_: _today_key(session, teacher_id), etag=True)
 def today_view(
     request: Request,
     teacher_id: int | None = Query(default=None),
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.cache import cache
 from app.db import get_db
 from app.schemas import FeeMarkPaidRequest
-from app.services.fee_service import get_fee_dashboard, mark_fee_paid
+from app.services.dashboard_today_service import clear_today_view_cache
+from app.services.fee_analytics_service import DEFAULT_PAGE_SIZE, FEE_STATUSES, MAX_PAGE_SIZE
+from app.services.fee_service import get_fee_dashboard, get_fee_records_page, mark_fee_paid
 from app.services.operational_brain_service import clear_operational_brain_cache
 
 
@@ -12,8 +14,23 @@ router = APIRouter(prefix='/fee', tags=['Fees'])
 
 
 @router.get('/dashboard')
-def fee_dashboard(db: Session = Depends(get_db)):
-    return get_fee_dashboard(db)
+def fee_dashboard(
+    page_size: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    return get_fee_dashboard(db, page_size=page_size)
+
+
+@router.get('/records')
+def fee_records(
+    status: str = Query(...),
+    after_id: int | None = Query(default=None, ge=0),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    if status not in FEE_STATUSES:
+        raise HTTPException(status_code=400, detail=f'status must be one of {", ".join(FEE_STATUSES)}')
+    return get_fee_records_page(db, status=status, after_id=after_id, limit=limit)
 
 
 @router.post('/mark-paid')
@@ -22,7 +39,7 @@ def mark_paid(payload: FeeMarkPaidRequest, db: Session = Depends(get_db)):
         result = mark_fee_paid(db, payload.fee_record_id, payload.paid_amount)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
-    cache.invalidate_prefix('today_view')
+    clear_today_view_cache()
     cache.invalidate_prefix('inbox')
     cache.invalidate_prefix('admin_ops')
     cache.invalidate_prefix('student_dashboard')
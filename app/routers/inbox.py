@@ -11,6 +11,7 @@ from app.core.time_provider import default_time_provider
 from app.db import get_db
 from app.models import PendingAction, Role
 from app.services.auth_service import validate_session_token
+from app.services.dashboard_today_service import clear_today_view_cache
 from app.services.inbox_automation import list_inbox_actions
 from app.services.pending_action_service import resolve_action
 
@@ -104,7 +105,7 @@ def resolve_action_api(
     actor_teacher_id = int(session.get('user_id') or 0)
     affected_teacher_id = int(row.teacher_id or actor_teacher_id or 0)
     cache.invalidate_prefix('inbox')
-    cache.invalidate_prefix('today_view')
+    clear_today_view_cache(teacher_id=affected_teacher_id or None)
     cache.invalidate_prefix('admin_ops')
     return {'ok': True, 'action_id': resolved.id, 'status': resolved.status}
 
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import hmac
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from app.metrics import registry
+
+
+router = APIRouter(tags=['Metrics'])
+
+
+@router.get('/metrics', include_in_schema=False)
+def metrics(request: Request):
+    token = (settings.metrics_token or '').strip()
+    if not token:
+        # Scraping is opt-in: without a configured token the endpoint does not exist.
+        raise HTTPException(status_code=404, detail='Not Found')
+    supplied = request.headers.get('authorization', '')
+    if not hmac.compare_digest(supplied, f'Bearer {token}'):
+        raise HTTPException(status_code=401, detail='Unauthorized')
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
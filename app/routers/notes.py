@@ -13,7 +13,7 @@ from sqlalchemy.orm import Session, joinedload
 from app.cache import cache, cache_key
 from app.domain.services.notes_service import create_note as domain_create_note
 from app.core.time_provider import default_time_provider
-from app.db import get_db
+from app.db import get_db, read_replica
 from app.models import Batch, Chapter, Note, NoteVersion, Role, Subject, Tag, Topic
 from app.services.auth_service import validate_session_token
 from app.services.drive_oauth_service import DriveNotConnectedError
@@ -310,26 +310,27 @@ def list_notes(
         if cached is not None:
             return cached
 
-    query = list_notes_query(
-        db,
-        center_id=int(session.get('center_id') or 0),
-        batch_id=batch_id,
-        subject_id=subject_id,
-        topic_id=topic_id,
-        tag=tag,
-        search=search,
-        role=role,
-        student=student,
-    )
+    with read_replica():
+        query = list_notes_query(
+            db,
+            center_id=int(session.get('center_id') or 0),
+            batch_id=batch_id,
+            subject_id=subject_id,
+            topic_id=topic_id,
+            tag=tag,
+            search=search,
+            role=role,
+            student=student,
+        )
 
-    total = query.count()
-    offset = (page - 1) * page_size
-    rows = (
-        query.options(joinedload(Note.versions))
-        .offset(offset)
-        .limit(page_size)
-        .all()
-    )
+        total = query.count()
+        offset = (page - 1) * page_size
+        rows = (
+            query.options(joinedload(Note.versions))
+            .offset(offset)
+            .limit(page_size)
+            .all()
+        )
 
     payload = {
         'items': [serialize_note(row) for row in rows],
@@ -23,6 +23,7 @@ from app.models import (
     StudentBatchMap,
 )
 from app.services.auth_service import validate_session_token
+from app.services.insights_service import invalidate_insights
 from app.services.student_notification_service import notify_student
 
 
@@ -244,7 +245,9 @@ def students_delete_api(
     db.query(StudentRiskEvent).filter(StudentRiskEvent.student_id == student_id).delete(synchronize_session=False)
     db.query(CommunicationLog).filter(CommunicationLog.student_id == student_id).delete(synchronize_session=False)
     db.query(OfferRedemption).filter(OfferRedemption.student_id == student_id).delete(synchronize_session=False)
+    center_id = int(student.center_id or 1)
     db.delete(student)
     db.commit()
+    invalidate_insights(center_id)
 
     return {'ok': True, 'deleted_student_id': student_id}
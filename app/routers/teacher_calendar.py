@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
+from app.cache import etag_response
 from app.db import get_db
 from app.models import CalendarOverride, Role
 from app.services.auth_service import validate_session_token
@@ -87,13 +88,16 @@ def list_calendar(
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    return {
-        'start': start.isoformat(),
-        'end': end.isoformat(),
-        'view': view,
-        'teacher_id': effective_teacher_id,
-        **payload,
-    }
+    return etag_response(
+        request,
+        {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'view': view,
+            'teacher_id': effective_teacher_id,
+            **payload,
+        },
+    )
 
 
 @router.post('/override')
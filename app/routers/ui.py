@@ -11,7 +11,8 @@ from app.db import get_db
 from app.core.time_provider import default_time_provider
 from app.models import Batch, ClassSession, FeeRecord, PendingAction, Student, StudentBatchMap
 from app.schemas import HomeworkCreateRequest
-from app.services.fee_service import get_fee_dashboard, mark_fee_paid
+from app.services.fee_analytics_service import FEE_STATUSES
+from app.services.fee_service import get_fee_dashboard, get_fee_records_page, mark_fee_paid
 from app.services.homework_service import create_homework, list_homework
 from app.services.insights_service import generate_insights
 from app.services.pending_action_service import list_open_actions, resolve_action
@@ -94,10 +95,16 @@ def attendance_submit(
 
 
 @router.get('/fees')
-def fees_page(request: Request, batch_id: int | None = Query(default=None), db: Session = Depends(get_db)):
-    data = get_fee_dashboard(db)
+def fees_page(
+    request: Request,
+    batch_id: int | None = Query(default=None),
+    status: str | None = Query(default=None),
+    after_id: int | None = Query(default=None, ge=0),
+    db: Session = Depends(get_db),
+):
     batches = db.query(Batch).order_by(Batch.name.asc()).all()
 
+    student_ids = None
     if batch_id is not None:
         student_ids = {
             sid
@@ -111,11 +118,11 @@ def fees_page(request: Request, batch_id: int | None = Query(default=None), db:
                 sid
                 for (sid,) in db.query(Student.id).filter(Student.batch_id == batch_id).all()
             }
-        data = {
-            'due': [row for row in data['due'] if row['student_id'] in student_ids],
-            'paid': [row for row in data['paid'] if row['student_id'] in student_ids],
-            'overdue': [row for row in data['overdue'] if row['student_id'] in student_ids],
-        }
+    data = get_fee_dashboard(db, student_ids=student_ids)
+    if status in FEE_STATUSES and after_id:
+        # "Next page" for one section: swap that section's rows for the requested page.
+        page = get_fee_records_page(db, status=status, after_id=after_id, student_ids=student_ids)
+        data = {**data, status: page['items'], 'next_cursors': {**data['next_cursors'], status: page['next_cursor']}}
 
     return templates.TemplateResponse(
         'fees.html',
@@ -124,6 +131,7 @@ def fees_page(request: Request, batch_id: int | None = Query(default=None), db:
             'data': data,
             'batches': batches,
             'selected_batch_id': batch_id,
+            'paged_status': status if after_id else None,
         },
     )
 
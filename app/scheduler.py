@@ -1,4 +1,5 @@
 import logging
+import threading
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
@@ -6,6 +7,7 @@ from app.config import settings
 from app.core.time_provider import TimeProvider, default_time_provider
 from app.domain.jobs import (
     auto_close_attendance_sessions as auto_close_attendance_sessions_domain_job,
+    automation_outbox as automation_outbox_domain_job,
     daily_brief as daily_brief_domain_job,
     daily_teacher_brief as daily_teacher_brief_domain_job,
     delete_due_telegram_messages as delete_due_telegram_messages_domain_job,
@@ -22,6 +24,7 @@ from app.domain.jobs import (
     teacher_timed_alerts as teacher_timed_alerts_domain_job,
     telegram_link_polling as telegram_link_polling_domain_job,
 )
+from app.services.scheduler_lease_service import LeaderElector
 from app.services.telegram_linking_service import should_poll_telegram_updates
 
 
@@ -53,6 +56,10 @@ def snapshot_rebuild_job():
     snapshot_rebuild_domain_job.execute()
 
 
+def automation_outbox_job():
+    automation_outbox_domain_job.execute()
+
+
 def auto_close_attendance_sessions_job():
     auto_close_attendance_sessions_domain_job.execute()
 
@@ -77,8 +84,8 @@ def student_weekly_motivation_job():
     student_weekly_motivation_domain_job.execute()
 
 
-def telegram_link_polling_job():
-    telegram_link_polling_domain_job.execute()
+def start_telegram_link_polling() -> bool:
+    return telegram_link_polling_domain_job.start()
 
 
 def daily_teacher_brief_job(*, time_provider: TimeProvider = default_time_provider):
@@ -105,19 +112,44 @@ def _parse_hhmm(value: str, default_hour: int = 7, default_minute: int = 30) ->
         return default_hour, default_minute
 
 
-def start_scheduler():
+SCHEDULER_MODES = ('embedded', 'leader', 'off')
+
+_state_lock = threading.Lock()
+_jobs_registered = False
+_elector: tuple[LeaderElector, threading.Thread, threading.Event] | None = None
+
+
+def _register_jobs() -> None:
+    global _jobs_registered
+    if _jobs_registered:
+        return
     brief_hour, brief_minute = _parse_hhmm(settings.daily_teacher_brief_time)
     scheduler.add_job(pre_class_notifications_job, 'cron', hour=6, minute=30, id='pre_class_notifications')
     scheduler.add_job(teacher_timed_alerts_job, 'interval', minutes=1, id='teacher_timed_alerts')
     scheduler.add_job(delete_due_telegram_messages_job, 'interval', minutes=1, id='telegram_auto_delete')
+    scheduler.add_job(inbox_escalation_job, 'interval', minutes=10, id='inbox_escalation')
+    scheduler.add_job(student_homework_reminder_job, 'cron', hour=20, minute=0, id='student_homework_reminders')
+    scheduler.add_job(student_daily_digest_job, 'cron', hour=20, minute=30, id='student_daily_digest')
+    scheduler.add_job(student_weekly_motivation_job, 'cron', day_of_week='sun', hour=19, minute=0, id='student_weekly_motivation')
+    scheduler.add_job(auto_close_attendance_sessions_job, 'interval', minutes=5, id='auto_close_attendance_sessions')
+    scheduler.add_job(fee_reminders_job, 'cron', hour=9, minute=0, id='fee_reminders')
+    scheduler.add_job(daily_brief_job, 'cron', hour=20, minute=0, id='daily_briefs')
+    scheduler.add_job(daily_teacher_brief_job, 'cron', hour=brief_hour, minute=brief_minute, id='daily_teacher_brief')
+    scheduler.add_job(google_backup_job, 'cron', hour=23, minute=30, id='google_backup')
+    scheduler.add_job(student_risk_recompute_job, 'cron', hour=1, minute=30, id='student_risk_recompute')
+    scheduler.add_job(snapshot_rebuild_job, 'interval', minutes=15, id='snapshot_rebuild')
+    scheduler.add_job(automation_outbox_job, 'interval', seconds=10, id='automation_outbox', max_instances=1, coalesce=True)
+    _jobs_registered = True
+
+
+def _start_telegram_polling() -> None:
     poll_enabled, poll_reason = should_poll_telegram_updates()
     if poll_enabled:
-        interval_seconds = max(5, int(settings.telegram_link_polling_interval_seconds or 20))
-        scheduler.add_job(telegram_link_polling_job, 'interval', seconds=interval_seconds, id='telegram_link_polling')
+        start_telegram_link_polling()
         logger.info(
-            'telegram_link_polling_enabled mode=%s interval_seconds=%s reason=%s',
+            'telegram_link_polling_enabled mode=%s long_poll_seconds=%s reason=%s',
             settings.telegram_link_polling_mode,
-            interval_seconds,
+            settings.telegram_long_poll_timeout_seconds,
             poll_reason,
         )
     else:
@@ -126,22 +158,69 @@ def start_scheduler():
             settings.telegram_link_polling_mode,
             poll_reason,
         )
-    scheduler.add_job(inbox_escalation_job, 'interval', minutes=10, id='inbox_escalation')
-    scheduler.add_job(student_homework_reminder_job, 'cron', hour=20, minute=0, id='student_homework_reminders')
-    scheduler.add_job(student_daily_digest_job, 'cron', hour=20, minute=30, id='student_daily_digest')
-    scheduler.add_job(student_weekly_motivation_job, 'cron', day_of_week='sun', hour=19, minute=0, id='student_weekly_motivation')
-    scheduler.add_job(auto_close_attendance_sessions_job, 'interval', minutes=5, id='auto_close_attendance_sessions')
-    scheduler.add_job(fee_reminders_job, 'cron', hour=9, minute=0, id='fee_reminders')
-    scheduler.add_job(daily_brief_job, 'cron', hour=20, minute=0, id='daily_briefs')
-    scheduler.add_job(daily_teacher_brief_job, 'cron', hour=brief_hour, minute=brief_minute, id='daily_teacher_brief')
-    scheduler.add_job(google_backup_job, 'cron', hour=23, minute=30, id='google_backup')
-    scheduler.add_job(student_risk_recompute_job, 'cron', hour=1, minute=30, id='student_risk_recompute')
-    scheduler.add_job(snapshot_rebuild_job, 'interval', minutes=15, id='snapshot_rebuild')
 
-    if not scheduler.running:
-        scheduler.start()
+
+def run_jobs() -> None:
+    """Start (or resume) the jobs and the Telegram poller in this process."""
+    with _state_lock:
+        _register_jobs()
+        _start_telegram_polling()
+        if not scheduler.running:
+            scheduler.start()
+        else:
+            scheduler.resume()
+
+
+def pause_jobs() -> None:
+    """Stop firing jobs here without tearing the scheduler down; in-flight runs finish."""
+    with _state_lock:
+        telegram_link_polling_domain_job.stop()
+        if scheduler.running:
+            scheduler.pause()
+
+
+def _scheduler_mode(mode: str | None) -> str:
+    value = str(mode or settings.scheduler_mode or 'embedded').strip().lower()
+    if value not in SCHEDULER_MODES:
+        raise ValueError(f'Unknown scheduler mode: {value}')
+    return value
+
+
+def start_scheduler(mode: str | None = None):
+    """Start jobs according to `settings.scheduler_mode`.
+
+    `embedded` runs them in this process (single-worker setups), `leader` runs
+    them only while this process holds the scheduler lease, and `off` skips
+    them entirely (web workers behind `python -m app.scheduler_main`).
+    """
+    global _elector
+    mode = _scheduler_mode(mode)
+    if mode == 'off':
+        logger.info('scheduler_disabled mode=off')
+        return
+    if mode == 'embedded':
+        run_jobs()
+        return
+    with _state_lock:
+        if _elector is not None and _elector[1].is_alive():
+            return
+        elector = LeaderElector(on_elected=run_jobs, on_demoted=pause_jobs)
+        stop = threading.Event()
+        thread = threading.Thread(target=elector.run, args=(stop,), name='scheduler-leader-election', daemon=True)
+        _elector = (elector, thread, stop)
+    logger.info('scheduler_leader_election_started holder=%s', elector.holder)
+    thread.start()
 
 
 def stop_scheduler():
+    global _elector
+    with _state_lock:
+        current, _elector = _elector, None
+    if current is not None:
+        _, thread, stop = current
+        stop.set()
+        # The election thread resigns the lease on its way out.
+        thread.join(timeout=5)
+    telegram_link_polling_domain_job.stop()
     if scheduler.running:
         scheduler.shutdown(wait=False)
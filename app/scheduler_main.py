@@ -0,0 +1,49 @@
+"""Standalone scheduler process: `python -m app.scheduler_main`.
+
+Web workers run with SCHEDULER_MODE=off; one or more of these processes run
+the jobs, and the scheduler lease keeps exactly one of them active.
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.communication.bootstrap import shutdown_embedded_communication, startup_embedded_communication
+from app.db import Base, engine
+from app.metrics import flush_cache_metrics
+from app.scheduler import start_scheduler, stop_scheduler
+
+
+logger = logging.getLogger(__name__)
+
+
+async def run() -> None:
+    Base.metadata.create_all(bind=engine)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+
+    # Jobs hand messages to the embedded communication worker, which lives on this loop.
+    await startup_embedded_communication()
+    start_scheduler(mode='leader')
+    logger.info('scheduler_process_started')
+    try:
+        await stop.wait()
+    finally:
+        stop_scheduler()
+        await shutdown_embedded_communication()
+        flush_cache_metrics()
+        logger.info('scheduler_process_stopped')
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s %(name)s %(message)s',
+    )
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
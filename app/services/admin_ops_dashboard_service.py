@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 
 from app.cache import cache
 from app.core.time_provider import TimeProvider, default_time_provider
+from app.db import reads_from_replica
 from app.models import (
     AttendanceRecord,
     AuthUser,
@@ -491,6 +492,7 @@ def _build_automation_health(db: Session, now: datetime) -> dict:
 
 
 @timed_service('admin_ops_dashboard')
+@reads_from_replica
 def get_admin_ops_dashboard(
     db: Session,
     *,
@@ -1,4 +1,5 @@
 from datetime import date
+import hashlib
 import logging
 from sqlalchemy import and_
 from sqlalchemy.orm import Session
@@ -8,8 +9,10 @@ from app.services.access_scope_service import get_teacher_batch_ids
 from app.services.batch_membership_service import list_active_student_ids_for_batch
 from app.services.center_scope_service import get_current_center_id
 from app.services.automation_failure_service import log_automation_failure
+from app.services.automation_outbox_service import POST_CLASS_EVENT, enqueue_outbox_event
+from app.services.insights_service import invalidate_insights
 from app.services.post_class_pipeline import run_post_class_pipeline
-from app.services.post_class_automation_engine import run_post_class_automation
+from app.services.snapshot_journal_service import record_bulk_student_writes
 from app.utils.time_utils import get_utcnow
 
 logger = logging.getLogger(__name__)
@@ -19,6 +22,14 @@ class SafeConflictError(ValueError):
     pass
 
 
+def _post_class_idempotency_key(session_id: int, *, absent_ids, unpaid_present_ids, ad_hoc: bool) -> str:
+    """Scheduled sessions run post-class once; an ad-hoc re-submit is new work when the targets change."""
+    if not ad_hoc:
+        return f'post_class:{session_id}'
+    targets = f"{sorted(int(i) for i in absent_ids)}|{sorted(int(i) for i in unpaid_present_ids)}"
+    return f'post_class:{session_id}:{hashlib.sha1(targets.encode()).hexdigest()[:12]}'
+
+
 def _idempotent_submit_response(
     db: Session,
     *,
@@ -119,6 +130,86 @@ def get_attendance_for_batch_today(
     return result
 
 
+def _upsert_attendance_records(
+    db: Session,
+    *,
+    attendance_date: date,
+    records: list[dict],
+    center_id: int,
+) -> list[AttendanceRecord]:
+    """Write one record per student for `attendance_date` in a fixed number of statements.
+
+    Existing rows come from a single prefetch and are updated through the session;
+    new rows go in as one INSERT ... ON CONFLICT on dialects that support it, so a
+    concurrent submit for the same student and date updates instead of failing.
+    """
+    items: dict[int, dict] = {}
+    for item in records:
+        items[int(item['student_id'])] = item  # last entry for a student wins
+    if not items:
+        return []
+
+    existing = {
+        rec.student_id: rec
+        for rec in db.query(AttendanceRecord).filter(
+            AttendanceRecord.student_id.in_(list(items)),
+            AttendanceRecord.attendance_date == attendance_date,
+        )
+    }
+    for student_id, rec in existing.items():
+        rec.status = items[student_id]['status']
+        rec.comment = items[student_id].get('comment', '')
+
+    now = get_utcnow()
+    new_rows = [
+        {
+            'student_id': student_id,
+            'attendance_date': attendance_date,
+            'status': item['status'],
+            'comment': item.get('comment', ''),
+            'marked_at': now,
+            'updated_at': now,
+        }
+        for student_id, item in items.items()
+        if student_id not in existing
+    ]
+    dialect = db.get_bind().dialect.name
+    if new_rows and dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(AttendanceRecord).values(new_rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['student_id', 'attendance_date'],
+            set_={
+                'status': stmt.excluded.status,
+                'comment': stmt.excluded.comment,
+                'updated_at': stmt.excluded.updated_at,
+            },
+        )
+        db.execute(stmt)
+        # Core writes skip the before_flush journal, so mark the snapshots here.
+        record_bulk_student_writes(
+            db,
+            center_id=center_id,
+            student_ids=[row['student_id'] for row in new_rows],
+            source='AttendanceRecord',
+        )
+        inserted = db.query(AttendanceRecord).filter(
+            AttendanceRecord.student_id.in_([row['student_id'] for row in new_rows]),
+            AttendanceRecord.attendance_date == attendance_date,
+        )
+        existing.update({rec.student_id: rec for rec in inserted})
+    elif new_rows:
+        for row in new_rows:
+            rec = AttendanceRecord(**row)
+            db.add(rec)
+            existing[row['student_id']] = rec
+    db.flush()
+    return [existing[student_id] for student_id in items]
+
+
 def submit_attendance(
     db: Session,
     batch_id: int,
@@ -165,26 +256,12 @@ def submit_attendance(
     if not batch:
         raise ValueError('Batch not found')
 
-    created = []
-    for item in records:
-        existing = db.query(AttendanceRecord).filter(
-            AttendanceRecord.student_id == item['student_id'],
-            AttendanceRecord.attendance_date == attendance_date,
-        ).first()
-        if existing:
-            existing.status = item['status']
-            existing.comment = item.get('comment', '')
-            rec = existing
-        else:
-            rec = AttendanceRecord(
-                student_id=item['student_id'],
-                attendance_date=attendance_date,
-                status=item['status'],
-                comment=item.get('comment', ''),
-            )
-            db.add(rec)
-        created.append(rec)
-    db.flush()
+    created = _upsert_attendance_records(
+        db,
+        attendance_date=attendance_date,
+        records=records,
+        center_id=int(get_current_center_id() or batch.center_id or 0),
+    )
 
     should_run_post_class = True
     if session_row is not None:
@@ -214,10 +291,35 @@ def submit_attendance(
                 scheduled_start=scheduled_start,
                 topic_planned=topic_planned,
                 topic_completed=topic_completed,
+                notify_parents=False,
             )
-            session_id = pipeline_result.get('class_summary', {}).get('class_session_id')
+            session_id = int(pipeline_result.get('class_summary', {}).get('class_session_id') or 0)
             if session_id:
-                run_post_class_automation(db, session_id=session_id, trigger_source='manual_submit')
+                # Telegram fan-out happens in the outbox worker, committed atomically with the records.
+                targets = pipeline_result.get('parent_notification_targets') or {}
+                absent_ids = list(targets.get('absent_ids') or [])
+                unpaid_present_ids = list(targets.get('unpaid_present_ids') or [])
+                enqueue_outbox_event(
+                    db,
+                    event_type=POST_CLASS_EVENT,
+                    aggregate_type='class_session',
+                    aggregate_id=session_id,
+                    idempotency_key=_post_class_idempotency_key(
+                        session_id,
+                        absent_ids=absent_ids,
+                        unpaid_present_ids=unpaid_present_ids,
+                        ad_hoc=session_row is None,
+                    ),
+                    center_id=int(get_current_center_id() or 1),
+                    payload={
+                        'class_session_id': session_id,
+                        'batch_id': int(batch_id),
+                        'attendance_date': attendance_date.isoformat(),
+                        'absent_ids': absent_ids,
+                        'unpaid_present_ids': unpaid_present_ids,
+                        'trigger_source': 'manual_submit',
+                    },
+                )
         except Exception as exc:
             post_class_error = True
             logger.error(
@@ -256,5 +358,6 @@ def submit_attendance(
                 if post_class_error:
                     processed_session.post_class_error = True
     db.commit()
+    invalidate_insights(int(get_current_center_id() or batch.center_id or 1))
 
     return {'updated_records': len(created), **pipeline_result}
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models import AttendanceRecord
+
+
+WEAK_STATUSES = ('Absent', 'Late')
+_PREFETCH_CHUNK_SIZE = 500
+
+
+@dataclass(frozen=True)
+class AttendanceStreak:
+    """A student's latest `depth` attendance records, summarised."""
+
+    student_id: int
+    sample_size: int
+    weak_streak: int
+    absent_count: int
+
+
+def recent_attendance_streaks(db: Session, student_ids: list[int], *, depth: int) -> dict[int, AttendanceStreak]:
+    """Trailing Absent/Late streak and absence count over each student's latest `depth` records.
+
+    One windowed query per chunk of students: records are ranked newest first, and
+    the streak ends at the first record that is neither Absent nor Late. Students
+    without records are left out; streaks longer than `depth` read as `depth`.
+    """
+    depth = max(1, int(depth))
+    ids = sorted({int(student_id) for student_id in student_ids})
+    streaks: dict[int, AttendanceStreak] = {}
+    for start in range(0, len(ids), _PREFETCH_CHUNK_SIZE):
+        ranked = (
+            db.query(
+                AttendanceRecord.student_id.label('student_id'),
+                AttendanceRecord.status.label('status'),
+                func.row_number()
+                .over(
+                    partition_by=AttendanceRecord.student_id,
+                    order_by=(AttendanceRecord.attendance_date.desc(), AttendanceRecord.id.desc()),
+                )
+                .label('position'),
+            )
+            .filter(AttendanceRecord.student_id.in_(ids[start : start + _PREFETCH_CHUNK_SIZE]))
+            .subquery()
+        )
+        first_break = func.min(case((func.coalesce(ranked.c.status, '').notin_(WEAK_STATUSES), ranked.c.position)))
+        rows = (
+            db.query(
+                ranked.c.student_id,
+                func.count().label('sample_size'),
+                first_break.label('first_break'),
+                func.sum(case((ranked.c.status == 'Absent', 1), else_=0)).label('absent_count'),
+            )
+            .filter(ranked.c.position <= depth)
+            .group_by(ranked.c.student_id)
+            .all()
+        )
+        for row in rows:
+            sample_size = int(row.sample_size or 0)
+            streaks[int(row.student_id)] = AttendanceStreak(
+                student_id=int(row.student_id),
+                sample_size=sample_size,
+                weak_streak=int(row.first_break) - 1 if row.first_break is not None else sample_size,
+                absent_count=int(row.absent_count or 0),
+            )
+    return streaks
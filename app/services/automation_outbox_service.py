@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.metrics import registry
+from app.models import AutomationOutbox, ClassSession
+from app.services.automation_failure_service import log_automation_failure
+from app.services.center_scope_service import center_context
+from app.services.post_class_pipeline import run_post_class_side_effects
+from app.utils.time_utils import get_utcnow
+
+
+logger = logging.getLogger(__name__)
+
+POST_CLASS_EVENT = 'post_class.attendance_submitted'
+
+STATUS_PENDING = 'pending'
+STATUS_PROCESSING = 'processing'
+STATUS_DONE = 'done'
+STATUS_DEAD = 'dead'
+_UNFINISHED = (STATUS_PENDING, STATUS_PROCESSING)
+
+_RETRY_BASE_SECONDS = 30
+_RETRY_MAX_SECONDS = 3600
+
+_outbox_depth = registry.gauge('automation_outbox_depth', 'Unfinished outbox events per center.')
+_outbox_lag = registry.gauge('automation_outbox_lag_seconds', 'Age of the oldest unfinished outbox event per center.')
+_outbox_dead = registry.gauge('automation_outbox_dead', 'Dead-lettered outbox events per center.')
+
+_HANDLERS: dict[str, Callable[[Session, dict], object]] = {
+    POST_CLASS_EVENT: run_post_class_side_effects,
+}
+
+
+def enqueue_outbox_event(
+    db: Session,
+    *,
+    event_type: str,
+    aggregate_type: str,
+    aggregate_id: int,
+    idempotency_key: str,
+    payload: dict,
+    center_id: int,
+    now: datetime | None = None,
+) -> AutomationOutbox | None:
+    """Stage a side effect in the caller's transaction; the worker delivers it after commit.
+
+    Returns None when an event with the same idempotency key was already enqueued.
+    """
+    for pending in db.new:
+        if isinstance(pending, AutomationOutbox) and pending.idempotency_key == idempotency_key:
+            return None
+    existing = db.query(AutomationOutbox.id).filter(AutomationOutbox.idempotency_key == idempotency_key).first()
+    if existing:
+        logger.info('automation_outbox_duplicate_skipped', extra={'idempotency_key': idempotency_key})
+        return None
+    ts = now or get_utcnow()
+    row = AutomationOutbox(
+        center_id=int(center_id or 1),
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=int(aggregate_id or 0),
+        idempotency_key=idempotency_key,
+        payload_json=json.dumps(payload, default=str),
+        status=STATUS_PENDING,
+        attempts=0,
+        next_attempt_at=ts,
+        created_at=ts,
+    )
+    db.add(row)
+    return row
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(_RETRY_MAX_SECONDS, _RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1))))
+
+
+def _claim_batch(db: Session, *, center_id: int, now: datetime, limit: int) -> list[tuple[int, tuple[str, int]]]:
+    """Lease up to `limit` due rows, oldest first, without overtaking an unfinished earlier row of the same aggregate.
+
+    Rows stuck in `processing` past their lease (a worker died mid-run) are reclaimed.
+    """
+    lease_until = now + timedelta(seconds=max(1, int(settings.automation_outbox_lease_seconds)))
+    candidates = (
+        db.query(
+            AutomationOutbox.id,
+            AutomationOutbox.aggregate_type,
+            AutomationOutbox.aggregate_id,
+            AutomationOutbox.status,
+            AutomationOutbox.next_attempt_at,
+            AutomationOutbox.locked_until,
+        )
+        .filter(
+            AutomationOutbox.center_id == center_id,
+            AutomationOutbox.status.in_(_UNFINISHED),
+        )
+        .order_by(AutomationOutbox.id.asc())
+        .limit(limit * 4)
+        .all()
+    )
+    claimed: list[tuple[int, tuple[str, int]]] = []
+    blocked: set[tuple[str, int]] = set()
+    for row in candidates:
+        aggregate = (str(row.aggregate_type), int(row.aggregate_id))
+        if aggregate in blocked:
+            continue
+        due = row.status == STATUS_PENDING and row.next_attempt_at <= now
+        stale = row.status == STATUS_PROCESSING and (row.locked_until is None or row.locked_until <= now)
+        if not (due or stale):
+            blocked.add(aggregate)
+            continue
+        result = db.execute(
+            update(AutomationOutbox)
+            .where(
+                AutomationOutbox.id == row.id,
+                AutomationOutbox.status == row.status,
+                or_(AutomationOutbox.locked_until.is_(None), AutomationOutbox.locked_until <= now),
+            )
+            .values(status=STATUS_PROCESSING, locked_until=lease_until)
+        )
+        if result.rowcount != 1:
+            # Another worker got there first; leave the rest of this aggregate to it.
+            blocked.add(aggregate)
+            continue
+        claimed.append((int(row.id), aggregate))
+        if len(claimed) >= limit:
+            break
+    db.commit()
+    return claimed
+
+
+def _dead_letter(db: Session, row: AutomationOutbox, error_message: str) -> None:
+    row.status = STATUS_DEAD
+    row.locked_until = None
+    log_automation_failure(
+        db,
+        job_name='automation_outbox',
+        entity_type=row.aggregate_type or row.event_type,
+        entity_id=int(row.aggregate_id or 0) or None,
+        error_message=f'{row.event_type}: {error_message}',
+        center_id=int(row.center_id or 1),
+    )
+    if row.aggregate_type == 'class_session' and row.aggregate_id:
+        session_row = db.query(ClassSession).filter(ClassSession.id == row.aggregate_id).first()
+        if session_row is not None:
+            session_row.post_class_error = True
+
+
+def _process_group(session_factory: sessionmaker, center_id: int, outbox_ids: list[int], now: datetime) -> dict[str, int]:
+    """Run one aggregate's leased rows in id order, stopping at the first failure."""
+    counts = {'done': 0, 'retried': 0, 'dead': 0}
+    max_attempts = max(1, int(settings.automation_outbox_max_attempts))
+    db = session_factory()
+    try:
+        with center_context(center_id):
+            for position, outbox_id in enumerate(outbox_ids):
+                row = db.get(AutomationOutbox, outbox_id)
+                if row is None or row.status != STATUS_PROCESSING:
+                    continue
+                try:
+                    handler = _HANDLERS.get(row.event_type)
+                    if handler is None:
+                        raise LookupError(f'no outbox handler for {row.event_type}')
+                    handler(db, json.loads(row.payload_json or '{}'))
+                    row = db.get(AutomationOutbox, outbox_id)
+                    row.status = STATUS_DONE
+                    row.attempts = int(row.attempts or 0) + 1
+                    row.locked_until = None
+                    row.last_error = ''
+                    row.processed_at = now
+                    db.commit()
+                    counts['done'] += 1
+                except Exception as exc:
+                    db.rollback()
+                    logger.exception('automation_outbox_handler_failed id=%s event=%s', outbox_id, getattr(row, 'event_type', ''))
+                    row = db.get(AutomationOutbox, outbox_id)
+                    row.attempts = int(row.attempts or 0) + 1
+                    row.last_error = str(exc)[:2000]
+                    if row.attempts >= max_attempts:
+                        _dead_letter(db, row, str(exc))
+                        counts['dead'] += 1
+                    else:
+                        row.status = STATUS_PENDING
+                        row.locked_until = None
+                        row.next_attempt_at = now + _retry_delay(row.attempts)
+                        counts['retried'] += 1
+                    # Later events of this aggregate wait for the failed one.
+                    for later_id in outbox_ids[position + 1:]:
+                        later = db.get(AutomationOutbox, later_id)
+                        if later is not None and later.status == STATUS_PROCESSING:
+                            later.status = STATUS_PENDING
+                            later.locked_until = None
+                    db.commit()
+                    break
+    finally:
+        db.close()
+    return counts
+
+
+def outbox_stats(db: Session, *, center_id: int | None = None, now: datetime | None = None) -> dict:
+    """Queue depth (pending + in-flight), age of the oldest undelivered event, and dead letters."""
+    ts = now or get_utcnow()
+    unfinished = db.query(func.count(AutomationOutbox.id), func.min(AutomationOutbox.created_at)).filter(
+        AutomationOutbox.status.in_(_UNFINISHED)
+    )
+    dead = db.query(func.count(AutomationOutbox.id)).filter(AutomationOutbox.status == STATUS_DEAD)
+    if center_id:
+        unfinished = unfinished.filter(AutomationOutbox.center_id == center_id)
+        dead = dead.filter(AutomationOutbox.center_id == center_id)
+    depth, oldest = unfinished.one()
+    lag_seconds = max(0.0, (ts - oldest).total_seconds()) if oldest else 0.0
+    return {'depth': int(depth or 0), 'lag_seconds': round(lag_seconds, 1), 'dead': int(dead.scalar() or 0)}
+
+
+def drain_automation_outbox(
+    *,
+    center_id: int,
+    session_factory: sessionmaker | None = None,
+    batch_size: int | None = None,
+    max_workers: int | None = None,
+    now: datetime | None = None,
+) -> dict:
+    """Deliver due outbox events for one center on a small worker pool, one worker per aggregate."""
+    if session_factory is None:
+        from app.db import SessionLocal
+
+        session_factory = SessionLocal
+    ts = now or get_utcnow()
+    limit = max(1, int(batch_size or settings.automation_outbox_batch_size))
+
+    db = session_factory()
+    try:
+        with center_context(center_id):
+            claimed = _claim_batch(db, center_id=center_id, now=ts, limit=limit)
+    finally:
+        db.close()
+
+    groups: dict[tuple[str, int], list[int]] = {}
+    for outbox_id, aggregate in claimed:
+        groups.setdefault(aggregate, []).append(outbox_id)
+
+    results: list[dict[str, int]] = []
+    if groups:
+        workers = max(1, min(int(max_workers or settings.automation_outbox_workers), len(groups)))
+        if workers == 1:
+            results = [_process_group(session_factory, center_id, ids, ts) for ids in groups.values()]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='automation-outbox') as pool:
+                results = list(pool.map(lambda ids: _process_group(session_factory, center_id, ids, ts), groups.values()))
+
+    summary = {
+        'claimed': len(claimed),
+        'done': sum(item['done'] for item in results),
+        'retried': sum(item['retried'] for item in results),
+        'dead': sum(item['dead'] for item in results),
+    }
+    db = session_factory()
+    try:
+        stats = outbox_stats(db, center_id=center_id, now=ts)
+    finally:
+        db.close()
+    _outbox_depth.set(stats['depth'], center_id=center_id)
+    _outbox_lag.set(stats['lag_seconds'], center_id=center_id)
+    _outbox_dead.set(stats['dead'], center_id=center_id)
+    logger.info(
+        'automation_outbox_drained center_id=%s claimed=%s done=%s retried=%s dead=%s depth=%s lag_seconds=%s',
+        center_id,
+        summary['claimed'],
+        summary['done'],
+        summary['retried'],
+        summary['dead'],
+        stats['depth'],
+        stats['lag_seconds'],
+    )
+    return {**summary, 'stats': stats}
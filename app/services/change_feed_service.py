@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable
+
+from app.cache import cache, cache_key
+from app.config import settings
+from app.services.center_scope_service import center_context
+
+
+logger = logging.getLogger(__name__)
+
+TOPIC_CALENDAR = 'calendar'
+TOPIC_TODAY = 'today'
+CHANGE_TOPICS = (TOPIC_CALENDAR, TOPIC_TODAY)
+
+_VERSION_PREFIX = 'change_version'
+# Versions only need to outlive the clients comparing them; a reset just looks like one more change.
+_VERSION_TTL_SECONDS = 7 * 24 * 3600
+_RETRY_MS = 5000
+
+
+def _version_key(topic: str, scope: str) -> str:
+    return cache_key(_VERSION_PREFIX, f'{topic}:{scope}')
+
+
+def bump_change_version(topic: str, *, teacher_id: int | None = None) -> None:
+    """Record that `topic` changed in the current center, for one teacher or for everyone.
+
+    Every bump also moves the `any` counter, which is what admins watching all
+    teachers compare.
+    """
+    scope = f'teacher:{int(teacher_id)}' if teacher_id else 'center'
+    for key in (_version_key(topic, scope), _version_key(topic, 'any')):
+        try:
+            cache.incr_counter(key, _VERSION_TTL_SECONDS)
+        except Exception:
+            logger.exception('change_version_bump_failed topic=%s scope=%s', topic, scope)
+
+
+def change_version(topic: str, *, teacher_id: int | None = None) -> str:
+    """Opaque version of what a viewer of `teacher_id`'s data (None: all teachers) sees."""
+    if not teacher_id:
+        return str(cache.read_counter(_version_key(topic, 'any')))
+    center = cache.read_counter(_version_key(topic, 'center'))
+    teacher = cache.read_counter(_version_key(topic, f'teacher:{int(teacher_id)}'))
+    return f'{center}.{teacher}'
+
+
+def change_versions(topics: tuple[str, ...] | list[str], *, teacher_id: int | None = None) -> dict[str, str]:
+    return {topic: change_version(topic, teacher_id=teacher_id) for topic in topics}
+
+
+def _center_versions(center_id: int, topics: list[str], teacher_id: int | None) -> dict[str, str]:
+    with center_context(center_id):
+        return change_versions(topics, teacher_id=teacher_id)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+async def stream_changes(
+    is_disconnected: Callable[[], Awaitable[bool]],
+    *,
+    center_id: int,
+    topics: list[str],
+    teacher_id: int | None = None,
+) -> AsyncIterator[str]:
+    """Server-sent events announcing version changes for `topics`.
+
+    Versions live in the cache; with a shared backend a bump from any worker is
+    seen on the next poll, which `ready` reports as `shared` so clients without it
+    keep polling. The stream ends after `change_feed_max_seconds`; EventSource
+    reconnects on its own and the `ready` event carries the versions to resume from.
+    Cache reads run in a thread so a slow backend never blocks the event loop.
+    """
+    poll_seconds = max(0.05, float(settings.change_feed_poll_seconds))
+    keepalive_seconds = max(1.0, float(settings.change_feed_keepalive_seconds))
+    max_seconds = max(poll_seconds, float(settings.change_feed_max_seconds))
+
+    last = await asyncio.to_thread(_center_versions, center_id, topics, teacher_id)
+    yield f'retry: {_RETRY_MS}\n\n'
+    yield _sse('ready', {'versions': last, 'shared': bool(cache.backend.shared)})
+
+    started = last_sent = time.monotonic()
+    while time.monotonic() - started < max_seconds:
+        await asyncio.sleep(poll_seconds)
+        if await is_disconnected():
+            return
+        current = await asyncio.to_thread(_center_versions, center_id, topics, teacher_id)
+        changed = [topic for topic in topics if current[topic] != last.get(topic)]
+        if changed:
+            for topic in changed:
+                yield _sse('change', {'topic': topic, 'version': current[topic]})
+            last = current
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= keepalive_seconds:
+            yield ': keepalive\n\n'
+            last_sent = time.monotonic()
@@ -1,13 +1,15 @@
 import json
 import logging
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 import httpx
-from sqlalchemy import or_
+from sqlalchemy import insert, or_
 from sqlalchemy.orm import Session
 
 from app.communication.communication_event import CommunicationEvent
 from app.config import settings
 from app.domain.communication_gateway import send_event as gateway_send_event
+from app.domain.communication_gateway import send_event_batch as gateway_send_event_batch
 from app.core.quiet_hours import is_quiet_now as _core_is_quiet_now
 from app.core.time_provider import TimeProvider, default_time_provider
 from app.models import AuthUser, CommunicationLog, Student
@@ -43,6 +45,10 @@ def _should_suppress_non_critical(db: Session, student: Student | None = None, s
     elif student_id is not None:
         row = db.query(Student).filter(Student.id == student_id).first()
         batch_id = row.batch_id if row else None
+    return _should_suppress_for_batch(db, batch_id)
+
+
+def _should_suppress_for_batch(db: Session, batch_id: int | None) -> bool:
     try:
         return _is_quiet_now_for_batch(db, batch_id=batch_id)
     except Exception:
@@ -266,6 +272,164 @@ def emit_communication_event(
     return primary
 
 
+@dataclass
+class StudentMessage:
+    """One student's message for `emit_student_events_batch`."""
+
+    event: CommunicationEvent
+    message: str
+    chat_id: str
+    student_id: int
+    batch_id: int | None = None
+    reference_id: int | None = None
+
+
+_DUPLICATE_WINDOW_SECONDS = 900
+_PREFETCH_CHUNK_SIZE = 500
+
+
+def _recently_sent_messages(
+    db: Session,
+    student_ids: list[int],
+    *,
+    since: datetime,
+) -> set[tuple[int, str]]:
+    """(student_id, message) pairs already sent on Telegram since `since`; the set form of `_is_duplicate_notification`."""
+    sent: set[tuple[int, str]] = set()
+    ids = sorted(set(student_ids))
+    for start in range(0, len(ids), _PREFETCH_CHUNK_SIZE):
+        rows = (
+            db.query(CommunicationLog.student_id, CommunicationLog.message)
+            .filter(
+                CommunicationLog.channel == 'telegram',
+                CommunicationLog.student_id.in_(ids[start : start + _PREFETCH_CHUNK_SIZE]),
+                CommunicationLog.created_at >= since,
+                or_(
+                    CommunicationLog.delivery_status.in_(['sent', 'duplicate_suppressed']),
+                    CommunicationLog.status == 'sent',
+                ),
+            )
+            .all()
+        )
+        sent.update((int(row.student_id), str(row.message or '')) for row in rows)
+    return sent
+
+
+def emit_student_events_batch(
+    db: Session,
+    items: list[StudentMessage],
+    *,
+    notification_type: str,
+    time_provider: TimeProvider = default_time_provider,
+) -> list[dict]:
+    """Batch form of `emit_communication_event` for non-critical student messages.
+
+    Rule checks and quiet hours are evaluated once per event type and batch,
+    recent duplicates are prefetched in one query, and the remaining messages go
+    through `send_event_batch` once per event type. Results follow `items` order.
+    """
+    results: list[dict | None] = [None] * len(items)
+    now = time_provider.now().replace(tzinfo=None)
+    recent = _recently_sent_messages(
+        db,
+        [item.student_id for item in items if item.chat_id],
+        since=now - timedelta(seconds=_DUPLICATE_WINDOW_SECONDS),
+    )
+    allowed_by_event: dict[str, bool] = {}
+    quiet_by_batch: dict[int | None, bool] = {}
+    pending: dict[str, list[int]] = {}
+    for idx, item in enumerate(items):
+        event = item.event
+        if not item.chat_id:
+            results[idx] = {'ok': False, 'status': 'skipped', 'reason': 'missing_chat_id'}
+            continue
+        if 'telegram' not in event.channels:
+            results[idx] = {'ok': False, 'status': 'skipped', 'reason': 'unsupported_channel'}
+            continue
+        if event.event_type not in allowed_by_event:
+            allowed, _ = should_dispatch_for_teacher(
+                db,
+                teacher_id=event.actor_id,
+                event_type=event.event_type,
+                notification_type=notification_type,
+            )
+            allowed_by_event[event.event_type] = allowed
+        if not allowed_by_event[event.event_type]:
+            results[idx] = {'ok': False, 'status': 'suppressed', 'reason': 'automation_rule'}
+            continue
+        if item.batch_id not in quiet_by_batch:
+            quiet_by_batch[item.batch_id] = _should_suppress_for_batch(db, item.batch_id)
+        if quiet_by_batch[item.batch_id]:
+            results[idx] = {'ok': False, 'status': 'suppressed', 'reason': 'quiet_hours'}
+            continue
+        if (item.student_id, item.message) in recent:
+            results[idx] = {'ok': True, 'status': 'duplicate_suppressed'}
+            continue
+        pending.setdefault(event.event_type, []).append(idx)
+
+    new_logs: list[dict] = []
+    for event_type, indexes in pending.items():
+        first = items[indexes[0]].event
+        outcomes = gateway_send_event_batch(
+            event_type,
+            {
+                'db': db,
+                'tenant_id': first.tenant_id,
+                'user_id': str(first.actor_id) if first.actor_id is not None else 'system',
+                'channels': first.channels,
+                'priority': first.priority,
+                'entity_type': first.entity_type,
+                'reply_markup': {},
+                'critical': False,
+                'notification_type': notification_type,
+            },
+            [
+                {
+                    'chat_id': items[idx].chat_id,
+                    'message': items[idx].message,
+                    'event_payload': items[idx].event.payload,
+                    'entity_type': items[idx].event.entity_type,
+                    'entity_id': items[idx].event.entity_id,
+                    'student_id': items[idx].student_id,
+                    'reference_id': items[idx].reference_id,
+                }
+                for idx in indexes
+            ],
+        )
+        for idx, outcome in zip(indexes, outcomes):
+            primary = outcome or {'ok': False, 'status': 'failed'}
+            results[idx] = primary
+            if primary.get('log_id'):
+                continue
+            item = items[idx]
+            status = 'sent' if primary.get('ok') else 'failed'
+            new_logs.append(
+                {
+                    'student_id': item.student_id,
+                    'channel': 'telegram',
+                    'message': item.message,
+                    'status': status,
+                    'created_at': now,
+                    'telegram_chat_id': item.chat_id,
+                    'notification_type': notification_type,
+                    'event_type': event_type,
+                    'reference_id': item.reference_id,
+                    'delivery_attempts': 1,
+                    'last_attempt_at': now,
+                    'delivery_status': status,
+                }
+            )
+    if new_logs:
+        try:
+            # One executemany instead of a flush that inserts row by row.
+            db.execute(insert(CommunicationLog), new_logs)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception('notification_log_write_failed', extra={'channel': 'telegram', 'count': len(new_logs)})
+    return [result or {'ok': False, 'status': 'failed'} for result in results]
+
+
 def _teacher_delete_minutes(db: Session, teacher_id: int) -> int:
     if not teacher_id:
         return 15
@@ -9,8 +9,6 @@ from sqlalchemy.orm import Session
 from app.models import (
     AttendanceRecord,
     Batch,
-    BatchSchedule,
-    CalendarOverride,
     ClassSession,
     FeeRecord,
     PendingAction,
@@ -20,16 +18,20 @@ from app.models import (
 )
 from app.cache import cache
 from app.core.time_provider import TimeProvider, default_time_provider
+from app.db import reads_from_replica
 from app.services.access_scope_service import get_teacher_batch_ids
 from app.services.center_scope_service import get_actor_center_id
+from app.services.change_feed_service import TOPIC_TODAY, bump_change_version
+from app.services.occurrence_index_service import list_occurrences
 from app.metrics import timed_service
 
 
 logger = logging.getLogger(__name__)
 
 
-def clear_today_view_cache() -> None:
+def clear_today_view_cache(*, teacher_id: int | None = None) -> None:
     cache.invalidate_prefix('today_view')
+    bump_change_version(TOPIC_TODAY, teacher_id=teacher_id)
 
 
 def _warn_missing_center_filter(*, query_name: str) -> None:
@@ -119,77 +121,42 @@ def _build_today_classes(
     center_id: int | None = None,
     time_provider: TimeProvider = default_time_provider,
 ) -> list[dict]:
-    weekday = today.weekday()
-    schedule_query = (
-        db.query(BatchSchedule, Batch)
-        .join(Batch, Batch.id == BatchSchedule.batch_id)
-        .filter(BatchSchedule.weekday == weekday, Batch.active.is_(True))
-        .order_by(BatchSchedule.start_time.asc(), BatchSchedule.id.asc())
+    if int(center_id or 0) <= 0:
+        _warn_missing_center_filter(query_name='build_today_classes')
+        return []
+    occurrences = list_occurrences(
+        db,
+        center_id=int(center_id),
+        start_date=today,
+        end_date=today,
+        batch_ids=batch_scope or None,
+        time_provider=time_provider,
     )
-    if int(center_id or 0) > 0:
-        schedule_query = schedule_query.filter(Batch.center_id == int(center_id))
-    if batch_scope:
-        schedule_query = schedule_query.filter(BatchSchedule.batch_id.in_(batch_scope))
-    schedules = schedule_query.all()
-    schedule_batch_ids = {int(batch.id) for _, batch in schedules}
-
-    override_query = (
-        db.query(CalendarOverride, Batch)
-        .join(Batch, Batch.id == CalendarOverride.batch_id)
-        .filter(CalendarOverride.override_date == today, Batch.active.is_(True))
-        .order_by(CalendarOverride.id.asc())
+    if not occurrences:
+        return []
+    batch_rows = (
+        db.query(Batch)
+        .filter(Batch.id.in_({row.batch_id for row in occurrences}), Batch.center_id == int(center_id))
+        .all()
     )
-    if int(center_id or 0) > 0:
-        override_query = override_query.filter(Batch.center_id == int(center_id))
-    if batch_scope:
-        override_query = override_query.filter(CalendarOverride.batch_id.in_(batch_scope))
-    overrides = override_query.all()
-    override_by_batch: dict[int, CalendarOverride] = {}
-    for override_row, _ in overrides:
-        override_by_batch[int(override_row.batch_id)] = override_row
+    batch_map = {int(batch.id): batch for batch in batch_rows}
 
     slot_rows: list[dict] = []
     seen_slot_keys: set[tuple[int, str, int]] = set()
-    for schedule, batch in schedules:
-        override = override_by_batch.get(int(batch.id))
-        if override and override.cancelled:
-            continue
-        start_time = (override.new_start_time if (override and override.new_start_time) else schedule.start_time) or schedule.start_time
-        duration_minutes = int(
-            override.new_duration_minutes
-            if (override and override.new_duration_minutes)
-            else (schedule.duration_minutes or batch.default_duration_minutes or 60)
-        )
-        slot_key = (int(batch.id), str(start_time), int(duration_minutes))
-        if slot_key in seen_slot_keys:
-            continue
-        seen_slot_keys.add(slot_key)
-        slot_rows.append(
-            {
-                'batch': batch,
-                'schedule_id': schedule.id,
-                'start_time': start_time,
-                'duration_minutes': duration_minutes,
-            }
-        )
-
-    for override, batch in overrides:
-        batch_id = int(batch.id)
-        if batch_id in schedule_batch_ids:
-            continue
-        if override.cancelled or not override.new_start_time:
+    for occurrence in occurrences:
+        batch = batch_map.get(occurrence.batch_id)
+        if batch is None:
             continue
-        duration_minutes = int(override.new_duration_minutes or batch.default_duration_minutes or 60)
-        slot_key = (int(batch.id), str(override.new_start_time), duration_minutes)
+        slot_key = (occurrence.batch_id, occurrence.start_time, occurrence.duration_minutes)
         if slot_key in seen_slot_keys:
             continue
         seen_slot_keys.add(slot_key)
         slot_rows.append(
             {
                 'batch': batch,
-                'schedule_id': None,
-                'start_time': override.new_start_time,
-                'duration_minutes': duration_minutes,
+                'schedule_id': occurrence.schedule_id,
+                'start_time': occurrence.start_time,
+                'duration_minutes': occurrence.duration_minutes,
             }
         )
 
@@ -364,6 +331,7 @@ def _build_flags(db: Session, *, today: date, student_scope: set[int] | None, ce
 
 
 @timed_service('dashboard_today_view')
+@reads_from_replica
 def get_today_view(
     db: Session,
     *,
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sqlalchemy import case, extract, func
+from sqlalchemy.orm import Session
+
+from app.cache import cache
+from app.models import FeeRecord, Student
+
+
+FEE_STATUSES = ('due', 'overdue', 'paid')
+AGING_BUCKETS = ('1-30', '31-60', '61-90', '90+')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DASHBOARD_CACHE_TTL_SECONDS = 300
+
+
+def _status_expr(today: date):
+    return case(
+        (FeeRecord.is_paid.is_(True), 'paid'),
+        (FeeRecord.due_date < today, 'overdue'),
+        else_='due',
+    )
+
+
+def _center_fees(db: Session, center_id: int, *columns):
+    return db.query(*columns).join(Student, Student.id == FeeRecord.student_id).filter(Student.center_id == center_id)
+
+
+def _status_filter(query, status: str, today: date):
+    if status == 'paid':
+        return query.filter(FeeRecord.is_paid.is_(True))
+    if status == 'overdue':
+        return query.filter(FeeRecord.is_paid.is_(False), FeeRecord.due_date < today)
+    if status == 'due':
+        return query.filter(FeeRecord.is_paid.is_(False), FeeRecord.due_date >= today)
+    raise ValueError(f'Unknown fee status: {status}')
+
+
+def fee_summary(db: Session, *, center_id: int, today: date, student_ids: set[int] | None = None) -> dict:
+    """Per-status counts and amounts, overdue aging and a monthly trend, all grouped in SQL."""
+    status = _status_expr(today)
+    outstanding = FeeRecord.amount - FeeRecord.paid_amount
+
+    def _scoped(*columns):
+        query = _center_fees(db, center_id, *columns)
+        if student_ids is not None:
+            query = query.filter(FeeRecord.student_id.in_(student_ids))
+        return query
+
+    totals = {name: {'count': 0, 'amount': 0.0, 'paid_amount': 0.0, 'outstanding': 0.0} for name in FEE_STATUSES}
+    status_rows = _scoped(
+        status.label('status'),
+        func.count(FeeRecord.id),
+        func.coalesce(func.sum(FeeRecord.amount), 0.0),
+        func.coalesce(func.sum(FeeRecord.paid_amount), 0.0),
+    ).group_by(status)
+    for name, count, amount, paid_amount in status_rows:
+        totals[name] = {
+            'count': int(count or 0),
+            'amount': float(amount or 0.0),
+            'paid_amount': float(paid_amount or 0.0),
+            'outstanding': max(float(amount or 0.0) - float(paid_amount or 0.0), 0.0),
+        }
+
+    age = case(
+        (FeeRecord.due_date >= today - timedelta(days=30), '1-30'),
+        (FeeRecord.due_date >= today - timedelta(days=60), '31-60'),
+        (FeeRecord.due_date >= today - timedelta(days=90), '61-90'),
+        else_='90+',
+    )
+    aging = {name: {'count': 0, 'outstanding': 0.0} for name in AGING_BUCKETS}
+    aging_rows = _status_filter(
+        _scoped(age.label('age'), func.count(FeeRecord.id), func.coalesce(func.sum(outstanding), 0.0)),
+        'overdue',
+        today,
+    ).group_by(age)
+    for name, count, amount in aging_rows:
+        aging[name] = {'count': int(count or 0), 'outstanding': float(amount or 0.0)}
+
+    year = extract('year', FeeRecord.due_date)
+    month = extract('month', FeeRecord.due_date)
+    monthly: dict[str, dict] = {}
+    month_rows = _scoped(year, month, status, func.count(FeeRecord.id)).group_by(year, month, status).order_by(year, month)
+    for year_value, month_value, name, count in month_rows:
+        key = f'{int(year_value):04d}-{int(month_value):02d}'
+        bucket = monthly.setdefault(key, {'month': key, 'paid': 0, 'due': 0, 'overdue': 0})
+        bucket[name] = int(count or 0)
+
+    return {'totals': totals, 'aging': aging, 'monthly': list(monthly.values())}
+
+
+def list_fee_records(
+    db: Session,
+    *,
+    center_id: int,
+    status: str,
+    today: date,
+    after_id: int | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    student_ids: set[int] | None = None,
+) -> dict:
+    """One keyset page of a center's fee records in `status`, ordered by id."""
+    page_size = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    query = _status_filter(
+        _center_fees(
+            db,
+            center_id,
+            FeeRecord.id,
+            FeeRecord.student_id,
+            FeeRecord.amount,
+            FeeRecord.paid_amount,
+            FeeRecord.due_date,
+            FeeRecord.upi_link,
+            FeeRecord.is_paid,
+        ),
+        status,
+        today,
+    )
+    if student_ids is not None:
+        query = query.filter(FeeRecord.student_id.in_(student_ids))
+    if after_id:
+        query = query.filter(FeeRecord.id > int(after_id))
+    rows = query.order_by(FeeRecord.id.asc()).limit(page_size + 1).all()
+    items = [
+        {
+            'id': row.id,
+            'student_id': row.student_id,
+            'amount': row.amount,
+            'paid_amount': row.paid_amount,
+            'due_date': str(row.due_date),
+            'upi_link': row.upi_link,
+            'is_paid': row.is_paid,
+        }
+        for row in rows[:page_size]
+    ]
+    next_cursor = items[-1]['id'] if len(rows) > page_size else None
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def _dashboard_cache_key(center_id: int, today: date, page_size: int) -> str:
+    return f'center:{int(center_id)}:fee_dashboard:{today.isoformat()}:{int(page_size)}'
+
+
+def invalidate_fee_dashboard(center_id: int) -> None:
+    cache.invalidate_prefix(f'center:{int(center_id)}:fee_dashboard')
+
+
+def build_fee_dashboard(
+    db: Session,
+    *,
+    center_id: int,
+    today: date,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    student_ids: set[int] | None = None,
+) -> dict:
+    """Summary plus the first page of each status; unfiltered dashboards are cached per center and day."""
+    key = _dashboard_cache_key(center_id, today, page_size) if student_ids is None else None
+    if key is not None:
+        cached = cache.get_cached(key)
+        if cached is not None:
+            return cached
+    payload: dict = {'center_id': int(center_id), 'summary': fee_summary(db, center_id=center_id, today=today, student_ids=student_ids)}
+    cursors: dict[str, int | None] = {}
+    for status in FEE_STATUSES:
+        page = list_fee_records(db, center_id=center_id, status=status, today=today, limit=page_size, student_ids=student_ids)
+        payload[status] = page['items']
+        cursors[status] = page['next_cursor']
+    payload['next_cursors'] = cursors
+    if key is not None:
+        cache.set_cached(key, payload, ttl=DASHBOARD_CACHE_TTL_SECONDS)
+    return payload
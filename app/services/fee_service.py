@@ -4,8 +4,16 @@ from sqlalchemy.orm import Session
 from app.config import settings
 from app.core.time_provider import TimeProvider, default_time_provider
 from app.models import FeeRecord, Student
+from app.services.center_scope_service import get_current_center_id
 from app.services.comms_service import send_fee_reminder
+from app.services.fee_analytics_service import (
+    DEFAULT_PAGE_SIZE,
+    build_fee_dashboard,
+    invalidate_fee_dashboard,
+    list_fee_records,
+)
 from app.services.inbox_automation import resolve_fee_actions_on_paid
+from app.services.insights_service import invalidate_insights
 from app.services import snapshot_service
 
 
@@ -13,29 +21,49 @@ def build_upi_link(student: Student, amount: float) -> str:
     return f"upi://pay?pa={settings.default_upi_id}&pn=Coaching&am={amount:.2f}&tn=Fee-{student.id}"
 
 
-def get_fee_dashboard(db: Session, *, time_provider: TimeProvider = default_time_provider):
-    today = time_provider.today()
-    all_fees = db.query(FeeRecord).all()
-    due, paid, overdue = [], [], []
-
-    for fee in all_fees:
-        item = {
-            'id': fee.id,
-            'student_id': fee.student_id,
-            'amount': fee.amount,
-            'paid_amount': fee.paid_amount,
-            'due_date': str(fee.due_date),
-            'upi_link': fee.upi_link,
-            'is_paid': fee.is_paid,
-        }
-        if fee.is_paid:
-            paid.append(item)
-        elif fee.due_date < today:
-            overdue.append(item)
-        else:
-            due.append(item)
-
-    return {'due': due, 'paid': paid, 'overdue': overdue}
+def _require_center_id(center_id: int | None) -> int:
+    resolved = int(center_id or get_current_center_id() or 0)
+    if resolved <= 0:
+        raise ValueError('center_id is required')
+    return resolved
+
+
+def get_fee_dashboard(
+    db: Session,
+    *,
+    center_id: int | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    student_ids: set[int] | None = None,
+    time_provider: TimeProvider = default_time_provider,
+):
+    return build_fee_dashboard(
+        db,
+        center_id=_require_center_id(center_id),
+        today=time_provider.today(),
+        page_size=page_size,
+        student_ids=student_ids,
+    )
+
+
+def get_fee_records_page(
+    db: Session,
+    *,
+    status: str,
+    center_id: int | None = None,
+    after_id: int | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    student_ids: set[int] | None = None,
+    time_provider: TimeProvider = default_time_provider,
+):
+    return list_fee_records(
+        db,
+        center_id=_require_center_id(center_id),
+        status=status,
+        today=time_provider.today(),
+        after_id=after_id,
+        limit=limit,
+        student_ids=student_ids,
+    )
 
 
 def mark_fee_paid(
@@ -51,7 +79,10 @@ def mark_fee_paid(
 
     fee.paid_amount += paid_amount
     fee.is_paid = fee.paid_amount >= fee.amount
+    center_id = db.query(Student.center_id).filter(Student.id == fee.student_id).scalar()
     db.commit()
+    invalidate_fee_dashboard(int(center_id or 1))
+    invalidate_insights(int(center_id or 1))
     if fee.is_paid:
         resolve_fee_actions_on_paid(db, student_id=fee.student_id)
 
@@ -94,4 +125,6 @@ def trigger_fee_reminders(db: Session, *, center_id: int, time_provider: TimePro
             db.commit()
         send_fee_reminder(db, student, fee.amount - fee.paid_amount, fee.upi_link)
 
+    if pending:
+        invalidate_fee_dashboard(center_id)
     return len(pending)
@@ -1,56 +1,266 @@
+from __future__ import annotations
+
+import csv
 import json
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Protocol
 
 import gspread
 from google.oauth2.service_account import Credentials
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.core.time_provider import default_time_provider
-from app.models import AttendanceRecord, FeeRecord, Student
+from app.models import AttendanceRecord, BackupLog, FeeRecord, Student
+from app.utils.time_utils import get_utcnow
 
 
-def backup_daily_to_google_sheet(db: Session, *, center_id: int) -> bool:
-    center_id = int(center_id or 0)
-    if center_id <= 0:
-        raise ValueError('center_id is required')
-    if not settings.enable_sheets_backup:
-        return False
-    if not settings.sheet_id or not settings.google_credentials_json:
-        return False
-
-    scopes = ['https://www.googleapis.com/auth/spreadsheets']
-    creds_dict = json.loads(settings.google_credentials_json)
-    credentials = Credentials.from_service_account_info(creds_dict, scopes=scopes)
-    gc = gspread.authorize(credentials)
-    sh = gc.open_by_key(settings.sheet_id)
-
-    worksheet_name = f"backup-{default_time_provider.today()}"
-    try:
-        ws = sh.worksheet(worksheet_name)
-    except gspread.WorksheetNotFound:
-        ws = sh.add_worksheet(title=worksheet_name, rows=1000, cols=10)
+BACKUP_HEADER = ['type', 'record_id', 'student_id', 'date', 'field_1', 'field_2', 'field_3', 'updated_at']
+
+
+class BackupSink(Protocol):
+    name: str
+
+    def write_rows(self, rows: list[list]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class GoogleSheetsSink:
+    """Appends to one running worksheet per center; the header is written when the sheet is created."""
+
+    name = 'sheets'
+
+    def __init__(self, worksheet) -> None:
+        self._worksheet = worksheet
+
+    @classmethod
+    def open(cls, center_id: int) -> 'GoogleSheetsSink | None':
+        if not settings.enable_sheets_backup:
+            return None
+        if not settings.sheet_id or not settings.google_credentials_json:
+            return None
+
+        scopes = ['https://www.googleapis.com/auth/spreadsheets']
+        creds_dict = json.loads(settings.google_credentials_json)
+        credentials = Credentials.from_service_account_info(creds_dict, scopes=scopes)
+        gc = gspread.authorize(credentials)
+        sh = gc.open_by_key(settings.sheet_id)
+
+        worksheet_name = f'backup-center-{int(center_id)}'
+        try:
+            ws = sh.worksheet(worksheet_name)
+        except gspread.WorksheetNotFound:
+            ws = sh.add_worksheet(title=worksheet_name, rows=1, cols=len(BACKUP_HEADER))
+            ws.append_row(BACKUP_HEADER)
+        return cls(ws)
+
+    def write_rows(self, rows: list[list]) -> None:
+        # INSERT_ROWS grows the grid, so the worksheet never has to be pre-sized.
+        self._worksheet.append_rows(rows, value_input_option='RAW', insert_data_option='INSERT_ROWS')
+
+    def close(self) -> None:
+        return None
+
+
+class CsvSink:
+    """Appends to a local CSV file; used for offline runs and tests."""
+
+    name = 'csv'
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not path.exists() or path.stat().st_size == 0
+        self._handle = path.open('a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._handle)
+        if is_new:
+            self._writer.writerow(BACKUP_HEADER)
+
+    def write_rows(self, rows: list[list]) -> None:
+        self._writer.writerows(rows)
+        self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
 
-    records = []
+class ParquetSink:
+    """Writes one Parquet file per run with a row group per batch. Needs pyarrow."""
+
+    name = 'parquet'
+
+    def __init__(self, path: Path) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError('pyarrow is required for the parquet backup sink') from exc
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._pa = pa
+        self._schema = pa.schema([(column, pa.string()) for column in BACKUP_HEADER])
+        self._writer = pq.ParquetWriter(str(path), self._schema)
+
+    def write_rows(self, rows: list[list]) -> None:
+        columns = [[None if row[idx] is None else str(row[idx]) for row in rows] for idx in range(len(BACKUP_HEADER))]
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def open_backup_sink(center_id: int, *, run_at: datetime) -> BackupSink | None:
+    """The sink named by `settings.backup_sink`, or None when Sheets is not configured."""
+    kind = str(settings.backup_sink or 'sheets').strip().lower()
+    base_dir = Path(settings.backup_local_dir)
+    if kind == 'sheets':
+        return GoogleSheetsSink.open(center_id)
+    if kind == 'csv':
+        return CsvSink(base_dir / f'backup-center-{int(center_id)}.csv')
+    if kind == 'parquet':
+        return ParquetSink(base_dir / f'center-{int(center_id)}' / f"backup-{run_at:%Y%m%dT%H%M%S}.parquet")
+    raise ValueError(f'Unknown backup sink: {kind}')
+
+
+def last_high_water_mark(db: Session, *, center_id: int) -> datetime | None:
+    row = (
+        db.query(BackupLog.high_water_mark)
+        .filter(
+            BackupLog.center_id == int(center_id),
+            BackupLog.status == 'success',
+            BackupLog.high_water_mark.isnot(None),
+        )
+        .order_by(BackupLog.high_water_mark.desc())
+        .first()
+    )
+    return row[0] if row else None
+
+
+def _changed_since(column, since: datetime | None, until: datetime):
+    if since is None:
+        # First backup: everything, including rows that predate the updated_at column.
+        return or_(column <= until, column.is_(None))
+    return (column > since) & (column <= until)
+
+
+def iter_changed_rows(
+    db: Session,
+    *,
+    center_id: int,
+    since: datetime | None,
+    until: datetime,
+    chunk_size: int,
+) -> Iterator[list]:
+    """Attendance and fee rows for a center updated in (since, until], streamed `chunk_size` at a time."""
     attendance = (
-        db.query(AttendanceRecord)
+        db.query(
+            AttendanceRecord.id,
+            AttendanceRecord.student_id,
+            AttendanceRecord.attendance_date,
+            AttendanceRecord.status,
+            AttendanceRecord.comment,
+            AttendanceRecord.updated_at,
+        )
         .join(Student, Student.id == AttendanceRecord.student_id)
-        .filter(Student.center_id == center_id)
-        .all()
+        .filter(Student.center_id == center_id, _changed_since(AttendanceRecord.updated_at, since, until))
+        .order_by(AttendanceRecord.id.asc())
+        .yield_per(chunk_size)
     )
     for row in attendance:
-        records.append(['attendance', row.student_id, str(row.attendance_date), row.status, row.comment])
+        yield ['attendance', row.id, row.student_id, str(row.attendance_date), row.status, row.comment, '', _stamp(row.updated_at)]
 
     fees = (
-        db.query(FeeRecord)
+        db.query(
+            FeeRecord.id,
+            FeeRecord.student_id,
+            FeeRecord.due_date,
+            FeeRecord.amount,
+            FeeRecord.paid_amount,
+            FeeRecord.is_paid,
+            FeeRecord.updated_at,
+        )
         .join(Student, Student.id == FeeRecord.student_id)
-        .filter(Student.center_id == center_id)
-        .all()
+        .filter(Student.center_id == center_id, _changed_since(FeeRecord.updated_at, since, until))
+        .order_by(FeeRecord.id.asc())
+        .yield_per(chunk_size)
     )
     for row in fees:
-        records.append(['fee', row.student_id, str(row.due_date), row.amount, row.paid_amount, row.is_paid])
+        yield ['fee', row.id, row.student_id, str(row.due_date), row.amount, row.paid_amount, row.is_paid, _stamp(row.updated_at)]
 
-    ws.clear()
-    ws.append_row(['type', 'student_id', 'date', 'field_1', 'field_2', 'field_3'])
-    if records:
-        ws.append_rows(records)
-    return True
+
+def _stamp(value: datetime | None) -> str:
+    return value.isoformat() if value else ''
+
+
+def _batched(rows: Iterable[list], size: int) -> Iterator[list[list]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_incremental_backup(
+    db: Session,
+    *,
+    center_id: int,
+    sink: BackupSink | None = None,
+    chunk_size: int | None = None,
+    now: datetime | None = None,
+) -> BackupLog | None:
+    """Append rows changed since the center's last successful backup and log the run.
+
+    Returns None when no sink is configured. A failed run keeps the previous
+    high-water mark, so the next run re-sends the same window; consumers should
+    treat (type, record_id, updated_at) as the row key.
+
+    `updated_at` is stamped at flush, not commit, so a transaction can commit a
+    row stamped before `until` after this run has read past it. The stored mark
+    therefore trails `until` by `backup_overlap_seconds`, and the next run
+    re-reads that window; rows sent twice are deduplicated by the row key.
+    """
+    center_id = int(center_id or 0)
+    if center_id <= 0:
+        raise ValueError('center_id is required')
+    until = now or get_utcnow()
+    if sink is None:
+        sink = open_backup_sink(center_id, run_at=until)
+    if sink is None:
+        return None
+
+    size = max(1, int(chunk_size or settings.backup_chunk_size or 500))
+    since = last_high_water_mark(db, center_id=center_id)
+    written = 0
+    try:
+        try:
+            for batch in _batched(iter_changed_rows(db, center_id=center_id, since=since, until=until, chunk_size=size), size):
+                sink.write_rows(batch)
+                written += len(batch)
+        finally:
+            sink.close()
+    except Exception as exc:
+        row = BackupLog(
+            center_id=center_id,
+            status='failed',
+            message=f'Backup failed after {written} rows: {exc}',
+            sink=sink.name,
+            rows_written=written,
+        )
+    else:
+        high_water_mark = until - timedelta(seconds=max(0, int(settings.backup_overlap_seconds or 0)))
+        if since is not None:
+            high_water_mark = max(since, high_water_mark)
+        row = BackupLog(
+            center_id=center_id,
+            status='success',
+            message=f'Backup appended {written} changed rows to {sink.name}',
+            sink=sink.name,
+            rows_written=written,
+            high_water_mark=high_water_mark,
+        )
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    return row
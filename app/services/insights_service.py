@@ -1,44 +1,178 @@
-from datetime import timedelta
-from sqlalchemy import case, func
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sqlalchemy import and_, case, func
 from sqlalchemy.orm import Session
 
+from app.cache import cache
 from app.config import settings
 from app.core.time_provider import TimeProvider, default_time_provider
 from app.models import AttendanceRecord, FeeRecord, Student
+from app.services.center_scope_service import get_current_center_id
 
 
-def generate_insights(db: Session, *, time_provider: TimeProvider = default_time_provider):
-    today = time_provider.today()
-    month_start = today - timedelta(days=30)
-
-    attendance_rows = db.query(
-        AttendanceRecord.student_id,
-        func.count(AttendanceRecord.id).label('total'),
-        func.sum(case((AttendanceRecord.status == 'Present', 1), else_=0)).label('present_count'),
-    ).filter(AttendanceRecord.attendance_date >= month_start).group_by(AttendanceRecord.student_id).all()
-
-    low_attendance = []
-    for row in attendance_rows:
-        if not row.total:
-            continue
-        ratio = (row.present_count or 0) / row.total
-        if ratio < settings.attendance_low_threshold:
-            student = db.query(Student).filter(Student.id == row.student_id).first()
-            low_attendance.append({
-                'student_id': row.student_id,
-                'student_name': student.name if student else 'Unknown',
-                'attendance_ratio': round(ratio, 2),
-            })
-
-    unpaid = db.query(FeeRecord).filter(FeeRecord.is_paid.is_(False)).all()
-    unpaid_fees = [
+INSIGHT_WINDOWS = (7, 30, 90)
+DEFAULT_WINDOW_DAYS = 30
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+INSIGHTS_CACHE_TTL_SECONDS = 300
+
+
+def _window_start(today: date, days: int) -> date:
+    # A 7-day window is today plus the six days before it.
+    return today - timedelta(days=days - 1)
+
+
+def _window_columns(today: date):
+    columns = []
+    for days in INSIGHT_WINDOWS:
+        in_window = AttendanceRecord.attendance_date >= _window_start(today, days)
+        columns.append(func.sum(case((in_window, 1), else_=0)).label(f'total_{days}'))
+        columns.append(
+            func.sum(case((and_(in_window, AttendanceRecord.status == 'Present'), 1), else_=0)).label(f'present_{days}')
+        )
+    return columns
+
+
+def list_low_attendance(
+    db: Session,
+    *,
+    center_id: int,
+    today: date,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    after_id: int | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> dict:
+    """One keyset page of the center's students below the attendance threshold over `window_days`.
+
+    Every window in INSIGHT_WINDOWS comes out of the same grouped query, names included.
+    """
+    if window_days not in INSIGHT_WINDOWS:
+        raise ValueError(f'window_days must be one of {INSIGHT_WINDOWS}')
+    page_size = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    in_window = AttendanceRecord.attendance_date >= _window_start(today, window_days)
+    total = func.sum(case((in_window, 1), else_=0))
+    present = func.sum(case((and_(in_window, AttendanceRecord.status == 'Present'), 1), else_=0))
+
+    query = (
+        db.query(Student.id, Student.name, *_window_columns(today))
+        .join(AttendanceRecord, AttendanceRecord.student_id == Student.id)
+        .filter(
+            Student.center_id == center_id,
+            AttendanceRecord.attendance_date >= _window_start(today, max(INSIGHT_WINDOWS)),
+        )
+        .group_by(Student.id, Student.name)
+        .having(total > 0, present < total * float(settings.attendance_low_threshold))
+    )
+    if after_id:
+        query = query.filter(Student.id > int(after_id))
+    rows = query.order_by(Student.id.asc()).limit(page_size + 1).all()
+
+    items = []
+    for row in rows[:page_size]:
+        ratios = {}
+        for days in INSIGHT_WINDOWS:
+            window_total = int(getattr(row, f'total_{days}') or 0)
+            window_present = int(getattr(row, f'present_{days}') or 0)
+            ratios[str(days)] = round(window_present / window_total, 2) if window_total else None
+        items.append(
+            {
+                'student_id': row.id,
+                'student_name': row.name,
+                'attendance_ratio': ratios[str(window_days)],
+                'windows': ratios,
+            }
+        )
+    next_cursor = items[-1]['student_id'] if len(rows) > page_size else None
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def list_unpaid_fees(
+    db: Session,
+    *,
+    center_id: int,
+    after_id: int | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> dict:
+    """One keyset page of the center's unpaid fee records, ordered by id."""
+    page_size = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    query = (
+        db.query(
+            FeeRecord.id,
+            FeeRecord.student_id,
+            Student.name,
+            FeeRecord.amount,
+            FeeRecord.paid_amount,
+            FeeRecord.due_date,
+        )
+        .join(Student, Student.id == FeeRecord.student_id)
+        .filter(Student.center_id == center_id, FeeRecord.is_paid.is_(False))
+    )
+    if after_id:
+        query = query.filter(FeeRecord.id > int(after_id))
+    rows = query.order_by(FeeRecord.id.asc()).limit(page_size + 1).all()
+    items = [
         {
-            'fee_record_id': f.id,
-            'student_id': f.student_id,
-            'pending_amount': round(f.amount - f.paid_amount, 2),
-            'due_date': str(f.due_date),
+            'fee_record_id': row.id,
+            'student_id': row.student_id,
+            'student_name': row.name,
+            'pending_amount': round(row.amount - row.paid_amount, 2),
+            'due_date': str(row.due_date),
         }
-        for f in unpaid
+        for row in rows[:page_size]
     ]
+    next_cursor = items[-1]['fee_record_id'] if len(rows) > page_size else None
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def _insights_cache_key(center_id: int, today: date, *parts) -> str:
+    return f'center:{int(center_id)}:insights:{today.isoformat()}:' + ':'.join(str(part or 0) for part in parts)
+
+
+def invalidate_insights(center_id: int) -> None:
+    cache.invalidate_prefix(f'center:{int(center_id)}:insights')
+
+
+def generate_insights(
+    db: Session,
+    *,
+    center_id: int | None = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    attendance_after_id: int | None = None,
+    fees_after_id: int | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    time_provider: TimeProvider = default_time_provider,
+):
+    """Low-attendance students and unpaid fees for one center, one page each, cached per center and day."""
+    center_id = int(center_id or get_current_center_id() or 0)
+    if center_id <= 0:
+        raise ValueError('center_id is required')
+    today = time_provider.today()
+    key = _insights_cache_key(center_id, today, window_days, attendance_after_id, fees_after_id, limit)
+    cached = cache.get_cached(key)
+    if cached is not None:
+        return cached
 
-    return {'low_attendance': low_attendance, 'unpaid_fees': unpaid_fees}
+    low_attendance = list_low_attendance(
+        db,
+        center_id=center_id,
+        today=today,
+        window_days=window_days,
+        after_id=attendance_after_id,
+        limit=limit,
+    )
+    unpaid_fees = list_unpaid_fees(db, center_id=center_id, after_id=fees_after_id, limit=limit)
+    payload = {
+        'center_id': center_id,
+        'window_days': window_days,
+        'windows': list(INSIGHT_WINDOWS),
+        'low_attendance': low_attendance['items'],
+        'unpaid_fees': unpaid_fees['items'],
+        'next_cursors': {
+            'low_attendance': low_attendance['next_cursor'],
+            'unpaid_fees': unpaid_fees['next_cursor'],
+        },
+    }
+    cache.set_cached(key, payload, ttl=INSIGHTS_CACHE_TTL_SECONDS)
+    return payload
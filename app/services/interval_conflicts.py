@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from collections.abc import Hashable, Sequence
+from datetime import datetime
+from itertools import accumulate
+from typing import Any
+
+
+def intervals_overlap(a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime) -> bool:
+    """Half-open overlap: back-to-back slots ([9:00, 10:00) and [10:00, 11:00)) do not clash."""
+    return a_start < b_end and b_start < a_end
+
+
+def overlap_counts(spans: Sequence[tuple[Any, Any]]) -> list[int]:
+    """For each (start, end) span, how many *other* spans overlap it.
+
+    Same answer as comparing every pair with `intervals_overlap`, in
+    O(n log n): the spans overlapping span i are those starting before it ends,
+    minus those that already ended by the time it starts. Spans must have
+    start <= end; zero-length spans overlap only spans strictly around them.
+    """
+    if not spans:
+        return []
+    starts = sorted(start for start, _ in spans)
+    ends = sorted(end for _, end in spans)
+    zero_length = Counter(start for start, end in spans if start == end)
+    counts: list[int] = []
+    for start, end in spans:
+        count = bisect_left(starts, end) - bisect_right(ends, start)
+        if start == end:
+            count += zero_length[start]
+        else:
+            count -= 1  # the span itself
+        counts.append(count)
+    return counts
+
+
+def room_conflict_scores(spans: Sequence[tuple[Any, Any, Hashable | None]]) -> list[int]:
+    """Overlap counts for (start, end, room_id) spans, only counting spans in the same room.
+
+    Spans without a room never conflict and score 0.
+    """
+    scores = [0] * len(spans)
+    by_room: dict[Hashable, list[int]] = {}
+    for idx, (_, _, room_id) in enumerate(spans):
+        if room_id:
+            by_room.setdefault(room_id, []).append(idx)
+    for indexes in by_room.values():
+        counts = overlap_counts([(spans[idx][0], spans[idx][1]) for idx in indexes])
+        for idx, count in zip(indexes, counts):
+            scores[idx] = count
+    return scores
+
+
+class IntervalIndex:
+    """Static index over (start, end, item) spans for repeated overlap probes.
+
+    Build once, then `has_overlap` costs O(log n) and `overlapping` O(log n + k)
+    instead of a scan over every span per probe.
+    """
+
+    def __init__(self, spans: Sequence[tuple[Any, Any, Any]]) -> None:
+        ordered = sorted(spans, key=lambda span: (span[0], span[1]))
+        self._starts = [span[0] for span in ordered]
+        self._spans = ordered
+        # Running max of end times over the start-sorted spans.
+        self._max_end = list(accumulate((span[1] for span in ordered), max))
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def has_overlap(self, start: Any, end: Any) -> bool:
+        candidates = bisect_left(self._starts, end)
+        return candidates > 0 and self._max_end[candidates - 1] > start
+
+    def overlapping(self, start: Any, end: Any) -> list[Any]:
+        """Items whose span overlaps [start, end), ordered by span start."""
+        candidates = bisect_left(self._starts, end)
+        if candidates == 0 or self._max_end[candidates - 1] <= start:
+            return []
+        # `_max_end` is non-decreasing, so every span before `first` ended by `start`.
+        first = bisect_right(self._max_end, start, 0, candidates)
+        return [
+            item
+            for span_start, span_end, item in self._spans[first:candidates]
+            if intervals_overlap(span_start, span_end, start, end)
+        ]
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session, joinedload
 
 from app.cache import cache
 from app.core.time_provider import TimeProvider, default_time_provider
+from app.db import reads_from_replica
 from app.models import (
     Batch,
     Chapter,
@@ -267,6 +268,7 @@ def create_download_log(
     return row
 
 
+@reads_from_replica
 def list_notes_analytics(db: Session, *, center_id: int, role: str, student: Student | None = None) -> dict:
     query = list_notes_query(db, center_id=center_id, role=role, student=student)
     notes = query.all()
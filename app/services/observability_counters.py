@@ -1,42 +1,48 @@
 from __future__ import annotations
 
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
-import threading
+from datetime import datetime
 
 from app.core.time_provider import default_time_provider
+from app.metrics import registry
 
 
-_LOCK = threading.Lock()
-_EVENTS: dict[str, deque[datetime]] = defaultdict(deque)
+_WINDOW_HOURS = 25
+_EPOCH = datetime(1970, 1, 1)
+_EVENTS = registry.counter(
+    'observability_events',
+    'Operational events (cache mismatches, job outcomes, rate-limit blocks, snapshot drift).',
+    window_seconds=_WINDOW_HOURS * 3600,
+)
 
 
-def record_observability_event(name: str, *, at: datetime | None = None) -> None:
+def _timestamp(value: datetime | None) -> float:
+    current = value or default_time_provider.now()
+    return (current.replace(tzinfo=None) - _EPOCH).total_seconds()
+
+
+def record_observability_event(name: str, *, at: datetime | None = None, **labels: object) -> None:
+    """Count one event. Every label combination is its own exported series, so keep labels
+    to small, fixed sets (job, action, center_id) and put open-ended ids in the log line."""
     event = str(name or '').strip().lower()
     if not event:
         return
-    now = at or default_time_provider.now().replace(tzinfo=None)
-    with _LOCK:
-        bucket = _EVENTS[event]
-        bucket.append(now)
-        cutoff = now - timedelta(hours=25)
-        while bucket and bucket[0] < cutoff:
-            bucket.popleft()
+    _EVENTS.inc(at=_timestamp(at), event=event, **labels)
 
 
-def count_observability_events(name: str, *, window_hours: int = 24, now: datetime | None = None) -> int:
+def count_observability_events(
+    name: str,
+    *,
+    window_hours: int = 24,
+    now: datetime | None = None,
+    **labels: object,
+) -> int:
+    """Events named `name` in the last `window_hours`, across every series carrying `labels`."""
     event = str(name or '').strip().lower()
     if not event:
         return 0
-    current = now or default_time_provider.now().replace(tzinfo=None)
-    cutoff = current - timedelta(hours=max(1, int(window_hours or 24)))
-    with _LOCK:
-        bucket = _EVENTS.get(event) or deque()
-        while bucket and bucket[0] < cutoff:
-            bucket.popleft()
-        return len(bucket)
+    window = min(max(1, int(window_hours or 24)), _WINDOW_HOURS)
+    return int(_EVENTS.count_in_window(window * 3600, now=_timestamp(now), event=event, **labels))
 
 
 def clear_observability_events() -> None:
-    with _LOCK:
-        _EVENTS.clear()
+    _EVENTS.clear()
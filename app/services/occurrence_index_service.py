@@ -0,0 +1,519 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time as monotonic_time
+import weakref
+from collections.abc import Iterable
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.time_provider import TimeProvider, default_time_provider
+from app.models import Batch, BatchSchedule, CalendarOverride
+from app.services.access_scope_service import get_teacher_batch_ids
+
+
+logger = logging.getLogger(__name__)
+
+_SESSION_DIRTY_KEY = 'occurrence_index_dirty_batches'
+_ALL_BATCHES = -1
+_TRACKED_MODELS = (Batch, BatchSchedule, CalendarOverride)
+
+
+@dataclass(frozen=True)
+class Occurrence:
+    """One concrete class meeting: a weekly schedule slot with that day's override applied.
+
+    `schedule_id` is None for classes that only exist through an override
+    (an extra class on a day the batch does not normally meet).
+    """
+
+    batch_id: int
+    schedule_id: int | None
+    start_dt: datetime
+    end_dt: datetime
+    duration_minutes: int
+    room_id: int | None = None
+    override_id: int | None = None
+    reason: str = ''
+
+    @property
+    def day(self) -> date:
+        return self.start_dt.date()
+
+    @property
+    def start_time(self) -> str:
+        return self.start_dt.strftime('%H:%M')
+
+
+@dataclass(frozen=True)
+class _Slot:
+    schedule_id: int
+    weekday: int
+    start: time
+    duration_minutes: int
+
+
+@dataclass(frozen=True)
+class _Override:
+    id: int
+    new_start: time | None
+    new_duration_minutes: int | None
+    cancelled: bool
+    reason: str
+
+
+@dataclass
+class _BatchPlan:
+    batch_id: int
+    room_id: int | None
+    default_duration_minutes: int
+    slots: list[_Slot] = field(default_factory=list)
+    overrides: dict[date, list[_Override]] = field(default_factory=dict)
+
+
+@dataclass
+class _CenterIndex:
+    center_id: int
+    window_start: date
+    window_end: date
+    loaded_at: float
+    plans: dict[int, _BatchPlan]
+    days: dict[date, tuple[Occurrence, ...]]
+    dirty: set[int] = field(default_factory=set)
+
+
+class _EngineIndex:
+    def __init__(self) -> None:
+        # Guards `centers` and `generation` only; no queries run while it is held.
+        self.lock = threading.Lock()
+        self.centers: dict[int, _CenterIndex] = {}
+        self.generation = 0
+
+
+_indexes: weakref.WeakKeyDictionary[Engine, _EngineIndex] = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def _parse_clock(value: str | None) -> time | None:
+    try:
+        hh, mm = str(value or '').split(':', 1)
+        return time(hour=int(hh), minute=int(mm))
+    except ValueError:
+        return None
+
+
+def _engine_for(db: Session) -> Engine | None:
+    try:
+        bind = db.get_bind()
+    except Exception:
+        return None
+    return getattr(bind, 'engine', bind)
+
+
+def _engine_index(engine: Engine) -> _EngineIndex:
+    with _indexes_lock:
+        index = _indexes.get(engine)
+        if index is None:
+            index = _EngineIndex()
+            _indexes[engine] = index
+        return index
+
+
+def _expand_day(plan: _BatchPlan, day: date) -> list[Occurrence]:
+    weekday = day.weekday()
+    rows = [
+        Occurrence(
+            batch_id=plan.batch_id,
+            schedule_id=slot.schedule_id,
+            start_dt=datetime.combine(day, slot.start),
+            end_dt=datetime.combine(day, slot.start) + timedelta(minutes=slot.duration_minutes),
+            duration_minutes=slot.duration_minutes,
+            room_id=plan.room_id,
+        )
+        for slot in plan.slots
+        if slot.weekday == weekday
+    ]
+    # Overrides apply in creation order: a cancellation followed by a new start
+    # time on the same day reads as "moved to that time".
+    for override in plan.overrides.get(day, ()):
+        if override.cancelled:
+            rows = []
+            continue
+        changes = bool(override.new_start or override.new_duration_minutes)
+        reason = override.reason if changes else ''
+        if rows:
+            updated = []
+            for current in rows:
+                start_dt = datetime.combine(day, override.new_start) if override.new_start else current.start_dt
+                duration = int(override.new_duration_minutes or current.duration_minutes)
+                updated.append(
+                    Occurrence(
+                        batch_id=current.batch_id,
+                        schedule_id=current.schedule_id,
+                        start_dt=start_dt,
+                        end_dt=start_dt + timedelta(minutes=duration),
+                        duration_minutes=duration,
+                        room_id=current.room_id,
+                        override_id=override.id if changes else current.override_id,
+                        reason=reason or current.reason,
+                    )
+                )
+            rows = updated
+            continue
+        if override.new_start is None:
+            continue
+        duration = int(override.new_duration_minutes or plan.default_duration_minutes)
+        start_dt = datetime.combine(day, override.new_start)
+        rows.append(
+            Occurrence(
+                batch_id=plan.batch_id,
+                schedule_id=None,
+                start_dt=start_dt,
+                end_dt=start_dt + timedelta(minutes=duration),
+                duration_minutes=duration,
+                room_id=plan.room_id,
+                override_id=override.id,
+                reason=reason,
+            )
+        )
+    return rows
+
+
+def _sort_key(row: Occurrence) -> tuple[datetime, int, int]:
+    return row.start_dt, row.batch_id, int(row.schedule_id or 0)
+
+
+def _load_plans(
+    db: Session,
+    *,
+    center_id: int,
+    batch_ids: set[int] | None = None,
+) -> dict[int, _BatchPlan]:
+    query = (
+        db.query(
+            Batch.id,
+            Batch.room_id,
+            Batch.default_duration_minutes,
+            BatchSchedule.id,
+            BatchSchedule.weekday,
+            BatchSchedule.start_time,
+            BatchSchedule.duration_minutes,
+        )
+        .outerjoin(BatchSchedule, BatchSchedule.batch_id == Batch.id)
+        .filter(Batch.center_id == center_id, Batch.active.is_(True))
+    )
+    if batch_ids is not None:
+        query = query.filter(Batch.id.in_(batch_ids))
+    plans: dict[int, _BatchPlan] = {}
+    for batch_id, room_id, default_duration, schedule_id, weekday, start_time, duration in query.all():
+        plan = plans.get(int(batch_id))
+        if plan is None:
+            plan = _BatchPlan(
+                batch_id=int(batch_id),
+                room_id=room_id,
+                default_duration_minutes=int(default_duration or 60),
+            )
+            plans[plan.batch_id] = plan
+        if schedule_id is None:
+            continue
+        start = _parse_clock(start_time)
+        if start is None:
+            logger.warning('occurrence_index_bad_start_time schedule_id=%s value=%r', schedule_id, start_time)
+            continue
+        plan.slots.append(
+            _Slot(
+                schedule_id=int(schedule_id),
+                weekday=int(weekday),
+                start=start,
+                duration_minutes=int(duration or plan.default_duration_minutes),
+            )
+        )
+    for plan in plans.values():
+        plan.slots.sort(key=lambda slot: (slot.weekday, slot.start, slot.schedule_id))
+    return plans
+
+
+def _load_overrides(
+    db: Session,
+    plans: dict[int, _BatchPlan],
+    *,
+    center_id: int,
+    start_date: date,
+    end_date: date,
+) -> None:
+    if not plans:
+        return
+    rows = (
+        db.query(
+            CalendarOverride.id,
+            CalendarOverride.batch_id,
+            CalendarOverride.override_date,
+            CalendarOverride.new_start_time,
+            CalendarOverride.new_duration_minutes,
+            CalendarOverride.cancelled,
+            CalendarOverride.reason,
+        )
+        .join(Batch, Batch.id == CalendarOverride.batch_id)
+        .filter(
+            Batch.center_id == center_id,
+            CalendarOverride.batch_id.in_(plans.keys()),
+            CalendarOverride.override_date >= start_date,
+            CalendarOverride.override_date <= end_date,
+        )
+        .order_by(CalendarOverride.override_date.asc(), CalendarOverride.id.asc())
+        .all()
+    )
+    for override_id, batch_id, override_date, new_start_time, new_duration, cancelled, reason in rows:
+        new_start = _parse_clock(new_start_time) if new_start_time else None
+        plans[int(batch_id)].overrides.setdefault(override_date, []).append(
+            _Override(
+                id=int(override_id),
+                new_start=new_start,
+                new_duration_minutes=int(new_duration) if new_duration else None,
+                cancelled=bool(cancelled),
+                reason=(reason or '').strip(),
+            )
+        )
+
+
+def _date_range(start_date: date, end_date: date) -> Iterable[date]:
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += timedelta(days=1)
+
+
+def _materialize(plans: dict[int, _BatchPlan], *, start_date: date, end_date: date) -> dict[date, tuple[Occurrence, ...]]:
+    days: dict[date, tuple[Occurrence, ...]] = {}
+    for day in _date_range(start_date, end_date):
+        rows: list[Occurrence] = []
+        for plan in plans.values():
+            rows.extend(_expand_day(plan, day))
+        rows.sort(key=_sort_key)
+        days[day] = tuple(rows)
+    return days
+
+
+def _build_center(db: Session, *, center_id: int, start_date: date, end_date: date) -> _CenterIndex:
+    plans = _load_plans(db, center_id=center_id)
+    _load_overrides(db, plans, center_id=center_id, start_date=start_date, end_date=end_date)
+    return _CenterIndex(
+        center_id=center_id,
+        window_start=start_date,
+        window_end=end_date,
+        loaded_at=monotonic_time.monotonic(),
+        plans=plans,
+        days=_materialize(plans, start_date=start_date, end_date=end_date),
+    )
+
+
+def _refreshed(db: Session, state: _CenterIndex, batch_ids: set[int]) -> _CenterIndex:
+    """A copy of `state` with only the given batches re-expanded across its window."""
+    fresh = _load_plans(db, center_id=state.center_id, batch_ids=batch_ids)
+    _load_overrides(db, fresh, center_id=state.center_id, start_date=state.window_start, end_date=state.window_end)
+    plans = {batch_id: plan for batch_id, plan in state.plans.items() if batch_id not in batch_ids}
+    plans.update(fresh)
+    days: dict[date, tuple[Occurrence, ...]] = {}
+    for day, rows in state.days.items():
+        kept = [row for row in rows if row.batch_id not in batch_ids]
+        for plan in fresh.values():
+            kept.extend(_expand_day(plan, day))
+        kept.sort(key=_sort_key)
+        days[day] = tuple(kept)
+    return replace(state, plans=plans, days=days, dirty=set())
+
+
+def _extended(db: Session, state: _CenterIndex, *, start_date: date, end_date: date) -> _CenterIndex:
+    """A copy of `state` whose window also covers `start_date`..`end_date`."""
+    # New override dates go into copied dicts; the published plans stay untouched.
+    plans = {batch_id: replace(plan, overrides=dict(plan.overrides)) for batch_id, plan in state.plans.items()}
+    days = dict(state.days)
+    ranges = []
+    if start_date < state.window_start:
+        ranges.append((start_date, state.window_start - timedelta(days=1)))
+    if end_date > state.window_end:
+        ranges.append((state.window_end + timedelta(days=1), end_date))
+    for range_start, range_end in ranges:
+        _load_overrides(db, plans, center_id=state.center_id, start_date=range_start, end_date=range_end)
+        days.update(_materialize(plans, start_date=range_start, end_date=range_end))
+    return replace(
+        state,
+        window_start=min(state.window_start, start_date),
+        window_end=max(state.window_end, end_date),
+        plans=plans,
+        days=days,
+        dirty=set(),
+    )
+
+
+def _center_days(
+    db: Session,
+    *,
+    center_id: int,
+    start_date: date,
+    end_date: date,
+    time_provider: TimeProvider,
+) -> list[tuple[Occurrence, ...]]:
+    engine = _engine_for(db)
+    if engine is None:
+        state = _build_center(db, center_id=center_id, start_date=start_date, end_date=end_date)
+        return [state.days[day] for day in _date_range(start_date, end_date)]
+
+    index = _engine_index(engine)
+    ttl = max(0, int(settings.occurrence_index_ttl_seconds))
+    with index.lock:
+        state = index.centers.get(center_id)
+        if state is not None and monotonic_time.monotonic() - state.loaded_at >= ttl:
+            state = None
+        if state is not None and _ALL_BATCHES in state.dirty:
+            state = None
+        generation = index.generation
+        dirty = set(state.dirty) if state is not None else set()
+
+    # Published states are never mutated apart from their dirty marks: loading and
+    # re-expanding happen outside the lock on a copy, and the lock is only held to
+    # swap it in. Marks stay on the published state until then, so a concurrent
+    # reader (possibly the writer itself) refreshes rather than reading stale rows.
+    if state is None:
+        today = time_provider.today()
+        window_start = min(start_date, today - timedelta(days=max(0, settings.occurrence_index_days_back)))
+        window_end = max(end_date, today + timedelta(days=max(0, settings.occurrence_index_days_ahead)))
+        state = _build_center(db, center_id=center_id, start_date=window_start, end_date=window_end)
+        with index.lock:
+            if index.generation != generation:
+                state.dirty.add(_ALL_BATCHES)
+            index.centers[center_id] = state
+        return [state.days[day] for day in _date_range(start_date, end_date)]
+
+    if not dirty and state.window_start <= start_date and end_date <= state.window_end:
+        return [state.days[day] for day in _date_range(start_date, end_date)]
+
+    published = state
+    if dirty:
+        state = _refreshed(db, state, dirty)
+    if start_date < state.window_start or end_date > state.window_end:
+        state = _extended(db, state, start_date=start_date, end_date=end_date)
+    with index.lock:
+        if index.centers.get(center_id) is published:
+            # Anything invalidated while we loaded may predate our reads, so it stays marked.
+            state.dirty = set(published.dirty) if index.generation != generation else published.dirty - dirty
+            index.centers[center_id] = state
+    return [state.days[day] for day in _date_range(start_date, end_date)]
+
+
+def list_occurrences(
+    db: Session,
+    *,
+    center_id: int,
+    start_date: date,
+    end_date: date,
+    batch_ids: Iterable[int] | None = None,
+    room_id: int | None = None,
+    teacher_id: int | None = None,
+    time_provider: TimeProvider = default_time_provider,
+) -> list[Occurrence]:
+    """Concrete class occurrences for a center between two dates (inclusive), by start time.
+
+    Served from a per-process index that materializes a rolling window of days
+    around today and extends it on demand. Writes to batches, schedules and
+    overrides through the ORM invalidate only the affected batches; the TTL
+    bounds staleness from writes made by other processes.
+    """
+    center_id = int(center_id or 0)
+    if center_id <= 0:
+        raise ValueError('center_id is required')
+    if end_date < start_date:
+        return []
+    allowed = {int(batch_id) for batch_id in batch_ids} if batch_ids is not None else None
+    if int(teacher_id or 0) > 0:
+        teacher_batch_ids = get_teacher_batch_ids(db, int(teacher_id), center_id=center_id)
+        allowed = teacher_batch_ids if allowed is None else allowed & teacher_batch_ids
+    if allowed is not None and not allowed:
+        return []
+
+    payload: list[Occurrence] = []
+    for rows in _center_days(
+        db,
+        center_id=center_id,
+        start_date=start_date,
+        end_date=end_date,
+        time_provider=time_provider,
+    ):
+        for row in rows:
+            if allowed is not None and row.batch_id not in allowed:
+                continue
+            if room_id is not None and row.room_id != room_id:
+                continue
+            payload.append(row)
+    return payload
+
+
+def list_occurrences_for_day(db: Session, *, center_id: int, day: date, **filters) -> list[Occurrence]:
+    return list_occurrences(db, center_id=center_id, start_date=day, end_date=day, **filters)
+
+
+def invalidate_occurrence_index(engine: Engine | None = None, batch_ids: Iterable[int] | None = None) -> None:
+    """Drop cached occurrences for `batch_ids` (or everything) on one engine (or all engines)."""
+    with _indexes_lock:
+        targets = [_indexes[engine]] if engine is not None and engine in _indexes else (
+            [] if engine is not None else list(_indexes.values())
+        )
+    marks = {int(batch_id) for batch_id in batch_ids} if batch_ids is not None else {_ALL_BATCHES}
+    for index in targets:
+        with index.lock:
+            index.generation += 1
+            for state in index.centers.values():
+                state.dirty.update(marks)
+
+
+def record_schedule_changes(session: Session) -> None:
+    """before_flush hook: note which batches' occurrences the pending writes touch.
+
+    They are invalidated right away (so this session reads its own writes) and
+    again when the transaction commits or rolls back, so readers that loaded
+    in between never keep uncommitted or rolled-back rows.
+    """
+    touched = [obj for obj in (*session.new, *session.deleted) if isinstance(obj, _TRACKED_MODELS)]
+    touched.extend(obj for obj in session.dirty if isinstance(obj, _TRACKED_MODELS) and session.is_modified(obj))
+    if not touched:
+        return
+    batch_ids: set[int] = set()
+    for obj in touched:
+        batch_id = obj.id if isinstance(obj, Batch) else obj.batch_id
+        if batch_id:
+            batch_ids.add(int(batch_id))
+        else:
+            batch_ids.add(_ALL_BATCHES)
+    _mark_session_dirty(session, batch_ids)
+
+
+def record_bulk_schedule_change(execute_state) -> None:
+    """do_orm_execute hook: bulk UPDATE/DELETE on a tracked table invalidates everything."""
+    mapper = execute_state.bind_mapper
+    if mapper is None or not issubclass(mapper.class_, _TRACKED_MODELS):
+        return
+    _mark_session_dirty(execute_state.session, {_ALL_BATCHES})
+
+
+def flush_schedule_changes(session: Session) -> None:
+    """after_commit / after_rollback hook: re-invalidate what this transaction touched."""
+    batch_ids = session.info.pop(_SESSION_DIRTY_KEY, None)
+    if batch_ids:
+        _invalidate_for_session(session, batch_ids)
+
+
+def _mark_session_dirty(session: Session, batch_ids: set[int]) -> None:
+    session.info.setdefault(_SESSION_DIRTY_KEY, set()).update(batch_ids)
+    _invalidate_for_session(session, batch_ids)
+
+
+def _invalidate_for_session(session: Session, batch_ids: set[int]) -> None:
+    engine = _engine_for(session)
+    if engine is None:
+        return
+    invalidate_occurrence_index(engine, batch_ids)
@@ -247,6 +247,7 @@ def reserve_slug(
     if not center:
         raise ValueError('Center not found')
 
+    previous_slug = str(center.slug or '')
     center.slug = clean_slug
     row.temp_slug = clean_slug
     row.reserved_slug = clean_slug
@@ -260,6 +261,9 @@ def reserve_slug(
     db.commit()
     db.refresh(row)
     cache.invalidate(cache_key('onboard_slug_availability', clean_slug))
+    from app.core.request_identity import invalidate_center_identity
+
+    invalidate_center_identity(slug=previous_slug)
     return row
 
 
@@ -3,7 +3,8 @@ from datetime import date
 from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
-from app.models import AttendanceRecord, Parent, ParentStudentMap, Student
+from app.models import Parent, ParentStudentMap, Student
+from app.services.attendance_streak_service import recent_attendance_streaks
 from app.services.batch_membership_service import list_active_student_ids_for_batch
 from app.services.comms_service import queue_telegram_by_chat_id
 
@@ -57,6 +58,23 @@ def get_parents_for_student(db: Session, student_id: int):
     return db.query(Parent).filter(Parent.id.in_(parent_ids)).all()
 
 
+def get_parents_for_students(db: Session, student_ids: list[int]) -> dict[int, list[Parent]]:
+    """Parents keyed by student id, resolved with a single join."""
+    if not student_ids:
+        return {}
+    parents: dict[int, list[Parent]] = {}
+    rows = (
+        db.query(ParentStudentMap.student_id, Parent)
+        .join(Parent, Parent.id == ParentStudentMap.parent_id)
+        .filter(ParentStudentMap.student_id.in_(student_ids))
+        .order_by(ParentStudentMap.student_id, Parent.id)
+        .all()
+    )
+    for student_id, parent in rows:
+        parents.setdefault(int(student_id), []).append(parent)
+    return parents
+
+
 def notify_parents_for_absence(db: Session, absent_student_ids: list[int], attendance_date: date):
     for student_id in absent_student_ids:
         student = db.query(Student).filter(Student.id == student_id).first()
@@ -83,17 +101,21 @@ def notify_parents_for_unpaid_fees(db: Session, student_ids: list[int]):
 
 def notify_parents_for_low_attendance_streak(db: Session, batch_id: int, streak_threshold: int = 3):
     student_ids = list_active_student_ids_for_batch(db, batch_id)
-    students = db.query(Student).filter(Student.id.in_(student_ids)).all() if student_ids else []
-    for student in students:
-        latest = db.query(AttendanceRecord).filter(AttendanceRecord.student_id == student.id).order_by(AttendanceRecord.attendance_date.desc()).limit(streak_threshold).all()
-        if len(latest) < streak_threshold:
+    streaks = recent_attendance_streaks(db, student_ids, depth=streak_threshold)
+    flagged_ids = sorted(sid for sid, streak in streaks.items() if streak.weak_streak >= streak_threshold)
+    if not flagged_ids:
+        return
+    students = {row.id: row for row in db.query(Student).filter(Student.id.in_(flagged_ids)).all()}
+    parents_by_student = get_parents_for_students(db, flagged_ids)
+    for student_id in flagged_ids:
+        student = students.get(student_id)
+        if not student:
             continue
-        if all(x.status in ('Absent', 'Late') for x in latest):
-            for parent in get_parents_for_student(db, student.id):
-                if not parent.telegram_chat_id:
-                    continue
-                message = f"Low attendance streak: {student.name} has {streak_threshold} consecutive weak attendance records."
-                queue_telegram_by_chat_id(db, parent.telegram_chat_id, message, student_id=student.id)
+        for parent in parents_by_student.get(student_id, []):
+            if not parent.telegram_chat_id:
+                continue
+            message = f"Low attendance streak: {student.name} has {streak_threshold} consecutive weak attendance records."
+            queue_telegram_by_chat_id(db, parent.telegram_chat_id, message, student_id=student.id)
 
 
 def parent_notifications_from_rules(
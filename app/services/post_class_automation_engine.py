@@ -11,6 +11,7 @@ from app.config import settings
 from app.frontend_routes import session_summary_url
 from app.models import AllowedUser, AllowedUserStatus, AttendanceRecord, AuthUser, Batch, ClassSession, FeeRecord, Student
 from app.services.action_token_service import create_action_token
+from app.services.attendance_streak_service import recent_attendance_streaks
 from app.services.batch_membership_service import list_active_student_ids_for_batch
 from app.services.comms_service import emit_communication_event
 from app.services.daily_teacher_brief_service import resolve_teacher_chat_id
@@ -122,21 +123,14 @@ def _rule_fee_context(db: Session, present_ids: list[int]) -> dict:
 
 def _rule_risk_indicators(db: Session, student_ids: list[int]) -> list[dict]:
     flags = []
+    streaks = recent_attendance_streaks(db, student_ids, depth=5)
     for student_id in student_ids:
-        rows = (
-            db.query(AttendanceRecord)
-            .filter(AttendanceRecord.student_id == student_id)
-            .order_by(AttendanceRecord.attendance_date.desc(), AttendanceRecord.id.desc())
-            .limit(5)
-            .all()
-        )
-        if not rows:
+        streak = streaks.get(int(student_id))
+        if streak is None:
             continue
-        recent_statuses = [row.status for row in rows]
-        absent_count = sum(1 for status in recent_statuses if status == 'Absent')
-        if absent_count >= 2:
-            flags.append({'student_id': student_id, 'type': 'frequent_absence', 'count': absent_count})
-        if len(recent_statuses) >= 3 and all(status in ('Absent', 'Late') for status in recent_statuses[:3]):
+        if streak.absent_count >= 2:
+            flags.append({'student_id': student_id, 'type': 'frequent_absence', 'count': streak.absent_count})
+        if streak.weak_streak >= 3:
             flags.append({'student_id': student_id, 'type': 'low_attendance_streak'})
     return flags
 
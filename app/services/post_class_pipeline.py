@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.models import FeeRecord
 from app.services.class_session_service import get_or_create_session_for_attendance
 from app.services.parent_service import parent_notifications_from_rules
+from app.services.post_class_automation_engine import run_post_class_automation
 from app.services.rule_config_service import get_effective_rule_config
 
 
@@ -30,6 +31,8 @@ def run_post_class_pipeline(
     scheduled_start,
     topic_planned: str,
     topic_completed: str,
+    *,
+    notify_parents: bool = True,
 ):
     rules = get_effective_rule_config(db, batch_id=batch_id)
     logger.info('post_class_pipeline_start', extra={'batch_id': batch_id, 'attendance_date': str(attendance_date), 'rules_scope': rules['scope']})
@@ -82,14 +85,15 @@ def run_post_class_pipeline(
     if summary['absent_count'] >= rules['absence_streak_threshold']:
         teacher_flags.append('high_absence_threshold_reached')
 
-    parent_notifications_from_rules(
-        db,
-        batch_id=batch_id,
-        attendance_date=attendance_date,
-        absent_ids=absent_ids,
-        unpaid_present_ids=unpaid_present_ids,
-        rules=rules,
-    )
+    if notify_parents:
+        parent_notifications_from_rules(
+            db,
+            batch_id=batch_id,
+            attendance_date=attendance_date,
+            absent_ids=absent_ids,
+            unpaid_present_ids=unpaid_present_ids,
+            rules=rules,
+        )
 
     logger.info(
         'post_class_pipeline_complete',
@@ -106,7 +110,30 @@ def run_post_class_pipeline(
         'class_summary': summary,
         'teacher_notifications': teacher_flags,
         'student_notifications': len(records),
-        'parent_notifications_rules_applied': True,
+        'parent_notifications_rules_applied': notify_parents,
+        'parent_notification_targets': {'absent_ids': absent_ids, 'unpaid_present_ids': unpaid_present_ids},
         'pending_action_ids': [],
         'rules': rules,
     }
+
+
+def run_post_class_side_effects(db: Session, payload: dict) -> dict:
+    """Outbox handler for a submitted class: parent notifications, then the post-class automation."""
+    batch_id = int(payload.get('batch_id') or 0)
+    session_id = int(payload.get('class_session_id') or 0)
+    rules = get_effective_rule_config(db, batch_id=batch_id)
+    parent_notifications_from_rules(
+        db,
+        batch_id=batch_id,
+        attendance_date=date.fromisoformat(str(payload['attendance_date'])),
+        absent_ids=[int(student_id) for student_id in payload.get('absent_ids') or []],
+        unpaid_present_ids=[int(student_id) for student_id in payload.get('unpaid_present_ids') or []],
+        rules=rules,
+    )
+    if not session_id:
+        return {}
+    return run_post_class_automation(
+        db,
+        session_id=session_id,
+        trigger_source=str(payload.get('trigger_source') or 'manual_submit'),
+    )
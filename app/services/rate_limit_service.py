@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.core.time_provider import TimeProvider, default_time_provider
 from app.models import RateLimitState
 from app.services.observability_counters import record_observability_event
@@ -17,8 +21,223 @@ class SafeRateLimitError(ValueError):
     pass
 
 
-def check_rate_limit(
-    db: Session,
+@dataclass(frozen=True)
+class RateLimitKey:
+    center_id: int
+    scope_type: str
+    scope_key: str
+    action_name: str
+
+    def as_string(self) -> str:
+        return f"ratelimit:{self.center_id}:{self.scope_type}:{self.scope_key}:{self.action_name}"
+
+
+class RateLimitBackend(ABC):
+    name = 'base'
+
+    @abstractmethod
+    def consume(
+        self,
+        db: Session | None,
+        key: RateLimitKey,
+        *,
+        max_requests: int,
+        window_seconds: int,
+        now: datetime,
+        cost: int = 1,
+    ) -> float | None:
+        """Take `cost` requests from the key's allowance, all or nothing.
+
+        Returns None when the requests are allowed, otherwise the seconds until
+        they would be allowed.
+        """
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """Fixed window on a row-locked RateLimitState; kept as the fallback path."""
+
+    name = 'db'
+
+    def consume(self, db, key, *, max_requests, window_seconds, now, cost=1):
+        if db is None:
+            return None
+        row = (
+            db.query(RateLimitState)
+            .filter(
+                RateLimitState.center_id == key.center_id,
+                RateLimitState.scope_type == key.scope_type,
+                RateLimitState.scope_key == key.scope_key,
+                RateLimitState.action_name == key.action_name,
+            )
+            .with_for_update()
+            .first()
+        )
+
+        if row is None:
+            row = RateLimitState(
+                center_id=key.center_id,
+                scope_type=key.scope_type,
+                scope_key=key.scope_key,
+                action_name=key.action_name,
+                window_start=now,
+                request_count=cost,
+            )
+            db.add(row)
+            db.flush()
+            return None
+
+        if (now - row.window_start).total_seconds() >= window_seconds:
+            row.window_start = now
+            row.request_count = cost
+            db.flush()
+            return None
+
+        if int(row.request_count or 0) + cost > max_requests:
+            return (row.window_start + timedelta(seconds=window_seconds) - now).total_seconds()
+
+        row.request_count = int(row.request_count or 0) + cost
+        db.flush()
+        return None
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """In-process token bucket: `max_requests` capacity refilled evenly over the window.
+
+    Single-process only: every worker keeps its own buckets, so with N workers each
+    limit is effectively N times looser. Opt in with RATE_LIMIT_BACKEND=memory.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_keys: int = 50_000) -> None:
+        self._lock = threading.Lock()
+        self._max_keys = max(1, int(max_keys))
+        self._buckets: dict[RateLimitKey, tuple[float, float]] = {}
+
+    def consume(self, db, key, *, max_requests, window_seconds, now, cost=1):
+        capacity = float(max_requests)
+        refill_per_second = capacity / float(window_seconds)
+        now_ts = now.timestamp()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now_ts))
+            tokens = min(capacity, tokens + max(0.0, now_ts - updated_at) * refill_per_second)
+            if key not in self._buckets and len(self._buckets) >= self._max_keys:
+                self._evict_full_buckets_locked(now_ts)
+            if tokens < cost:
+                self._buckets[key] = (tokens, now_ts)
+                return (cost - tokens) / refill_per_second
+            self._buckets[key] = (tokens - cost, now_ts)
+            return None
+
+    def _evict_full_buckets_locked(self, now_ts: float) -> None:
+        # Buckets idle for a day have certainly refilled; dropping them loses nothing.
+        stale = [key for key, (_, updated_at) in self._buckets.items() if now_ts - updated_at >= 86400]
+        for key in stale or list(self._buckets)[: max(1, len(self._buckets) // 10)]:
+            self._buckets.pop(key, None)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+_REDIS_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+local cost = tonumber(ARGV[5])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+if allowed == 1 then
+  return '-1'
+end
+return tostring((cost - tokens) / refill)
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Token bucket evaluated atomically server-side, shared by every worker process."""
+
+    name = 'redis'
+
+    def __init__(self, redis_url: str) -> None:
+        import redis  # type: ignore
+
+        self._client = redis.Redis.from_url(redis_url, decode_responses=True)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET_LUA)
+
+    def consume(self, db, key, *, max_requests, window_seconds, now, cost=1):
+        raw = self._script(
+            keys=[key.as_string()],
+            args=[max_requests, float(max_requests) / float(window_seconds), now.timestamp(), int(window_seconds) * 2, cost],
+        )
+        retry_after = float(raw)
+        return None if retry_after < 0 else retry_after
+
+
+_database_backend = DatabaseRateLimitBackend()
+
+
+def _build_rate_limit_backend() -> RateLimitBackend:
+    choice = (settings.rate_limit_backend or 'auto').strip().lower()
+    if choice == 'auto':
+        # Without redis, only the database is shared across workers; 'memory' stays opt-in.
+        choice = 'redis' if settings.cache_redis_url else 'db'
+    if choice == 'redis' and settings.cache_redis_url:
+        try:
+            return RedisRateLimitBackend(settings.cache_redis_url)
+        except Exception:
+            logger.exception('redis_rate_limit_init_failed_falling_back_to_db')
+            return _database_backend
+    if choice == 'memory':
+        return MemoryRateLimitBackend()
+    return _database_backend
+
+
+_backend_lock = threading.Lock()
+_backend: RateLimitBackend | None = None
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _build_rate_limit_backend()
+    return _backend
+
+
+def set_rate_limit_backend(backend: RateLimitBackend | None) -> None:
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def _consume_with_fallback(backend, db, key, *, max_allowed, window, now, cost) -> float | None:
+    try:
+        return backend.consume(db, key, max_requests=max_allowed, window_seconds=window, now=now, cost=cost)
+    except Exception:
+        if backend is _database_backend:
+            raise
+        logger.exception('rate_limit_backend_failed backend=%s falling_back=db', backend.name)
+        return _database_backend.consume(db, key, max_requests=max_allowed, window_seconds=window, now=now, cost=cost)
+
+
+def _try_consume(
+    db: Session | None,
     *,
     center_id: int,
     scope_type: str,
@@ -26,66 +245,94 @@ def check_rate_limit(
     action_name: str,
     max_requests: int,
     window_seconds: int,
-    time_provider: TimeProvider = default_time_provider,
-) -> bool:
-    scoped_center_id = int(center_id or 1)
-    normalized_scope_type = str(scope_type or 'user').strip().lower() or 'user'
-    normalized_scope_key = str(scope_key or '').strip() or 'unknown'
-    normalized_action_name = str(action_name or '').strip() or 'unknown_action'
+    time_provider: TimeProvider,
+    cost: int,
+) -> tuple[float | None, RateLimitKey, dict]:
+    key = RateLimitKey(
+        center_id=int(center_id or 1),
+        scope_type=str(scope_type or 'user').strip().lower() or 'user',
+        scope_key=str(scope_key or '').strip() or 'unknown',
+        action_name=str(action_name or '').strip() or 'unknown_action',
+    )
     max_allowed = max(1, int(max_requests or 1))
     window = max(1, int(window_seconds or 60))
     now = time_provider.now().replace(tzinfo=None)
+    cost = max(1, int(cost or 1))
 
-    row = (
-        db.query(RateLimitState)
-        .filter(
-            RateLimitState.center_id == scoped_center_id,
-            RateLimitState.scope_type == normalized_scope_type,
-            RateLimitState.scope_key == normalized_scope_key,
-            RateLimitState.action_name == normalized_action_name,
-        )
-        .with_for_update()
-        .first()
+    backend = get_rate_limit_backend()
+    if cost > max_allowed:
+        # Larger than the whole allowance: can never be granted, so consume nothing.
+        retry_after = float(window)
+    else:
+        retry_after = _consume_with_fallback(backend, db, key, max_allowed=max_allowed, window=window, now=now, cost=cost)
+    return retry_after, key, {'max_requests': max_allowed, 'window_seconds': window, 'cost': cost, 'backend': backend.name}
+
+
+def try_rate_limit(
+    db: Session | None,
+    *,
+    center_id: int,
+    scope_type: str,
+    scope_key: str,
+    action_name: str,
+    max_requests: int,
+    window_seconds: int,
+    time_provider: TimeProvider = default_time_provider,
+    cost: int = 1,
+) -> bool:
+    """Like `check_rate_limit`, but a refusal is silent: no log, no block metric, no exception.
+
+    For callers that probe a larger cost first and fall back to smaller ones.
+    """
+    retry_after, _, _ = _try_consume(
+        db,
+        center_id=center_id,
+        scope_type=scope_type,
+        scope_key=scope_key,
+        action_name=action_name,
+        max_requests=max_requests,
+        window_seconds=window_seconds,
+        time_provider=time_provider,
+        cost=cost,
     )
+    return retry_after is None
 
-    if row is None:
-        row = RateLimitState(
-            center_id=scoped_center_id,
-            scope_type=normalized_scope_type,
-            scope_key=normalized_scope_key,
-            action_name=normalized_action_name,
-            window_start=now,
-            request_count=1,
-        )
-        db.add(row)
-        db.flush()
-        return True
 
-    if (now - row.window_start).total_seconds() >= window:
-        row.window_start = now
-        row.request_count = 1
-        db.flush()
+def check_rate_limit(
+    db: Session,
+    *,
+    center_id: int,
+    scope_type: str,
+    scope_key: str,
+    action_name: str,
+    max_requests: int,
+    window_seconds: int,
+    time_provider: TimeProvider = default_time_provider,
+    cost: int = 1,
+) -> bool:
+    retry_after, key, limits = _try_consume(
+        db,
+        center_id=center_id,
+        scope_type=scope_type,
+        scope_key=scope_key,
+        action_name=action_name,
+        max_requests=max_requests,
+        window_seconds=window_seconds,
+        time_provider=time_provider,
+        cost=cost,
+    )
+    if retry_after is None:
         return True
 
-    if int(row.request_count or 0) >= max_allowed:
-        record_observability_event('rate_limit_block')
-        logger.warning(
-            'rate_limit_blocked',
-            extra={
-                'center_id': scoped_center_id,
-                'scope_type': normalized_scope_type,
-                'scope_key': normalized_scope_key,
-                'action_name': normalized_action_name,
-                'max_requests': max_allowed,
-                'window_seconds': window,
-            },
-        )
-        retry_after = max(
-            1,
-            int((row.window_start + timedelta(seconds=window) - now).total_seconds()),
-        )
-        raise SafeRateLimitError(f'Rate limit exceeded. Retry in {retry_after} seconds.')
-
-    row.request_count = int(row.request_count or 0) + 1
-    db.flush()
-    return True
+    record_observability_event('rate_limit_block', action=key.action_name)
+    logger.warning(
+        'rate_limit_blocked',
+        extra={
+            'center_id': key.center_id,
+            'scope_type': key.scope_type,
+            'scope_key': key.scope_key,
+            'action_name': key.action_name,
+            **limits,
+        },
+    )
+    raise SafeRateLimitError(f'Rate limit exceeded. Retry in {max(1, int(retry_after))} seconds.')
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.models import SchedulerLease
+from app.services.observability_counters import record_observability_event
+from app.utils.time_utils import get_utcnow
+
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LEASE_NAME = 'scheduler'
+
+
+def lease_holder_id() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def acquire_lease(
+    db: Session,
+    *,
+    name: str,
+    holder: str,
+    ttl_seconds: int,
+    now: datetime | None = None,
+) -> bool:
+    """Take or renew `name` for `holder`; succeeds only if it is free, expired, or already ours."""
+    now = now or get_utcnow()
+    expires_at = now + timedelta(seconds=max(1, int(ttl_seconds)))
+    result = db.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at <= now),
+        )
+        .values(holder=holder, expires_at=expires_at, heartbeat_at=now)
+    )
+    if result.rowcount == 1:
+        db.commit()
+        return True
+    if db.query(SchedulerLease.id).filter(SchedulerLease.name == name).first() is not None:
+        db.rollback()
+        return False
+    db.add(SchedulerLease(name=name, holder=holder, expires_at=expires_at, heartbeat_at=now))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another process created the row between our check and insert.
+        db.rollback()
+        return False
+    return True
+
+
+def release_lease(db: Session, *, name: str, holder: str, now: datetime | None = None) -> None:
+    db.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+        .values(expires_at=now or get_utcnow())
+    )
+    db.commit()
+
+
+class LeaderElector:
+    """Keeps one process holding a named lease and tells it when it gains or loses it.
+
+    Every heartbeat renews the lease; a leader that cannot renew (DB error or
+    takeover after a stall) demotes itself before the lease runs out, so at
+    most one process runs `on_elected` work at a time.
+    """
+
+    def __init__(
+        self,
+        *,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None],
+        name: str = SCHEDULER_LEASE_NAME,
+        session_factory: sessionmaker | None = None,
+        holder: str | None = None,
+        ttl_seconds: int | None = None,
+        heartbeat_seconds: int | None = None,
+    ) -> None:
+        if session_factory is None:
+            from app.db import SessionLocal
+
+            session_factory = SessionLocal
+        self.name = name
+        self.holder = holder or lease_holder_id()
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._session_factory = session_factory
+        self._ttl_seconds = max(2, int(ttl_seconds or settings.scheduler_lease_ttl_seconds or 30))
+        heartbeat = int(heartbeat_seconds or settings.scheduler_heartbeat_seconds or 10)
+        # Renew well inside the TTL so one slow heartbeat does not hand the lease away.
+        self._heartbeat_seconds = max(1, min(heartbeat, self._ttl_seconds // 2))
+        self._leader = False
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader
+
+    def tick(self, *, now: datetime | None = None) -> bool:
+        db = self._session_factory()
+        try:
+            held = acquire_lease(db, name=self.name, holder=self.holder, ttl_seconds=self._ttl_seconds, now=now)
+        except Exception:
+            db.rollback()
+            logger.exception('scheduler_lease_renew_failed name=%s holder=%s', self.name, self.holder)
+            held = False
+        finally:
+            db.close()
+
+        if held and not self._leader:
+            self._leader = True
+            logger.info('scheduler_leader_elected name=%s holder=%s', self.name, self.holder)
+            record_observability_event('scheduler_leader_elected', lease=self.name)
+            self._on_elected()
+        elif not held and self._leader:
+            self._leader = False
+            logger.warning('scheduler_leader_lost name=%s holder=%s', self.name, self.holder)
+            record_observability_event('scheduler_leader_lost', lease=self.name)
+            self._on_demoted()
+        return held
+
+    def resign(self) -> None:
+        """Stop leader work and expire the lease so a standby takes over on its next heartbeat."""
+        if self._leader:
+            self._leader = False
+            self._on_demoted()
+        db = self._session_factory()
+        try:
+            release_lease(db, name=self.name, holder=self.holder)
+        except Exception:
+            db.rollback()
+            logger.exception('scheduler_lease_release_failed name=%s holder=%s', self.name, self.holder)
+        finally:
+            db.close()
+
+    def run(self, stop: threading.Event) -> None:
+        try:
+            while not stop.is_set():
+                self.tick()
+                stop.wait(self._heartbeat_seconds)
+        finally:
+            self.resign()
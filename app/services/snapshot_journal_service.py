@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.time_provider import default_time_provider
+from app.models import (
+    AttendanceRecord,
+    Batch,
+    CalendarOverride,
+    ClassSession,
+    FeeRecord,
+    PendingAction,
+    SnapshotDirtyMark,
+    Student,
+    StudentBatchMap,
+    TeacherBatchMap,
+)
+from app.services.center_scope_service import get_current_center_id
+
+
+logger = logging.getLogger(__name__)
+
+SCOPE_TEACHER = 'teacher'
+SCOPE_STUDENT = 'student'
+SCOPE_BATCH = 'batch'
+SCOPE_CENTER = 'center'
+
+
+@dataclass
+class DirtySnapshotSet:
+    center_id: int
+    max_mark_id: int = 0
+    center_dirty: bool = False
+    teacher_ids: set[int] = field(default_factory=set)
+    student_ids: set[int] = field(default_factory=set)
+    batch_ids: set[int] = field(default_factory=set)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.center_dirty or self.teacher_ids or self.student_ids or self.batch_ids)
+
+
+def _student_center_id(session: Session, student_id: int) -> int:
+    row = session.get(Student, int(student_id)) if int(student_id or 0) > 0 else None
+    return int(getattr(row, 'center_id', 0) or 0)
+
+
+def _batch_center_id(session: Session, batch_id: int) -> int:
+    row = session.get(Batch, int(batch_id)) if int(batch_id or 0) > 0 else None
+    return int(getattr(row, 'center_id', 0) or 0)
+
+
+def _dependencies_for(session: Session, obj) -> list[tuple[int, str, int]]:
+    """Map a written row to the (center_id, scope, entity_id) snapshots it can affect."""
+    context_center_id = int(get_current_center_id() or 0)
+    if isinstance(obj, (AttendanceRecord, FeeRecord)):
+        student_id = int(obj.student_id or 0)
+        center_id = context_center_id or _student_center_id(session, student_id)
+        return [(center_id, SCOPE_STUDENT, student_id)]
+    if isinstance(obj, PendingAction):
+        center_id = int(obj.center_id or 0) or context_center_id
+        deps = [(center_id, SCOPE_CENTER, 0)]
+        if int(obj.teacher_id or 0) > 0:
+            deps.append((center_id, SCOPE_TEACHER, int(obj.teacher_id)))
+        if int(obj.student_id or 0) > 0:
+            deps.append((center_id, SCOPE_STUDENT, int(obj.student_id)))
+        return deps
+    if isinstance(obj, ClassSession):
+        center_id = int(obj.center_id or 0) or context_center_id
+        deps = [(center_id, SCOPE_BATCH, int(obj.batch_id or 0))]
+        if int(obj.teacher_id or 0) > 0:
+            deps.append((center_id, SCOPE_TEACHER, int(obj.teacher_id)))
+        return deps
+    if isinstance(obj, CalendarOverride):
+        batch_id = int(obj.batch_id or 0)
+        center_id = context_center_id or _batch_center_id(session, batch_id)
+        return [(center_id, SCOPE_BATCH, batch_id)]
+    return []
+
+
+_TRACKED_MODELS = (AttendanceRecord, FeeRecord, PendingAction, ClassSession, CalendarOverride)
+
+
+def record_snapshot_dependencies(session: Session) -> None:
+    """before_flush hook: journal which snapshots the pending writes make stale.
+
+    Marks are added to the same flush, so they commit or roll back together with
+    the write that caused them.
+    """
+    touched = [obj for obj in (*session.new, *session.deleted) if isinstance(obj, _TRACKED_MODELS)]
+    touched.extend(
+        obj for obj in session.dirty if isinstance(obj, _TRACKED_MODELS) and session.is_modified(obj)
+    )
+    if not touched:
+        return
+    dependencies: list[tuple[int, str, int, str]] = []
+    for obj in touched:
+        try:
+            dependencies.extend((*dep, type(obj).__name__) for dep in _dependencies_for(session, obj))
+        except Exception:
+            logger.exception('snapshot_journal_dependency_failed model=%s', type(obj).__name__)
+    _add_dirty_marks(session, dependencies)
+
+
+def record_bulk_student_writes(session: Session, *, center_id: int, student_ids, source: str) -> None:
+    """Journal student-scoped rows written by Core statements, which never reach before_flush."""
+    _add_dirty_marks(
+        session,
+        [(int(center_id or 0), SCOPE_STUDENT, int(student_id or 0), source) for student_id in student_ids],
+    )
+
+
+def _add_dirty_marks(session: Session, dependencies: list[tuple[int, str, int, str]]) -> None:
+    now = default_time_provider.now().replace(tzinfo=None)
+    seen: set[tuple[int, str, int]] = set()
+    for center_id, scope, entity_id, source in dependencies:
+        if center_id <= 0 or (scope != SCOPE_CENTER and entity_id <= 0):
+            continue
+        key = (center_id, scope, entity_id)
+        if key in seen:
+            continue
+        seen.add(key)
+        if scope != SCOPE_CENTER:
+            seen_center = (center_id, SCOPE_CENTER, 0)
+            if seen_center not in seen:
+                seen.add(seen_center)
+                session.add(
+                    SnapshotDirtyMark(
+                        center_id=center_id,
+                        scope=SCOPE_CENTER,
+                        entity_id=0,
+                        source=source,
+                        marked_at=now,
+                    )
+                )
+        session.add(
+            SnapshotDirtyMark(
+                center_id=center_id,
+                scope=scope,
+                entity_id=entity_id,
+                source=source,
+                marked_at=now,
+            )
+        )
+
+
+def load_dirty_snapshot_set(db: Session, *, center_id: int) -> DirtySnapshotSet:
+    center_id = int(center_id or 0)
+    dirty = DirtySnapshotSet(center_id=center_id)
+    rows = (
+        db.query(SnapshotDirtyMark.id, SnapshotDirtyMark.scope, SnapshotDirtyMark.entity_id)
+        .filter(SnapshotDirtyMark.center_id == center_id)
+        .all()
+    )
+    for mark_id, scope, entity_id in rows:
+        dirty.max_mark_id = max(dirty.max_mark_id, int(mark_id))
+        if scope == SCOPE_CENTER:
+            dirty.center_dirty = True
+        elif scope == SCOPE_TEACHER:
+            dirty.teacher_ids.add(int(entity_id))
+        elif scope == SCOPE_STUDENT:
+            dirty.student_ids.add(int(entity_id))
+        elif scope == SCOPE_BATCH:
+            dirty.batch_ids.add(int(entity_id))
+    return dirty
+
+
+def expand_dirty_snapshot_set(db: Session, dirty: DirtySnapshotSet) -> tuple[set[int], set[int]]:
+    """Resolve batch and student marks to the full teacher and student sets to rebuild."""
+    center_id = int(dirty.center_id)
+    batch_ids = set(dirty.batch_ids)
+    student_ids = set(dirty.student_ids)
+    if student_ids:
+        batch_ids.update(
+            int(row[0])
+            for row in db.query(Student.batch_id)
+            .filter(Student.id.in_(student_ids), Student.center_id == center_id)
+            .all()
+            if row[0]
+        )
+        batch_ids.update(
+            int(row[0])
+            for row in db.query(StudentBatchMap.batch_id)
+            .join(Student, Student.id == StudentBatchMap.student_id)
+            .filter(
+                StudentBatchMap.student_id.in_(student_ids),
+                StudentBatchMap.active.is_(True),
+                Student.center_id == center_id,
+            )
+            .all()
+        )
+    teacher_ids = set(dirty.teacher_ids)
+    if batch_ids:
+        teacher_ids.update(
+            int(row[0])
+            for row in db.query(TeacherBatchMap.teacher_id)
+            .filter(TeacherBatchMap.batch_id.in_(batch_ids), TeacherBatchMap.center_id == center_id)
+            .all()
+        )
+    if dirty.batch_ids:
+        linked_student_ids = (
+            db.query(StudentBatchMap.student_id)
+            .filter(StudentBatchMap.batch_id.in_(dirty.batch_ids), StudentBatchMap.active.is_(True))
+            .scalar_subquery()
+        )
+        student_ids.update(
+            int(row[0])
+            for row in db.query(Student.id)
+            .filter(
+                Student.center_id == center_id,
+                or_(Student.batch_id.in_(dirty.batch_ids), Student.id.in_(linked_student_ids)),
+            )
+            .all()
+        )
+    return teacher_ids, student_ids
+
+
+def clear_dirty_marks(db: Session, *, center_id: int, up_to_id: int) -> int:
+    if int(up_to_id or 0) <= 0:
+        return 0
+    deleted = (
+        db.query(SnapshotDirtyMark)
+        .filter(SnapshotDirtyMark.center_id == int(center_id or 0), SnapshotDirtyMark.id <= int(up_to_id))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return int(deleted or 0)
@@ -2,15 +2,26 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
+import time
 from datetime import date
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.db import reads_from_primary
 from app.core.time_provider import TimeProvider, default_time_provider
 from app.models import AdminOpsSnapshot, AuthUser, Role, Student, StudentDashboardSnapshot, TeacherTodaySnapshot
 from app.services.admin_ops_dashboard_service import get_admin_ops_dashboard
 from app.services.dashboard_today_service import get_today_view
 from app.services.observability_counters import record_observability_event
+from app.services.snapshot_journal_service import (
+    DirtySnapshotSet,
+    clear_dirty_marks,
+    expand_dirty_snapshot_set,
+    load_dirty_snapshot_set,
+)
 from app.services.student_portal_service import get_student_dashboard
 
 
@@ -32,23 +43,45 @@ def _today(time_provider: TimeProvider = default_time_provider) -> date:
     return time_provider.today()
 
 
+def _record_drift(center_id: int, snapshot_type: str, entity_id: int, day: date) -> None:
+    """A stored snapshot disagreed with a fresh build although nothing journaled it as dirty."""
+    record_observability_event('snapshot_drift')
+    logger.warning(
+        'snapshot_drift_detected',
+        extra={
+            'center_id': int(center_id),
+            'snapshot_type': snapshot_type,
+            'entity_id': int(entity_id),
+            'day': day.isoformat(),
+        },
+    )
+
+
+@reads_from_primary
 def rebuild_teacher_today_snapshot(
     db: Session,
     center_id: int,
     *,
     day: date | None = None,
     time_provider: TimeProvider = default_time_provider,
+    teacher_ids: set[int] | None = None,
+    expected_ids: set[int] = frozenset(),
 ) -> dict:
+    """Rewrite today's teacher snapshots that differ from a fresh build.
+
+    Rows for `expected_ids` were journaled dirty, so rewriting them is not drift.
+    """
     target_day = day or _today(time_provider)
     now = time_provider.now().replace(tzinfo=None)
-    teachers = (
-        db.query(AuthUser.id)
-        .filter(
-            AuthUser.role == Role.TEACHER.value,
-            AuthUser.center_id == int(center_id or 0),
-        )
-        .all()
+    query = db.query(AuthUser.id).filter(
+        AuthUser.role == Role.TEACHER.value,
+        AuthUser.center_id == int(center_id or 0),
     )
+    if teacher_ids is not None:
+        if not teacher_ids:
+            return {'rebuilt': 0, 'healed': 0}
+        query = query.filter(AuthUser.id.in_(sorted(teacher_ids)))
+    teachers = query.all()
     rebuilt = 0
     healed = 0
     for (teacher_id,) in teachers:
@@ -77,42 +110,27 @@ def rebuild_teacher_today_snapshot(
                 )
             )
             healed += 1
-            record_observability_event('snapshot_drift')
-            logger.warning(
-                'snapshot_drift_detected',
-                extra={
-                    'center_id': int(center_id),
-                    'snapshot_type': 'teacher_today',
-                    'entity_id': int(teacher_id),
-                    'day': target_day.isoformat(),
-                },
-            )
             continue
         if _canonical_row_payload(str(row.data_json or '')) != payload_json:
             row.data_json = payload_json
             row.updated_at = now
             healed += 1
-            record_observability_event('snapshot_drift')
-            logger.warning(
-                'snapshot_drift_detected',
-                extra={
-                    'center_id': int(center_id),
-                    'snapshot_type': 'teacher_today',
-                    'entity_id': int(teacher_id),
-                    'day': target_day.isoformat(),
-                },
-            )
+            if int(teacher_id) not in expected_ids:
+                _record_drift(center_id, 'teacher_today', teacher_id, target_day)
     db.commit()
     return {'rebuilt': rebuilt, 'healed': healed}
 
 
+@reads_from_primary
 def rebuild_admin_ops_snapshot(
     db: Session,
     center_id: int,
     *,
     day: date | None = None,
     time_provider: TimeProvider = default_time_provider,
+    expected: bool = False,
 ) -> dict:
+    """Rewrite the center's admin ops snapshot if it differs; `expected` means it was journaled dirty."""
     target_day = day or _today(time_provider)
     now = time_provider.now().replace(tzinfo=None)
     payload = get_admin_ops_dashboard(db, center_id=int(center_id or 0), time_provider=time_provider)
@@ -137,45 +155,38 @@ def rebuild_admin_ops_snapshot(
             )
         )
         healed = 1
-        record_observability_event('snapshot_drift')
-        logger.warning(
-            'snapshot_drift_detected',
-            extra={
-                'center_id': int(center_id),
-                'snapshot_type': 'admin_ops',
-                'entity_id': 0,
-                'day': target_day.isoformat(),
-            },
-        )
-    else:
-        if _canonical_row_payload(str(row.data_json or '')) != payload_json:
-            row.data_json = payload_json
-            row.updated_at = now
-            healed = 1
-            record_observability_event('snapshot_drift')
-            logger.warning(
-                'snapshot_drift_detected',
-                extra={
-                    'center_id': int(center_id),
-                    'snapshot_type': 'admin_ops',
-                    'entity_id': 0,
-                    'day': target_day.isoformat(),
-                },
-            )
+    elif _canonical_row_payload(str(row.data_json or '')) != payload_json:
+        row.data_json = payload_json
+        row.updated_at = now
+        healed = 1
+        if not expected:
+            _record_drift(center_id, 'admin_ops', 0, target_day)
     db.commit()
     return {'rebuilt': rebuilt, 'healed': healed}
 
 
+@reads_from_primary
 def rebuild_student_dashboard_snapshot(
     db: Session,
     center_id: int,
     *,
     day: date | None = None,
     time_provider: TimeProvider = default_time_provider,
+    student_ids: set[int] | None = None,
+    expected_ids: set[int] = frozenset(),
 ) -> dict:
+    """Rewrite today's student dashboard snapshots that differ from a fresh build.
+
+    Rows for `expected_ids` were journaled dirty, so rewriting them is not drift.
+    """
     target_day = day or _today(time_provider)
     now = time_provider.now().replace(tzinfo=None)
-    students = db.query(Student).filter(Student.center_id == int(center_id or 0)).all()
+    query = db.query(Student).filter(Student.center_id == int(center_id or 0))
+    if student_ids is not None:
+        if not student_ids:
+            return {'rebuilt': 0, 'healed': 0}
+        query = query.filter(Student.id.in_(sorted(student_ids)))
+    students = query.all()
     rebuilt = 0
     healed = 0
     for student in students:
@@ -200,31 +211,13 @@ def rebuild_student_dashboard_snapshot(
                 )
             )
             healed += 1
-            record_observability_event('snapshot_drift')
-            logger.warning(
-                'snapshot_drift_detected',
-                extra={
-                    'center_id': int(center_id),
-                    'snapshot_type': 'student_dashboard',
-                    'entity_id': int(student.id),
-                    'day': target_day.isoformat(),
-                },
-            )
             continue
         if _canonical_row_payload(str(row.data_json or '')) != payload_json:
             row.data_json = payload_json
             row.updated_at = now
             healed += 1
-            record_observability_event('snapshot_drift')
-            logger.warning(
-                'snapshot_drift_detected',
-                extra={
-                    'center_id': int(center_id),
-                    'snapshot_type': 'student_dashboard',
-                    'entity_id': int(student.id),
-                    'day': target_day.isoformat(),
-                },
-            )
+            if int(student.id) not in expected_ids:
+                _record_drift(center_id, 'student_dashboard', student.id, target_day)
     db.commit()
     return {'rebuilt': rebuilt, 'healed': healed}
 
@@ -235,11 +228,23 @@ def rebuild_snapshots_for_center(
     center_id: int,
     day: date | None = None,
     time_provider: TimeProvider = default_time_provider,
+    dirty: DirtySnapshotSet | None = None,
 ) -> dict:
+    """Rebuild every snapshot of the center; differences outside `dirty` are reported as drift."""
     target_day = day or _today(time_provider)
-    teacher = rebuild_teacher_today_snapshot(db, center_id, day=target_day, time_provider=time_provider)
-    admin = rebuild_admin_ops_snapshot(db, center_id, day=target_day, time_provider=time_provider)
-    student = rebuild_student_dashboard_snapshot(db, center_id, day=target_day, time_provider=time_provider)
+    expected_teachers: set[int] = set()
+    expected_students: set[int] = set()
+    if dirty is not None and not dirty.is_empty:
+        expected_teachers, expected_students = expand_dirty_snapshot_set(db, dirty)
+    teacher = rebuild_teacher_today_snapshot(
+        db, center_id, day=target_day, time_provider=time_provider, expected_ids=expected_teachers
+    )
+    admin = rebuild_admin_ops_snapshot(
+        db, center_id, day=target_day, time_provider=time_provider, expected=dirty is not None and not dirty.is_empty
+    )
+    student = rebuild_student_dashboard_snapshot(
+        db, center_id, day=target_day, time_provider=time_provider, expected_ids=expected_students
+    )
     healed_count = int(teacher['healed']) + int(admin['healed']) + int(student['healed'])
     rebuilt_count = int(teacher['rebuilt']) + int(admin['rebuilt']) + int(student['rebuilt'])
     record_observability_event('snapshot_rebuild_run')
@@ -254,8 +259,107 @@ def rebuild_snapshots_for_center(
     return {
         'center_id': int(center_id),
         'day': target_day.isoformat(),
+        'mode': 'full',
+        'rebuilt_count': rebuilt_count,
+        'healed_count': healed_count,
+        'skipped_count': 0,
+        'teacher': teacher,
+        'admin': admin,
+        'student': student,
+    }
+
+
+_LAST_FULL_REBUILD: dict[int, tuple[date, float]] = {}
+_LAST_FULL_REBUILD_LOCK = threading.Lock()
+
+
+def _full_rebuild_due(center_id: int, target_day: date) -> bool:
+    interval_seconds = max(0, int(settings.snapshot_full_rebuild_minutes or 0)) * 60
+    with _LAST_FULL_REBUILD_LOCK:
+        last = _LAST_FULL_REBUILD.get(int(center_id))
+    if last is None:
+        return True
+    last_day, last_at = last
+    if last_day != target_day:
+        return True
+    return interval_seconds > 0 and (time.monotonic() - last_at) >= interval_seconds
+
+
+def _note_full_rebuild(center_id: int, target_day: date) -> None:
+    with _LAST_FULL_REBUILD_LOCK:
+        _LAST_FULL_REBUILD[int(center_id)] = (target_day, time.monotonic())
+
+
+def rebuild_dirty_snapshots_for_center(
+    db: Session,
+    *,
+    center_id: int,
+    day: date | None = None,
+    time_provider: TimeProvider = default_time_provider,
+    force_full: bool = False,
+) -> dict:
+    """Rebuild only the snapshots journaled as dirty since the last run.
+
+    A full sweep still runs on the first pass of each new day, when every "today"
+    snapshot is stale, and every `snapshot_full_rebuild_minutes` after that to
+    refresh their time-dependent parts.
+    """
+    center_id = int(center_id or 0)
+    target_day = day or _today(time_provider)
+    dirty = load_dirty_snapshot_set(db, center_id=center_id)
+    if force_full or _full_rebuild_due(center_id, target_day):
+        summary = rebuild_snapshots_for_center(
+            db, center_id=center_id, day=target_day, time_provider=time_provider, dirty=dirty
+        )
+        clear_dirty_marks(db, center_id=center_id, up_to_id=dirty.max_mark_id)
+        _note_full_rebuild(center_id, target_day)
+        return summary
+
+    teacher_total = (
+        db.query(func.count(AuthUser.id))
+        .filter(AuthUser.role == Role.TEACHER.value, AuthUser.center_id == center_id)
+        .scalar()
+        or 0
+    )
+    student_total = db.query(func.count(Student.id)).filter(Student.center_id == center_id).scalar() or 0
+    teacher_ids, student_ids = expand_dirty_snapshot_set(db, dirty)
+
+    teacher = rebuild_teacher_today_snapshot(
+        db, center_id, day=target_day, time_provider=time_provider, teacher_ids=teacher_ids, expected_ids=teacher_ids
+    )
+    if dirty.is_empty:
+        admin = {'rebuilt': 0, 'healed': 0}
+    else:
+        admin = rebuild_admin_ops_snapshot(db, center_id, day=target_day, time_provider=time_provider, expected=True)
+    student = rebuild_student_dashboard_snapshot(
+        db, center_id, day=target_day, time_provider=time_provider, student_ids=student_ids, expected_ids=student_ids
+    )
+    clear_dirty_marks(db, center_id=center_id, up_to_id=dirty.max_mark_id)
+
+    healed_count = int(teacher['healed']) + int(admin['healed']) + int(student['healed'])
+    rebuilt_count = int(teacher['rebuilt']) + int(admin['rebuilt']) + int(student['rebuilt'])
+    teacher['skipped'] = max(0, int(teacher_total) - int(teacher['rebuilt']))
+    admin['skipped'] = 1 - int(admin['rebuilt'])
+    student['skipped'] = max(0, int(student_total) - int(student['rebuilt']))
+    skipped_count = int(teacher['skipped']) + int(admin['skipped']) + int(student['skipped'])
+    record_observability_event('snapshot_rebuild_run')
+    logger.info(
+        'snapshot_rebuild_incremental',
+        extra={
+            'center_id': center_id,
+            'rebuilt_count': rebuilt_count,
+            'healed_count': healed_count,
+            'skipped_count': skipped_count,
+            'day': target_day.isoformat(),
+        },
+    )
+    return {
+        'center_id': center_id,
+        'day': target_day.isoformat(),
+        'mode': 'incremental',
         'rebuilt_count': rebuilt_count,
         'healed_count': healed_count,
+        'skipped_count': skipped_count,
         'teacher': teacher,
         'admin': admin,
         'student': student,
@@ -3,7 +3,7 @@ from __future__ import annotations
 import logging
 from datetime import datetime, timedelta
 
-from sqlalchemy import and_, func
+from sqlalchemy import and_, case, func
 from sqlalchemy.orm import Session
 
 from app.communication.communication_event import CommunicationEvent, CommunicationEventType
@@ -11,13 +11,14 @@ from app.config import settings
 from app.core.time_provider import TimeProvider, default_time_provider
 from app.models import AttendanceRecord, ClassSession, CommunicationLog, Homework, HomeworkSubmission, Student
 from app.services.batch_membership_service import list_active_student_ids_for_batch
-from app.services.comms_service import emit_communication_event
-from app.services.student_digest_service import build_student_digest
+from app.services.comms_service import StudentMessage, emit_communication_event, emit_student_events_batch
+from app.services.student_digest_service import build_student_digests
 
 
 logger = logging.getLogger(__name__)
 
 MAX_STUDENT_MESSAGES_PER_DAY = 2
+_PREFETCH_CHUNK_SIZE = 500
 
 
 def _start_of_today(*, time_provider: TimeProvider = default_time_provider) -> datetime:
@@ -216,115 +217,173 @@ def send_homework_due_tomorrow(db: Session, *, center_id: int, time_provider: Ti
     return {'sent': sent, 'suppressed': suppressed}
 
 
+def _daily_message_counts(
+    db: Session,
+    student_ids: list[int],
+    *,
+    time_provider: TimeProvider = default_time_provider,
+) -> dict[int, int]:
+    """Telegram messages sent today per student, for many students in one grouped query per chunk."""
+    start = _start_of_today(time_provider=time_provider)
+    ids = sorted(set(student_ids))
+    counts: dict[int, int] = {}
+    for offset in range(0, len(ids), _PREFETCH_CHUNK_SIZE):
+        counts.update(
+            db.query(CommunicationLog.student_id, func.count(CommunicationLog.id))
+            .filter(
+                CommunicationLog.student_id.in_(ids[offset : offset + _PREFETCH_CHUNK_SIZE]),
+                CommunicationLog.channel == 'telegram',
+                CommunicationLog.created_at >= start,
+            )
+            .group_by(CommunicationLog.student_id)
+            .all()
+        )
+    return counts
+
+
+def _already_sent_ids(
+    db: Session,
+    student_ids: list[int],
+    *,
+    notification_type: str,
+    reference_id: int | None = None,
+    since: datetime | None = None,
+    channel: str | None = 'telegram',
+) -> set[int]:
+    ids = sorted(set(student_ids))
+    sent: set[int] = set()
+    for offset in range(0, len(ids), _PREFETCH_CHUNK_SIZE):
+        query = db.query(CommunicationLog.student_id).filter(
+            CommunicationLog.student_id.in_(ids[offset : offset + _PREFETCH_CHUNK_SIZE]),
+            CommunicationLog.notification_type == notification_type,
+        )
+        if channel is not None:
+            query = query.filter(CommunicationLog.channel == channel)
+        if reference_id is not None:
+            query = query.filter(CommunicationLog.reference_id == reference_id)
+        if since is not None:
+            query = query.filter(CommunicationLog.created_at >= since)
+        sent.update(int(row.student_id) for row in query.distinct().all())
+    return sent
+
+
 def send_daily_digest(db: Session, *, center_id: int, time_provider: TimeProvider = default_time_provider) -> dict:
+    """Send today's digest to every opted-in student of the center.
+
+    Sent counts, the already-sent set and the digest facts are prefetched for the
+    whole center, so the job runs a fixed number of queries however many
+    students it covers; the messages then go out as one batch.
+    """
     center_id = int(center_id or 0)
     if center_id <= 0:
         raise ValueError('center_id is required')
-    sent = 0
-    suppressed = 0
-    students = db.query(Student).filter(Student.enable_daily_digest.is_(True), Student.center_id == center_id).all()
-    for student in students:
-        if not student.telegram_chat_id:
-            continue
-        if _already_sent(
-            db,
-            student_id=student.id,
-            notification_type='student_daily_digest',
-            reference_id=int(time_provider.today().strftime('%Y%m%d')),
-        ):
-            suppressed += 1
-            continue
-        if not _can_send_today(db, student.id, time_provider=time_provider):
-            suppressed += 1
-            continue
-        digest = build_student_digest(db, student, center_id=int(student.center_id or 0))
-        if not digest:
-            suppressed += 1
-            continue
-        emit_communication_event(
-            db,
-            CommunicationEvent(
+    digest_ref = int(time_provider.today().strftime('%Y%m%d'))
+    students = [
+        student
+        for student in db.query(Student).filter(Student.enable_daily_digest.is_(True), Student.center_id == center_id).all()
+        if student.telegram_chat_id
+    ]
+    student_ids = [student.id for student in students]
+    already = _already_sent_ids(db, student_ids, notification_type='student_daily_digest', reference_id=digest_ref)
+    counts = _daily_message_counts(db, student_ids, time_provider=time_provider)
+    eligible = [
+        student
+        for student in students
+        if student.id not in already and counts.get(student.id, 0) < MAX_STUDENT_MESSAGES_PER_DAY
+    ]
+    digests = build_student_digests(db, eligible, center_id=center_id, time_provider=time_provider)
+    items = [
+        StudentMessage(
+            event=CommunicationEvent(
                 event_type=CommunicationEventType.DAILY_BRIEF.value,
                 tenant_id=settings.communication_tenant_id,
                 actor_id=None,
                 entity_type='student',
                 entity_id=student.id,
-                payload={'digest_date': int(time_provider.today().strftime('%Y%m%d'))},
+                payload={'digest_date': digest_ref},
                 channels=['telegram'],
             ),
-            message=digest,
+            message=digests[student.id],
             chat_id=student.telegram_chat_id,
             student_id=student.id,
-            notification_type='student_daily_digest',
-            reference_id=int(time_provider.today().strftime('%Y%m%d')),
-            time_provider=time_provider,
+            batch_id=student.batch_id,
+            reference_id=digest_ref,
         )
-        sent += 1
-    return {'sent': sent, 'suppressed': suppressed}
+        for student in eligible
+        if student.id in digests
+    ]
+    if items:
+        emit_student_events_batch(db, items, notification_type='student_daily_digest', time_provider=time_provider)
+    return {'sent': len(items), 'suppressed': len(students) - len(items)}
 
 
 def send_weekly_motivation(db: Session, *, center_id: int, time_provider: TimeProvider = default_time_provider) -> dict:
+    """Cheer on students who attended every class in the last week, prefetching all checks per center."""
     center_id = int(center_id or 0)
     if center_id <= 0:
         raise ValueError('center_id is required')
-    sent = 0
-    suppressed = 0
     cutoff = time_provider.today() - timedelta(days=7)
-    students = db.query(Student).filter(Student.enable_motivation_messages.is_(True), Student.center_id == center_id).all()
-    for student in students:
-        if not student.telegram_chat_id:
-            continue
-        recent = (
-            db.query(AttendanceRecord)
+    students = [
+        student
+        for student in db.query(Student)
+        .filter(Student.enable_motivation_messages.is_(True), Student.center_id == center_id)
+        .all()
+        if student.telegram_chat_id
+    ]
+    student_ids = [student.id for student in students]
+    week: dict[int, tuple[int, int]] = {}
+    for offset in range(0, len(student_ids), _PREFETCH_CHUNK_SIZE):
+        rows = (
+            db.query(
+                AttendanceRecord.student_id,
+                func.count(AttendanceRecord.id),
+                func.sum(case((AttendanceRecord.status == 'Present', 1), else_=0)),
+            )
             .filter(
-                AttendanceRecord.student_id == student.id,
+                AttendanceRecord.student_id.in_(student_ids[offset : offset + _PREFETCH_CHUNK_SIZE]),
                 AttendanceRecord.attendance_date >= cutoff,
             )
-            .order_by(AttendanceRecord.attendance_date.desc())
+            .group_by(AttendanceRecord.student_id)
             .all()
         )
-        if not recent:
-            suppressed += 1
+        week.update({int(student_id): (int(total), int(present or 0)) for student_id, total, present in rows})
+    already = _already_sent_ids(
+        db,
+        student_ids,
+        notification_type='student_motivation_weekly',
+        since=time_provider.now().replace(tzinfo=None) - timedelta(days=7),
+        channel=None,
+    )
+    counts = _daily_message_counts(db, student_ids, time_provider=time_provider)
+
+    message = "🔥 Great job!\nYou attended all classes this week."
+    items: list[StudentMessage] = []
+    for student in students:
+        total, present = week.get(student.id, (0, 0))
+        if total == 0 or present != total:
             continue
-        all_present = all(row.status == 'Present' for row in recent)
-        if not all_present:
-            suppressed += 1
+        if student.id in already or counts.get(student.id, 0) >= MAX_STUDENT_MESSAGES_PER_DAY:
             continue
-        already = (
-            db.query(CommunicationLog)
-            .filter(
-                CommunicationLog.student_id == student.id,
-                CommunicationLog.notification_type == 'student_motivation_weekly',
-                CommunicationLog.created_at >= (time_provider.now().replace(tzinfo=None) - timedelta(days=7)),
+        items.append(
+            StudentMessage(
+                event=CommunicationEvent(
+                    event_type=CommunicationEventType.DAILY_BRIEF.value,
+                    tenant_id=settings.communication_tenant_id,
+                    actor_id=None,
+                    entity_type='student',
+                    entity_id=student.id,
+                    payload={'kind': 'weekly_motivation'},
+                    channels=['telegram'],
+                ),
+                message=message,
+                chat_id=student.telegram_chat_id,
+                student_id=student.id,
+                batch_id=student.batch_id,
             )
-            .first()
-        )
-        if already:
-            suppressed += 1
-            continue
-        if not _can_send_today(db, student.id, time_provider=time_provider):
-            suppressed += 1
-            continue
-        message = "🔥 Great job!\nYou attended all classes this week."
-        emit_communication_event(
-            db,
-            CommunicationEvent(
-                event_type=CommunicationEventType.DAILY_BRIEF.value,
-                tenant_id=settings.communication_tenant_id,
-                actor_id=None,
-                entity_type='student',
-                entity_id=student.id,
-                payload={'kind': 'weekly_motivation'},
-                channels=['telegram'],
-            ),
-            message=message,
-            chat_id=student.telegram_chat_id,
-            student_id=student.id,
-            notification_type='student_motivation_weekly',
-            time_provider=time_provider,
         )
-        sent += 1
-    return {'sent': sent, 'suppressed': suppressed}
+    if items:
+        emit_student_events_batch(db, items, notification_type='student_motivation_weekly', time_provider=time_provider)
+    return {'sent': len(items), 'suppressed': len(students) - len(items)}
 
 
 def send_risk_soft_warning(db: Session, student_id: int, *, time_provider: TimeProvider = default_time_provider) -> None:
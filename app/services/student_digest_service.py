@@ -1,67 +1,82 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.core.time_provider import TimeProvider, default_time_provider
 from app.models import AttendanceRecord, Homework, HomeworkSubmission, Student
 
 
-def build_student_digest(
+_PREFETCH_CHUNK_SIZE = 500
+
+
+def _render_digest(attended_today: int, new_homework: int) -> str | None:
+    if attended_today == 0 and not new_homework:
+        return None
+    lines = [
+        "📅 Today’s Summary",
+        f"✔ Classes attended: {attended_today}",
+    ]
+    if new_homework:
+        lines.append(f"📝 New homework today: {new_homework} item(s)")
+    return "\n".join(lines)
+
+
+def build_student_digests(
     db: Session,
-    student: Student,
+    students: list[Student],
     *,
     center_id: int,
     time_provider: TimeProvider = default_time_provider,
-) -> str | None:
+) -> dict[int, str]:
+    """Digest text per student id for the center's students, from two grouped queries per chunk.
+
+    Students with nothing to report are left out.
+    """
     center_id = int(center_id or 0)
-    if center_id <= 0 or int(student.center_id or 0) != center_id:
-        return None
+    if center_id <= 0:
+        return {}
+    student_ids = sorted({int(student.id) for student in students if int(student.center_id or 0) == center_id})
     today = time_provider.today()
-    attendance_rows = db.query(AttendanceRecord).filter(
-        AttendanceRecord.student_id == student.id,
-        AttendanceRecord.attendance_date == today,
-    ).all()
-    attended_today = sum(1 for row in attendance_rows if row.status == 'Present')
-
     start_of_day = datetime.combine(today, datetime.min.time())
-    homework_today = (
-        db.query(Homework)
-        .join(HomeworkSubmission, HomeworkSubmission.homework_id == Homework.id)
-        .join(Student, Student.id == HomeworkSubmission.student_id)
-        .filter(Homework.created_at >= start_of_day, Student.id == student.id, Student.center_id == center_id)
-        .distinct()
-        .all()
-    )
-    homework_due_tomorrow = (
-        db.query(Homework)
-        .join(HomeworkSubmission, HomeworkSubmission.homework_id == Homework.id)
-        .join(Student, Student.id == HomeworkSubmission.student_id)
-        .filter(Homework.due_date == today + timedelta(days=1), Student.id == student.id, Student.center_id == center_id)
-        .distinct()
-        .all()
-    )
-    submitted_ids = {
-        row.homework_id
-        for row in db.query(HomeworkSubmission.homework_id)
-        .filter(HomeworkSubmission.student_id == student.id)
-        .all()
-    }
-    pending_titles = []
-    for hw in homework_due_tomorrow:
-        if hw.id not in submitted_ids:
-            pending_titles.append(hw.title)
 
-    if attended_today == 0 and not pending_titles and not homework_today:
-        return None
+    attended: dict[int, int] = {}
+    new_homework: dict[int, int] = {}
+    for start in range(0, len(student_ids), _PREFETCH_CHUNK_SIZE):
+        chunk = student_ids[start : start + _PREFETCH_CHUNK_SIZE]
+        attended.update(
+            db.query(AttendanceRecord.student_id, func.count(AttendanceRecord.id))
+            .filter(
+                AttendanceRecord.student_id.in_(chunk),
+                AttendanceRecord.attendance_date == today,
+                AttendanceRecord.status == 'Present',
+            )
+            .group_by(AttendanceRecord.student_id)
+            .all()
+        )
+        new_homework.update(
+            db.query(HomeworkSubmission.student_id, func.count(func.distinct(Homework.id)))
+            .join(Homework, Homework.id == HomeworkSubmission.homework_id)
+            .filter(HomeworkSubmission.student_id.in_(chunk), Homework.created_at >= start_of_day)
+            .group_by(HomeworkSubmission.student_id)
+            .all()
+        )
 
-    lines = [
-        "📅 Today’s Summary",
-        f"✔ Classes attended: {attended_today}",
-    ]
-    if pending_titles:
-        lines.append(f"📚 Homework pending: {', '.join(pending_titles[:2])}")
-    if homework_today:
-        lines.append(f"📝 New homework today: {len(homework_today)} item(s)")
-    return "\n".join(lines)
+    digests: dict[int, str] = {}
+    for student_id in student_ids:
+        digest = _render_digest(int(attended.get(student_id, 0)), int(new_homework.get(student_id, 0)))
+        if digest:
+            digests[student_id] = digest
+    return digests
+
+
+def build_student_digest(
+    db: Session,
+    student: Student,
+    *,
+    center_id: int,
+    time_provider: TimeProvider = default_time_provider,
+) -> str | None:
+    return build_student_digests(db, [student], center_id=center_id, time_provider=time_provider).get(int(student.id))
@@ -3,7 +3,7 @@ import logging
 import time
 from datetime import timedelta
 
-from sqlalchemy import and_, inspect, text
+from sqlalchemy import and_, bindparam, case, func, inspect, text
 from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.core.time_provider import TimeProvider, default_time_provider
@@ -27,6 +27,7 @@ logger = logging.getLogger(__name__)
 
 WINDOW_ATTENDANCE = 20
 WINDOW_HOMEWORK = 10
+BULK_CHUNK_SIZE = 500
 FEE_OVERDUE_MONTHS_2_DAYS = 60
 
 WEIGHT_ATTENDANCE = 0.40
@@ -52,11 +53,15 @@ def risk_level_from_score(score: float) -> str:
 
 
 def compute_attendance_score(records: list[AttendanceRecord]) -> tuple[float, dict]:
-    if not records:
-        return 1.0, {'attendance_percentage': 1.0, 'sample_size': 0}
     present_count = sum(1 for row in records if (row.status or '').lower() == 'present')
-    ratio = present_count / len(records)
-    return clamp_01(ratio), {'attendance_percentage': round(ratio, 4), 'sample_size': len(records)}
+    return compute_attendance_score_from_counts(present_count, len(records))
+
+
+def compute_attendance_score_from_counts(present_count: int, sample_size: int) -> tuple[float, dict]:
+    if sample_size <= 0:
+        return 1.0, {'attendance_percentage': 1.0, 'sample_size': 0}
+    ratio = present_count / sample_size
+    return clamp_01(ratio), {'attendance_percentage': round(ratio, 4), 'sample_size': sample_size}
 
 
 def compute_homework_score(assigned_count: int, submitted_count: int) -> tuple[float, dict]:
@@ -109,23 +114,28 @@ def combine_scores(attendance_score: float, homework_score: float, fee_score: fl
     return round(total * 100.0, 2)
 
 
-def _load_test_marks_if_available(db: Session, student_id: int) -> list[float]:
+def _test_marks_order_column(db: Session) -> str | None:
     inspector = inspect(db.bind)
     if 'test_marks' not in inspector.get_table_names():
-        return []
+        return None
     columns = {col['name'] for col in inspector.get_columns('test_marks')}
     if not {'student_id', 'marks'}.issubset(columns):
-        return []
+        return None
 
     if 'center_id' not in columns:
         _warn_missing_center_filter(query_name='test_marks_without_center_id')
     if 'taken_at' in columns:
-        sql = text('SELECT marks FROM test_marks WHERE student_id = :student_id ORDER BY taken_at DESC LIMIT 2')
-    elif 'created_at' in columns:
-        sql = text('SELECT marks FROM test_marks WHERE student_id = :student_id ORDER BY created_at DESC LIMIT 2')
-    else:
-        sql = text('SELECT marks FROM test_marks WHERE student_id = :student_id ORDER BY id DESC LIMIT 2')
+        return 'taken_at'
+    if 'created_at' in columns:
+        return 'created_at'
+    return 'id'
 
+
+def _load_test_marks_if_available(db: Session, student_id: int) -> list[float]:
+    order_column = _test_marks_order_column(db)
+    if order_column is None:
+        return []
+    sql = text(f'SELECT marks FROM test_marks WHERE student_id = :student_id ORDER BY {order_column} DESC LIMIT 2')
     rows = db.execute(sql, {'student_id': student_id}).fetchall()
     return [float(row[0]) for row in rows if row and row[0] is not None][::-1]
 
@@ -200,6 +210,28 @@ def compute_student_risk(
     fee_score, fee_details = compute_fee_score(max_overdue_days if unpaid_rows else None)
 
     test_marks = _load_test_marks_if_available(db, student.id)
+    return _build_risk_payload(
+        student_id=student.id,
+        attendance=(attendance_score, attendance_details),
+        homework=(homework_score, homework_details),
+        fees=(fee_score, fee_details),
+        test_marks=test_marks,
+        time_provider=time_provider,
+    )
+
+
+def _build_risk_payload(
+    *,
+    student_id: int,
+    attendance: tuple[float, dict],
+    homework: tuple[float, dict],
+    fees: tuple[float, dict],
+    test_marks: list[float],
+    time_provider: TimeProvider,
+) -> dict:
+    attendance_score, attendance_details = attendance
+    homework_score, homework_details = homework
+    fee_score, fee_details = fees
     test_score, test_details = compute_test_score(test_marks)
 
     final_score = combine_scores(attendance_score, homework_score, fee_score, test_score)
@@ -221,7 +253,7 @@ def compute_student_risk(
     reason_summary = _short_reason(risk_level, details)
 
     return {
-        'student_id': student.id,
+        'student_id': student_id,
         'attendance_score': round(attendance_score, 4),
         'homework_score': round(homework_score, 4),
         'fee_score': round(fee_score, 4),
@@ -268,15 +300,7 @@ def recompute_student_risk(
     db.flush()
 
     if previous_level != payload['risk_level']:
-        db.add(
-            StudentRiskEvent(
-                student_id=student.id,
-                previous_risk_level=previous_level,
-                new_risk_level=payload['risk_level'],
-                reason_json=json.dumps(payload['reasons']),
-                created_at=now,
-            )
-        )
+        existing_open = None
         if payload['risk_level'] == 'HIGH':
             existing_open = db.query(PendingAction).filter(
                 PendingAction.type == 'student_risk',
@@ -284,31 +308,246 @@ def recompute_student_risk(
                 PendingAction.status == 'open',
                 PendingAction.center_id == center_id,
             ).first()
-            if not existing_open:
-                create_pending_action(
-                    db,
-                    action_type='student_risk',
-                    student_id=student.id,
-                    related_session_id=None,
-                    note=payload['reason_summary'],
-                )
-            try:
-                send_risk_soft_warning(db, student_id=student.id, time_provider=time_provider)
-            except Exception as exc:
-                logger.error(
-                    'automation_failure',
-                    extra={
-                        'job': 'student_risk_soft_warning',
-                        'center_id': int(student.center_id or 1),
-                        'entity_id': int(student.id),
-                        'error': str(exc),
-                    },
-                )
+        _record_risk_transition(
+            db,
+            student,
+            previous_level=previous_level,
+            payload=payload,
+            now=now,
+            has_open_action=existing_open is not None,
+            time_provider=time_provider,
+        )
     db.commit()
     return payload
 
 
-def recompute_all_student_risk(db: Session, *, center_id: int, time_provider: TimeProvider = default_time_provider) -> dict:
+def _record_risk_transition(
+    db: Session,
+    student: Student,
+    *,
+    previous_level: str | None,
+    payload: dict,
+    now,
+    has_open_action: bool,
+    time_provider: TimeProvider,
+) -> None:
+    db.add(
+        StudentRiskEvent(
+            student_id=student.id,
+            previous_risk_level=previous_level,
+            new_risk_level=payload['risk_level'],
+            reason_json=json.dumps(payload['reasons']),
+            created_at=now,
+        )
+    )
+    if payload['risk_level'] != 'HIGH':
+        return
+    if not has_open_action:
+        create_pending_action(
+            db,
+            action_type='student_risk',
+            student_id=student.id,
+            related_session_id=None,
+            note=payload['reason_summary'],
+        )
+    try:
+        send_risk_soft_warning(db, student_id=student.id, time_provider=time_provider)
+    except Exception as exc:
+        logger.error(
+            'automation_failure',
+            extra={
+                'job': 'student_risk_soft_warning',
+                'center_id': int(student.center_id or 1),
+                'entity_id': int(student.id),
+                'error': str(exc),
+            },
+        )
+
+
+def _load_bulk_risk_inputs(
+    db: Session,
+    student_ids: list[int],
+    *,
+    center_id: int,
+    assigned_homework_ids: list[int],
+    test_marks_order_column: str | None,
+) -> dict:
+    """Fetch every risk input for a chunk of students in a fixed number of queries."""
+    ranked_attendance = (
+        db.query(
+            AttendanceRecord.student_id.label('student_id'),
+            AttendanceRecord.status.label('status'),
+            func.row_number()
+            .over(
+                partition_by=AttendanceRecord.student_id,
+                order_by=(AttendanceRecord.attendance_date.desc(), AttendanceRecord.id.desc()),
+            )
+            .label('position'),
+        )
+        .join(Student, Student.id == AttendanceRecord.student_id)
+        .filter(AttendanceRecord.student_id.in_(student_ids), Student.center_id == center_id)
+        .subquery()
+    )
+    is_present = case((func.lower(func.coalesce(ranked_attendance.c.status, '')) == 'present', 1), else_=0)
+    attendance = {
+        int(row.student_id): (int(row.present_count or 0), int(row.sample_size or 0))
+        for row in db.query(
+            ranked_attendance.c.student_id,
+            func.sum(is_present).label('present_count'),
+            func.count().label('sample_size'),
+        )
+        .filter(ranked_attendance.c.position <= WINDOW_ATTENDANCE)
+        .group_by(ranked_attendance.c.student_id)
+        .all()
+    }
+
+    submitted: dict[int, int] = {}
+    if assigned_homework_ids:
+        submitted = {
+            int(student_id): int(count or 0)
+            for student_id, count in db.query(HomeworkSubmission.student_id, func.count(HomeworkSubmission.id))
+            .join(Student, Student.id == HomeworkSubmission.student_id)
+            .filter(
+                HomeworkSubmission.student_id.in_(student_ids),
+                HomeworkSubmission.homework_id.in_(assigned_homework_ids),
+                Student.center_id == center_id,
+            )
+            .group_by(HomeworkSubmission.student_id)
+            .all()
+        }
+
+    earliest_unpaid_due = {
+        int(student_id): earliest_due
+        for student_id, earliest_due in db.query(FeeRecord.student_id, func.min(FeeRecord.due_date))
+        .join(Student, Student.id == FeeRecord.student_id)
+        .filter(FeeRecord.student_id.in_(student_ids), FeeRecord.is_paid.is_(False), Student.center_id == center_id)
+        .group_by(FeeRecord.student_id)
+        .all()
+    }
+
+    test_marks: dict[int, list[float]] = {}
+    if test_marks_order_column is not None:
+        marks_sql = text(
+            'SELECT student_id, marks FROM ('
+            ' SELECT student_id, marks, ROW_NUMBER() OVER ('
+            f'  PARTITION BY student_id ORDER BY {test_marks_order_column} DESC'
+            ' ) AS position FROM test_marks WHERE student_id IN :student_ids'
+            ') ranked WHERE position <= 2 ORDER BY student_id, position DESC'
+        ).bindparams(bindparam('student_ids', expanding=True))
+        for student_id, marks in db.execute(marks_sql, {'student_ids': student_ids}).fetchall():
+            if marks is not None:
+                test_marks.setdefault(int(student_id), []).append(float(marks))
+
+    profiles = {
+        int(row.student_id): row
+        for row in db.query(StudentRiskProfile)
+        .join(Student, Student.id == StudentRiskProfile.student_id)
+        .filter(StudentRiskProfile.student_id.in_(student_ids), Student.center_id == center_id)
+        .all()
+    }
+    open_action_student_ids = {
+        int(row[0])
+        for row in db.query(PendingAction.student_id)
+        .filter(
+            PendingAction.type == 'student_risk',
+            PendingAction.student_id.in_(student_ids),
+            PendingAction.status == 'open',
+            PendingAction.center_id == center_id,
+        )
+        .all()
+    }
+    return {
+        'attendance': attendance,
+        'submitted': submitted,
+        'earliest_unpaid_due': earliest_unpaid_due,
+        'test_marks': test_marks,
+        'profiles': profiles,
+        'open_action_student_ids': open_action_student_ids,
+    }
+
+
+def bulk_recompute_student_risk(
+    db: Session,
+    students: list[Student],
+    *,
+    center_id: int,
+    assigned_homework_ids: list[int],
+    test_marks_order_column: str | None,
+    time_provider: TimeProvider = default_time_provider,
+) -> list[dict]:
+    center_id = int(center_id or 0)
+    if center_id <= 0:
+        raise ValueError('center_id is required')
+    if not students:
+        return []
+    student_ids = [int(student.id) for student in students]
+    inputs = _load_bulk_risk_inputs(
+        db,
+        student_ids,
+        center_id=center_id,
+        assigned_homework_ids=assigned_homework_ids,
+        test_marks_order_column=test_marks_order_column,
+    )
+    today = time_provider.today()
+    now = time_provider.now().replace(tzinfo=None)
+    assigned_count = len(assigned_homework_ids)
+
+    results: list[dict] = []
+    transitions: list[tuple[Student, str | None, dict]] = []
+    new_profiles: list[StudentRiskProfile] = []
+    for student in students:
+        present_count, sample_size = inputs['attendance'].get(int(student.id), (0, 0))
+        earliest_due = inputs['earliest_unpaid_due'].get(int(student.id))
+        overdue_days = max(0, (today - earliest_due).days) if earliest_due is not None else None
+        payload = _build_risk_payload(
+            student_id=student.id,
+            attendance=compute_attendance_score_from_counts(present_count, sample_size),
+            homework=compute_homework_score(assigned_count, inputs['submitted'].get(int(student.id), 0)),
+            fees=compute_fee_score(overdue_days),
+            test_marks=inputs['test_marks'].get(int(student.id), []),
+            time_provider=time_provider,
+        )
+
+        profile = inputs['profiles'].get(int(student.id))
+        previous_level = profile.risk_level if profile else None
+        if not profile:
+            profile = StudentRiskProfile(student_id=student.id)
+            new_profiles.append(profile)
+        profile.attendance_score = payload['attendance_score']
+        profile.homework_score = payload['homework_score']
+        profile.fee_score = payload['fee_score']
+        profile.test_score = payload['test_score']
+        profile.final_risk_score = payload['final_risk_score']
+        profile.risk_level = payload['risk_level']
+        profile.last_computed_at = now
+        if previous_level != payload['risk_level']:
+            transitions.append((student, previous_level, payload))
+        results.append(payload)
+
+    db.add_all(new_profiles)
+    db.flush()
+    for student, previous_level, payload in transitions:
+        _record_risk_transition(
+            db,
+            student,
+            previous_level=previous_level,
+            payload=payload,
+            now=now,
+            has_open_action=int(student.id) in inputs['open_action_student_ids'],
+            time_provider=time_provider,
+        )
+    db.commit()
+    return results
+
+
+def recompute_all_student_risk(
+    db: Session,
+    *,
+    center_id: int,
+    time_provider: TimeProvider = default_time_provider,
+    bulk: bool = True,
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> dict:
     started = time.perf_counter()
     center_id = int(center_id or 0)
     if center_id <= 0:
@@ -318,30 +557,41 @@ def recompute_all_student_risk(db: Session, *, center_id: int, time_provider: Ti
     medium_count = 0
     low_count = 0
 
-    for student in students:
-        try:
-            result = recompute_student_risk(db, student, center_id=center_id, time_provider=time_provider)
-        except Exception as exc:
-            db.rollback()
-            logger.error(
-                'automation_failure',
-                extra={
-                    'job': 'student_risk_recompute',
-                    'center_id': int(student.center_id or 1),
-                    'entity_id': int(student.id),
-                    'error': str(exc),
-                },
+    results: list[dict] = []
+    if bulk and students:
+        _warn_missing_center_filter(query_name='homework_assigned_window')
+        assigned_homework_ids = [
+            row[0]
+            for row in (
+                db.query(Homework.id)
+                .order_by(Homework.due_date.desc(), Homework.id.desc())
+                .limit(WINDOW_HOMEWORK)
+                .all()
             )
-            log_automation_failure(
-                db,
-                job_name='student_risk_recompute',
-                entity_type='student',
-                entity_id=int(student.id),
-                error_message=str(exc),
-                center_id=int(student.center_id or 1),
-            )
-            db.commit()
-            continue
+        ]
+        test_marks_order_column = _test_marks_order_column(db)
+        size = max(1, int(chunk_size))
+        for offset in range(0, len(students), size):
+            chunk = students[offset : offset + size]
+            try:
+                results.extend(
+                    bulk_recompute_student_risk(
+                        db,
+                        chunk,
+                        center_id=center_id,
+                        assigned_homework_ids=assigned_homework_ids,
+                        test_marks_order_column=test_marks_order_column,
+                        time_provider=time_provider,
+                    )
+                )
+            except Exception:
+                db.rollback()
+                logger.exception('student_risk_bulk_chunk_failed center_id=%s offset=%s', center_id, offset)
+                results.extend(_recompute_students_individually(db, chunk, center_id=center_id, time_provider=time_provider))
+    else:
+        results = _recompute_students_individually(db, students, center_id=center_id, time_provider=time_provider)
+
+    for result in results:
         if result['risk_level'] == 'HIGH':
             high_count += 1
         elif result['risk_level'] == 'MEDIUM':
@@ -358,6 +608,7 @@ def recompute_all_student_risk(db: Session, *, center_id: int, time_provider: Ti
             'medium': medium_count,
             'low': low_count,
             'duration_ms': duration_ms,
+            'bulk': bool(bulk),
         },
     )
     return {
@@ -369,6 +620,40 @@ def recompute_all_student_risk(db: Session, *, center_id: int, time_provider: Ti
     }
 
 
+def _recompute_students_individually(
+    db: Session,
+    students: list[Student],
+    *,
+    center_id: int,
+    time_provider: TimeProvider,
+) -> list[dict]:
+    results: list[dict] = []
+    for student in students:
+        try:
+            results.append(recompute_student_risk(db, student, center_id=center_id, time_provider=time_provider))
+        except Exception as exc:
+            db.rollback()
+            logger.error(
+                'automation_failure',
+                extra={
+                    'job': 'student_risk_recompute',
+                    'center_id': int(student.center_id or 1),
+                    'entity_id': int(student.id),
+                    'error': str(exc),
+                },
+            )
+            log_automation_failure(
+                db,
+                job_name='student_risk_recompute',
+                entity_type='student',
+                entity_id=int(student.id),
+                error_message=str(exc),
+                center_id=int(student.center_id or 1),
+            )
+            db.commit()
+    return results
+
+
 def list_student_risk_profiles(db: Session, *, center_id: int, batch_id: int | None = None) -> list[dict]:
     center_id = int(center_id or 0)
     if center_id <= 0:
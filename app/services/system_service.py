@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 from app.config import settings
 from app.models import BackupLog
 from app.services.center_scope_service import get_current_center_id
-from app.services.google_sheets_backup import backup_daily_to_google_sheet
+from app.services.google_sheets_backup import run_incremental_backup
 
 
 def get_sqlite_db_path() -> Path:
@@ -18,15 +18,15 @@ def get_sqlite_db_path() -> Path:
 
 
 def run_backup_now(db: Session) -> BackupLog:
+    center_id = int(get_current_center_id() or 0)
     try:
-        center_id = int(get_current_center_id() or 0)
-        ok = backup_daily_to_google_sheet(db, center_id=center_id)
-        if ok:
-            row = BackupLog(status='success', message='Backup synced to Google Sheets')
-        else:
-            row = BackupLog(status='failed', message='Backup skipped; missing sheets configuration')
+        logged = run_incremental_backup(db, center_id=center_id)
+        if logged is not None:
+            return logged
+        row = BackupLog(center_id=center_id, status='failed', message='Backup skipped; missing sheets configuration')
     except Exception as exc:
-        row = BackupLog(status='failed', message=f'Backup failed: {exc}')
+        db.rollback()
+        row = BackupLog(center_id=center_id, status='failed', message=f'Backup failed: {exc}')
 
     db.add(row)
     db.commit()
@@ -35,4 +35,8 @@ def run_backup_now(db: Session) -> BackupLog:
 
 
 def get_last_backup(db: Session) -> BackupLog | None:
-    return db.query(BackupLog).order_by(BackupLog.created_at.desc()).first()
+    query = db.query(BackupLog)
+    center_id = int(get_current_center_id() or 0)
+    if center_id > 0:
+        query = query.filter(BackupLog.center_id == center_id)
+    return query.order_by(BackupLog.created_at.desc()).first()
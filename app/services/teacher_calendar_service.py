@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
 from typing import Any
 import json
@@ -14,9 +13,13 @@ from sqlalchemy.orm import Session, selectinload
 from app.cache import cache, cache_key
 from app.config import settings
 from app.core.time_provider import TimeProvider, default_time_provider
-from app.models import AttendanceRecord, AuthUser, Batch, BatchSchedule, CalendarHoliday, CalendarOverride, ClassSession, FeeRecord, Room, Student, StudentBatchMap, StudentRiskProfile
+from app.db import reads_from_replica
+from app.models import AttendanceRecord, AuthUser, Batch, BatchSchedule, CalendarHoliday, ClassSession, FeeRecord, Room, Student, StudentBatchMap, StudentRiskProfile
 from app.services.access_scope_service import get_teacher_batch_ids
 from app.services.center_scope_service import get_current_center_id
+from app.services.change_feed_service import TOPIC_CALENDAR, bump_change_version
+from app.services.interval_conflicts import intervals_overlap, room_conflict_scores
+from app.services.occurrence_index_service import list_occurrences
 
 
 CALENDAR_TTL_SECONDS = 60
@@ -25,14 +28,6 @@ NAGER_HOLIDAY_URL = 'https://date.nager.at/api/v3/PublicHolidays/{year}/{country
 logger = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True)
-class _Occurrence:
-    batch_id: int
-    start_dt: datetime
-    end_dt: datetime
-    duration_minutes: int
-
-
 def _parse_start_minutes(start_time: str) -> int:
     hh, mm = start_time.split(':', 1)
     hour = int(hh)
@@ -111,89 +106,6 @@ def _resolve_scoped_batch_ids(
     return set()
 
 
-def _apply_overrides(
-    *,
-    occurrences: list[_Occurrence],
-    overrides: list[CalendarOverride],
-) -> list[_Occurrence]:
-    by_day: dict[tuple[int, date], list[_Occurrence]] = {}
-    for item in occurrences:
-        by_day.setdefault((item.batch_id, item.start_dt.date()), []).append(item)
-
-    for override in sorted(overrides, key=lambda row: (row.override_date, row.id)):
-        key = (override.batch_id, override.override_date)
-        existing = by_day.get(key, [])
-        if override.cancelled:
-            by_day[key] = []
-            continue
-
-        if existing:
-            updated_rows: list[_Occurrence] = []
-            for current in existing:
-                new_start = current.start_dt
-                if override.new_start_time:
-                    new_start = datetime.combine(override.override_date, _parse_time(override.new_start_time))
-                duration = int(override.new_duration_minutes or current.duration_minutes)
-                new_end = new_start + timedelta(minutes=duration)
-                updated_rows.append(
-                    _Occurrence(
-                        batch_id=current.batch_id,
-                        start_dt=new_start,
-                        end_dt=new_end,
-                        duration_minutes=duration,
-                    )
-                )
-            by_day[key] = updated_rows
-            continue
-
-        if not override.new_start_time:
-            continue
-        duration = int(override.new_duration_minutes or 60)
-        start_dt = datetime.combine(override.override_date, _parse_time(override.new_start_time))
-        by_day.setdefault(key, []).append(
-            _Occurrence(
-                batch_id=override.batch_id,
-                start_dt=start_dt,
-                end_dt=start_dt + timedelta(minutes=duration),
-                duration_minutes=duration,
-            )
-        )
-
-    payload: list[_Occurrence] = []
-    for rows in by_day.values():
-        payload.extend(rows)
-    payload.sort(key=lambda row: (row.start_dt, row.batch_id))
-    return payload
-
-
-def _expand_recurring_occurrences(
-    schedules: list[BatchSchedule],
-    *,
-    start_date: date,
-    end_date: date,
-) -> list[_Occurrence]:
-    items: list[_Occurrence] = []
-    day = start_date
-    while day <= end_date:
-        weekday = day.weekday()
-        for schedule in schedules:
-            if schedule.weekday != weekday:
-                continue
-            start_dt = datetime.combine(day, _parse_time(schedule.start_time))
-            duration = int(schedule.duration_minutes or 60)
-            items.append(
-                _Occurrence(
-                    batch_id=schedule.batch_id,
-                    start_dt=start_dt,
-                    end_dt=start_dt + timedelta(minutes=duration),
-                    duration_minutes=duration,
-                )
-            )
-        day += timedelta(days=1)
-    items.sort(key=lambda row: (row.start_dt, row.batch_id))
-    return items
-
-
 def _session_status_label(
     *,
     now: datetime,
@@ -247,6 +159,7 @@ def _find_best_session(
     return None
 
 
+@reads_from_replica
 def get_teacher_calendar_view(
     db: Session,
     teacher_id: int,
@@ -274,11 +187,37 @@ def get_teacher_calendar_view(
         end_date=end_date,
         view=clean_view,
     )
-    if not bypass_cache:
-        cached = cache.get_cached(cache_token)
-        if cached is not None:
-            return cached
+    def _build() -> list[dict[str, Any]]:
+        return _build_teacher_calendar_view(
+            db,
+            center_id=center_id,
+            teacher_id=int(teacher_id),
+            start_date=start_date,
+            end_date=end_date,
+            actor_role=actor_role,
+            actor_user_id=actor_user_id,
+            time_provider=time_provider,
+        )
 
+    if bypass_cache:
+        payload = _build()
+        cache.set_cached(cache_token, payload, ttl=CALENDAR_TTL_SECONDS)
+        return payload
+    # Single-flight: when a popular calendar key expires only one request rebuilds it.
+    return cache.get_or_compute(cache_token, _build, ttl=CALENDAR_TTL_SECONDS)
+
+
+def _build_teacher_calendar_view(
+    db: Session,
+    *,
+    center_id: int,
+    teacher_id: int,
+    start_date: date,
+    end_date: date,
+    actor_role: str,
+    actor_user_id: int | None,
+    time_provider: TimeProvider,
+) -> list[dict[str, Any]]:
     day_start, _ = _window_for_day(start_date)
     _, day_end = _window_for_day(end_date)
     scoped_batch_ids = _resolve_scoped_batch_ids(
@@ -288,46 +227,27 @@ def get_teacher_calendar_view(
         teacher_id=int(teacher_id),
     )
     if isinstance(scoped_batch_ids, set) and not scoped_batch_ids:
-        payload: list[dict[str, Any]] = []
-        cache.set_cached(cache_token, payload, ttl=CALENDAR_TTL_SECONDS)
-        return payload
+        return []
 
-    schedules_query = (
-        db.query(BatchSchedule)
-        .options(selectinload(BatchSchedule.batch))
-        .join(Batch, Batch.id == BatchSchedule.batch_id)
-        .filter(Batch.active.is_(True), Batch.center_id == center_id)
-        .order_by(BatchSchedule.weekday.asc(), BatchSchedule.start_time.asc(), BatchSchedule.id.asc())
+    occurrences = list_occurrences(
+        db,
+        center_id=center_id,
+        start_date=start_date,
+        end_date=end_date,
+        batch_ids=scoped_batch_ids,
+        time_provider=time_provider,
     )
-    if scoped_batch_ids is not None:
-        schedules_query = schedules_query.filter(BatchSchedule.batch_id.in_(scoped_batch_ids))
-    schedules = schedules_query.all()
-
-    if not schedules:
-        payload: list[dict[str, Any]] = []
-        cache.set_cached(cache_token, payload, ttl=CALENDAR_TTL_SECONDS)
-        return payload
+    if not occurrences:
+        return []
 
-    batch_map: dict[int, Batch] = {row.batch_id: row.batch for row in schedules if row.batch is not None}
-    batch_ids = sorted(batch_map.keys())
+    batch_ids = sorted({row.batch_id for row in occurrences})
+    batch_map: dict[int, Batch] = {
+        row.id: row for row in db.query(Batch).filter(Batch.id.in_(batch_ids), Batch.center_id == center_id).all()
+    }
     room_ids = {batch.room_id for batch in batch_map.values() if batch.room_id}
     rooms = db.query(Room).filter(Room.id.in_(room_ids)).all() if room_ids else []
     room_map = {room.id: room for room in rooms}
 
-    occurrences = _expand_recurring_occurrences(schedules, start_date=start_date, end_date=end_date)
-
-    overrides = (
-        db.query(CalendarOverride)
-        .filter(
-            CalendarOverride.batch_id.in_(batch_ids),
-            CalendarOverride.override_date >= start_date,
-            CalendarOverride.override_date <= end_date,
-        )
-        .order_by(CalendarOverride.override_date.asc(), CalendarOverride.id.asc())
-        .all()
-    )
-    occurrences = _apply_overrides(occurrences=occurrences, overrides=overrides)
-
     session_query = db.query(ClassSession).filter(
         ClassSession.batch_id.in_(batch_ids),
         ClassSession.scheduled_start >= day_start - timedelta(hours=1),
@@ -393,6 +313,7 @@ def get_teacher_calendar_view(
 
     now = time_provider.now()
     payload: list[dict[str, Any]] = []
+    spans: list[tuple[datetime, datetime, int | None]] = []
     for occurrence in occurrences:
         batch = batch_map.get(occurrence.batch_id)
         if not batch:
@@ -402,7 +323,7 @@ def get_teacher_calendar_view(
             sessions=sessions_by_batch.get(occurrence.batch_id, []),
             start_dt=occurrence.start_dt,
         )
-        end_dt = occurrence.start_dt + timedelta(minutes=occurrence.duration_minutes)
+        end_dt = occurrence.end_dt
         status, attendance_status = _session_status_label(
             now=now,
             start_dt=occurrence.start_dt,
@@ -443,39 +364,14 @@ def get_teacher_calendar_view(
                 },
             }
         )
+        spans.append((occurrence.start_dt, end_dt, batch.room_id))
 
-    _apply_conflict_scores(payload)
+    for item, score in zip(payload, room_conflict_scores(spans)):
+        item['conflict_score'] = score
 
-    cache.set_cached(cache_token, payload, ttl=CALENDAR_TTL_SECONDS)
     return payload
 
 
-def _apply_conflict_scores(items: list[dict[str, Any]]) -> None:
-    def overlaps(a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime) -> bool:
-        return a_start < b_end and b_start < a_end
-
-    parsed = []
-    for item in items:
-        parsed.append(
-            (
-                item,
-                datetime.fromisoformat(item['start_datetime']),
-                datetime.fromisoformat(item['end_datetime']),
-                item.get('room_id'),
-            )
-        )
-
-    for idx, (item, start_a, end_a, room_a) in enumerate(parsed):
-        conflicts = 0
-        for jdx, (other, start_b, end_b, room_b) in enumerate(parsed):
-            if idx == jdx:
-                continue
-            if overlaps(start_a, end_a, start_b, end_b):
-                if room_a and room_a == room_b:
-                    conflicts += 1
-        item['conflict_score'] = conflicts
-
-
 def _fetch_public_holidays(country_code: str, year: int) -> list[dict[str, Any]]:
     try:
         response = httpx.get(
@@ -581,6 +477,7 @@ def sync_calendar_holidays(
     }
 
 
+@reads_from_replica
 def get_calendar_holidays(
     db: Session,
     *,
@@ -610,6 +507,7 @@ def get_calendar_holidays(
     ]
 
 
+@reads_from_replica
 def get_teacher_calendar(
     db: Session,
     teacher_id: int,
@@ -703,7 +601,7 @@ def validate_calendar_conflicts(
     )
     for session in teacher_sessions:
         session_end = session.scheduled_start + timedelta(minutes=int(session.duration_minutes or 60))
-        if start_dt < session_end and session.scheduled_start < end_dt:
+        if intervals_overlap(start_dt, end_dt, session.scheduled_start, session_end):
             conflicts.append(
                 {
                     'type': 'teacher_conflict',
@@ -731,7 +629,7 @@ def validate_calendar_conflicts(
             )
             for session in room_sessions:
                 session_end = session.scheduled_start + timedelta(minutes=int(session.duration_minutes or 60))
-                if start_dt < session_end and session.scheduled_start < end_dt:
+                if intervals_overlap(start_dt, end_dt, session.scheduled_start, session_end):
                     conflicts.append(
                         {
                             'type': 'room_conflict',
@@ -750,6 +648,7 @@ def validate_calendar_conflicts(
     }
 
 
+@reads_from_replica
 def get_calendar_session_detail(
     db: Session,
     session_id: int,
@@ -788,10 +687,12 @@ def get_calendar_session_detail(
     }
 
 
-def clear_teacher_calendar_cache() -> None:
+def clear_teacher_calendar_cache(*, teacher_id: int | None = None) -> None:
     cache.invalidate_prefix('teacher_calendar')
+    bump_change_version(TOPIC_CALENDAR, teacher_id=teacher_id)
 
 
+@reads_from_replica
 def get_teacher_calendar_analytics(
     db: Session,
     teacher_id: int,
@@ -815,11 +716,34 @@ def get_teacher_calendar_analytics(
         end_date=end_date,
         view='analytics',
     )
-    if not bypass_cache:
-        cached = cache.get_cached(cache_token)
-        if cached is not None:
-            return cached
+    def _build() -> dict[str, Any]:
+        return _build_teacher_calendar_analytics(
+            db,
+            center_id=center_id,
+            teacher_id=int(teacher_id),
+            start_date=start_date,
+            end_date=end_date,
+            actor_role=actor_role,
+            actor_user_id=actor_user_id,
+        )
 
+    if bypass_cache:
+        payload = _build()
+        cache.set_cached(cache_token, payload, ttl=CALENDAR_TTL_SECONDS)
+        return payload
+    return cache.get_or_compute(cache_token, _build, ttl=CALENDAR_TTL_SECONDS)
+
+
+def _build_teacher_calendar_analytics(
+    db: Session,
+    *,
+    center_id: int,
+    teacher_id: int,
+    start_date: date,
+    end_date: date,
+    actor_role: str,
+    actor_user_id: int | None,
+) -> dict[str, Any]:
     scoped_batch_ids = _resolve_scoped_batch_ids(
         db,
         role=(actor_role or 'teacher').lower(),
@@ -842,9 +766,7 @@ def get_teacher_calendar_analytics(
         teacher_batch_ids = set(scoped_batch_ids)
 
     if not teacher_batch_ids:
-        payload = {'range': {'start': start_date.isoformat(), 'end': end_date.isoformat()}, 'days': []}
-        cache.set_cached(cache_token, payload, ttl=CALENDAR_TTL_SECONDS)
-        return payload
+        return {'range': {'start': start_date.isoformat(), 'end': end_date.isoformat()}, 'days': []}
 
     total_students = int(
         db.query(func.count(func.distinct(StudentBatchMap.student_id)))
@@ -893,7 +815,5 @@ def get_teacher_calendar_analytics(
         )
         cursor = cursor + timedelta(days=1)
 
-    payload = {'range': {'start': start_date.isoformat(), 'end': end_date.isoformat()}, 'days': days}
-    cache.set_cached(cache_token, payload, ttl=CALENDAR_TTL_SECONDS)
-    return payload
+    return {'range': {'start': start_date.isoformat(), 'end': end_date.isoformat()}, 'days': days}
 APP_ZONE = ZoneInfo(settings.app_timezone or 'Asia/Kolkata')
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
@@ -11,11 +12,17 @@ from app.communication.client_factory import get_communication_client
 from app.config import settings
 from app.core.phone import normalize_phone as _core_normalize_phone
 from app.domain.communication_gateway import send_event as gateway_send_event
-from app.models import AuthUser, Parent, ParentStudentMap, Student, StudentBatchMap
+from app.models import AuthUser, Center, Parent, ParentStudentMap, Student, StudentBatchMap
 
 
 logger = logging.getLogger(__name__)
-_POLL_OFFSET: int | None = None
+
+
+@dataclass(frozen=True)
+class LinkReply:
+    chat_id: str
+    message: str
+    reply_markup: dict[str, Any] | None = None
 
 
 def extract_chat_and_text(update: dict[str, Any]) -> tuple[str, str]:
@@ -94,6 +101,25 @@ def _send_linking_reply(
     )
 
 
+def _reply(
+    db: Session,
+    chat_id: str,
+    message: str,
+    reply_markup: dict[str, Any] | None = None,
+    *,
+    replies: list[LinkReply] | None = None,
+) -> None:
+    if replies is None:
+        _send_linking_reply(db, chat_id, message, reply_markup)
+    elif chat_id and message:
+        replies.append(LinkReply(chat_id=chat_id, message=message, reply_markup=reply_markup))
+
+
+def send_link_replies(db: Session, replies: list[LinkReply]) -> None:
+    for reply in replies:
+        _send_linking_reply(db, reply.chat_id, reply.message, reply.reply_markup)
+
+
 def _link_user_to_chat(db: Session, user: AuthUser, chat_id: str) -> None:
     others = db.query(AuthUser).filter(AuthUser.id != user.id, AuthUser.telegram_chat_id == chat_id).all()
     for row in others:
@@ -294,7 +320,20 @@ def should_poll_telegram_updates() -> tuple[bool, str]:
     return True, "auto_no_webhook"
 
 
-def process_link_update(db: Session, update: dict[str, Any], *, center_id: int) -> dict[str, Any]:
+def process_link_update(
+    db: Session,
+    update: dict[str, Any],
+    *,
+    center_id: int,
+    link_result: dict[str, Any] | None = None,
+    replies: list[LinkReply] | None = None,
+) -> dict[str, Any]:
+    """Link the sender of a bot update to their account in `center_id` and reply.
+
+    `link_result` is the already-consumed app link token (see `resolve_link_update`);
+    without it the token is consumed here. When `replies` is given, replies are
+    collected there instead of sent, so a caller fanning out over centers sends one.
+    """
     if not isinstance(update, dict):
         return {"ok": True, "linked": False, "reason": "invalid_update_payload"}
 
@@ -305,41 +344,37 @@ def process_link_update(db: Session, update: dict[str, Any], *, center_id: int)
         contact_user_id = contact.get("contact_user_id")
         from_user_id = contact.get("from_user_id")
         if contact_user_id and from_user_id and str(contact_user_id) != str(from_user_id):
-            _send_linking_reply(db, chat_id, "Please share your own phone number to continue linking.")
+            _reply(db, chat_id, "Please share your own phone number to continue linking.", replies=replies)
             return {"ok": True, "linked": False, "reason": "contact_not_self"}
         matches = _find_known_phone_matches(db, contact_phone, center_id=center_id)
         if not matches.get("known"):
-            _send_linking_reply(db, chat_id, "Please connect with Admin for registration.")
+            _reply(db, chat_id, "Please connect with Admin for registration.", replies=replies)
             return {"ok": True, "linked": False, "reason": "phone_not_registered"}
         matched_phone = str(matches.get("phone") or contact_phone)
         _link_phone_matches(db, matched_phone, chat_id, matches)
-        _send_linking_reply(db, chat_id, _build_welcome_message(db, matched_phone, matches))
+        _reply(db, chat_id, _build_welcome_message(db, matched_phone, matches), replies=replies)
         return {"ok": True, "linked": True, "reason": "contact_verified_linked", "phone": matched_phone}
     # Fallback: accept phone typed as plain text.
     text_phone = _normalize_phone(text)
     if chat_id and text_phone and len(text_phone) >= 10:
         matches = _find_known_phone_matches(db, text_phone, center_id=center_id)
         if not matches.get("known"):
-            _send_linking_reply(db, chat_id, "Please connect with Admin for registration.")
+            _reply(db, chat_id, "Please connect with Admin for registration.", replies=replies)
             return {"ok": True, "linked": False, "reason": "phone_not_registered_text"}
         matched_phone = str(matches.get("phone") or text_phone)
         _link_phone_matches(db, matched_phone, chat_id, matches)
-        _send_linking_reply(db, chat_id, _build_welcome_message(db, matched_phone, matches))
+        _reply(db, chat_id, _build_welcome_message(db, matched_phone, matches), replies=replies)
         return {"ok": True, "linked": True, "reason": "text_phone_linked", "phone": matched_phone}
-    client = get_communication_client()
-    result = client.consume_telegram_link_update(
-        update=update,
-        expected_tenant_id=settings.communication_tenant_id,
-    )
+    result = link_result if link_result is not None else _consume_link_token(update)
     if not result.get("matched"):
         reason = str(result.get("reason", "ignored"))
         if chat_id and text.lower().startswith("/start"):
             linked_phone = _resolve_linked_phone_for_chat(db, chat_id, center_id=center_id)
             if linked_phone:
                 matches = _find_known_phone_matches(db, linked_phone, center_id=center_id)
-                _send_linking_reply(db, chat_id, _build_welcome_message(db, linked_phone, matches))
+                _reply(db, chat_id, _build_welcome_message(db, linked_phone, matches), replies=replies)
                 return {"ok": True, "linked": True, "reason": "already_linked"}
-            _send_linking_reply(
+            _reply(
                 db,
                 chat_id,
                 "Welcome to LearningMate. Please share your phone number to link your account.",
@@ -348,6 +383,7 @@ def process_link_update(db: Session, update: dict[str, Any], *, center_id: int)
                     "resize_keyboard": True,
                     "one_time_keyboard": True,
                 },
+                replies=replies,
             )
         return {"ok": True, "linked": False, "reason": reason}
 
@@ -356,62 +392,82 @@ def process_link_update(db: Session, update: dict[str, Any], *, center_id: int)
     chat_id = str(result.get("chat_id") or "").strip()
     if user_id <= 0 or not phone or not chat_id:
         if chat_id:
-            _send_linking_reply(db, chat_id, "Link request is invalid or expired. Please retry from the app.")
+            _reply(db, chat_id, "Link request is invalid or expired. Please retry from the app.", replies=replies)
         return {"ok": True, "linked": False, "reason": "invalid_link_payload"}
 
     user = db.query(AuthUser).filter(AuthUser.id == user_id, AuthUser.phone == phone, AuthUser.center_id == center_id).first()
     if not user:
-        _send_linking_reply(db, chat_id, "We could not find your account for this link request. Please retry from the app.")
+        _reply(db, chat_id, "We could not find your account for this link request. Please retry from the app.", replies=replies)
         return {"ok": True, "linked": False, "reason": "user_not_found"}
 
     matches = _find_known_phone_matches(db, phone, center_id=center_id)
     if matches.get("known"):
         _link_phone_matches(db, phone, chat_id, matches)
-        _send_linking_reply(db, chat_id, _build_welcome_message(db, phone, matches))
+        _reply(db, chat_id, _build_welcome_message(db, phone, matches), replies=replies)
     else:
         _link_user_to_chat(db, user, chat_id)
-        _send_linking_reply(db, chat_id, "Welcome to LearningMate. Your account is linked and ready for notifications.")
+        _reply(db, chat_id, "Welcome to LearningMate. Your account is linked and ready for notifications.", replies=replies)
     return {"ok": True, "linked": True}
 
 
-def poll_telegram_updates_for_linking(db: Session, *, center_id: int) -> dict[str, Any]:
-    center_id = int(center_id or 0)
-    if center_id <= 0:
-        raise ValueError('center_id is required')
-    global _POLL_OFFSET
-    token = str(settings.telegram_bot_token or "").strip()
-    if not token:
-        return {"ok": False, "reason": "missing_bot_token"}
-    url = f"{settings.telegram_api_base}/bot{token}/getUpdates"
-    params: dict[str, Any] = {"timeout": 0, "allowed_updates": '["message","edited_message"]'}
-    if _POLL_OFFSET is not None:
-        params["offset"] = _POLL_OFFSET
+def _default_center_id(db: Session) -> int:
+    row = db.query(Center.id).filter(Center.slug == settings.dev_default_center_slug).first()
+    if row is None:
+        row = db.query(Center.id).order_by(Center.id.asc()).first()
+    return int(row[0]) if row else 1
 
-    try:
-        response = httpx.get(url, params=params, timeout=10)
-    except Exception:
-        logger.exception("telegram_get_updates_failed")
-        return {"ok": False, "reason": "request_failed"}
-    if response.status_code != 200:
-        return {"ok": False, "reason": f"http_{response.status_code}"}
-    data = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
-    if not isinstance(data, dict) or not data.get("ok"):
-        return {"ok": False, "reason": "invalid_payload"}
-
-    rows = data.get("result") or []
-    linked = 0
-    processed = 0
-    max_update_id: int | None = None
-    for row in rows:
-        if not isinstance(row, dict):
-            continue
-        update_id = row.get("update_id")
-        if isinstance(update_id, int):
-            max_update_id = update_id if max_update_id is None else max(max_update_id, update_id)
-        processed += 1
-        outcome = process_link_update(db, row, center_id=center_id)
-        if outcome.get("linked"):
-            linked += 1
-    if max_update_id is not None:
-        _POLL_OFFSET = max_update_id + 1
-    return {"ok": True, "processed": processed, "linked": linked}
+
+def _centers_for_phone(db: Session, phone: str) -> set[int]:
+    candidates = _phone_candidates(phone)
+    if not candidates:
+        return set()
+    center_ids = {int(cid) for (cid,) in db.query(AuthUser.center_id).filter(AuthUser.phone.in_(candidates)).distinct()}
+    center_ids |= {int(cid) for (cid,) in db.query(Student.center_id).filter(Student.guardian_phone.in_(candidates)).distinct()}
+    center_ids |= {int(cid) for (cid,) in db.query(Parent.center_id).filter(Parent.phone.in_(candidates)).distinct()}
+    return center_ids
+
+
+def _centers_for_chat(db: Session, chat_id: str) -> set[int]:
+    center_ids = {int(cid) for (cid,) in db.query(AuthUser.center_id).filter(AuthUser.telegram_chat_id == chat_id).distinct()}
+    center_ids |= {int(cid) for (cid,) in db.query(Parent.center_id).filter(Parent.telegram_chat_id == chat_id).distinct()}
+    center_ids |= {int(cid) for (cid,) in db.query(Student.center_id).filter(Student.telegram_chat_id == chat_id).distinct()}
+    return center_ids
+
+
+def _consume_link_token(update: dict[str, Any]) -> dict[str, Any]:
+    return get_communication_client().consume_telegram_link_update(
+        update=update,
+        expected_tenant_id=settings.communication_tenant_id,
+    )
+
+
+def resolve_link_update(db: Session, update: dict[str, Any]) -> tuple[list[int], dict[str, Any] | None]:
+    """Centers an incoming bot update belongs to, checked in the order `process_link_update` acts on it.
+
+    A shared phone or chat can legitimately belong to several centers; anything
+    unrecognised goes to the default center so the sender still gets one reply.
+    Also returns the consumed app link token (None when the update carries a
+    phone), to hand to `process_link_update` so it is consumed only once.
+    """
+    if not isinstance(update, dict):
+        return [], None
+    chat_id, text = extract_chat_and_text(update)
+    contact_phone = _normalize_phone(_extract_contact(update).get("phone_number") or "")
+    text_phone = _normalize_phone(text)
+    phone = contact_phone or (text_phone if len(text_phone) >= 10 else "")
+    if chat_id and phone:
+        center_ids = _centers_for_phone(db, phone)
+        if center_ids:
+            return sorted(center_ids), None
+        return [_default_center_id(db)], None
+    result = _consume_link_token(update)
+    user_id = int(result.get("user_id") or 0) if result.get("matched") else 0
+    if user_id > 0:
+        row = db.query(AuthUser.center_id).filter(AuthUser.id == user_id).first()
+        if row is not None:
+            return [int(row[0])], result
+    if chat_id:
+        center_ids = _centers_for_chat(db, chat_id)
+        if center_ids:
+            return sorted(center_ids), result
+    return [_default_center_id(db)], result
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Any
+
+import httpx
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.models import TelegramPollState
+from app.services.center_scope_service import center_context
+from app.services.observability_counters import record_observability_event
+from app.services.telegram_linking_service import process_link_update, resolve_link_update, send_link_replies
+from app.utils.time_utils import get_utcnow
+
+
+logger = logging.getLogger(__name__)
+
+_ALLOWED_UPDATES = '["message","edited_message"]'
+
+
+def _bot_key(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def load_poll_offset(db: Session, token: str) -> int | None:
+    row = db.query(TelegramPollState).filter(TelegramPollState.bot_key == _bot_key(token)).first()
+    return int(row.next_offset) if row and row.next_offset else None
+
+
+def store_poll_offset(db: Session, token: str, next_offset: int) -> None:
+    key = _bot_key(token)
+    row = db.query(TelegramPollState).filter(TelegramPollState.bot_key == key).first()
+    if row is None:
+        row = TelegramPollState(bot_key=key, next_offset=0)
+        db.add(row)
+    row.next_offset = max(int(row.next_offset or 0), int(next_offset))
+    row.updated_at = get_utcnow()
+
+
+class TelegramUpdatePoller:
+    """One long-polling `getUpdates` consumer for the whole deployment.
+
+    Each update is routed to the center(s) it belongs to and the offset is
+    committed after every update, so a restart resumes at the first update
+    that was not fully handled.
+    """
+
+    def __init__(
+        self,
+        *,
+        token: str | None = None,
+        session_factory: sessionmaker | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        long_poll_seconds: int | None = None,
+    ) -> None:
+        if session_factory is None:
+            from app.db import SessionLocal
+
+            session_factory = SessionLocal
+        self._token = str(token if token is not None else settings.telegram_bot_token or '').strip()
+        self._session_factory = session_factory
+        self._transport = transport
+        self._long_poll_seconds = max(0, int(settings.telegram_long_poll_timeout_seconds if long_poll_seconds is None else long_poll_seconds))
+        self._client: httpx.AsyncClient | None = None
+        self._offset: int | None = None
+        self._offset_loaded = False
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=f'{settings.telegram_api_base}/bot{self._token}',
+                # Leave headroom over the server-side long-poll timeout.
+                timeout=httpx.Timeout(self._long_poll_seconds + 10.0, connect=10.0),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _load_offset(self) -> int | None:
+        db = self._session_factory()
+        try:
+            return load_poll_offset(db, self._token)
+        finally:
+            db.close()
+
+    def _dispatch(self, update: dict[str, Any]) -> dict[str, Any]:
+        """Handle one update on a fresh session and record the offset past it."""
+        update_id = update.get('update_id')
+        db = self._session_factory()
+        try:
+            linked = False
+            try:
+                center_ids, link_result = resolve_link_update(db, update)
+                # A phone known in several centers is linked in each, but the sender
+                # gets one reply: the first linking center's, else the first center's.
+                reply_center_id, reply = None, []
+                for center_id in center_ids:
+                    replies = []
+                    with center_context(center_id):
+                        outcome = process_link_update(
+                            db, update, center_id=center_id, link_result=link_result, replies=replies
+                        )
+                    if replies and (reply_center_id is None or (outcome.get('linked') and not linked)):
+                        reply_center_id, reply = center_id, replies
+                    linked = linked or bool(outcome.get('linked'))
+                if reply_center_id is not None:
+                    with center_context(reply_center_id):
+                        send_link_replies(db, reply)
+            except Exception:
+                db.rollback()
+                logger.exception('telegram_update_dispatch_failed update_id=%s', update_id)
+                record_observability_event('telegram_update_dispatch_failed')
+            if isinstance(update_id, int):
+                store_poll_offset(db, self._token, update_id + 1)
+                db.commit()
+            return {'linked': linked}
+        finally:
+            db.close()
+
+    async def poll_once(self) -> dict[str, Any]:
+        if not self._token:
+            return {'ok': False, 'reason': 'missing_bot_token'}
+        if not self._offset_loaded:
+            self._offset = await asyncio.to_thread(self._load_offset)
+            self._offset_loaded = True
+        params: dict[str, Any] = {'timeout': self._long_poll_seconds, 'allowed_updates': _ALLOWED_UPDATES}
+        if self._offset is not None:
+            params['offset'] = self._offset
+
+        client = await self._get_client()
+        try:
+            response = await client.get('/getUpdates', params=params)
+        except Exception:
+            logger.exception('telegram_get_updates_failed')
+            return {'ok': False, 'reason': 'request_failed'}
+        if response.status_code != 200:
+            return {'ok': False, 'reason': f'http_{response.status_code}'}
+        data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+        if not isinstance(data, dict) or not data.get('ok'):
+            return {'ok': False, 'reason': 'invalid_payload'}
+
+        processed = 0
+        linked = 0
+        for row in data.get('result') or []:
+            if not isinstance(row, dict):
+                continue
+            # Linking code is synchronous (DB plus a nested event loop), so keep it off this loop.
+            outcome = await asyncio.to_thread(self._dispatch, row)
+            processed += 1
+            linked += int(bool(outcome.get('linked')))
+            update_id = row.get('update_id')
+            if isinstance(update_id, int):
+                self._offset = max(self._offset or 0, update_id + 1)
+        return {'ok': True, 'processed': processed, 'linked': linked}
+
+    async def run_forever(self, stop: threading.Event) -> None:
+        retry_seconds = max(5, int(settings.telegram_link_polling_interval_seconds or 20))
+        try:
+            while not stop.is_set():
+                outcome = await self.poll_once()
+                if not outcome.get('ok'):
+                    logger.debug('telegram_update_poll_skipped reason=%s', outcome.get('reason'))
+                    await asyncio.to_thread(stop.wait, retry_seconds)
+                elif int(outcome.get('processed') or 0) > 0:
+                    logger.info(
+                        'telegram_update_poll_processed processed=%s linked=%s',
+                        outcome.get('processed'),
+                        outcome.get('linked'),
+                    )
+        finally:
+            await self.aclose()
+
+
+_runner_lock = threading.Lock()
+_runner: tuple[threading.Thread, threading.Event] | None = None
+
+
+def start_telegram_update_poller() -> bool:
+    """Start the process-wide poller thread; a no-op if it is already running."""
+    global _runner
+    with _runner_lock:
+        if _runner is not None and _runner[0].is_alive():
+            return False
+        stop = threading.Event()
+        poller = TelegramUpdatePoller()
+        thread = threading.Thread(
+            target=lambda: asyncio.run(poller.run_forever(stop)),
+            name='telegram-update-poller',
+            daemon=True,
+        )
+        thread.start()
+        _runner = (thread, stop)
+        return True
+
+
+def stop_telegram_update_poller() -> None:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            return
+        _, stop = _runner
+        stop.set()
+        _runner = None
@@ -10,9 +10,11 @@ from sqlalchemy.orm import Session, selectinload
 
 from app.cache import cache, cache_key
 from app.core.time_provider import TimeProvider, default_time_provider
-from app.models import AuthUser, Batch, BatchSchedule, CalendarOverride, ClassSession, StudentBatchMap, TeacherUnavailability
+from app.models import AuthUser, Batch, BatchSchedule, ClassSession, StudentBatchMap, TeacherUnavailability
 from app.services.access_scope_service import get_teacher_batch_ids
 from app.services.center_scope_service import get_current_center_id
+from app.services.interval_conflicts import IntervalIndex
+from app.services.occurrence_index_service import list_occurrences_for_day
 
 
 TIME_CAPACITY_TTL_SECONDS = 30
@@ -51,15 +53,6 @@ def _to_datetime(day: date, value: time) -> datetime:
     return datetime.combine(day, value)
 
 
-def _parse_hhmm(value: str) -> time:
-    hh, mm = value.split(':', 1)
-    hour = int(hh)
-    minute = int(mm)
-    if hour < 0 or hour > 23 or minute < 0 or minute > 59:
-        raise ValueError('Invalid HH:MM time')
-    return time(hour=hour, minute=minute)
-
-
 def _round_to_snap(dt: datetime, snap_minutes: int) -> datetime:
     minute = (dt.minute // snap_minutes) * snap_minutes
     return dt.replace(minute=minute, second=0, microsecond=0)
@@ -203,61 +196,25 @@ def _collect_schedule_occurrences_for_day(
     if not teacher_batch_ids:
         return []
 
-    weekday = target_date.weekday()
-    schedules = (
-        db.query(BatchSchedule)
-        .options(selectinload(BatchSchedule.batch))
-        .filter(
-            BatchSchedule.batch_id.in_(teacher_batch_ids),
-            BatchSchedule.weekday == weekday,
-        )
-        .all()
-    )
-    if not schedules:
-        return []
-
-    overrides = (
-        db.query(CalendarOverride)
-        .filter(
-            CalendarOverride.batch_id.in_(teacher_batch_ids),
-            CalendarOverride.override_date == target_date,
-        )
-        .all()
-    )
-    override_by_batch = {row.batch_id: row for row in overrides}
-
-    items: list[_Interval] = []
-    for schedule in schedules:
-        override = override_by_batch.get(schedule.batch_id)
-        if override and override.cancelled:
-            continue
-
-        start_clock = _parse_hhmm(schedule.start_time)
-        duration = int(schedule.duration_minutes or 60)
-        reason = ''
-        if override and override.new_start_time:
-            start_clock = _parse_hhmm(override.new_start_time)
-            duration = int(override.new_duration_minutes or duration)
-            reason = (override.reason or '').strip()
-        elif override and override.new_duration_minutes:
-            duration = int(override.new_duration_minutes or duration)
-            reason = (override.reason or '').strip()
-        start_dt = datetime.combine(target_date, start_clock)
-        end_dt = start_dt + timedelta(minutes=duration)
-        room_id = schedule.batch.room_id if schedule.batch else None
-        items.append(
-            _Interval(
-                start=start_dt,
-                end=end_dt,
-                slot_type='busy',
+    center_id = _current_center_id_or_raise(query_name='collect_schedule_occurrences_for_day')
+    return [
+        _Interval(
+            start=occurrence.start_dt,
+            end=occurrence.end_dt,
+            slot_type='busy',
             source='schedule',
-            slot_id=f'schedule:{schedule.batch_id}:{start_dt.isoformat()}',
-            batch_id=schedule.batch_id,
-            room_id=room_id,
-            reason=reason,
-            )
+            slot_id=f'schedule:{occurrence.batch_id}:{occurrence.start_dt.isoformat()}',
+            batch_id=occurrence.batch_id,
+            room_id=occurrence.room_id,
+            reason=occurrence.reason,
+        )
+        for occurrence in list_occurrences_for_day(
+            db,
+            center_id=center_id,
+            day=target_date,
+            batch_ids=teacher_batch_ids,
         )
-    return items
+    ]
 
 
 def _collect_class_sessions_for_day(
@@ -498,24 +455,6 @@ def _room_conflicts_for_day(
         )
         .all()
     )
-    schedule_rows = (
-        db.query(BatchSchedule)
-        .filter(
-            BatchSchedule.batch_id.in_(batch_ids),
-            BatchSchedule.weekday == target_date.weekday(),
-        )
-        .all()
-    )
-    override_rows = (
-        db.query(CalendarOverride)
-        .filter(
-            CalendarOverride.batch_id.in_(batch_ids),
-            CalendarOverride.override_date == target_date,
-        )
-        .all()
-    )
-    override_by_batch = {row.batch_id: row for row in override_rows}
-
     intervals: list[_Interval] = []
     for session in session_rows:
         start_dt = session.scheduled_start
@@ -532,27 +471,17 @@ def _room_conflicts_for_day(
             )
         )
 
-    for schedule in schedule_rows:
-        override = override_by_batch.get(schedule.batch_id)
-        if override and override.cancelled:
+    for occurrence in list_occurrences_for_day(db, center_id=center_id, day=target_date, room_id=room_id):
+        if occurrence.batch_id == int(excluding_batch_id):
             continue
-        start_clock = _parse_hhmm(schedule.start_time)
-        duration = int(schedule.duration_minutes or 60)
-        if override and override.new_start_time:
-            start_clock = _parse_hhmm(override.new_start_time)
-            duration = int(override.new_duration_minutes or duration)
-        elif override and override.new_duration_minutes:
-            duration = int(override.new_duration_minutes or duration)
-        start_dt = datetime.combine(target_date, start_clock)
-        end_dt = start_dt + timedelta(minutes=duration)
         intervals.append(
             _Interval(
-                start=start_dt,
-                end=end_dt,
+                start=occurrence.start_dt,
+                end=occurrence.end_dt,
                 slot_type='busy',
                 source='room_schedule',
-                slot_id=f'room_schedule:{schedule.batch_id}:{start_dt.isoformat()}',
-                batch_id=schedule.batch_id,
+                slot_id=f'room_schedule:{occurrence.batch_id}:{occurrence.start_dt.isoformat()}',
+                batch_id=occurrence.batch_id,
                 room_id=room_id,
             )
         )
@@ -613,10 +542,15 @@ def get_reschedule_options(
                 target_date=day,
                 excluding_batch_id=batch.id,
             )
-        merged_room_conflicts = _merge_intervals(
-            room_conflicts,
-            range_start=datetime.combine(day, work_start),
-            range_end=datetime.combine(day, work_end),
+        room_conflict_index = IntervalIndex(
+            [
+                (conflict.start, conflict.end, conflict)
+                for conflict in _merge_intervals(
+                    room_conflicts,
+                    range_start=datetime.combine(day, work_start),
+                    range_end=datetime.combine(day, work_end),
+                )
+            ]
         )
 
         for free in free_slots:
@@ -628,10 +562,7 @@ def get_reschedule_options(
                 if candidate_start <= now_cutoff:
                     candidate_start += timedelta(minutes=snap_minutes)
                     continue
-                has_room_conflict = any(
-                    candidate_start < conflict.end and conflict.start < candidate_end
-                    for conflict in merged_room_conflicts
-                )
+                has_room_conflict = room_conflict_index.has_overlap(candidate_start, candidate_end)
                 if not has_room_conflict:
                     options.append(
                         {
@@ -5,8 +5,8 @@ from fastapi.responses import RedirectResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 
+from app.core.request_identity import get_request_session
 from app.models import Role
-from app.services.auth_service import validate_session_token
 
 
 class SessionAuthMiddleware(BaseHTTPMiddleware):
@@ -32,8 +32,7 @@ class SessionAuthMiddleware(BaseHTTPMiddleware):
         if path.startswith(self._public_prefixes):
             return await call_next(request)
 
-        token = request.cookies.get('auth_session')
-        session = validate_session_token(token)
+        session = get_request_session(request, allow_bearer=False)
         if not session:
             next_url = quote(path, safe='/')
             return RedirectResponse(url=f'/ui/login?next={next_url}', status_code=303)
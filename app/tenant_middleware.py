@@ -10,9 +10,9 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 
 from app.config import settings
+from app.core.request_identity import get_request_session, resolve_center_by_slug
 from app.db import SessionLocal
 from app.models import Center
-from app.services.auth_service import validate_session_token
 from app.services.center_scope_service import center_context
 
 logger = logging.getLogger(__name__)
@@ -78,14 +78,14 @@ class TenantResolutionMiddleware(BaseHTTPMiddleware):
         host = request.headers.get('host', '')
         slug = _extract_subdomain(host)
 
-        db: Session = self._session_factory()
-        try:
-            center = None
-            if slug:
-                center = db.query(Center).filter(Center.slug == slug).first()
-                if not center:
-                    return JSONResponse(status_code=404, content={'detail': 'Center not found'})
-            else:
+        if slug:
+            resolved = resolve_center_by_slug(self._session_factory, slug)
+            if not resolved:
+                return JSONResponse(status_code=404, content={'detail': 'Center not found'})
+            request.state.center_id, request.state.center_slug = resolved
+        else:
+            db: Session = self._session_factory()
+            try:
                 center = _get_or_create_default_center(db)
                 logger.info(
                     'tenant_resolution_fallback_default_center host=%s slug=%s center_id=%s',
@@ -93,17 +93,12 @@ class TenantResolutionMiddleware(BaseHTTPMiddleware):
                     settings.dev_default_center_slug,
                     center.id,
                 )
-            request.state.center_id = int(center.id)
-            request.state.center_slug = str(center.slug)
-        finally:
-            db.close()
-
-        token = request.cookies.get('auth_session')
-        if not token:
-            auth_header = request.headers.get('Authorization', '')
-            if auth_header.lower().startswith('bearer '):
-                token = auth_header.split(' ', 1)[1].strip()
-        session = validate_session_token(token)
+                request.state.center_id = int(center.id)
+                request.state.center_slug = str(center.slug)
+            finally:
+                db.close()
+
+        session = get_request_session(request)
         if session:
             session_center_id = int(session.get('center_id') or 0)
             if session_center_id > 0 and session_center_id != int(request.state.center_id):
@@ -56,7 +56,7 @@ async def broadcast(payload: BroadcastRequest):
 @router.get("/queue", response_model=list[MessageQueueItem])
 async def queue(tenant_id: str):
     ctx = get_context()
-    return [q for q in ctx.store.queue.values() if q.tenant_id == tenant_id]
+    return ctx.store.queue.for_tenant(tenant_id)
 
 
 @router.get("/logs")
@@ -25,6 +25,7 @@ async def lifespan(app: FastAPI):
     await ctx.worker.start()
     yield
     await ctx.worker.stop()
+    await ctx.registry.aclose()
 
 
 app = FastAPI(title="coach-communication-service", lifespan=lifespan)
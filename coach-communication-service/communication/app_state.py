@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 
 from communication.core import (
@@ -7,9 +8,11 @@ from communication.core import (
     InMemoryStore,
     MessageDispatcher,
     ProviderRegistry,
+    QueueStore,
     QuietHoursPolicy,
     RateLimiter,
     RetryEngine,
+    SQLiteQueueStore,
     TemplateEngine,
 )
 from communication.providers import TelegramProvider, WhatsAppProvider
@@ -34,8 +37,16 @@ class AppContext:
 _ctx: AppContext | None = None
 
 
+def _build_queue_store() -> QueueStore:
+    # Set COMMUNICATION_QUEUE_DB_PATH to keep pending messages across restarts.
+    path = os.getenv("COMMUNICATION_QUEUE_DB_PATH", "").strip()
+    if path:
+        return SQLiteQueueStore(path)
+    return QueueStore()
+
+
 def build_context() -> AppContext:
-    store = InMemoryStore()
+    store = InMemoryStore(queue=_build_queue_store())
     event_bus = EventBus()
     template_engine = TemplateEngine()
     dispatcher = MessageDispatcher(store, template_engine)
@@ -1,6 +1,7 @@
 from communication.core.event_bus import EventBus
 from communication.core.message_dispatcher import MessageDispatcher
 from communication.core.provider_registry import ProviderRegistry
+from communication.core.queue_store import QueueStore, SQLiteQueueStore
 from communication.core.rate_limiter import QuietHoursPolicy, RateLimiter
 from communication.core.retry_engine import RetryEngine
 from communication.core.state_store import InMemoryStore
@@ -11,8 +12,10 @@ __all__ = [
     "InMemoryStore",
     "MessageDispatcher",
     "ProviderRegistry",
+    "QueueStore",
     "QuietHoursPolicy",
     "RateLimiter",
     "RetryEngine",
+    "SQLiteQueueStore",
     "TemplateEngine",
 ]
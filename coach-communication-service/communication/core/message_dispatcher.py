@@ -20,18 +20,16 @@ class MessageDispatcher:
         user_id: str,
         payload: dict[str, Any],
     ) -> int:
-        rules = [
-            rule for rule in self.store.rules.values()
-            if rule.tenant_id == tenant_id and rule.event == event and rule.enabled
-        ]
-        created = 0
+        rules = self.store.rules_for_event(tenant_id, event)
+        queued: list[MessageQueueItem] = []
         for rule in rules:
             template = self._resolve_template(tenant_id, rule)
             if not template:
                 continue
             recipients = payload.get("recipients") or [str(user_id)]
+            # The rendered body does not depend on the recipient.
+            content = self.template_engine.render(template.body, payload, rule.preferred_providers[0])
             for recipient in recipients:
-                content = self.template_engine.render(template.body, payload, rule.preferred_providers[0])
                 queue_item = MessageQueueItem(
                     id=self.store.new_id(),
                     tenant_id=tenant_id,
@@ -43,9 +41,8 @@ class MessageDispatcher:
                     critical=bool(payload.get("critical", False)),
                     next_attempt_at=datetime.utcnow(),
                 )
-                await self.store.add_queue_item(queue_item)
-                created += 1
-        if created == 0 and payload.get("message"):
+                queued.append(queue_item)
+        if not queued and payload.get("message"):
             recipients = payload.get("recipients") or [str(user_id)]
             providers = payload.get("preferred_providers") or ["telegram", "whatsapp"]
             for recipient in recipients:
@@ -60,15 +57,13 @@ class MessageDispatcher:
                     critical=bool(payload.get("critical", False)),
                     next_attempt_at=datetime.utcnow(),
                 )
-                await self.store.add_queue_item(queue_item)
-                created += 1
-        return created
+                queued.append(queue_item)
+        if queued:
+            await self.store.add_queue_items(queued)
+        return len(queued)
 
     def _resolve_template(self, tenant_id: str, rule: NotificationRule) -> MessageTemplate | None:
-        candidates = [
-            t for t in self.store.templates.values()
-            if t.tenant_id == tenant_id and t.id == rule.template_id and t.active
-        ]
-        if not candidates:
+        template = self.store.templates.get(rule.template_id)
+        if template is None or template.tenant_id != tenant_id or not template.active:
             return None
-        return max(candidates, key=lambda t: t.version)
+        return template
@@ -17,3 +17,9 @@ class ProviderRegistry:
 
     def list(self) -> list[str]:
         return sorted(self._providers)
+
+    async def aclose(self) -> None:
+        for provider in self._providers.values():
+            close = getattr(provider, "aclose", None)
+            if close is not None:
+                await close()
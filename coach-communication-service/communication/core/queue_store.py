@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from datetime import datetime
+
+from communication.models import MessageQueueItem, MessageStatus
+
+ACTIVE_STATUSES = frozenset({MessageStatus.pending, MessageStatus.retrying})
+TERMINAL_STATUSES = frozenset({MessageStatus.delivered, MessageStatus.failed})
+
+
+class QueueStore:
+    """Queue items indexed by due time, tenant and status.
+
+    Pending and retrying items sit on a min-heap keyed by `next_attempt_at`, so
+    collecting the due set costs O(due * log n) instead of a scan over every
+    item ever queued. Delivered and failed items move to a bounded archive.
+
+    Items are mutated in place by the worker; call `save` after every change so
+    the indexes (and the persistent copy, if any) follow.
+    """
+
+    def __init__(self, max_archive: int = 10_000) -> None:
+        self._items: dict[str, MessageQueueItem] = {}
+        self._archive: OrderedDict[str, MessageQueueItem] = OrderedDict()
+        self._max_archive = max(0, int(max_archive))
+        self._heap: list[tuple[datetime, int, str]] = []
+        self._scheduled: dict[str, datetime] = {}
+        self._seq = itertools.count()
+        self._by_tenant: dict[str, set[str]] = {}
+        self._by_status: dict[MessageStatus, set[str]] = {}
+        self._indexed_status: dict[str, MessageStatus] = {}
+
+    def add(self, item: MessageQueueItem) -> None:
+        self.save(item)
+
+    def add_many(self, items: list[MessageQueueItem]) -> None:
+        for item in items:
+            self._index(item)
+        self._persist_many(items)
+
+    def save(self, item: MessageQueueItem) -> None:
+        self._index(item)
+        self._persist_many([item])
+
+    def pop_due(self, now: datetime, limit: int | None = None) -> list[MessageQueueItem]:
+        """Take active items due at `now`, earliest first.
+
+        Popped items are off the heap until they are saved again, so the caller
+        must `save` every item it does not finish.
+        """
+        due: list[MessageQueueItem] = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(due) < limit):
+            at, _, item_id = heapq.heappop(self._heap)
+            if self._scheduled.get(item_id) != at:
+                continue  # superseded by a later reschedule
+            del self._scheduled[item_id]
+            item = self._items.get(item_id)
+            if item is None or item.status not in ACTIVE_STATUSES:
+                continue
+            if item.next_attempt_at != at:
+                # Rescheduled in place without a save; honour the new time.
+                self._schedule(item)
+                continue
+            due.append(item)
+        return due
+
+    def next_due_at(self) -> datetime | None:
+        while self._heap:
+            at, _, item_id = self._heap[0]
+            if self._scheduled.get(item_id) == at:
+                return at
+            heapq.heappop(self._heap)
+        return None
+
+    def get(self, item_id: str) -> MessageQueueItem | None:
+        return self._items.get(item_id) or self._archive.get(item_id)
+
+    def for_tenant(self, tenant_id: str) -> list[MessageQueueItem]:
+        active = [self._items[item_id] for item_id in self._by_tenant.get(tenant_id, ())]
+        archived = [item for item in self._archive.values() if item.tenant_id == tenant_id]
+        return sorted(active + archived, key=lambda item: item.created_at)
+
+    def count_by_status(self, status: MessageStatus) -> int:
+        if status in TERMINAL_STATUSES:
+            return sum(1 for item in self._archive.values() if item.status == status)
+        return len(self._by_status.get(status, ()))
+
+    def active_count(self) -> int:
+        return len(self._items)
+
+    def values(self) -> Iterator[MessageQueueItem]:
+        yield from list(self._items.values())
+        yield from list(self._archive.values())
+
+    def __getitem__(self, item_id: str) -> MessageQueueItem:
+        item = self.get(item_id)
+        if item is None:
+            raise KeyError(item_id)
+        return item
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._items or item_id in self._archive
+
+    def __len__(self) -> int:
+        return len(self._items) + len(self._archive)
+
+    def _index(self, item: MessageQueueItem) -> None:
+        previous = self._indexed_status.get(item.id)
+        if previous is not None and previous != item.status:
+            self._by_status.get(previous, set()).discard(item.id)
+        if item.status in TERMINAL_STATUSES:
+            self._retire(item)
+            return
+        self._items[item.id] = item
+        self._archive.pop(item.id, None)
+        self._by_tenant.setdefault(item.tenant_id, set()).add(item.id)
+        self._by_status.setdefault(item.status, set()).add(item.id)
+        self._indexed_status[item.id] = item.status
+        if item.status in ACTIVE_STATUSES and self._scheduled.get(item.id) != item.next_attempt_at:
+            self._schedule(item)
+
+    def _schedule(self, item: MessageQueueItem) -> None:
+        self._scheduled[item.id] = item.next_attempt_at
+        heapq.heappush(self._heap, (item.next_attempt_at, next(self._seq), item.id))
+
+    def _retire(self, item: MessageQueueItem) -> None:
+        self._items.pop(item.id, None)
+        self._scheduled.pop(item.id, None)
+        self._indexed_status.pop(item.id, None)
+        tenant_ids = self._by_tenant.get(item.tenant_id)
+        if tenant_ids is not None:
+            tenant_ids.discard(item.id)
+            if not tenant_ids:
+                del self._by_tenant[item.tenant_id]
+        if self._max_archive <= 0:
+            return
+        self._archive[item.id] = item
+        self._archive.move_to_end(item.id)
+        while len(self._archive) > self._max_archive:
+            self._archive.popitem(last=False)
+
+    def _persist_many(self, items: list[MessageQueueItem]) -> None:
+        return None
+
+
+class SQLiteQueueStore(QueueStore):
+    """QueueStore that journals every save to SQLite and reloads active items on start.
+
+    Items caught mid-send by a restart come back as `retrying`: delivery is
+    at-least-once. Terminal items move to `queue_archive` on disk.
+    """
+
+    def __init__(self, path: str, max_archive: int = 10_000) -> None:
+        super().__init__(max_archive=max_archive)
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for table in ("queue_items", "queue_archive"):
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, status TEXT NOT NULL, "
+                "next_attempt_at TEXT NOT NULL, body TEXT NOT NULL)"
+            )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_queue_items_status_due ON queue_items (status, next_attempt_at)"
+        )
+        self._restore()
+
+    def _restore(self) -> None:
+        with self._db_lock:
+            rows = self._conn.execute("SELECT body FROM queue_items").fetchall()
+        for (body,) in rows:
+            item = MessageQueueItem.model_validate_json(body)
+            if item.status == MessageStatus.sending:
+                item.status = MessageStatus.retrying
+            self._index(item)
+
+    def _persist_many(self, items: list[MessageQueueItem]) -> None:
+        live = [item for item in items if item.status not in TERMINAL_STATUSES]
+        done = [item for item in items if item.status in TERMINAL_STATUSES]
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            try:
+                if live:
+                    self._conn.executemany(
+                        "INSERT INTO queue_items (id, tenant_id, status, next_attempt_at, body) "
+                        "VALUES (?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                        "status = excluded.status, next_attempt_at = excluded.next_attempt_at, body = excluded.body",
+                        [_row(item) for item in live],
+                    )
+                if done:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO queue_archive (id, tenant_id, status, next_attempt_at, body) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [_row(item) for item in done],
+                    )
+                    self._conn.executemany("DELETE FROM queue_items WHERE id = ?", [(item.id,) for item in done])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._db_lock:
+            self._conn.close()
+
+
+def _row(item: MessageQueueItem) -> tuple[str, str, str, str, str]:
+    return (
+        item.id,
+        item.tenant_id,
+        item.status.value,
+        item.next_attempt_at.isoformat(),
+        item.model_dump_json(),
+    )
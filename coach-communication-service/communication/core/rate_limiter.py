@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import time
+from collections import OrderedDict
+from collections.abc import Callable
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
@@ -19,18 +22,141 @@ class QuietHoursPolicy:
         return hour >= start or hour < end
 
 
+class TokenBucket:
+    """Continuous-refill bucket: `rate` tokens per second up to `capacity`."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated_at = now
+
+    def refill(self, now: float) -> None:
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def wait_time(self, now: float, cost: float = 1.0) -> float:
+        self.refill(now)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, cost: float = 1.0) -> None:
+        self.tokens -= cost
+
+    def is_full(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+
 class RateLimiter:
-    def __init__(self, per_second: int = 15) -> None:
+    """Token buckets per provider, per (tenant, provider) and per recipient chat.
+
+    A send needs a token from every bucket it touches: the provider-wide bucket
+    (`global_per_second`, the bot-level cap across all tenants), its sender bucket
+    (`per_second`, bursting up to one second's worth) and its chat bucket
+    (`per_chat_per_second`, matching Telegram's per-chat limit), so one busy tenant
+    or chat never consumes another's allowance. `allow()` without keys uses a
+    single shared bucket.
+
+    Sender and chat buckets are kept in LRU order and capped; at the cap, buckets
+    that have refilled (idle long enough to carry no state) go first, then the
+    least recently used.
+    """
+
+    def __init__(
+        self,
+        per_second: int = 15,
+        *,
+        per_chat_per_second: float = 1.0,
+        chat_burst: int = 1,
+        global_per_second: float | None = 30.0,
+        max_sender_buckets: int = 10_000,
+        max_chat_buckets: int = 50_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         self.per_second = per_second
-        self._tokens = per_second
-        self._last_reset = datetime.utcnow()
-
-    def allow(self) -> bool:
-        now = datetime.utcnow()
-        if (now - self._last_reset).total_seconds() >= 1:
-            self._tokens = self.per_second
-            self._last_reset = now
-        if self._tokens <= 0:
-            return False
-        self._tokens -= 1
-        return True
+        self.per_chat_per_second = per_chat_per_second
+        self.chat_burst = chat_burst
+        self.global_per_second = global_per_second
+        self._max_sender_buckets = max(1, int(max_sender_buckets))
+        self._max_chat_buckets = max(1, int(max_chat_buckets))
+        self._clock = clock
+        self._global_buckets: dict[str, TokenBucket] = {}
+        self._sender_buckets: OrderedDict[tuple[str, str], TokenBucket] = OrderedDict()
+        self._chat_buckets: OrderedDict[tuple[str, str, str], TokenBucket] = OrderedDict()
+
+    def allow(self, tenant_id: str = "", provider: str = "", chat_id: str | None = None) -> bool:
+        return self.retry_after(tenant_id, provider, chat_id, consume=True) == 0.0
+
+    def retry_after(
+        self,
+        tenant_id: str = "",
+        provider: str = "",
+        chat_id: str | None = None,
+        *,
+        consume: bool = False,
+    ) -> float:
+        """Seconds until a send on these keys would be allowed; 0.0 takes the tokens when `consume`."""
+        now = self._clock()
+        buckets = [self._sender_bucket(tenant_id, provider, now)]
+        if self.global_per_second and provider:
+            buckets.append(self._global_bucket(provider, now))
+        if chat_id:
+            buckets.append(self._chat_bucket(tenant_id, provider, str(chat_id), now))
+        wait = max(bucket.wait_time(now) for bucket in buckets)
+        if wait == 0.0 and consume:
+            for bucket in buckets:
+                bucket.take()
+        return wait
+
+    def _global_bucket(self, provider: str, now: float) -> TokenBucket:
+        # One per provider type, so this table never grows past a handful of keys.
+        bucket = self._global_buckets.get(provider)
+        if bucket is None:
+            bucket = TokenBucket(self.global_per_second, self.global_per_second, now)
+            self._global_buckets[provider] = bucket
+        return bucket
+
+    def _sender_bucket(self, tenant_id: str, provider: str, now: float) -> TokenBucket:
+        return _lru_bucket(
+            self._sender_buckets,
+            (tenant_id, provider),
+            now,
+            limit=self._max_sender_buckets,
+            rate=self.per_second,
+            capacity=self.per_second,
+        )
+
+    def _chat_bucket(self, tenant_id: str, provider: str, chat_id: str, now: float) -> TokenBucket:
+        return _lru_bucket(
+            self._chat_buckets,
+            (tenant_id, provider, chat_id),
+            now,
+            limit=self._max_chat_buckets,
+            rate=self.per_chat_per_second,
+            capacity=self.chat_burst,
+        )
+
+
+def _lru_bucket(table: OrderedDict, key: tuple, now: float, *, limit: int, rate: float, capacity: float) -> TokenBucket:
+    bucket = table.get(key)
+    if bucket is not None:
+        table.move_to_end(key)
+        return bucket
+    if len(table) >= limit:
+        _evict(table, now)
+    bucket = TokenBucket(rate, capacity, now)
+    table[key] = bucket
+    return bucket
+
+
+def _evict(table: OrderedDict, now: float) -> None:
+    # A full bucket carries no state beyond a fresh one, so dropping it is free;
+    # otherwise fall back to the least recently used tenth.
+    full = [key for key, bucket in table.items() if bucket.is_full(now)]
+    for key in full or list(table)[: max(1, len(table) // 10)]:
+        del table[key]
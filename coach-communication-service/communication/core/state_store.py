@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+from collections import deque
 from datetime import datetime, timezone
 from typing import Any
 from uuid import uuid4
 
+from communication.core.queue_store import QueueStore
 from communication.models import (
     MessageLog,
     MessageQueueItem,
@@ -16,20 +18,24 @@ from communication.models import (
 
 
 class InMemoryStore:
-    def __init__(self) -> None:
+    def __init__(self, queue: QueueStore | None = None, max_logs: int = 50_000, max_audit: int = 10_000) -> None:
         self.provider_configs: dict[str, ProviderConfig] = {}
         self.templates: dict[str, MessageTemplate] = {}
         self.rules: dict[str, NotificationRule] = {}
-        self.queue: dict[str, MessageQueueItem] = {}
+        self.queue: QueueStore = queue if queue is not None else QueueStore()
+        # Logs and audit entries are retained up to a cap; metrics keep the totals.
         self.logs: dict[str, MessageLog] = {}
+        self._max_logs = max(1, int(max_logs))
         self.metrics: dict[str, int] = {
             "sent": 0,
             "delivered": 0,
             "failed": 0,
             "retry_count": 0,
         }
-        self.audit: list[dict[str, Any]] = []
+        self.audit: deque[dict[str, Any]] = deque(maxlen=max(1, int(max_audit)))
         self.quiet_hours: dict[str, tuple[int, int]] = {}
+        self._rule_ids_by_event: dict[tuple[str, str], dict[str, None]] = {}
+        self._provider_ids_by_key: dict[tuple[str, str], dict[str, None]] = {}
         self._lock = asyncio.Lock()
 
     def new_id(self) -> str:
@@ -37,11 +43,19 @@ class InMemoryStore:
 
     async def add_queue_item(self, item: MessageQueueItem) -> None:
         async with self._lock:
-            self.queue[item.id] = item
+            self.queue.add(item)
+
+    async def add_queue_items(self, items: list[MessageQueueItem]) -> None:
+        async with self._lock:
+            self.queue.add_many(items)
 
     async def upsert_provider(self, config: ProviderConfig) -> None:
         async with self._lock:
+            previous = self.provider_configs.get(config.id)
+            if previous is not None:
+                self._provider_ids_by_key.get((previous.tenant_id, previous.provider.value), {}).pop(config.id, None)
             self.provider_configs[config.id] = config
+            self._provider_ids_by_key.setdefault((config.tenant_id, config.provider.value), {})[config.id] = None
 
     async def upsert_template(self, template: MessageTemplate) -> None:
         async with self._lock:
@@ -55,7 +69,22 @@ class InMemoryStore:
 
     async def upsert_rule(self, rule: NotificationRule) -> None:
         async with self._lock:
+            previous = self.rules.get(rule.id)
+            if previous is not None:
+                self._rule_ids_by_event.get((previous.tenant_id, previous.event), {}).pop(rule.id, None)
             self.rules[rule.id] = rule
+            self._rule_ids_by_event.setdefault((rule.tenant_id, rule.event), {})[rule.id] = None
+
+    def rules_for_event(self, tenant_id: str, event: str) -> list[NotificationRule]:
+        ids = self._rule_ids_by_event.get((tenant_id, event), {})
+        return [self.rules[rule_id] for rule_id in ids if self.rules[rule_id].enabled]
+
+    def provider_config_for(self, tenant_id: str, provider: str) -> ProviderConfig | None:
+        for config_id in self._provider_ids_by_key.get((tenant_id, provider), {}):
+            config = self.provider_configs[config_id]
+            if config.enabled:
+                return config
+        return None
 
     async def write_log(
         self,
@@ -75,6 +104,8 @@ class InMemoryStore:
         )
         async with self._lock:
             self.logs[log.id] = log
+            while len(self.logs) > self._max_logs:
+                self.logs.pop(next(iter(self.logs)))
             if status == MessageStatus.sending:
                 self.metrics["sent"] += 1
             elif status == MessageStatus.delivered:
@@ -18,3 +18,8 @@ class BaseProvider(ABC):
     @abstractmethod
     async def health_check(self, config: dict[str, Any]) -> tuple[bool, str]:
         raise NotImplementedError
+
+    async def aclose(self) -> None:
+        http = getattr(self, "http", None)
+        if http is not None:
+            await http.aclose()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import weakref
+
+import httpx
+
+# HTTP/2 needs the optional `h2` package; fall back to pooled HTTP/1.1 keep-alive without it.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class SharedHTTPClient:
+    """Long-lived pooled `httpx.AsyncClient`, one per running event loop.
+
+    Connections belong to the loop that opened them, so a client is never
+    shared across loops (the embedded mode runs short-lived loops). Each client
+    is closed when its loop is torn down (asyncio.run cancels leftover tasks,
+    which triggers the close) or by `aclose()` at app shutdown.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float = 10.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._timeout = timeout
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._transport = transport
+        self._clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+            weakref.WeakKeyDictionary()
+        )
+        # The loop only holds weak references to tasks; keep the closers alive here.
+        self._closers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def get(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=self._timeout,
+                limits=self._limits,
+                http2=HTTP2_AVAILABLE and self._transport is None,
+                transport=self._transport,
+            )
+            self._clients[loop] = client
+            self._closers[loop] = loop.create_task(self._close_on_teardown(client))
+        return client
+
+    @staticmethod
+    async def _close_on_teardown(client: httpx.AsyncClient) -> None:
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await client.aclose()
+
+    async def aclose(self) -> None:
+        """Close every client: this loop's directly, other live loops' on their own loop."""
+        current = asyncio.get_running_loop()
+        for loop, client in list(self._clients.items()):
+            self._clients.pop(loop, None)
+            closer = self._closers.pop(loop, None)
+            if loop is current:
+                if closer is not None:
+                    closer.cancel()
+                await client.aclose()
+            elif loop.is_running() and closer is not None:
+                loop.call_soon_threadsafe(closer.cancel)
+
+
+shared_http_client = SharedHTTPClient()
@@ -2,22 +2,23 @@ from __future__ import annotations
 
 from typing import Any
 
-import httpx
-
 from communication.providers.base import BaseProvider
+from communication.providers.http import SharedHTTPClient, shared_http_client
 
 
 class TelegramProvider(BaseProvider):
     name = "telegram"
 
+    def __init__(self, http: SharedHTTPClient | None = None) -> None:
+        self.http = http or shared_http_client
+
     async def send_message(self, config: dict[str, Any], recipient_id: str, content: str) -> dict[str, Any]:
         token = config.get("bot_token")
         if not token:
             return {"ok": False, "error": "Missing bot_token"}
         url = f"https://api.telegram.org/bot{token}/sendMessage"
         payload = {"chat_id": recipient_id, "text": content}
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.post(url, json=payload)
+        response = await self.http.get().post(url, json=payload)
         body = response.json()
         return {"ok": bool(body.get("ok")), "provider_response": body}
 
@@ -30,8 +31,7 @@ class TelegramProvider(BaseProvider):
         if not token:
             return False, "Missing bot_token"
         url = f"https://api.telegram.org/bot{token}/getMe"
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.get(url)
+        response = await self.http.get().get(url)
         if response.status_code != 200:
             return False, f"status={response.status_code}"
         payload = response.json()
@@ -2,14 +2,16 @@ from __future__ import annotations
 
 from typing import Any
 
-import httpx
-
 from communication.providers.base import BaseProvider
+from communication.providers.http import SharedHTTPClient, shared_http_client
 
 
 class WhatsAppProvider(BaseProvider):
     name = "whatsapp"
 
+    def __init__(self, http: SharedHTTPClient | None = None) -> None:
+        self.http = http or shared_http_client
+
     async def send_message(self, config: dict[str, Any], recipient_id: str, content: str) -> dict[str, Any]:
         phone_number_id = config.get("phone_number_id")
         access_token = config.get("access_token")
@@ -24,8 +26,7 @@ class WhatsAppProvider(BaseProvider):
             "type": "text",
             "text": {"body": content},
         }
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.post(url, json=payload, headers=headers)
+        response = await self.http.get().post(url, json=payload, headers=headers)
         body = response.json()
         return {"ok": response.status_code < 300, "provider_response": body}
 
@@ -43,6 +44,5 @@ class WhatsAppProvider(BaseProvider):
             return False, "Missing phone_number_id/access_token"
         url = f"https://graph.facebook.com/v21.0/{phone_number_id}"
         headers = {"Authorization": f"Bearer {access_token}"}
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.get(url, headers=headers)
+        response = await self.http.get().get(url, headers=headers)
         return response.status_code < 300, f"status={response.status_code}"
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 from datetime import datetime
 
 from communication.core.provider_registry import ProviderRegistry
+from communication.core.queue_store import ACTIVE_STATUSES
 from communication.core.rate_limiter import QuietHoursPolicy, RateLimiter
 from communication.core.retry_engine import RetryEngine
 from communication.core.state_store import InMemoryStore
-from communication.models import MessageStatus
+from communication.models import MessageQueueItem, MessageStatus
 from communication.security.crypto import TokenCrypto
 
+logger = logging.getLogger(__name__)
+
 
 class DeliveryWorker:
     def __init__(
@@ -20,6 +24,7 @@ class DeliveryWorker:
         rate_limiter: RateLimiter,
         quiet_hours: QuietHoursPolicy,
         token_crypto: TokenCrypto,
+        max_concurrency: int = 20,
     ) -> None:
         self.store = store
         self.providers = providers
@@ -27,8 +32,12 @@ class DeliveryWorker:
         self.rate_limiter = rate_limiter
         self.quiet_hours = quiet_hours
         self.token_crypto = token_crypto
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._send_slots = asyncio.Semaphore(self.max_concurrency)
         self._running = False
         self._task: asyncio.Task[None] | None = None
+        # (tenant, chat) -> id of a failed message the chat waits on until it is delivered or gives up.
+        self._held: dict[tuple[str, str], str] = {}
 
     async def start(self) -> None:
         self._running = True
@@ -50,31 +59,76 @@ class DeliveryWorker:
 
     async def _tick(self) -> None:
         now = datetime.utcnow()
-        for item in list(self.store.queue.values()):
-            if item.status not in {MessageStatus.pending, MessageStatus.retrying}:
-                continue
-            if item.next_attempt_at > now:
-                continue
-
+        queue = self.store.queue
+        chats: dict[tuple[str, str], list[MessageQueueItem]] = {}
+        for item in queue.pop_due(now):
             quiet = self.store.quiet_hours.get(item.tenant_id)
             if quiet and not item.critical and self.quiet_hours.is_quiet(quiet):
                 item.next_attempt_at = self.retry_engine.next_attempt(item.retry_count)
+                queue.save(item)
                 continue
-
-            if not self.rate_limiter.allow():
-                break
-
-            await self.store.write_log(item.id, item.tenant_id, item.active_provider, MessageStatus.sending, {})
-            item.status = MessageStatus.sending
-            item.updated_at = datetime.utcnow()
-
+            key = (item.tenant_id, item.recipient_id)
+            blocker = self._blocker(key, item)
+            if blocker is not None:
+                self._defer([item], behind=blocker)
+                continue
+            chats.setdefault(key, []).append(item)
+        if chats:
+            await asyncio.gather(*(self._deliver_chat(key, items) for key, items in chats.items()))
+
+    async def _deliver_chat(self, key: tuple[str, str], items: list[MessageQueueItem]) -> None:
+        # Messages to one chat go out in due order, one at a time; different chats
+        # share the send slots concurrently. A chat stops at its first throttled
+        # message, and a failed one that will be retried holds the chat until it is
+        # delivered or gives up, so later messages never overtake it.
+        for index, item in enumerate(items):
+            async with self._send_slots:
+                if not self.rate_limiter.allow(item.tenant_id, item.active_provider, item.recipient_id):
+                    # Throttled: park this chat until a later tick; other chats carry on.
+                    self._defer(items[index:])
+                    return
+                delivered = await self._attempt(item)
+            if not delivered and item.status in ACTIVE_STATUSES:
+                self._held[key] = item.id
+                self._defer(items[index + 1 :], behind=item)
+                return
+
+    def _blocker(self, key: tuple[str, str], item: MessageQueueItem) -> MessageQueueItem | None:
+        held_id = self._held.get(key)
+        if held_id is None or held_id == item.id:
+            self._held.pop(key, None)
+            return None
+        blocker = self.store.queue.get(held_id)
+        if blocker is None or blocker.status not in ACTIVE_STATUSES:
+            del self._held[key]
+            return None
+        return blocker
+
+    def _defer(self, items: list[MessageQueueItem], *, behind: MessageQueueItem | None = None) -> None:
+        for item in items:
+            if behind is not None and item.next_attempt_at < behind.next_attempt_at:
+                item.next_attempt_at = behind.next_attempt_at
+            self.store.queue.save(item)
+
+    async def _attempt(self, item: MessageQueueItem) -> bool:
+        await self.store.write_log(item.id, item.tenant_id, item.active_provider, MessageStatus.sending, {})
+        item.status = MessageStatus.sending
+        item.updated_at = datetime.utcnow()
+        self.store.queue.save(item)
+
+        try:
             success = await self._deliver(item)
-            if success:
-                item.status = MessageStatus.delivered
-                await self.store.write_log(item.id, item.tenant_id, item.active_provider, MessageStatus.delivered, {"ok": True})
-            else:
-                await self._handle_failure(item)
-            item.updated_at = datetime.utcnow()
+        except Exception as exc:
+            logger.warning("delivery_send_error queue_id=%s provider=%s error=%s", item.id, item.active_provider, exc)
+            success = False
+        if success:
+            item.status = MessageStatus.delivered
+            await self.store.write_log(item.id, item.tenant_id, item.active_provider, MessageStatus.delivered, {"ok": True})
+        else:
+            await self._handle_failure(item)
+        item.updated_at = datetime.utcnow()
+        self.store.queue.save(item)
+        return success
 
     async def _deliver(self, item) -> bool:
         provider_name = item.active_provider
@@ -130,7 +184,4 @@ class DeliveryWorker:
         item.status = MessageStatus.failed
 
     def _provider_config(self, tenant_id: str, provider_name: str):
-        for cfg in self.store.provider_configs.values():
-            if cfg.tenant_id == tenant_id and cfg.provider.value == provider_name and cfg.enabled:
-                return cfg
-        return None
+        return self.store.provider_config_for(tenant_id, provider_name)
@@ -0,0 +1,108 @@
+"""Measure DeliveryWorker send throughput against a local stub provider.
+
+    python scripts/bench_delivery.py --messages 500 --latency-ms 150
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from communication.core import InMemoryStore, ProviderRegistry, QuietHoursPolicy, RateLimiter, RetryEngine  # noqa: E402
+from communication.models import MessageQueueItem, MessageStatus, ProviderConfig, ProviderType  # noqa: E402
+from communication.security.crypto import TokenCrypto  # noqa: E402
+from communication.workers.delivery_worker import DeliveryWorker  # noqa: E402
+
+
+class StubProvider:
+    name = "telegram"
+
+    def __init__(self, latency_seconds: float) -> None:
+        self.latency_seconds = latency_seconds
+
+    async def send_message(self, config, recipient_id, content):
+        await asyncio.sleep(self.latency_seconds)
+        return {"ok": True}
+
+    async def validate_config(self, config):
+        return True, "ok"
+
+    async def health_check(self, config):
+        return True, "ok"
+
+
+async def run_broadcast(*, messages: int, latency_ms: float, concurrency: int, per_second: int) -> float:
+    store = InMemoryStore()
+    crypto = TokenCrypto("bench-secret")
+    registry = ProviderRegistry()
+    registry.register(StubProvider(latency_ms / 1000.0))
+    await store.upsert_provider(
+        ProviderConfig(
+            id=store.new_id(),
+            tenant_id="bench",
+            provider=ProviderType.telegram,
+            name="tg",
+            encrypted_secrets={"bot_token": crypto.encrypt("x")},
+        )
+    )
+    due = datetime.utcnow() - timedelta(seconds=1)
+    await store.add_queue_items(
+        [
+            MessageQueueItem(
+                id=store.new_id(),
+                tenant_id="bench",
+                event="manual.broadcast",
+                recipient_id=f"chat-{idx}",
+                preferred_providers=["telegram"],
+                content="hello",
+                next_attempt_at=due,
+            )
+            for idx in range(messages)
+        ]
+    )
+    worker = DeliveryWorker(
+        store,
+        registry,
+        RetryEngine(),
+        RateLimiter(per_second=per_second),
+        QuietHoursPolicy(),
+        crypto,
+        max_concurrency=concurrency,
+    )
+    started = time.perf_counter()
+    while store.queue.count_by_status(MessageStatus.delivered) < messages:
+        await worker._tick()
+        if store.queue.next_due_at() is not None:
+            await asyncio.sleep(0.05)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--per-second", type=int, default=10_000, help="worker rate limit for the run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 20])
+    args = parser.parse_args()
+    for concurrency in args.concurrency:
+        elapsed = asyncio.run(
+            run_broadcast(
+                messages=args.messages,
+                latency_ms=args.latency_ms,
+                concurrency=concurrency,
+                per_second=args.per_second,
+            )
+        )
+        print(
+            f"concurrency={concurrency} messages={args.messages} latency_ms={args.latency_ms:.0f} "
+            f"elapsed_s={elapsed:.2f} msgs_per_s={args.messages / elapsed:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
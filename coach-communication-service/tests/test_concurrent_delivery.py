@@ -0,0 +1,191 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+
+from communication.core import InMemoryStore, ProviderRegistry, QuietHoursPolicy, RateLimiter, RetryEngine
+from communication.models import MessageQueueItem, MessageStatus, ProviderConfig, ProviderType
+from communication.providers import TelegramProvider
+from communication.providers.http import SharedHTTPClient
+from communication.security.crypto import TokenCrypto
+from communication.workers.delivery_worker import DeliveryWorker
+
+
+class SlowProvider:
+    name = "telegram"
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.busy_chats = set()
+        self.sent = []
+
+    async def send_message(self, config, recipient_id, content):
+        assert recipient_id not in self.busy_chats, "two sends to one chat overlapped"
+        self.busy_chats.add(recipient_id)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.busy_chats.discard(recipient_id)
+        self.sent.append((recipient_id, content))
+        return {"ok": True}
+
+    async def validate_config(self, config):
+        return True, "ok"
+
+    async def health_check(self, config):
+        return True, "ok"
+
+
+def test_worker_sends_concurrently_and_keeps_per_chat_order():
+    asyncio.run(_run_worker())
+
+
+async def _run_worker():
+    store = InMemoryStore()
+    crypto = TokenCrypto("test-secret")
+    provider = SlowProvider()
+    registry = ProviderRegistry()
+    registry.register(provider)
+    await store.upsert_provider(
+        ProviderConfig(
+            id=store.new_id(),
+            tenant_id="t1",
+            provider=ProviderType.telegram,
+            name="tg",
+            encrypted_secrets={"bot_token": crypto.encrypt("x")},
+        )
+    )
+    base = datetime.utcnow() - timedelta(minutes=1)
+    items = []
+    for idx in range(12):
+        chat = "shared-chat" if idx < 3 else f"chat-{idx}"
+        items.append(
+            MessageQueueItem(
+                id=f"m{idx}",
+                tenant_id="t1",
+                event="manual.broadcast",
+                recipient_id=chat,
+                preferred_providers=["telegram"],
+                content=f"message {idx}",
+                next_attempt_at=base + timedelta(seconds=idx),
+            )
+        )
+    await store.add_queue_items(items)
+
+    worker = DeliveryWorker(
+        store,
+        registry,
+        RetryEngine(),
+        RateLimiter(per_second=100, chat_burst=3),
+        QuietHoursPolicy(),
+        crypto,
+        max_concurrency=4,
+    )
+    await worker._tick()
+
+    assert store.queue.count_by_status(MessageStatus.delivered) == 12
+    assert 1 < provider.max_in_flight <= 4
+    shared = [content for chat, content in provider.sent if chat == "shared-chat"]
+    assert shared == ["message 0", "message 1", "message 2"]
+
+
+class FlakyProvider(SlowProvider):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = set(failures)
+
+    async def send_message(self, config, recipient_id, content):
+        if content in self.failures:
+            self.failures.discard(content)
+            return {"ok": False}
+        return await super().send_message(config, recipient_id, content)
+
+
+def test_retried_message_holds_its_chat():
+    asyncio.run(_run_retry_order())
+
+
+async def _run_retry_order():
+    store = InMemoryStore()
+    crypto = TokenCrypto("test-secret")
+    provider = FlakyProvider({"message 0"})
+    registry = ProviderRegistry()
+    registry.register(provider)
+    await store.upsert_provider(
+        ProviderConfig(
+            id=store.new_id(),
+            tenant_id="t1",
+            provider=ProviderType.telegram,
+            name="tg",
+            encrypted_secrets={"bot_token": crypto.encrypt("x")},
+        )
+    )
+    base = datetime.utcnow() - timedelta(minutes=1)
+
+    def _item(idx):
+        return MessageQueueItem(
+            id=f"m{idx}",
+            tenant_id="t1",
+            event="manual.broadcast",
+            recipient_id="chat",
+            preferred_providers=["telegram"],
+            content=f"message {idx}",
+            next_attempt_at=base + timedelta(seconds=idx),
+        )
+
+    await store.add_queue_items([_item(idx) for idx in range(3)])
+    worker = DeliveryWorker(
+        store,
+        registry,
+        RetryEngine(base_seconds=0),
+        RateLimiter(per_second=100, chat_burst=10, per_chat_per_second=100),
+        QuietHoursPolicy(),
+        crypto,
+    )
+    await worker._tick()
+    assert store.queue["m0"].status == MessageStatus.retrying
+    assert provider.sent == []
+
+    # Due long before the retry, but it still queues behind it.
+    await store.add_queue_item(_item(3))
+    for _ in range(3):
+        await worker._tick()
+
+    assert [content for _, content in provider.sent] == ["message 0", "message 1", "message 2", "message 3"]
+    assert store.queue.count_by_status(MessageStatus.delivered) == 4
+
+
+def test_provider_reuses_pooled_client():
+    asyncio.run(_run_provider())
+
+
+async def _run_provider():
+    requests = []
+
+    def handler(request):
+        requests.append(str(request.url))
+        return httpx.Response(200, json={"ok": True})
+
+    http = SharedHTTPClient(transport=httpx.MockTransport(handler))
+    provider = TelegramProvider(http=http)
+    first = http.get()
+    assert (await provider.send_message({"bot_token": "abc"}, "1", "hi"))["ok"]
+    assert (await provider.health_check({"bot_token": "abc"}))[0]
+    assert http.get() is first
+    assert len(requests) == 2
+    await provider.aclose()
+    assert first.is_closed
+
+
+def test_shared_http_client_closes_with_its_loop():
+    http = SharedHTTPClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+
+    async def _open():
+        return http.get()
+
+    first = asyncio.run(_open())
+    second = asyncio.run(_open())
+    assert first is not second
+    assert first.is_closed and second.is_closed
@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from communication.core import InMemoryStore, ProviderRegistry, QueueStore, QuietHoursPolicy, RateLimiter, RetryEngine
+from communication.core.queue_store import SQLiteQueueStore
+from communication.models import MessageQueueItem, MessageStatus, ProviderConfig, ProviderType
+from communication.security.crypto import TokenCrypto
+from communication.workers.delivery_worker import DeliveryWorker
+
+
+class CountingProvider:
+    name = "telegram"
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, config, recipient_id, content):
+        self.sent.append(recipient_id)
+        return {"ok": True}
+
+    async def validate_config(self, config):
+        return True, "ok"
+
+    async def health_check(self, config):
+        return True, "ok"
+
+
+def _item(item_id, *, due, tenant_id="t1", status=MessageStatus.pending):
+    return MessageQueueItem(
+        id=item_id,
+        tenant_id=tenant_id,
+        event="fee.reminder",
+        recipient_id=f"chat-{item_id}",
+        preferred_providers=["telegram"],
+        content="hello",
+        status=status,
+        next_attempt_at=due,
+    )
+
+
+def test_pop_due_returns_only_due_items_in_order():
+    now = datetime(2026, 3, 2, 10, 0)
+    queue = QueueStore()
+    queue.add(_item("late", due=now + timedelta(minutes=5)))
+    queue.add(_item("b", due=now - timedelta(seconds=1)))
+    queue.add(_item("a", due=now - timedelta(seconds=30)))
+    queue.add(_item("done", due=now - timedelta(hours=1), status=MessageStatus.delivered))
+
+    assert [item.id for item in queue.pop_due(now)] == ["a", "b"]
+    assert queue.pop_due(now) == []
+    assert queue.next_due_at() == now + timedelta(minutes=5)
+
+    rescheduled = queue["a"]
+    rescheduled.next_attempt_at = now - timedelta(seconds=5)
+    queue.save(rescheduled)
+    assert [item.id for item in queue.pop_due(now)] == ["a"]
+
+
+def test_terminal_items_are_archived_and_bounded():
+    now = datetime(2026, 3, 2, 10, 0)
+    queue = QueueStore(max_archive=2)
+    for idx in range(3):
+        item = _item(f"m{idx}", due=now)
+        queue.add(item)
+        item.status = MessageStatus.delivered
+        queue.save(item)
+
+    assert queue.active_count() == 0
+    assert "m0" not in queue
+    assert [item.id for item in queue.for_tenant("t1")] == ["m1", "m2"]
+    assert queue.pop_due(now + timedelta(days=1)) == []
+
+
+def test_sqlite_store_restores_pending_items(tmp_path):
+    now = datetime(2026, 3, 2, 10, 0)
+    path = str(tmp_path / "queue.db")
+    queue = SQLiteQueueStore(path)
+    queue.add_many([_item("pending", due=now), _item("future", due=now + timedelta(hours=1))])
+    in_flight = _item("in-flight", due=now)
+    queue.add(in_flight)
+    in_flight.status = MessageStatus.sending
+    queue.save(in_flight)
+    delivered = _item("delivered", due=now)
+    queue.add(delivered)
+    delivered.status = MessageStatus.delivered
+    queue.save(delivered)
+    queue.close()
+
+    restored = SQLiteQueueStore(path)
+    try:
+        assert restored.active_count() == 3
+        assert restored["in-flight"].status == MessageStatus.retrying
+        assert "delivered" not in restored
+        assert sorted(item.id for item in restored.pop_due(now)) == ["in-flight", "pending"]
+    finally:
+        restored.close()
+
+
+def test_worker_tick_ignores_delivered_history():
+    asyncio.run(_run_worker())
+
+
+async def _run_worker():
+    store = InMemoryStore()
+    crypto = TokenCrypto("test-secret")
+    provider = CountingProvider()
+    registry = ProviderRegistry()
+    registry.register(provider)
+    await store.upsert_provider(
+        ProviderConfig(
+            id=store.new_id(),
+            tenant_id="t1",
+            provider=ProviderType.telegram,
+            name="tg",
+            encrypted_secrets={"bot_token": crypto.encrypt("x")},
+        )
+    )
+    now = datetime.utcnow()
+    await store.add_queue_items([_item(f"m{idx}", due=now - timedelta(seconds=1)) for idx in range(5)])
+
+    worker = DeliveryWorker(store, registry, RetryEngine(), RateLimiter(per_second=100), QuietHoursPolicy(), crypto)
+    await worker._tick()
+    await worker._tick()
+
+    assert len(provider.sent) == 5
+    assert store.queue.active_count() == 0
+    assert store.queue.count_by_status(MessageStatus.delivered) == 5
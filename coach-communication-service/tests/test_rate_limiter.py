@@ -0,0 +1,154 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from communication.core import InMemoryStore, ProviderRegistry, QuietHoursPolicy, RateLimiter, RetryEngine
+from communication.models import MessageQueueItem, MessageStatus, ProviderConfig, ProviderType
+from communication.security.crypto import TokenCrypto
+from communication.workers.delivery_worker import DeliveryWorker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_tenant_buckets_are_independent_and_refill_smoothly():
+    clock = FakeClock()
+    limiter = RateLimiter(per_second=4, clock=clock)
+
+    assert [limiter.allow("noisy", "telegram") for _ in range(5)] == [True, True, True, True, False]
+    assert limiter.allow("quiet", "telegram")
+    assert limiter.allow("noisy", "whatsapp")
+
+    clock.now += 0.25
+    assert limiter.allow("noisy", "telegram")
+    assert not limiter.allow("noisy", "telegram")
+    assert abs(limiter.retry_after("noisy", "telegram") - 0.25) < 1e-9
+
+
+def test_chat_bucket_limits_one_chat_only():
+    clock = FakeClock()
+    limiter = RateLimiter(per_second=100, per_chat_per_second=1.0, chat_burst=1, clock=clock)
+
+    assert limiter.allow("t1", "telegram", "chat-a")
+    assert not limiter.allow("t1", "telegram", "chat-a")
+    assert limiter.allow("t1", "telegram", "chat-b")
+
+    clock.now += 1.0
+    assert limiter.allow("t1", "telegram", "chat-a")
+
+
+def test_denied_send_does_not_consume_sender_tokens():
+    clock = FakeClock()
+    limiter = RateLimiter(per_second=2, clock=clock)
+
+    assert limiter.allow("t1", "telegram", "chat-a")
+    assert not limiter.allow("t1", "telegram", "chat-a")
+    assert limiter.allow("t1", "telegram", "chat-b")
+
+
+def test_global_bucket_caps_all_tenants_of_a_provider():
+    clock = FakeClock()
+    limiter = RateLimiter(per_second=10, global_per_second=3, clock=clock)
+
+    assert [limiter.allow(f"t{idx}", "telegram") for idx in range(4)] == [True, True, True, False]
+    assert limiter.allow("t9", "whatsapp")
+    clock.now += 1 / 3
+    assert limiter.allow("t9", "telegram")
+
+
+def test_sender_buckets_are_evicted_least_recently_used():
+    clock = FakeClock()
+    limiter = RateLimiter(per_second=1, global_per_second=None, max_sender_buckets=2, clock=clock)
+
+    assert limiter.allow("a", "telegram")
+    assert limiter.allow("b", "telegram")
+    assert not limiter.allow("a", "telegram")
+    assert limiter.allow("c", "telegram")
+    # "b" was least recently used and still drained, so it went first; "a" kept its state.
+    assert set(limiter._sender_buckets) == {("a", "telegram"), ("c", "telegram")}
+    assert not limiter.allow("a", "telegram")
+
+    clock.now += 5
+    assert limiter.allow("d", "telegram")
+    assert len(limiter._sender_buckets) == 1
+
+
+def test_worker_skips_throttled_tenant_and_serves_others():
+    asyncio.run(_run_worker())
+
+
+class OkProvider:
+    name = "telegram"
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, config, recipient_id, content):
+        self.sent.append(recipient_id)
+        return {"ok": True}
+
+    async def validate_config(self, config):
+        return True, "ok"
+
+    async def health_check(self, config):
+        return True, "ok"
+
+
+async def _run_worker():
+    store = InMemoryStore()
+    crypto = TokenCrypto("test-secret")
+    provider = OkProvider()
+    registry = ProviderRegistry()
+    registry.register(provider)
+    for tenant_id in ("noisy", "quiet"):
+        await store.upsert_provider(
+            ProviderConfig(
+                id=store.new_id(),
+                tenant_id=tenant_id,
+                provider=ProviderType.telegram,
+                name="tg",
+                encrypted_secrets={"bot_token": crypto.encrypt("x")},
+            )
+        )
+    due = datetime.utcnow() - timedelta(minutes=1)
+    items = [
+        MessageQueueItem(
+            id=f"noisy-{idx}",
+            tenant_id="noisy",
+            event="manual.broadcast",
+            recipient_id=f"n-{idx}",
+            preferred_providers=["telegram"],
+            content="hello",
+            next_attempt_at=due,
+        )
+        for idx in range(10)
+    ]
+    items.extend(
+        MessageQueueItem(
+            id=f"quiet-{idx}",
+            tenant_id="quiet",
+            event="manual.broadcast",
+            recipient_id=f"q-{idx}",
+            preferred_providers=["telegram"],
+            content="hello",
+            next_attempt_at=due + timedelta(seconds=1),
+        )
+        for idx in range(2)
+    )
+    await store.add_queue_items(items)
+
+    clock = FakeClock()
+    worker = DeliveryWorker(store, registry, RetryEngine(), RateLimiter(per_second=3, clock=clock), QuietHoursPolicy(), crypto)
+    await worker._tick()
+
+    assert sorted(chat for chat in provider.sent if chat.startswith("q-")) == ["q-0", "q-1"]
+    assert sum(1 for chat in provider.sent if chat.startswith("n-")) == 3
+    assert store.queue.count_by_status(MessageStatus.pending) == 7
+
+    clock.now += 1.0
+    await worker._tick()
+    assert sum(1 for chat in provider.sent if chat.startswith("n-")) == 6
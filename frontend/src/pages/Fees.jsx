@@ -5,6 +5,7 @@ import { useDispatch, useSelector } from 'react-redux';
 import { InlineSkeletonText } from '../components/Skeleton.jsx';
 import {
   clearFilters,
+  loadMoreRequested,
   loadRequested,
   setMonthFilter,
   setSearch,
@@ -19,6 +20,7 @@ function Fees() {
   const dispatch = useDispatch();
   const {
     loading,
+    loadingMore,
     error,
     fees,
     search,
@@ -33,6 +35,10 @@ function Fees() {
   const overdue = normalizeList(fees.overdue);
   const due = normalizeList(fees.due);
   const paid = normalizeList(fees.paid);
+  const statusTotals = fees.summary?.totals || {};
+  const countFor = (status, rows) => statusTotals[status]?.count ?? rows.length;
+  const nextCursors = fees.next_cursors || {};
+  const statuses = statusFilter === 'all' ? ['overdue', 'due', 'paid'] : [statusFilter];
 
   const rows = [...overdue, ...due, ...paid].map((row) => {
     const today = new Date().toISOString().slice(0, 10);
@@ -41,7 +47,9 @@ function Fees() {
     return { ...row, computed_status: status, due_month: month };
   });
 
-  const uniqueMonths = Array.from(new Set(rows.map((row) => row.due_month))).filter((month) => month && month !== 'unknown').sort();
+  // Cards and chart come from the server-side summary; the table only holds the pages loaded so far.
+  const monthly = normalizeList(fees.summary?.monthly);
+  const uniqueMonths = monthly.map((row) => row.month).filter(Boolean).sort();
 
   const filtered = rows.filter((row) => {
     const text = `${row.student_name || ''} ${row.student_id || ''}`.toLowerCase();
@@ -51,26 +59,22 @@ function Fees() {
     return searchMatch && statusMatch && monthMatch;
   });
 
-  const totals = filtered.reduce(
-    (acc, row) => {
-      acc.total += Number(row.amount || 0);
-      acc.paid += Number(row.paid_amount || 0);
-      return acc;
-    },
-    { total: 0, paid: 0 }
-  );
-  const dueAmount = Math.max(totals.total - totals.paid, 0);
+  const dueAmount = statuses
+    .filter((status) => status !== 'paid')
+    .reduce((sum, status) => sum + Number(statusTotals[status]?.outstanding || 0), 0);
 
-  const trendMap = filtered.reduce((acc, row) => {
-    const key = row.due_month || 'Unknown';
-    if (!acc[key]) {
-      acc[key] = { month: key, paid: 0, due: 0, overdue: 0 };
-    }
-    acc[key][row.computed_status] += 1;
-    return acc;
-  }, {});
+  const trendData = monthly
+    .filter((row) => monthFilter === 'all' || row.month === monthFilter)
+    .map((row) => ({
+      month: row.month,
+      paid: statuses.includes('paid') ? row.paid : 0,
+      due: statuses.includes('due') ? row.due : 0,
+      overdue: statuses.includes('overdue') ? row.overdue : 0,
+    }));
 
-  const trendData = Object.values(trendMap);
+  const loadedCount = statuses.reduce((sum, status) => sum + normalizeList(fees[status]).length, 0);
+  const totalCount = statuses.reduce((sum, status) => sum + Number(statusTotals[status]?.count ?? normalizeList(fees[status]).length), 0);
+  const moreStatuses = statuses.filter((status) => nextCursors[status]);
 
   return (
     <section className="space-y-4">
@@ -87,9 +91,9 @@ function Fees() {
         </div>
 
         <div className="grid gap-3 md:grid-cols-4">
-          <div className="rounded-xl bg-emerald-50 p-3"><p className="text-xs text-emerald-700">Paid Items</p><p className="text-2xl font-bold text-emerald-800">{paid.length}</p></div>
-          <div className="rounded-xl bg-amber-50 p-3"><p className="text-xs text-amber-700">Due Items</p><p className="text-2xl font-bold text-amber-800">{due.length}</p></div>
-          <div className="rounded-xl bg-rose-50 p-3"><p className="text-xs text-rose-700">Overdue Items</p><p className="text-2xl font-bold text-rose-800">{overdue.length}</p></div>
+          <div className="rounded-xl bg-emerald-50 p-3"><p className="text-xs text-emerald-700">Paid Items</p><p className="text-2xl font-bold text-emerald-800">{countFor('paid', paid)}</p></div>
+          <div className="rounded-xl bg-amber-50 p-3"><p className="text-xs text-amber-700">Due Items</p><p className="text-2xl font-bold text-amber-800">{countFor('due', due)}</p></div>
+          <div className="rounded-xl bg-rose-50 p-3"><p className="text-xs text-rose-700">Overdue Items</p><p className="text-2xl font-bold text-rose-800">{countFor('overdue', overdue)}</p></div>
           <div className="rounded-xl bg-blue-50 p-3"><p className="text-xs text-blue-700">Outstanding Amount</p><p className="text-2xl font-bold text-blue-800">{dueAmount.toFixed(0)}</p></div>
         </div>
       </div>
@@ -157,6 +161,19 @@ function Fees() {
                 {filtered.length === 0 ? <tr><td className="px-3 py-6 text-center text-slate-500" colSpan={5}>No fee rows for selected filter.</td></tr> : null}
               </tbody>
             </table>
+            <div className="mt-3 flex flex-wrap items-center justify-between gap-2 text-xs text-slate-500">
+              <span>Loaded {loadedCount} of {totalCount} fee rows; search and month filter apply to loaded rows.</span>
+              {moreStatuses.length ? (
+                <button
+                  type="button"
+                  disabled={Boolean(loadingMore)}
+                  onClick={() => moreStatuses.forEach((status) => dispatch(loadMoreRequested({ status })))}
+                  className="rounded-lg border border-slate-300 px-3 py-1.5 text-sm font-semibold text-slate-700 disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading…' : 'Load more'}
+                </button>
+              ) : null}
+            </div>
           </div>
         ) : null}
       </div>
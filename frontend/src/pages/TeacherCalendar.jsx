@@ -11,6 +11,7 @@ import LiveClassPanel from '../components/calendar/LiveClassPanel.jsx';
 import ErrorState from '../components/ui/ErrorState.jsx';
 import LoadingState from '../components/ui/LoadingState.jsx';
 import useRole from '../hooks/useRole';
+import { subscribeChangeFeed } from '../services/api';
 import {
   createOverrideRequested,
   loadAnalyticsRequested,
@@ -343,14 +344,26 @@ function TeacherCalendar() {
     loadCalendar();
   }, [loadCalendar, roleLoading]);
 
+  // Only a shared (redis) cache carries change versions across workers; otherwise keep the 60s poll.
+  const [changeFeedShared, setChangeFeedShared] = React.useState(false);
+
   React.useEffect(() => {
     if (roleLoading) return undefined;
     const intervalId = window.setInterval(() => {
       if (document.visibilityState !== 'visible') return;
       loadCalendar();
-    }, 60000);
+    }, changeFeedShared ? 300000 : 60000);
     return () => window.clearInterval(intervalId);
-  }, [loadCalendar, roleLoading]);
+  }, [changeFeedShared, loadCalendar, roleLoading]);
+
+  React.useEffect(() => {
+    if (roleLoading) return undefined;
+    return subscribeChangeFeed({
+      topics: ['calendar'],
+      teacherId: isAdmin ? teacherId : undefined,
+      onReady: ({ shared }) => setChangeFeedShared(shared),
+    });
+  }, [isAdmin, roleLoading, teacherId]);
 
   React.useEffect(() => {
     if (initialViewApplied.current) return;
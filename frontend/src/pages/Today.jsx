@@ -11,6 +11,7 @@ import SectionHeader from '../components/ui/SectionHeader';
 import StatusBadge from '../components/ui/StatusBadge';
 import useQueryParam from '../hooks/useQueryParam';
 import useRole from '../hooks/useRole';
+import { subscribeChangeFeed, subscribeDataSync } from '../services/api';
 import {
   loadRequested,
   resolveActionRequested,
@@ -57,6 +58,23 @@ function Today() {
     dispatch(loadRequested({ teacherId: effectiveTeacherId }));
   }, [dispatch, isAdmin, roleLoading, teacherIdParam]);
 
+  const teacherFilterRef = React.useRef(teacherFilter);
+  teacherFilterRef.current = teacherFilter;
+  React.useEffect(() => {
+    if (roleLoading) return undefined;
+    // Teachers are scoped server-side; admins follow every change in the center.
+    const unsubscribe = subscribeDataSync((event) => {
+      if (event.action !== 'server_change' || !(event.domains || []).includes('today')) return;
+      if (document.visibilityState !== 'visible') return;
+      dispatch(loadRequested({ teacherId: isAdmin ? (teacherFilterRef.current || undefined) : undefined }));
+    });
+    const close = subscribeChangeFeed({ topics: ['today'] });
+    return () => {
+      close();
+      unsubscribe();
+    };
+  }, [dispatch, isAdmin, roleLoading]);
+
   const onResolve = React.useCallback(
     async (actionId) => {
       dispatch(resolveActionRequested({
@@ -69,6 +69,40 @@ export function subscribeDataSync(handler) {
   };
 }
 
+export function subscribeChangeFeed({ topics = ['calendar', 'today'], teacherId, onReady } = {}) {
+  if (typeof window === 'undefined' || typeof window.EventSource !== 'function') return () => {};
+  const params = new URLSearchParams({ topics: topics.join(',') });
+  if (teacherId) params.set('teacher_id', String(teacherId));
+  const source = new window.EventSource(
+    `${import.meta.env.VITE_API_BASE_URL || ''}${BACKEND}/api/changes/stream?${params.toString()}`,
+    { withCredentials: true }
+  );
+  const onChange = (event) => {
+    try {
+      const { topic, version } = JSON.parse(event.data);
+      publishDataSync([topic], { action: 'server_change', version });
+    } catch {
+      // no-op
+    }
+  };
+  const onReadyEvent = (event) => {
+    if (typeof onReady !== 'function') return;
+    try {
+      const { shared } = JSON.parse(event.data);
+      onReady({ shared: Boolean(shared) });
+    } catch {
+      // no-op
+    }
+  };
+  source.addEventListener('change', onChange);
+  source.addEventListener('ready', onReadyEvent);
+  return () => {
+    source.removeEventListener('change', onChange);
+    source.removeEventListener('ready', onReadyEvent);
+    source.close();
+  };
+}
+
 function getDefaultToastDurationMs() {
   try {
     const raw = window.localStorage.getItem(TOAST_DURATION_MS_KEY);
@@ -499,6 +533,14 @@ export async function fetchFees() {
   return data;
 }
 
+export async function fetchFeeRecords({ status, afterId, limit } = {}) {
+  const params = new URLSearchParams({ status });
+  if (afterId) params.set('after_id', String(afterId));
+  if (limit) params.set('limit', String(limit));
+  const { data } = await api.get(`${BACKEND}/fee/records?${params.toString()}`);
+  return data;
+}
+
 export async function fetchHomework() {
   const { data } = await api.get(`${BACKEND}/homework/list`);
   return data;
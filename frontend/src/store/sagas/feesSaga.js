@@ -1,7 +1,14 @@
-import { call, put, takeLatest } from 'redux-saga/effects';
+import { call, put, select, takeEvery, takeLatest } from 'redux-saga/effects';
 
-import { fetchFees } from '../../services/api';
-import { loadFailed, loadRequested, loadSucceeded } from '../slices/feesSlice.js';
+import { fetchFeeRecords, fetchFees } from '../../services/api';
+import {
+  loadFailed,
+  loadMoreFailed,
+  loadMoreRequested,
+  loadMoreSucceeded,
+  loadRequested,
+  loadSucceeded,
+} from '../slices/feesSlice.js';
 
 function normalizeList(value) {
   return Array.isArray(value) ? value : [];
@@ -18,12 +25,30 @@ function* loadWorker() {
       due: normalizeList(payload?.due),
       overdue: normalizeList(payload?.overdue),
       paid: normalizeList(payload?.paid),
+      summary: payload?.summary || null,
+      next_cursors: payload?.next_cursors || {},
     }));
   } catch (err) {
     yield put(loadFailed(resolveError(err, 'Failed to load fees')));
   }
 }
 
+function* loadMoreWorker(action) {
+  const status = action.payload?.status;
+  const afterId = yield select((state) => state.fees?.fees?.next_cursors?.[status]);
+  if (!status || !afterId) {
+    yield put(loadMoreSucceeded({ status, items: [], nextCursor: null }));
+    return;
+  }
+  try {
+    const page = yield call(fetchFeeRecords, { status, afterId });
+    yield put(loadMoreSucceeded({ status, items: normalizeList(page?.items), nextCursor: page?.next_cursor ?? null }));
+  } catch (err) {
+    yield put(loadMoreFailed(resolveError(err, 'Failed to load more fees')));
+  }
+}
+
 export default function* feesSaga() {
   yield takeLatest(loadRequested.type, loadWorker);
+  yield takeEvery(loadMoreRequested.type, loadMoreWorker);
 }
@@ -5,7 +5,8 @@ const feesSlice = createSlice({
   initialState: {
     loading: true,
     error: '',
-    fees: { due: [], overdue: [], paid: [] },
+    fees: { due: [], overdue: [], paid: [], next_cursors: {} },
+    loadingMore: '',
     search: '',
     statusFilter: 'all',
     monthFilter: 'all',
@@ -18,7 +19,21 @@ const feesSlice = createSlice({
     loadSucceeded(state, action) {
       state.loading = false;
       state.error = '';
-      state.fees = action.payload || { due: [], overdue: [], paid: [] };
+      state.fees = action.payload || { due: [], overdue: [], paid: [], next_cursors: {} };
+    },
+    loadMoreRequested(state, action) {
+      state.loadingMore = String(action.payload?.status || '');
+    },
+    loadMoreSucceeded(state, action) {
+      const { status, items, nextCursor } = action.payload || {};
+      state.loadingMore = '';
+      if (!status) return;
+      state.fees[status] = [...(state.fees[status] || []), ...(items || [])];
+      state.fees.next_cursors = { ...(state.fees.next_cursors || {}), [status]: nextCursor ?? null };
+    },
+    loadMoreFailed(state, action) {
+      state.loadingMore = '';
+      state.error = String(action.payload || 'Failed to load more fees');
     },
     loadFailed(state, action) {
       state.loading = false;
@@ -45,6 +60,9 @@ export const {
   loadRequested,
   loadSucceeded,
   loadFailed,
+  loadMoreRequested,
+  loadMoreSucceeded,
+  loadMoreFailed,
   setSearch,
   setStatusFilter,
   setMonthFilter,
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.services.interval_conflicts import intervals_overlap, room_conflict_scores
+
+
+def time_scoring(label: str, fn, runs: int = 3) -> list[int]:
+    timings = []
+    result: list[int] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    avg_ms = sum(timings) / len(timings) if timings else 0.0
+    print(f"{label}: avg_ms={avg_ms:.2f} runs={runs} samples={[round(x, 2) for x in timings]}")
+    return result
+
+
+def month_view_spans(batches: int, rooms: int, seed: int = 7) -> list[tuple[datetime, datetime, int | None]]:
+    """Synthetic center-wide month: every batch meets three weekdays a week, a few online."""
+    rng = random.Random(seed)
+    month_start = datetime(2026, 3, 1)
+    spans: list[tuple[datetime, datetime, int | None]] = []
+    for _ in range(batches):
+        room_id = rng.randrange(1, rooms + 1) if rng.random() > 0.1 else None
+        weekdays = rng.sample(range(7), 3)
+        start_minutes = 7 * 60 + 15 * rng.randrange(0, 52)
+        duration = rng.choice((45, 60, 90, 120))
+        for day_offset in range(31):
+            day = month_start + timedelta(days=day_offset)
+            if day.weekday() in weekdays:
+                start = day + timedelta(minutes=start_minutes)
+                spans.append((start, start + timedelta(minutes=duration), room_id))
+    return spans
+
+
+def pairwise_scores(spans: list[tuple[datetime, datetime, int | None]]) -> list[int]:
+    scores = []
+    for idx, (start_a, end_a, room_a) in enumerate(spans):
+        conflicts = 0
+        for jdx, (start_b, end_b, room_b) in enumerate(spans):
+            if idx != jdx and room_a and room_a == room_b and intervals_overlap(start_a, end_a, start_b, end_b):
+                conflicts += 1
+        scores.append(conflicts)
+    return scores
+
+
+def main() -> None:
+    for batches, rooms in ((40, 8), (120, 15), (300, 30)):
+        spans = month_view_spans(batches, rooms)
+        label = f"month_view batches={batches} rooms={rooms} occurrences={len(spans)}"
+        expected = time_scoring(f"{label} pairwise", lambda: pairwise_scores(spans), runs=1)
+        actual = time_scoring(f"{label} sweep", lambda: room_conflict_scores(spans))
+        if actual != expected:
+            raise SystemExit(f"{label}: sweep scores differ from pairwise scores")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import AttendanceRecord, AutomationOutbox, Batch, ClassSession, SnapshotDirtyMark, Student
+from app.services.attendance_service import submit_attendance
+from app.services.center_scope_service import center_context
+
+
+DAY = date(2026, 3, 2)
+
+
+class AttendanceBulkUpsertTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_attendance_bulk_upsert.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        db = self._session_factory()
+        try:
+            for table in (SnapshotDirtyMark, AutomationOutbox, AttendanceRecord, ClassSession, Student, Batch):
+                db.query(table).delete()
+            db.add(Batch(id=5, name='Bulk', subject='Math', center_id=1))
+            db.add_all([Student(id=100 + idx, name=f'S{idx}', batch_id=5, center_id=1) for idx in range(60)])
+            db.add_all(
+                [
+                    AttendanceRecord(student_id=100 + idx, attendance_date=DAY, status='Absent', comment='early')
+                    for idx in range(10)
+                ]
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _submit(self, db, records):
+        with center_context(1), patch('app.services.attendance_service.run_post_class_pipeline') as pipeline:
+            pipeline.return_value = {'class_summary': {'class_session_id': 0}}
+            result = submit_attendance(db=db, batch_id=5, attendance_date=DAY, records=records)
+        return result, pipeline.call_args.kwargs['records']
+
+    def test_sixty_students_take_a_fixed_number_of_statements(self):
+        records = [{'student_id': 100 + idx, 'status': 'Present', 'comment': ''} for idx in range(60)]
+        records.append({'student_id': 100, 'status': 'Late', 'comment': 'bus'})
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+            if 'attendance_records' in statement:
+                statements.append(statement.lstrip().split()[0].upper())
+
+        db = self._session_factory()
+        event.listen(self._engine, 'before_cursor_execute', _record)
+        try:
+            result, passed = self._submit(db, records)
+        finally:
+            event.remove(self._engine, 'before_cursor_execute', _record)
+        try:
+            passed_statuses = [(rec.student_id, rec.status) for rec in passed]
+        finally:
+            db.close()
+
+        self.assertEqual(result['updated_records'], 60)
+        self.assertEqual(len(passed_statuses), 60)
+        self.assertEqual(passed_statuses[0], (100, 'Late'))
+        self.assertLessEqual(len(statements), 4, statements)
+        self.assertEqual(statements.count('INSERT'), 1)
+
+        db = self._session_factory()
+        try:
+            rows = db.query(AttendanceRecord).filter(AttendanceRecord.attendance_date == DAY).all()
+            self.assertEqual(len(rows), 60)
+            self.assertEqual({row.student_id: row.status for row in rows}[100], 'Late')
+            self.assertEqual(sum(1 for row in rows if row.status == 'Present'), 59)
+            marked = {
+                entity_id
+                for (entity_id,) in db.query(SnapshotDirtyMark.entity_id).filter(SnapshotDirtyMark.scope == 'student')
+            }
+            self.assertEqual(marked, {100 + idx for idx in range(60)})
+        finally:
+            db.close()
+
+    def test_insert_that_loses_a_race_updates_instead(self):
+        db = self._session_factory()
+        raced = []
+
+        def _race(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+            # Another submit commits student 150 after this one prefetched but before it inserts.
+            if raced or not statement.lstrip().upper().startswith('INSERT INTO ATTENDANCE_RECORDS'):
+                return
+            raced.append(True)
+            other = self._session_factory()
+            try:
+                other.add(AttendanceRecord(student_id=150, attendance_date=DAY, status='Absent', comment=''))
+                other.commit()
+            finally:
+                other.close()
+
+        event.listen(self._engine, 'before_cursor_execute', _race)
+        try:
+            self._submit(db, [{'student_id': 150, 'status': 'Present', 'comment': 'late bus'}])
+        finally:
+            event.remove(self._engine, 'before_cursor_execute', _race)
+            db.close()
+
+        db = self._session_factory()
+        try:
+            rows = db.query(AttendanceRecord).filter(AttendanceRecord.student_id == 150).all()
+            self.assertTrue(raced)
+            self.assertEqual([(row.status, row.comment) for row in rows], [('Present', 'late bus')])
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
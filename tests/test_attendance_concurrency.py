@@ -69,7 +69,6 @@ class AttendanceConcurrencyTests(unittest.TestCase):
 
         original_submit_pipeline = attendance_module.run_post_class_pipeline
         original_autoclose_pipeline = auto_close_module.run_post_class_pipeline
-        original_submit_automation = attendance_module.run_post_class_automation
         original_autoclose_automation = auto_close_module.run_post_class_automation
 
         def fake_pipeline(*args, **kwargs):
@@ -89,7 +88,6 @@ class AttendanceConcurrencyTests(unittest.TestCase):
 
         attendance_module.run_post_class_pipeline = fake_pipeline
         auto_close_module.run_post_class_pipeline = fake_pipeline
-        attendance_module.run_post_class_automation = fake_automation
         auto_close_module.run_post_class_automation = fake_automation
 
         submit_error = []
@@ -139,7 +137,6 @@ class AttendanceConcurrencyTests(unittest.TestCase):
 
         attendance_module.run_post_class_pipeline = original_submit_pipeline
         auto_close_module.run_post_class_pipeline = original_autoclose_pipeline
-        attendance_module.run_post_class_automation = original_submit_automation
         auto_close_module.run_post_class_automation = original_autoclose_automation
 
         self.assertFalse(submit_error, f'submit_error={submit_error}')
@@ -0,0 +1,132 @@
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import AttendanceRecord, Parent, ParentStudentMap, Student
+from app.services.attendance_streak_service import recent_attendance_streaks
+from app.services.parent_service import notify_parents_for_low_attendance_streak
+from app.services.post_class_automation_engine import _rule_risk_indicators
+
+
+TODAY = date(2026, 3, 2)
+
+
+class AttendanceStreakTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_attendance_streaks.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        db = self._session_factory()
+        try:
+            for table in (ParentStudentMap, Parent, AttendanceRecord, Student):
+                db.query(table).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    def _add_student(self, db, student_id: int, statuses: list[str], *, parent_chat: str = '') -> None:
+        """`statuses` are newest first."""
+        db.add(Student(id=student_id, name=f'S{student_id}', batch_id=1, center_id=1))
+        for offset, status in enumerate(statuses):
+            db.add(AttendanceRecord(student_id=student_id, attendance_date=TODAY - timedelta(days=offset), status=status))
+        if parent_chat:
+            parent = Parent(name=f'P{student_id}', telegram_chat_id=parent_chat, center_id=1)
+            db.add(parent)
+            db.flush()
+            db.add(ParentStudentMap(parent_id=parent.id, student_id=student_id))
+
+    def test_streaks_stop_at_first_present(self):
+        db = self._session_factory()
+        try:
+            self._add_student(db, 1, ['Absent', 'Late', 'Absent', 'Present', 'Absent'])
+            self._add_student(db, 2, ['Present', 'Absent', 'Absent'])
+            self._add_student(db, 3, ['Late', 'Late'])
+            db.commit()
+            streaks = recent_attendance_streaks(db, [1, 2, 3, 4], depth=5)
+        finally:
+            db.close()
+
+        self.assertEqual(set(streaks), {1, 2, 3})
+        self.assertEqual((streaks[1].weak_streak, streaks[1].absent_count, streaks[1].sample_size), (3, 3, 5))
+        self.assertEqual((streaks[2].weak_streak, streaks[2].absent_count), (0, 2))
+        self.assertEqual((streaks[3].weak_streak, streaks[3].sample_size), (2, 2))
+
+    def test_risk_indicators(self):
+        db = self._session_factory()
+        try:
+            self._add_student(db, 1, ['Absent', 'Late', 'Absent', 'Present', 'Absent'])
+            self._add_student(db, 2, ['Present', 'Absent', 'Absent'])
+            self._add_student(db, 3, ['Late', 'Late'])
+            db.commit()
+            flags = _rule_risk_indicators(db, [1, 2, 3, 4])
+        finally:
+            db.close()
+
+        self.assertEqual(
+            flags,
+            [
+                {'student_id': 1, 'type': 'frequent_absence', 'count': 3},
+                {'student_id': 1, 'type': 'low_attendance_streak'},
+                {'student_id': 2, 'type': 'frequent_absence', 'count': 2},
+            ],
+        )
+
+    def _notify(self, streak_threshold: int = 3) -> tuple[list[str], int]:
+        statements = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+            statements.append(statement)
+
+        db = self._session_factory()
+        event.listen(self._engine, 'before_cursor_execute', _count)
+        try:
+            with patch('app.services.parent_service.queue_telegram_by_chat_id') as queue:
+                notify_parents_for_low_attendance_streak(db, batch_id=1, streak_threshold=streak_threshold)
+        finally:
+            event.remove(self._engine, 'before_cursor_execute', _count)
+            db.close()
+        return sorted(call.args[1] for call in queue.call_args_list), len(statements)
+
+    def test_parent_streak_alerts_use_fixed_query_count(self):
+        db = self._session_factory()
+        try:
+            self._add_student(db, 1, ['Absent', 'Absent', 'Late'], parent_chat='p1')
+            self._add_student(db, 2, ['Absent', 'Present', 'Absent'], parent_chat='p2')
+            self._add_student(db, 3, ['Absent', 'Absent'], parent_chat='p3')
+            db.commit()
+        finally:
+            db.close()
+        small_chats, small_statements = self._notify()
+
+        db = self._session_factory()
+        try:
+            for student_id in range(10, 70):
+                self._add_student(db, student_id, ['Late', 'Absent', 'Absent', 'Present'], parent_chat=f'p{student_id}')
+            db.commit()
+        finally:
+            db.close()
+        large_chats, large_statements = self._notify()
+
+        self.assertEqual(small_chats, ['p1'])
+        self.assertEqual(len(large_chats), 61)
+        self.assertEqual(small_statements, large_statements)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import AttendanceRecord, AutomationFailureLog, AutomationOutbox, Batch, ClassSession, Student
+from app.services import automation_outbox_service as outbox_module
+from app.services.attendance_service import submit_attendance
+from app.services.automation_outbox_service import (
+    POST_CLASS_EVENT,
+    drain_automation_outbox,
+    enqueue_outbox_event,
+    outbox_stats,
+)
+from app.services.center_scope_service import center_context
+
+
+NOW = datetime(2026, 3, 2, 12, 0)
+
+
+class AutomationOutboxTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_automation_outbox.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        db = self._session_factory()
+        try:
+            for table in (AutomationOutbox, AutomationFailureLog, AttendanceRecord, ClassSession, Student, Batch):
+                db.query(table).delete()
+            db.add(Batch(id=11, name='Batch A', subject='Math', academic_level='10', center_id=1))
+            db.add_all([Student(id=21, name='S1', batch_id=11, center_id=1), Student(id=22, name='S2', batch_id=11, center_id=1)])
+            db.add(
+                ClassSession(
+                    id=31,
+                    batch_id=11,
+                    subject='Math',
+                    scheduled_start=datetime.utcnow() - timedelta(hours=1),
+                    duration_minutes=60,
+                    teacher_id=0,
+                    center_id=1,
+                    status='open',
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _enqueue(self, aggregate_id, key, **payload):
+        db = self._session_factory()
+        try:
+            row = enqueue_outbox_event(
+                db,
+                event_type=POST_CLASS_EVENT,
+                aggregate_type='class_session',
+                aggregate_id=aggregate_id,
+                idempotency_key=key,
+                payload={'key': key, **payload},
+                center_id=1,
+                now=NOW,
+            )
+            db.commit()
+            return row
+        finally:
+            db.close()
+
+    def _drain(self, now=NOW, **kwargs):
+        return drain_automation_outbox(center_id=1, session_factory=self._session_factory, now=now, **kwargs)
+
+    def _statuses(self):
+        db = self._session_factory()
+        try:
+            return [(row.idempotency_key, row.status, row.attempts) for row in db.query(AutomationOutbox).order_by(AutomationOutbox.id).all()]
+        finally:
+            db.close()
+
+    def test_submit_writes_outbox_row_instead_of_sending(self):
+        db = self._session_factory()
+        try:
+            with patch('app.services.post_class_pipeline.parent_notifications_from_rules') as parent_notify, patch.dict(
+                outbox_module._HANDLERS, {POST_CLASS_EVENT: lambda db, payload: self.fail('handler ran inline')}
+            ), center_context(1):
+                result = submit_attendance(
+                    db=db,
+                    batch_id=11,
+                    attendance_date=datetime.utcnow().date(),
+                    records=[
+                        {'student_id': 21, 'status': 'Present', 'comment': ''},
+                        {'student_id': 22, 'status': 'Absent', 'comment': ''},
+                    ],
+                    class_session_id=31,
+                    actor_role='admin',
+                    actor_user_id=999,
+                )
+            parent_notify.assert_not_called()
+            self.assertEqual(result['updated_records'], 2)
+            row = db.query(AutomationOutbox).one()
+            self.assertEqual((row.event_type, row.aggregate_id, row.idempotency_key, row.status), (POST_CLASS_EVENT, 31, 'post_class:31', 'pending'))
+            self.assertIn('"absent_ids": [22]', row.payload_json)
+            self.assertIsNotNone(db.get(ClassSession, 31).post_class_processed_at)
+        finally:
+            db.close()
+
+    def test_ad_hoc_resubmit_with_new_absentees_is_enqueued(self):
+        def _submit(absent):
+            db = self._session_factory()
+            try:
+                with patch('app.services.post_class_pipeline.parent_notifications_from_rules'), center_context(1):
+                    submit_attendance(
+                        db=db,
+                        batch_id=11,
+                        attendance_date=datetime.utcnow().date(),
+                        records=[
+                            {'student_id': sid, 'status': 'Absent' if sid in absent else 'Present', 'comment': ''}
+                            for sid in (21, 22)
+                        ],
+                        actor_role='admin',
+                        actor_user_id=999,
+                    )
+                db.commit()
+            finally:
+                db.close()
+
+        _submit({22})
+        _submit({22})
+        _submit({21, 22})
+        db = self._session_factory()
+        try:
+            rows = db.query(AutomationOutbox).order_by(AutomationOutbox.id).all()
+            self.assertEqual(len(rows), 2)
+            self.assertEqual(len({row.aggregate_id for row in rows}), 1)
+            self.assertIn('"absent_ids": [21, 22]', rows[1].payload_json)
+        finally:
+            db.close()
+
+    def test_drain_delivers_once_in_aggregate_order(self):
+        self._enqueue(31, 'a1')
+        self._enqueue(32, 'b1')
+        self._enqueue(31, 'a2')
+        self.assertIsNone(self._enqueue(31, 'a1'))
+        seen = []
+        seen_lock = threading.Lock()
+
+        def _handler(db, payload):
+            with seen_lock:
+                seen.append(payload['key'])
+
+        with patch.dict(outbox_module._HANDLERS, {POST_CLASS_EVENT: _handler}):
+            summary = self._drain(max_workers=2)
+            self._drain()
+        self.assertEqual(summary['done'], 3)
+        self.assertEqual(sorted(seen), ['a1', 'a2', 'b1'])
+        self.assertLess(seen.index('a1'), seen.index('a2'))
+        self.assertEqual(summary['stats'], {'depth': 0, 'lag_seconds': 0.0, 'dead': 0})
+
+    def test_failure_holds_back_later_events_then_dead_letters(self):
+        self._enqueue(31, 'a1')
+        self._enqueue(31, 'a2')
+        calls = []
+
+        def _handler(db, payload):
+            calls.append(payload['key'])
+            if payload['key'] == 'a1':
+                raise RuntimeError('telegram down')
+
+        with patch.dict(outbox_module._HANDLERS, {POST_CLASS_EVENT: _handler}), patch.object(
+            outbox_module.settings, 'automation_outbox_max_attempts', 2
+        ):
+            first = self._drain()
+            self.assertEqual((first['retried'], first['stats']['depth']), (1, 2))
+            self.assertEqual(self._statuses(), [('a1', 'pending', 1), ('a2', 'pending', 0)])
+            self.assertEqual(self._drain(now=NOW + timedelta(seconds=5))['claimed'], 0)
+
+            second = self._drain(now=NOW + timedelta(minutes=5))
+            self.assertEqual((second['dead'], second['done']), (1, 0))
+            self._drain(now=NOW + timedelta(minutes=6))
+        self.assertEqual(calls, ['a1', 'a1', 'a2'])
+        self.assertEqual(self._statuses(), [('a1', 'dead', 2), ('a2', 'done', 1)])
+        db = self._session_factory()
+        try:
+            self.assertTrue(db.get(ClassSession, 31).post_class_error)
+            self.assertEqual(db.query(AutomationFailureLog).filter(AutomationFailureLog.job_name == 'automation_outbox').count(), 1)
+            self.assertEqual(outbox_stats(db, center_id=1)['dead'], 1)
+        finally:
+            db.close()
+
+    def test_expired_lease_is_reclaimed(self):
+        self._enqueue(31, 'a1')
+        db = self._session_factory()
+        try:
+            row = db.query(AutomationOutbox).one()
+            row.status = 'processing'
+            row.locked_until = NOW - timedelta(seconds=1)
+            db.commit()
+        finally:
+            db.close()
+        with patch.dict(outbox_module._HANDLERS, {POST_CLASS_EVENT: lambda db, payload: None}):
+            self.assertEqual(self._drain()['done'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
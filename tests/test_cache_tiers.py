@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from app.cache import CacheBackend, CacheManager, LocalLRUCache, MemoryCacheBackend, cache, cached_view
+
+
+class _SharedBackend(CacheBackend):
+    """Stands in for Redis: one store, fill locks and a pub/sub bus shared by every worker."""
+
+    def __init__(self):
+        self.store = MemoryCacheBackend()
+        self.gets = 0
+        self.locks = {}
+        self.subscribers = []
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        self.gets += 1
+        return self.store.get(key)
+
+    def set(self, key, value, ttl):
+        self.store.set(key, value, ttl)
+
+    def delete(self, key):
+        self.store.delete(key)
+
+    def delete_prefix(self, prefix):
+        self.store.delete_prefix(prefix)
+
+    def acquire_fill_lock(self, key, ttl):
+        with self._lock:
+            if key in self.locks:
+                return None
+            self.locks[key] = 'token'
+            return 'token'
+
+    def release_fill_lock(self, key, token):
+        with self._lock:
+            if self.locks.get(key) == token:
+                del self.locks[key]
+
+    def publish(self, channel, message):
+        for subscribed, handler in self.subscribers:
+            if subscribed == channel:
+                handler(message)
+
+    def listen(self, channel, handler):
+        self.subscribers.append((channel, handler))
+
+
+def _worker(backend):
+    manager = CacheManager(backend=backend, local=LocalLRUCache(max_entries=2, ttl_seconds=30))
+    manager.start_invalidation_listener()
+    return manager
+
+
+class TwoTierCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.backend = _SharedBackend()
+        self.worker_a = _worker(self.backend)
+        self.worker_b = _worker(self.backend)
+
+    def test_l1_serves_repeat_reads_without_touching_l2(self):
+        self.worker_a.set_cached('center:1:today_view:t1', {'n': 1}, ttl=60)
+        gets_before = self.backend.gets
+        for _ in range(5):
+            self.assertEqual(self.worker_a.get_cached('center:1:today_view:t1'), {'n': 1})
+        self.assertEqual(self.backend.gets, gets_before)
+
+    def test_l1_is_bounded(self):
+        for idx in range(5):
+            self.worker_a.set_cached(f'center:1:k{idx}', idx, ttl=60)
+        self.assertEqual(len(self.worker_a.local), 2)
+        self.assertEqual(self.worker_a.get_cached('center:1:k0'), 0)
+
+    def test_prefix_invalidation_reaches_other_workers(self):
+        self.worker_a.set_cached('center:1:today_view:t1', {'n': 1}, ttl=60)
+        self.assertEqual(self.worker_b.get_cached('center:1:today_view:t1'), {'n': 1})
+        self.worker_a.invalidate_prefix('center:1:today_view')
+        self.assertIsNone(self.worker_b.local.get('center:1:today_view:t1'))
+        self.assertIsNone(self.worker_b.get_cached('center:1:today_view:t1'))
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def _compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'payload': True}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.worker_a.get_or_compute('center:1:calendar:x', _compute, ttl=60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'payload': True}] * 8)
+
+    def test_other_worker_waits_for_the_fill_lock_holder(self):
+        self.backend.acquire_fill_lock('center:1:calendar:y', 30)
+
+        def _finish_elsewhere():
+            time.sleep(0.1)
+            self.backend.set('center:1:calendar:y', {'from': 'a'}, 60)
+
+        threading.Thread(target=_finish_elsewhere).start()
+        with patch('app.cache.settings.cache_fill_wait_seconds', 2.0):
+            value = self.worker_b.get_or_compute('center:1:calendar:y', lambda: {'from': 'b'}, ttl=60)
+        self.assertEqual(value, {'from': 'a'})
+
+    def test_foreign_messages_for_unknown_ops_are_ignored(self):
+        self.worker_a.set_cached('center:1:k', 1, ttl=60)
+        self.worker_a._on_invalidation('not json')
+        self.worker_a._on_invalidation(json.dumps({'origin': 'x', 'op': 'key', 'key': ''}))
+        self.assertEqual(self.worker_a.get_cached('center:1:k'), 1)
+
+
+class CachedViewSingleFlightTests(unittest.TestCase):
+    def test_cached_view_coalesces_concurrent_requests(self):
+        calls = []
+
+        @cached_view(ttl=60, key_builder=lambda **_: 'center:1:single_flight_view')
+        def handler():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'center_id': 1, 'ok': True}
+
+        cache.invalidate('center:1:single_flight_view')
+        threads = [threading.Thread(target=handler) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cache.invalidate('center:1:single_flight_view')
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,6 +15,7 @@ TARGET_FILES = [
     Path('app/services/notes_service.py'),
     Path('app/services/time_capacity_service.py'),
     Path('app/services/teacher_calendar_service.py'),
+    Path('app/services/occurrence_index_service.py'),
     Path('app/domain/services/notes_service.py'),
 ]
 
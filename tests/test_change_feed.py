@@ -0,0 +1,102 @@
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.cache import MemoryCacheBackend, cache, etag_response
+from app.services.center_scope_service import center_context
+from app.services.change_feed_service import (
+    TOPIC_CALENDAR,
+    TOPIC_TODAY,
+    bump_change_version,
+    change_version,
+    stream_changes,
+)
+
+
+def _request(if_none_match=None):
+    headers = {'if-none-match': if_none_match} if if_none_match else {}
+    return SimpleNamespace(headers=headers)
+
+
+class EtagResponseTests(unittest.TestCase):
+    def test_matching_if_none_match_returns_304(self):
+        payload = {'events': [{'id': 1}], 'view': 'week'}
+        first = etag_response(_request(), payload)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['etag']
+        self.assertEqual(json.loads(first.body), payload)
+
+        for header in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            replay = etag_response(_request(header), payload)
+            self.assertEqual(replay.status_code, 304, header)
+            self.assertEqual(replay.body, b'')
+            self.assertEqual(replay.headers['etag'], etag)
+
+        changed = etag_response(_request(etag), {**payload, 'view': 'month'})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['etag'], etag)
+
+
+class ChangeVersionTests(unittest.TestCase):
+    def setUp(self):
+        backend = MemoryCacheBackend()
+        patcher = patch.object(cache, 'backend', backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_memory_incr_counts(self):
+        backend = MemoryCacheBackend()
+        self.assertEqual(backend.incr('k', 60), 1)
+        self.assertEqual(backend.incr('k', 60), 2)
+        self.assertEqual(backend.get('k'), 2)
+
+    def test_scopes(self):
+        with center_context(1):
+            before_a = change_version(TOPIC_CALENDAR, teacher_id=7)
+            before_b = change_version(TOPIC_CALENDAR, teacher_id=8)
+            before_any = change_version(TOPIC_CALENDAR)
+
+            bump_change_version(TOPIC_CALENDAR, teacher_id=7)
+            self.assertNotEqual(change_version(TOPIC_CALENDAR, teacher_id=7), before_a)
+            self.assertEqual(change_version(TOPIC_CALENDAR, teacher_id=8), before_b)
+            self.assertNotEqual(change_version(TOPIC_CALENDAR), before_any)
+
+            mid_b = change_version(TOPIC_CALENDAR, teacher_id=8)
+            bump_change_version(TOPIC_CALENDAR)
+            self.assertNotEqual(change_version(TOPIC_CALENDAR, teacher_id=8), mid_b)
+            self.assertEqual(change_version(TOPIC_TODAY), '0')
+
+        with center_context(2):
+            self.assertEqual(change_version(TOPIC_CALENDAR), '0')
+
+    def test_stream_announces_changes(self):
+        async def _collect():
+            chunks = []
+
+            async def _never_disconnected():
+                return False
+
+            stream = stream_changes(_never_disconnected, center_id=1, topics=[TOPIC_TODAY], teacher_id=None)
+            async for chunk in stream:
+                chunks.append(chunk)
+                if chunk.startswith('event: ready'):
+                    with center_context(1):
+                        bump_change_version(TOPIC_TODAY, teacher_id=3)
+            return chunks
+
+        with patch('app.services.change_feed_service.settings') as settings:
+            settings.change_feed_poll_seconds = 0.05
+            settings.change_feed_keepalive_seconds = 60
+            settings.change_feed_max_seconds = 0.2
+            chunks = asyncio.run(_collect())
+
+        self.assertTrue(chunks[0].startswith('retry:'))
+        self.assertEqual(chunks[1], 'event: ready\ndata: {"versions":{"today":"0"},"shared":false}\n\n')
+        changes = [chunk for chunk in chunks if chunk.startswith('event: change')]
+        self.assertEqual(changes, ['event: change\ndata: {"topic":"today","version":"1"}\n\n'])
+
+
+if __name__ == '__main__':
+    unittest.main()
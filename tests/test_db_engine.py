@@ -0,0 +1,80 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.db import Base, EngineProfile, build_engine, make_session_factory, primary_reads, read_replica
+from app.models import Center
+
+
+class EngineProfileTests(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self._tmpdir.name)
+        profile = EngineProfile(sqlite_busy_timeout_ms=2500)
+        self.primary = build_engine(f"sqlite:///{root / 'primary.db'}", profile)
+        self.replica = build_engine(f"sqlite:///{root / 'replica.db'}", profile)
+        for engine, name in ((self.primary, 'primary'), (self.replica, 'replica')):
+            Base.metadata.create_all(bind=engine)
+            with engine.begin() as conn:
+                conn.execute(
+                    Center.__table__.insert().values(id=1, name=name, slug='main', timezone='UTC')
+                )
+        self.factory = make_session_factory(self.primary, self.replica)
+
+    def tearDown(self):
+        self.primary.dispose()
+        self.replica.dispose()
+        self._tmpdir.cleanup()
+
+    def test_sqlite_connections_use_wal_and_busy_timeout(self):
+        with self.primary.connect() as conn:
+            self.assertEqual(conn.execute(text('PRAGMA journal_mode')).scalar(), 'wal')
+            self.assertEqual(conn.execute(text('PRAGMA busy_timeout')).scalar(), 2500)
+
+    def test_read_intent_selects_go_to_the_replica(self):
+        db = self.factory()
+        try:
+            self.assertEqual(db.query(Center.name).scalar(), 'primary')
+            with read_replica():
+                self.assertEqual(db.query(Center.name).scalar(), 'replica')
+                self.assertEqual(db.query(Center.name).with_for_update().scalar(), 'primary')
+        finally:
+            db.close()
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        db = self.factory()
+        try:
+            with read_replica():
+                db.add(Center(id=2, name='north', slug='north', timezone='UTC'))
+                db.flush()
+                self.assertEqual(db.query(Center).count(), 2)
+            db.commit()
+            with read_replica():
+                self.assertEqual(db.query(Center).count(), 1)
+        finally:
+            db.close()
+
+    def test_primary_reads_override_nested_read_intent(self):
+        db = self.factory()
+        try:
+            with primary_reads():
+                with read_replica():
+                    self.assertEqual(db.query(Center.name).scalar(), 'primary')
+            with read_replica():
+                self.assertEqual(db.query(Center.name).scalar(), 'replica')
+        finally:
+            db.close()
+
+    def test_without_a_replica_everything_uses_the_primary(self):
+        db = make_session_factory(self.primary)()
+        try:
+            with read_replica():
+                self.assertEqual(db.query(Center.name).scalar(), 'primary')
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
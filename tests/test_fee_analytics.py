@@ -0,0 +1,129 @@
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.cache import cache
+from app.db import Base
+from app.models import Batch, Center, FeeRecord, Student
+from app.services.center_scope_service import center_context
+from app.services.fee_analytics_service import fee_summary, list_fee_records
+from app.services.fee_service import get_fee_dashboard, mark_fee_paid
+
+
+TODAY = date(2026, 3, 15)
+
+
+class _FixedTime:
+    def today(self):
+        return TODAY
+
+
+class FeeAnalyticsTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_fee_analytics.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        cache.invalidate_prefix('center:1:fee_dashboard')
+        db = self._session_factory()
+        try:
+            for table in (FeeRecord, Student, Batch, Center):
+                db.query(table).delete()
+            db.add_all([Center(id=1, name='A', slug='a', timezone='UTC'), Center(id=2, name='B', slug='b', timezone='UTC')])
+            db.add_all([Batch(id=1, name='Fees A', center_id=1), Batch(id=2, name='Fees B', center_id=2)])
+            db.add_all(
+                [
+                    Student(id=1, name='S1', batch_id=1, center_id=1),
+                    Student(id=2, name='S2', batch_id=1, center_id=1),
+                    Student(id=3, name='S3', batch_id=2, center_id=2),
+                ]
+            )
+            rows = [
+                (1, TODAY + timedelta(days=5), 100, 0, False),  # due
+                (1, TODAY - timedelta(days=10), 200, 50, False),  # overdue 1-30
+                (2, TODAY - timedelta(days=45), 300, 0, False),  # overdue 31-60
+                (2, TODAY - timedelta(days=120), 400, 0, False),  # overdue 90+
+                (2, TODAY - timedelta(days=40), 500, 500, True),  # paid
+                (3, TODAY - timedelta(days=10), 999, 0, False),  # other center
+            ]
+            db.add_all(
+                [
+                    FeeRecord(student_id=sid, due_date=due, amount=amount, paid_amount=paid, is_paid=is_paid)
+                    for sid, due, amount, paid, is_paid in rows
+                ]
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def test_summary_buckets_and_aging_match_row_scan(self):
+        db = self._session_factory()
+        try:
+            summary = fee_summary(db, center_id=1, today=TODAY)
+        finally:
+            db.close()
+        self.assertEqual({name: row['count'] for name, row in summary['totals'].items()}, {'due': 1, 'overdue': 3, 'paid': 1})
+        self.assertEqual(summary['totals']['overdue']['outstanding'], 850.0)
+        self.assertEqual(
+            {name: (row['count'], row['outstanding']) for name, row in summary['aging'].items()},
+            {'1-30': (1, 150.0), '31-60': (1, 300.0), '61-90': (0, 0.0), '90+': (1, 400.0)},
+        )
+        self.assertEqual(
+            summary['monthly'],
+            [
+                {'month': '2025-11', 'paid': 0, 'due': 0, 'overdue': 1},
+                {'month': '2026-01', 'paid': 0, 'due': 0, 'overdue': 1},
+                {'month': '2026-02', 'paid': 1, 'due': 0, 'overdue': 0},
+                {'month': '2026-03', 'paid': 0, 'due': 1, 'overdue': 1},
+            ],
+        )
+
+    def test_keyset_pages_stay_inside_the_center(self):
+        db = self._session_factory()
+        try:
+            seen = []
+            cursor = None
+            while True:
+                page = list_fee_records(db, center_id=1, status='overdue', today=TODAY, after_id=cursor, limit=2)
+                seen.extend(item['amount'] for item in page['items'])
+                cursor = page['next_cursor']
+                if cursor is None:
+                    break
+            self.assertEqual(seen, [200, 300, 400])
+        finally:
+            db.close()
+
+    def test_dashboard_is_cached_until_a_fee_is_paid(self):
+        db = self._session_factory()
+        try:
+            with center_context(1):
+                first = get_fee_dashboard(db, page_size=10, time_provider=_FixedTime())
+                self.assertEqual(len(first['overdue']), 3)
+                with patch('app.services.fee_analytics_service.fee_summary', side_effect=AssertionError('cache miss')):
+                    self.assertEqual(get_fee_dashboard(db, page_size=10, time_provider=_FixedTime()), first)
+                overdue_id = first['overdue'][0]['id']
+                with patch('app.services.fee_service.resolve_fee_actions_on_paid'), patch('app.services.fee_service.snapshot_service'):
+                    mark_fee_paid(db, overdue_id, 150)
+                refreshed = get_fee_dashboard(db, page_size=10, time_provider=_FixedTime())
+            self.assertEqual(refreshed['summary']['totals']['paid']['count'], 2)
+            self.assertNotIn(overdue_id, [item['id'] for item in refreshed['overdue']])
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
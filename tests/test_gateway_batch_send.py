@@ -0,0 +1,201 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.communication.clients import BaseCommunicationClient
+from app.db import Base
+from app.domain.communication_gateway import send_event_batch
+from app.models import Center, CommunicationLog, ProviderCircuitState, RateLimitState
+from app.services.rate_limit_service import DatabaseRateLimitBackend, set_rate_limit_backend
+
+
+class _RecordingClient:
+    def __init__(self):
+        self.sent = []
+
+    def emit_event(self, event_type, payload):
+        self.sent.append((event_type, payload['payload']['recipients'][0], payload['payload']['message']))
+        return {'queued': True}
+
+
+class _FailingClient(_RecordingClient):
+    def emit_event(self, event_type, payload):
+        super().emit_event(event_type, payload)
+        return {'queued': False}
+
+
+class _ConcurrentClient(BaseCommunicationClient):
+    supports_concurrent_emit = True
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def emit_event_async(self, event, payload):  # noqa: ARG002
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {'queued': True}
+
+
+class GatewayBatchSendTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_gateway_batch_send.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        # Start every test with a fresh in-process rate limit bucket.
+        set_rate_limit_backend(None)
+        db = self._session_factory()
+        try:
+            db.query(CommunicationLog).delete()
+            db.query(ProviderCircuitState).delete()
+            db.query(RateLimitState).delete()
+            db.query(Center).delete()
+            db.add(Center(id=1, name='Default', slug='default-center', timezone='UTC'))
+            db.commit()
+        finally:
+            db.close()
+
+    def _recipients(self, count):
+        return [
+            {
+                'chat_id': f'chat-{idx}',
+                'user_id': str(idx),
+                'entity_id': idx,
+                'student_id': idx,
+                'message': f'digest for {idx}',
+            }
+            for idx in range(1, count + 1)
+        ]
+
+    def test_batch_sends_per_recipient_messages_in_order(self):
+        db = self._session_factory()
+        client = _RecordingClient()
+        try:
+            recipients = self._recipients(3)
+            recipients.insert(1, {'chat_id': ''})
+            with patch('app.domain.communication_gateway.get_communication_client', return_value=client):
+                results = send_event_batch(
+                    'student_daily_digest',
+                    {'db': db, 'center_id': 1, 'entity_type': 'student', 'channels': ['telegram']},
+                    recipients,
+                )
+            self.assertEqual([r['status'] for r in results], ['sent', 'skipped', 'sent', 'sent'])
+            self.assertEqual(
+                client.sent,
+                [
+                    ('student_daily_digest', 'chat-1', 'digest for 1'),
+                    ('student_daily_digest', 'chat-2', 'digest for 2'),
+                    ('student_daily_digest', 'chat-3', 'digest for 3'),
+                ],
+            )
+            logs = db.query(CommunicationLog).order_by(CommunicationLog.student_id.asc()).all()
+            self.assertEqual([(row.student_id, row.delivery_status, row.delivery_attempts) for row in logs], [
+                (1, 'sent', 1),
+                (2, 'sent', 1),
+                (3, 'sent', 1),
+            ])
+        finally:
+            db.close()
+
+    def test_repeat_batch_is_duplicate_suppressed(self):
+        db = self._session_factory()
+        client = _RecordingClient()
+        try:
+            payload = {'db': db, 'center_id': 1, 'channels': ['telegram']}
+            recipients = self._recipients(4) + [self._recipients(1)[0]]
+            with patch('app.domain.communication_gateway.get_communication_client', return_value=client):
+                first = send_event_batch('student_daily_digest', payload, recipients)
+                second = send_event_batch('student_daily_digest', payload, recipients)
+            self.assertEqual([r['status'] for r in first], ['sent'] * 4 + ['duplicate_suppressed'])
+            self.assertEqual(first[4]['log_id'], first[0]['log_id'])
+            self.assertTrue(all(r['status'] == 'duplicate_suppressed' for r in second))
+            self.assertEqual(len(client.sent), 4)
+            self.assertEqual(db.query(CommunicationLog).count(), 4)
+        finally:
+            db.close()
+
+    def test_log_reads_and_commits_do_not_scale_with_recipients(self):
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append(statement)
+
+        # The database backend is the one whose reads could scale with the batch.
+        set_rate_limit_backend(DatabaseRateLimitBackend())
+        self.addCleanup(set_rate_limit_backend, None)
+        db = self._session_factory()
+        commits = {'n': 0}
+        event.listen(db, 'after_commit', lambda _session: commits.__setitem__('n', commits['n'] + 1))
+        event.listen(self._engine, 'before_cursor_execute', _record)
+        try:
+            with patch('app.domain.communication_gateway.get_communication_client', return_value=_RecordingClient()):
+                results = send_event_batch('fee_reminder', {'db': db, 'center_id': 1}, self._recipients(40))
+        finally:
+            event.remove(self._engine, 'before_cursor_execute', _record)
+            db.close()
+        self.assertTrue(all(r['status'] == 'sent' for r in results))
+        self.assertEqual(sum(1 for sql in statements if 'FROM communication_logs' in sql), 1)
+        self.assertEqual(sum(1 for sql in statements if 'FROM rate_limit_states' in sql), 1)
+        self.assertLessEqual(commits['n'], 2)
+
+    def test_batch_over_rate_limit_sends_head_of_batch(self):
+        db = self._session_factory()
+        client = _RecordingClient()
+        try:
+            with patch('app.domain.communication_gateway.get_communication_client', return_value=client), patch(
+                'app.services.rate_limit_service.record_observability_event'
+            ) as record:
+                results = send_event_batch('fee_reminder', {'db': db, 'center_id': 1}, self._recipients(102))
+        finally:
+            db.close()
+        self.assertEqual([r['status'] for r in results], ['sent'] * 100 + ['failed_backoff'] * 2)
+        self.assertEqual(len(client.sent), 100)
+        # Only the recipient that actually hit the limit counts as a block, not the batch probe.
+        self.assertEqual(record.call_count, 1)
+
+    def test_circuit_opening_mid_batch_holds_back_the_rest(self):
+        db = self._session_factory()
+        client = _FailingClient()
+        try:
+            with patch('app.domain.communication_gateway.get_communication_client', return_value=client):
+                results = send_event_batch('fee_reminder', {'db': db, 'center_id': 1}, self._recipients(12))
+            logs = db.query(CommunicationLog).order_by(CommunicationLog.student_id.asc()).all()
+            circuit = db.query(ProviderCircuitState).one()
+            self.assertEqual(circuit.state, 'open')
+            self.assertEqual(
+                [(row.delivery_status, row.delivery_attempts) for row in logs],
+                [('failed', 1)] * 5 + [('failed_backoff', 0)] * 7,
+            )
+        finally:
+            db.close()
+        self.assertEqual(len(client.sent), 5)
+        self.assertEqual([r['status'] for r in results], ['failed'] * 5 + ['failed_backoff'] * 7)
+
+    def test_async_client_dispatches_concurrently(self):
+        client = _ConcurrentClient()
+        with patch('app.domain.communication_gateway.get_communication_client', return_value=client):
+            results = send_event_batch('fee_reminder', {'center_id': 1}, self._recipients(6))
+        self.assertTrue(all(r['ok'] for r in results))
+        self.assertGreater(client.max_in_flight, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -27,6 +27,7 @@ from app.services.inbox_automation import (
     send_inbox_escalations,
 )
 from app.services.post_class_automation_engine import run_post_class_automation
+from app.services.rate_limit_service import set_rate_limit_backend
 
 
 class InboxAutomationTests(unittest.TestCase):
@@ -44,6 +45,7 @@ class InboxAutomationTests(unittest.TestCase):
         cls._tmpdir.cleanup()
 
     def setUp(self):
+        set_rate_limit_backend(None)
         db = self._session_factory()
         try:
             for table in (
@@ -0,0 +1,134 @@
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import AttendanceRecord, Center, FeeRecord, Student
+from app.services.center_scope_service import center_context
+from app.services.fee_service import mark_fee_paid
+from app.services.insights_service import generate_insights, invalidate_insights
+
+
+TODAY = date(2026, 3, 2)
+
+
+class _FixedTimeProvider:
+    def today(self) -> date:
+        return TODAY
+
+
+class InsightsServiceTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_insights_service.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        db = self._session_factory()
+        try:
+            for table in (FeeRecord, AttendanceRecord, Student, Center):
+                db.query(table).delete()
+            db.add_all([Center(id=1, name='A', slug='a'), Center(id=2, name='B', slug='b')])
+            # Present every day this week, absent for the three weeks before: fine at 7 days, low at 30 and 90.
+            db.add(Student(id=1, name='Recovering', batch_id=1, center_id=1))
+            for offset in range(25):
+                status = 'Present' if offset < 7 else 'Absent'
+                db.add(AttendanceRecord(student_id=1, attendance_date=TODAY - timedelta(days=offset), status=status))
+            for sid in (2, 3, 4):
+                db.add(Student(id=sid, name=f'Absent {sid}', batch_id=1, center_id=1))
+                db.add(AttendanceRecord(student_id=sid, attendance_date=TODAY, status='Absent'))
+            db.add(Student(id=5, name='Regular', batch_id=1, center_id=1))
+            db.add(AttendanceRecord(student_id=5, attendance_date=TODAY, status='Present'))
+            db.add(Student(id=9, name='Other center', batch_id=1, center_id=2))
+            db.add(AttendanceRecord(student_id=9, attendance_date=TODAY, status='Absent'))
+            db.add_all(
+                [
+                    FeeRecord(id=1, student_id=2, due_date=TODAY, amount=1000, paid_amount=250, is_paid=False),
+                    FeeRecord(id=2, student_id=5, due_date=TODAY, amount=500, paid_amount=500, is_paid=True),
+                    FeeRecord(id=3, student_id=9, due_date=TODAY, amount=800, paid_amount=0, is_paid=False),
+                ]
+            )
+            db.commit()
+        finally:
+            db.close()
+        for center_id in (1, 2):
+            with center_context(center_id):
+                invalidate_insights(center_id)
+
+    def _insights(self, center_id=1, **kwargs):
+        db = self._session_factory()
+        try:
+            with center_context(center_id):
+                return generate_insights(db, center_id=center_id, time_provider=_FixedTimeProvider(), **kwargs)
+        finally:
+            db.close()
+
+    def test_center_scoped_with_names_and_windows(self):
+        result = self._insights()
+        self.assertEqual([row['student_id'] for row in result['low_attendance']], [1, 2, 3, 4])
+        recovering = result['low_attendance'][0]
+        self.assertEqual(recovering['student_name'], 'Recovering')
+        self.assertEqual(recovering['windows'], {'7': 1.0, '30': 0.28, '90': 0.28})
+        self.assertEqual(recovering['attendance_ratio'], 0.28)
+        self.assertEqual(
+            result['unpaid_fees'],
+            [{'fee_record_id': 1, 'student_id': 2, 'student_name': 'Absent 2', 'pending_amount': 750.0, 'due_date': '2026-03-02'}],
+        )
+
+        weekly = self._insights(window_days=7)
+        self.assertEqual([row['student_id'] for row in weekly['low_attendance']], [2, 3, 4])
+
+        other = self._insights(center_id=2)
+        self.assertEqual([row['student_id'] for row in other['low_attendance']], [9])
+        self.assertEqual([row['fee_record_id'] for row in other['unpaid_fees']], [3])
+
+    def test_keyset_pages(self):
+        first = self._insights(limit=3)
+        self.assertEqual([row['student_id'] for row in first['low_attendance']], [1, 2, 3])
+        self.assertEqual(first['next_cursors'], {'low_attendance': 3, 'unpaid_fees': None})
+        second = self._insights(limit=3, attendance_after_id=3)
+        self.assertEqual([row['student_id'] for row in second['low_attendance']], [4])
+        self.assertIsNone(second['next_cursors']['low_attendance'])
+
+    def test_two_queries_and_cache_cleared_by_fee_write(self):
+        statements = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+            statements.append(statement)
+
+        event.listen(self._engine, 'before_cursor_execute', _count)
+        try:
+            self._insights()
+            self.assertEqual(len(statements), 2)
+            self._insights()
+            self.assertEqual(len(statements), 2)
+        finally:
+            event.remove(self._engine, 'before_cursor_execute', _count)
+
+        db = self._session_factory()
+        try:
+            with center_context(1):
+                mark_fee_paid(db, 1, 750, time_provider=_FixedTimeProvider())
+        finally:
+            db.close()
+        self.assertEqual(self._insights()['unpaid_fees'], [])
+
+    def test_unknown_window_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self._insights(window_days=14)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from app.services.interval_conflicts import IntervalIndex, intervals_overlap, overlap_counts, room_conflict_scores
+
+
+def _brute_force_scores(spans):
+    scores = []
+    for idx, (start_a, end_a, room_a) in enumerate(spans):
+        conflicts = 0
+        for jdx, (start_b, end_b, room_b) in enumerate(spans):
+            if idx != jdx and room_a and room_a == room_b and intervals_overlap(start_a, end_a, start_b, end_b):
+                conflicts += 1
+        scores.append(conflicts)
+    return scores
+
+
+class IntervalConflictTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(20260301)
+        self.base = datetime(2026, 3, 1, 7, 0)
+
+    def _random_spans(self, count):
+        spans = []
+        for _ in range(count):
+            start = self.base + timedelta(minutes=15 * self.rng.randrange(0, 60))
+            end = start + timedelta(minutes=15 * self.rng.randrange(0, 8))
+            spans.append((start, end, self.rng.choice([None, 0, 1, 2, 3])))
+        return spans
+
+    def test_room_scores_match_pairwise_comparison(self):
+        for size in (0, 1, 2, 7, 40, 300):
+            spans = self._random_spans(size)
+            self.assertEqual(room_conflict_scores(spans), _brute_force_scores(spans), size)
+
+    def test_back_to_back_and_zero_length_slots(self):
+        nine, ten, eleven = (self.base.replace(hour=hour) for hour in (9, 10, 11))
+        self.assertEqual(overlap_counts([(nine, ten), (ten, eleven)]), [0, 0])
+        self.assertEqual(overlap_counts([(nine, eleven), (ten, ten), (ten, ten)]), [2, 1, 1])
+        self.assertEqual(overlap_counts([(ten, ten), (ten, eleven)]), [0, 0])
+
+    def test_index_probes_match_linear_scan(self):
+        spans = [(start, end, idx) for idx, (start, end, _) in enumerate(self._random_spans(200))]
+        index = IntervalIndex(spans)
+        for _ in range(300):
+            start = self.base + timedelta(minutes=5 * self.rng.randrange(-12, 200))
+            end = start + timedelta(minutes=5 * self.rng.randrange(0, 30))
+            expected = sorted(item for s, e, item in spans if intervals_overlap(s, e, start, end))
+            self.assertEqual(sorted(index.overlapping(start, end)), expected)
+            self.assertEqual(index.has_overlap(start, end), bool(expected))
+        self.assertFalse(IntervalIndex([]).has_overlap(self.base, self.base + timedelta(hours=1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
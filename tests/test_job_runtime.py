@@ -0,0 +1,135 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.domain.jobs.job_lock import acquire_job_lock, release_job_lock
+from app.domain.jobs.runtime import with_db
+from app.models import Center
+from app.services.center_scope_service import get_current_center_id
+from app.services.observability_counters import clear_observability_events, count_observability_events
+
+
+class JobRuntimeTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_job_runtime.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+        db = cls._session_factory()
+        try:
+            db.add_all([Center(id=idx, name=f'C{idx}', slug=f'c{idx}', timezone='UTC') for idx in (1, 2, 3)])
+            db.commit()
+        finally:
+            db.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        clear_observability_events()
+
+    def test_centers_run_concurrently_with_isolated_sessions(self):
+        barrier = threading.Barrier(3, timeout=5)
+        seen = {}
+        seen_lock = threading.Lock()
+
+        def _task(db, center_id):
+            barrier.wait()
+            with seen_lock:
+                seen[center_id] = (id(db), get_current_center_id())
+            if center_id == 2:
+                raise RuntimeError('center 2 broke')
+
+        with_db(_task, job_label='runtime_parallel', concurrency=3, session_factory=self._session_factory)
+
+        self.assertEqual({center_id: ctx for center_id, (_, ctx) in seen.items()}, {1: 1, 2: 2, 3: 3})
+        self.assertEqual(len({session_id for session_id, _ in seen.values()}), 3)
+        self.assertEqual(count_observability_events('job_success', job='runtime_parallel', center_id=1), 1)
+        self.assertEqual(count_observability_events('job_failure', job='runtime_parallel', center_id=2), 1)
+        self.assertEqual(count_observability_events('job_success', job='runtime_parallel', center_id=3), 1)
+
+    def test_slow_center_times_out_without_holding_back_the_rest(self):
+        release = threading.Event()
+        finished = []
+
+        def _task(db, center_id):
+            if center_id == 1:
+                release.wait(5)
+            finished.append(center_id)
+
+        started = time.monotonic()
+        with_db(_task, job_label='runtime_timeout', concurrency=2, timeout_seconds=1, session_factory=self._session_factory)
+        elapsed = time.monotonic() - started
+        try:
+            self.assertLess(elapsed, 4)
+            self.assertEqual(sorted(finished), [2, 3])
+            self.assertEqual(count_observability_events('job_timeout', job='runtime_timeout', center_id=1), 1)
+            # The timed-out center still holds its lock until it really finishes.
+            self.assertIsNone(acquire_job_lock('runtime_timeout', 1))
+        finally:
+            release.set()
+
+    def test_queued_centers_get_their_own_timeout(self):
+        ran = []
+
+        def _task(db, center_id):
+            time.sleep(0.6)
+            ran.append(center_id)
+
+        with_db(_task, job_label='runtime_queued', concurrency=1, timeout_seconds=1, session_factory=self._session_factory)
+
+        self.assertEqual(ran, [1, 2, 3])
+        self.assertEqual(count_observability_events('job_success', job='runtime_queued'), 3)
+        self.assertEqual(count_observability_events('job_timeout', job='runtime_queued'), 0)
+
+    def test_queued_centers_are_dropped_when_the_job_budget_runs_out(self):
+        release = threading.Event()
+        ran = []
+
+        def _task(db, center_id):
+            ran.append(center_id)
+            if center_id == 1:
+                release.wait(5)
+
+        started = time.monotonic()
+        with_db(
+            _task,
+            job_label='runtime_budget',
+            concurrency=1,
+            timeout_seconds=1,
+            budget_seconds=2,
+            session_factory=self._session_factory,
+        )
+        elapsed = time.monotonic() - started
+        try:
+            self.assertLess(elapsed, 4)
+            self.assertEqual(ran, [1])
+            self.assertEqual(count_observability_events('job_timeout', job='runtime_budget', center_id=1), 1)
+            for center_id in (2, 3):
+                self.assertEqual(count_observability_events('job_budget_skipped', job='runtime_budget', center_id=center_id), 1)
+        finally:
+            release.set()
+
+    def test_locked_center_is_skipped(self):
+        token = acquire_job_lock('runtime_locked', 2)
+        ran = []
+        try:
+            with_db(lambda db, center_id: ran.append(center_id), job_label='runtime_locked', concurrency=1, session_factory=self._session_factory)
+        finally:
+            release_job_lock('runtime_locked', 2, token)
+        self.assertEqual(ran, [1, 3])
+        self.assertEqual(count_observability_events('job_lock_skipped', job='runtime_locked', center_id=2), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
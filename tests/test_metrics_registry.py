@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.metrics import MetricsRegistry, record_cache_event
+from app.routers import metrics as metrics_router
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_labeled_counter_totals_and_partial_label_sums(self):
+        jobs = self.registry.counter('job_events')
+        jobs.inc(job='digest', center_id=1)
+        jobs.inc(job='digest', center_id=2)
+        jobs.inc(2, job='backup', center_id=1)
+        self.assertEqual(jobs.value(job='digest'), 2)
+        self.assertEqual(jobs.value(center_id=1), 3)
+        self.assertEqual(jobs.value(), 4)
+
+    def test_rolling_window_is_bounded_and_expires(self):
+        events = self.registry.counter('events', window_seconds=3600, bucket_seconds=60)
+        for minute in range(0, 600):
+            events.inc(at=minute * 60.0, kind='tick')
+        now = 599 * 60.0
+        self.assertEqual(events.count_in_window(600, now=now, kind='tick'), 11)
+        self.assertEqual(events.count_in_window(3600, now=now), 61)
+        state = next(iter(events._series.values()))
+        self.assertLessEqual(len(state[1]._buckets), 61)
+        self.assertEqual(events.value(), 600)
+
+    def test_histogram_and_text_exposition(self):
+        latency = self.registry.histogram('job_duration_seconds', 'Job wall time.', buckets=(0.1, 1.0))
+        latency.observe(0.05, job='digest')
+        latency.observe(0.5, job='digest')
+        latency.observe(3.0, job='digest')
+        self.registry.gauge('outbox_depth').set(7, center_id=2)
+        self.registry.counter('cache_events').inc(event='a"b')
+
+        text = self.registry.render()
+        self.assertIn('# TYPE cache_events_total counter\ncache_events_total{event="a\\"b"} 1\n', text)
+        self.assertIn('job_duration_seconds_bucket{job="digest",le="0.1"} 1', text)
+        self.assertIn('job_duration_seconds_bucket{job="digest",le="1"} 2', text)
+        self.assertIn('job_duration_seconds_bucket{job="digest",le="+Inf"} 3', text)
+        self.assertIn('job_duration_seconds_sum{job="digest"} 3.55', text)
+        self.assertIn('outbox_depth{center_id="2"} 7', text)
+
+    def test_kind_mismatch_is_rejected(self):
+        self.registry.counter('depth')
+        with self.assertRaises(ValueError):
+            self.registry.gauge('depth')
+
+
+class MetricsEndpointTests(unittest.TestCase):
+    def setUp(self):
+        api = FastAPI()
+        api.include_router(metrics_router.router)
+        self.client = TestClient(api)
+
+    def test_scrape_includes_cache_events(self):
+        record_cache_event('cache_hit')
+        with patch('app.routers.metrics.settings.metrics_token', 'scrape-me'):
+            response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-me'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['content-type'].startswith('text/plain; version=0.0.4'))
+        self.assertRegex(response.text, r'cache_events_total\{event="hit"\} \d+')
+
+    def test_disabled_without_a_token(self):
+        with patch('app.routers.metrics.settings.metrics_token', ''):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    def test_token_is_required_when_configured(self):
+        with patch('app.routers.metrics.settings.metrics_token', 'scrape-me'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            ok = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-me'})
+        self.assertEqual(ok.status_code, 200)
+        self.assertIn('# TYPE cache_events_total counter', ok.text)
+
+
+if __name__ == '__main__':
+    unittest.main()
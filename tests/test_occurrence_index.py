@@ -0,0 +1,197 @@
+import tempfile
+import threading
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Batch, BatchSchedule, CalendarOverride, Center
+from app.services.center_scope_service import center_context
+from app.services.occurrence_index_service import (
+    _engine_index,
+    invalidate_occurrence_index,
+    list_occurrences,
+    list_occurrences_for_day,
+)
+
+
+MONDAY = date(2026, 3, 2)
+
+
+class OccurrenceIndexTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_occurrence_index.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        invalidate_occurrence_index()
+        db = self._session_factory()
+        try:
+            for table in (CalendarOverride, BatchSchedule, Batch, Center):
+                db.query(table).delete()
+            db.add(Center(id=1, name='Default', slug='default-center', timezone='UTC'))
+            db.commit()
+            self.math = self._batch(db, 'Math', room_id=None, slots=[(0, '10:00', 60), (2, '10:00', 60)])
+            self.physics = self._batch(db, 'Physics', room_id=None, slots=[(0, '09:00', 45)])
+        finally:
+            db.close()
+
+    def _batch(self, db, name, *, room_id, slots):
+        batch = Batch(name=name, subject=name, center_id=1, room_id=room_id, default_duration_minutes=50)
+        db.add(batch)
+        db.flush()
+        for weekday, start_time, duration in slots:
+            db.add(BatchSchedule(batch_id=batch.id, weekday=weekday, start_time=start_time, duration_minutes=duration))
+        db.commit()
+        return batch.id
+
+    def _day(self, db, day=MONDAY, **filters):
+        with center_context(1):
+            return [
+                (row.batch_id, row.start_dt.strftime('%H:%M'), row.duration_minutes)
+                for row in list_occurrences_for_day(db, center_id=1, day=day, **filters)
+            ]
+
+    def test_expands_week_and_applies_overrides(self):
+        db = self._session_factory()
+        try:
+            db.add_all(
+                [
+                    CalendarOverride(batch_id=self.math, override_date=MONDAY, new_start_time='11:30', new_duration_minutes=90, reason=' moved '),
+                    CalendarOverride(batch_id=self.physics, override_date=MONDAY, cancelled=True),
+                    CalendarOverride(batch_id=self.physics, override_date=date(2026, 3, 3), new_start_time='16:00'),
+                ]
+            )
+            db.commit()
+            with center_context(1):
+                week = list_occurrences(db, center_id=1, start_date=MONDAY, end_date=date(2026, 3, 8))
+            self.assertEqual(
+                [(row.batch_id, row.start_dt, row.duration_minutes, row.schedule_id is None) for row in week],
+                [
+                    (self.math, datetime(2026, 3, 2, 11, 30), 90, False),
+                    (self.physics, datetime(2026, 3, 3, 16, 0), 50, True),
+                    (self.math, datetime(2026, 3, 4, 10, 0), 60, False),
+                ],
+            )
+            self.assertEqual(week[0].reason, 'moved')
+            self.assertEqual(self._day(db, batch_ids={self.physics}), [])
+        finally:
+            db.close()
+
+    def test_warm_reads_skip_the_database(self):
+        db = self._session_factory()
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+            statements.append(statement)
+
+        try:
+            self._day(db)
+            event.listen(self._engine, 'before_cursor_execute', _record)
+            try:
+                self._day(db)
+                self._day(db, day=date(2026, 3, 4))
+            finally:
+                event.remove(self._engine, 'before_cursor_execute', _record)
+            self.assertEqual(statements, [])
+        finally:
+            db.close()
+
+    def test_schedule_and_override_writes_refresh_only_their_batch(self):
+        db = self._session_factory()
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append(statement)
+
+        try:
+            self.assertEqual(self._day(db), [(self.physics, '09:00', 45), (self.math, '10:00', 60)])
+
+            writer = self._session_factory()
+            try:
+                schedule = writer.query(BatchSchedule).filter(BatchSchedule.batch_id == self.physics).one()
+                schedule.start_time = '08:00'
+                writer.add(CalendarOverride(batch_id=self.math, override_date=MONDAY, new_duration_minutes=30))
+                writer.commit()
+            finally:
+                writer.close()
+
+            event.listen(self._engine, 'before_cursor_execute', _record)
+            try:
+                self.assertEqual(self._day(db), [(self.physics, '08:00', 45), (self.math, '10:00', 30)])
+            finally:
+                event.remove(self._engine, 'before_cursor_execute', _record)
+            self.assertEqual(len(statements), 2)
+            self.assertTrue(all('batch_id IN' in sql or 'batches.id IN' in sql for sql in statements))
+        finally:
+            db.close()
+
+    def test_refresh_queries_run_outside_the_index_lock(self):
+        db = self._session_factory()
+        lock = _engine_index(self._engine).lock
+        held_during_query = []
+
+        def _try_lock():
+            acquired = lock.acquire(blocking=False)
+            if acquired:
+                lock.release()
+            held_during_query.append(not acquired)
+
+        def _probe(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+            # Probe from another thread: other readers are what the lock would block.
+            prober = threading.Thread(target=_try_lock)
+            prober.start()
+            prober.join()
+
+        try:
+            self._day(db)
+            invalidate_occurrence_index(self._engine, batch_ids=[self.math])
+            event.listen(self._engine, 'before_cursor_execute', _probe)
+            try:
+                self._day(db)
+                self._day(db, day=date(2027, 3, 1))
+            finally:
+                event.remove(self._engine, 'before_cursor_execute', _probe)
+            self.assertTrue(held_during_query)
+            self.assertFalse(any(held_during_query))
+        finally:
+            db.close()
+
+    def test_rolled_back_writes_do_not_linger(self):
+        db = self._session_factory()
+        try:
+            self._day(db)
+            db.add(CalendarOverride(batch_id=self.math, override_date=MONDAY, cancelled=True))
+            db.flush()
+            self.assertEqual(self._day(db), [(self.physics, '09:00', 45)])
+            db.rollback()
+            self.assertEqual(self._day(db), [(self.physics, '09:00', 45), (self.math, '10:00', 60)])
+        finally:
+            db.close()
+
+    def test_room_filter(self):
+        db = self._session_factory()
+        try:
+            batch = db.get(Batch, self.math)
+            batch.room_id = 7
+            db.commit()
+            self.assertEqual(self._day(db, room_id=7), [(self.math, '10:00', 60)])
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
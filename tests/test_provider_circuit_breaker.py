@@ -10,6 +10,7 @@ from sqlalchemy.orm import sessionmaker
 from app.db import Base
 from app.domain.communication_gateway import send_event
 from app.models import Center, ProviderCircuitState
+from app.services.rate_limit_service import set_rate_limit_backend
 
 
 class _FailingClient:
@@ -27,6 +28,7 @@ def _utc(y, m, d, hh=0, mm=0, ss=0):
 
 
 def test_provider_circuit_breaker_transitions():
+    set_rate_limit_backend(None)
     tmpdir = tempfile.TemporaryDirectory()
     try:
         db_path = Path(tmpdir.name) / 'test_provider_circuit.db'
@@ -0,0 +1,81 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+import app.db  # noqa: F401  registers the cursor hooks
+from app.query_profiler import fingerprint, profile_scope, profiler_snapshot, reset_profiler
+from app.route_logging import EndpointNameRoute
+
+
+class QueryProfilerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_query_profiler.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        with cls._engine.begin() as conn:
+            conn.execute(text('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'))
+            conn.execute(text("INSERT INTO items (id, name) VALUES (1, 'a'), (2, 'b'), (3, 'c')"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        reset_profiler()
+
+    def _n_plus_one(self):
+        with self._engine.connect() as conn:
+            ids = [row[0] for row in conn.execute(text('SELECT id FROM items'))]
+            for item_id in ids:
+                conn.execute(text(f'SELECT name FROM items WHERE id = {item_id}'))
+
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?) AND name = 'x'  AND n = 4"),
+            'SELECT * FROM t WHERE id IN (?) AND name = ? AND n = ?',
+        )
+
+    def test_scope_counts_queries_and_flags_repeats(self):
+        with profile_scope('job:demo') as profile:
+            self._n_plus_one()
+        self.assertEqual(profile.query_count, 4)
+
+        stats = profiler_snapshot()['job:demo']
+        self.assertEqual((stats['calls'], stats['queries'], stats['max_queries']), (1, 4, 4))
+        self.assertEqual(stats['query_count_histogram']['le_5'], 1)
+        self.assertEqual(
+            stats['duplicate_statements'],
+            [{'fingerprint': 'SELECT name FROM items WHERE id = ?', 'repeats': 3}],
+        )
+
+    def test_queries_outside_a_scope_are_not_attributed(self):
+        self._n_plus_one()
+        self.assertEqual(profiler_snapshot(), {})
+
+    def test_endpoint_profile_and_server_timing_header(self):
+        router = APIRouter(route_class=EndpointNameRoute)
+
+        @router.get('/items')
+        def list_items():
+            self._n_plus_one()
+            return {'ok': True}
+
+        api = FastAPI()
+        api.include_router(router)
+        with patch('app.route_logging.settings.query_profiler_server_timing', True):
+            response = TestClient(api).get('/items')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.headers['server-timing'], r'^db;dur=[\d.]+;desc="4 queries"$')
+        self.assertEqual(profiler_snapshot()['GET /items']['queries'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
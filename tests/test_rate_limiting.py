@@ -8,8 +8,17 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.db import Base
-from app.models import Center
-from app.services.rate_limit_service import SafeRateLimitError, check_rate_limit
+from app.models import Center, RateLimitState
+from app.services.rate_limit_service import (
+    DatabaseRateLimitBackend,
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    RateLimitKey,
+    SafeRateLimitError,
+    _build_rate_limit_backend,
+    check_rate_limit,
+    set_rate_limit_backend,
+)
 
 
 def _utc(y, m, d, hh=0, mm=0, ss=0):
@@ -66,3 +75,94 @@ def test_rate_limit_blocks_after_threshold_and_resets():
             engine.dispose()
     finally:
         tmpdir.cleanup()
+
+
+def test_memory_backend_token_bucket_refills_smoothly():
+    backend = MemoryRateLimitBackend()
+    set_rate_limit_backend(backend)
+    try:
+        base = _utc(2026, 2, 16, 12, 0, 0)
+        kwargs = dict(
+            center_id=1,
+            scope_type='center',
+            scope_key='1',
+            action_name='communication_send_event',
+            max_requests=60,
+            window_seconds=60,
+        )
+        with patch('app.services.rate_limit_service.default_time_provider.now', return_value=base):
+            for _ in range(60):
+                assert check_rate_limit(None, **kwargs)
+            with pytest.raises(SafeRateLimitError):
+                check_rate_limit(None, **kwargs)
+
+        # One token per second comes back; no need to wait for a full window reset.
+        with patch('app.services.rate_limit_service.default_time_provider.now', return_value=base + timedelta(seconds=2)):
+            assert check_rate_limit(None, **kwargs)
+            assert check_rate_limit(None, **kwargs)
+            with pytest.raises(SafeRateLimitError):
+                check_rate_limit(None, **kwargs)
+
+        with patch('app.services.rate_limit_service.default_time_provider.now', return_value=base + timedelta(seconds=2)):
+            assert check_rate_limit(None, **{**kwargs, 'scope_key': '2'})
+    finally:
+        set_rate_limit_backend(None)
+
+
+def test_failing_backend_falls_back_to_database():
+    class BrokenBackend(RateLimitBackend):
+        name = 'broken'
+
+        def consume(self, db, key, *, max_requests, window_seconds, now):
+            raise ConnectionError('redis down')
+
+    tmpdir = tempfile.TemporaryDirectory()
+    set_rate_limit_backend(BrokenBackend())
+    try:
+        db_path = Path(tmpdir.name) / 'test_rate_limit_fallback.db'
+        engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        Base.metadata.create_all(bind=engine)
+        db = Session()
+        try:
+            db.add(Center(id=1, name='Center A', slug='center-a'))
+            db.commit()
+            kwargs = dict(
+                center_id=1,
+                scope_type='user',
+                scope_key='7',
+                action_name='auth_request_otp',
+                max_requests=2,
+                window_seconds=300,
+            )
+            assert check_rate_limit(db, **kwargs)
+            assert check_rate_limit(db, **kwargs)
+            with pytest.raises(SafeRateLimitError):
+                check_rate_limit(db, **kwargs)
+            assert db.query(RateLimitState).count() == 1
+        finally:
+            db.close()
+            engine.dispose()
+    finally:
+        set_rate_limit_backend(None)
+        tmpdir.cleanup()
+
+
+def test_backend_choice():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+    with patch('app.services.rate_limit_service.settings') as settings:
+        settings.cache_redis_url = None
+        settings.rate_limit_backend = 'auto'
+        assert isinstance(_build_rate_limit_backend(), DatabaseRateLimitBackend)
+        settings.rate_limit_backend = 'memory'
+        assert isinstance(_build_rate_limit_backend(), MemoryRateLimitBackend)
+
+
+def test_memory_backend_caps_keys_denied_on_first_sight():
+    backend = MemoryRateLimitBackend(max_keys=2)
+    now = datetime(2026, 2, 16, 12, 0, 0)
+    for scope_key in range(5):
+        key = RateLimitKey(center_id=1, scope_type='user', scope_key=str(scope_key), action_name='send')
+        assert backend.consume(None, key, max_requests=1, window_seconds=60, now=now, cost=2) is not None
+        assert len(backend._buckets) <= 2
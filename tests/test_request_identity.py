@@ -0,0 +1,123 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import request_identity
+from app.core.request_identity import (
+    clear_request_identity_cache,
+    get_request_session,
+    is_onboarding_incomplete_cached,
+    resolve_center_by_slug,
+)
+from app.db import Base
+from app.models import Center, OnboardingState
+from app.services.auth_service import _encode_jwt
+from app.tenant_middleware import TenantResolutionMiddleware
+
+
+class RequestIdentityTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_request_identity.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        Base.metadata.create_all(bind=cls._engine)
+        base_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        cls.session_opens = {'n': 0}
+
+        def counting_factory():
+            cls.session_opens['n'] += 1
+            return base_factory()
+
+        cls._base_factory = base_factory
+        cls._session_factory = staticmethod(counting_factory)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        clear_request_identity_cache()
+        self.session_opens['n'] = 0
+        db = self._base_factory()
+        try:
+            db.query(OnboardingState).delete()
+            db.query(Center).delete()
+            db.commit()
+            alpha = Center(name='Alpha', slug='alpha', timezone='Asia/Kolkata')
+            db.add(alpha)
+            db.commit()
+            db.refresh(alpha)
+            self.alpha_id = int(alpha.id)
+        finally:
+            db.close()
+
+    def test_slug_lookup_cached_between_requests(self):
+        self.assertEqual(resolve_center_by_slug(self._session_factory, 'alpha'), (self.alpha_id, 'alpha'))
+        self.assertEqual(resolve_center_by_slug(self._session_factory, 'ALPHA'), (self.alpha_id, 'alpha'))
+        self.assertEqual(self.session_opens['n'], 1)
+
+    def test_unknown_slug_not_cached(self):
+        self.assertIsNone(resolve_center_by_slug(self._session_factory, 'gamma'))
+        self.assertIsNone(resolve_center_by_slug(self._session_factory, 'gamma'))
+        self.assertEqual(self.session_opens['n'], 2)
+
+    def test_onboarding_completion_visible_immediately(self):
+        db = self._base_factory()
+        try:
+            state = OnboardingState(
+                center_id=self.alpha_id,
+                setup_token='tok-1',
+                temp_slug='alpha',
+                reserved_slug='alpha',
+                status='in_progress',
+                current_step='welcome',
+                is_completed=False,
+            )
+            db.add(state)
+            db.commit()
+            self.assertTrue(is_onboarding_incomplete_cached(self._session_factory, self.alpha_id))
+            state.is_completed = True
+            db.commit()
+        finally:
+            db.close()
+
+        self.assertFalse(is_onboarding_incomplete_cached(self._session_factory, self.alpha_id))
+        opens_after_completion = self.session_opens['n']
+        self.assertFalse(is_onboarding_incomplete_cached(self._session_factory, self.alpha_id))
+        self.assertEqual(self.session_opens['n'], opens_after_completion)
+
+    def test_session_token_decoded_once_per_request(self):
+        calls = {'n': 0}
+        original = request_identity.validate_session_token
+
+        def counting_validate(token):
+            calls['n'] += 1
+            return original(token)
+
+        app = FastAPI()
+        app.add_middleware(TenantResolutionMiddleware, session_factory=self._session_factory)
+
+        @app.get('/probe')
+        def probe(request: Request):
+            first = get_request_session(request, validator=counting_validate)
+            second = get_request_session(request, validator=counting_validate)
+            return {'same': first == second, 'center_id': int((first or {}).get('center_id') or 0)}
+
+        token = _encode_jwt({'sub': 1, 'phone': '9000000001', 'role': 'teacher', 'center_id': self.alpha_id, 'iat': 0})
+        with TestClient(app) as client:
+            response = client.get('/probe', headers={'host': 'alpha.yourapp.com'}, cookies={'auth_session': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'same': True, 'center_id': self.alpha_id})
+        # The tenant middleware already decoded the token, so the handler reuses it.
+        self.assertEqual(calls['n'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import scheduler as scheduler_module
+from app.db import Base
+from app.models import SchedulerLease
+from app.services.scheduler_lease_service import LeaderElector, acquire_lease, release_lease
+
+
+NOW = datetime(2026, 3, 2, 9, 0)
+
+
+class SchedulerLeaseTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_scheduler_leader.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        db = self._session_factory()
+        try:
+            db.query(SchedulerLease).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    def _acquire(self, holder, now):
+        db = self._session_factory()
+        try:
+            return acquire_lease(db, name='scheduler', holder=holder, ttl_seconds=30, now=now)
+        finally:
+            db.close()
+
+    def test_one_holder_until_the_lease_expires(self):
+        self.assertTrue(self._acquire('a', NOW))
+        self.assertFalse(self._acquire('b', NOW + timedelta(seconds=5)))
+        self.assertTrue(self._acquire('a', NOW + timedelta(seconds=10)))
+        # a renewed at +10s, so b is still locked out at +35s and only wins after a stops heartbeating.
+        self.assertFalse(self._acquire('b', NOW + timedelta(seconds=35)))
+        self.assertTrue(self._acquire('b', NOW + timedelta(seconds=41)))
+        self.assertFalse(self._acquire('a', NOW + timedelta(seconds=42)))
+
+    def test_release_hands_over_immediately(self):
+        self.assertTrue(self._acquire('a', NOW))
+        db = self._session_factory()
+        try:
+            release_lease(db, name='scheduler', holder='b', now=NOW)  # not the holder: no effect
+            self.assertFalse(acquire_lease(db, name='scheduler', holder='b', ttl_seconds=30, now=NOW))
+            release_lease(db, name='scheduler', holder='a', now=NOW)
+            self.assertTrue(acquire_lease(db, name='scheduler', holder='b', ttl_seconds=30, now=NOW))
+        finally:
+            db.close()
+
+    def test_elector_runs_callbacks_on_transitions(self):
+        events = []
+
+        def _elector(holder):
+            return LeaderElector(
+                on_elected=lambda: events.append((holder, 'elected')),
+                on_demoted=lambda: events.append((holder, 'demoted')),
+                session_factory=self._session_factory,
+                holder=holder,
+                ttl_seconds=30,
+            )
+
+        first, second = _elector('a'), _elector('b')
+        self.assertTrue(first.tick(now=NOW))
+        self.assertTrue(first.tick(now=NOW + timedelta(seconds=10)))
+        self.assertFalse(second.tick(now=NOW + timedelta(seconds=10)))
+        self.assertTrue(second.tick(now=NOW + timedelta(seconds=60)))
+        self.assertFalse(first.tick(now=NOW + timedelta(seconds=61)))
+        self.assertEqual(events, [('a', 'elected'), ('b', 'elected'), ('a', 'demoted')])
+
+        second.resign()
+        self.assertFalse(second.is_leader)
+        self.assertTrue(first.tick())
+        self.assertEqual(events[-2:], [('b', 'demoted'), ('a', 'elected')])
+
+
+class SchedulerModeTests(unittest.TestCase):
+    def test_off_mode_starts_nothing(self):
+        with patch.object(scheduler_module, 'run_jobs') as run_jobs, patch.object(scheduler_module, 'LeaderElector') as elector:
+            scheduler_module.start_scheduler(mode='off')
+        run_jobs.assert_not_called()
+        elector.assert_not_called()
+        self.assertFalse(scheduler_module.scheduler.running)
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            scheduler_module.start_scheduler(mode='every-worker')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import csv
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import AttendanceRecord, BackupLog, Batch, FeeRecord, Student
+from app.services.google_sheets_backup import BACKUP_HEADER, run_incremental_backup
+
+
+DAY = date(2026, 3, 2)
+
+
+class _RecordingSink:
+    name = 'memory'
+
+    def __init__(self, fail_after: int | None = None):
+        self.batches = []
+        self.closed = False
+        self._fail_after = fail_after
+
+    def write_rows(self, rows):
+        if self._fail_after is not None and len(self.batches) >= self._fail_after:
+            raise RuntimeError('quota exceeded')
+        self.batches.append(list(rows))
+
+    def close(self):
+        self.closed = True
+
+
+class SheetsBackupTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_sheets_backup.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        self.out_dir = Path(tempfile.mkdtemp(dir=self._tmpdir.name))
+        db = self._session_factory()
+        try:
+            for table in (BackupLog, AttendanceRecord, FeeRecord, Student, Batch):
+                db.query(table).delete()
+            db.add_all([Batch(id=1, name='A', center_id=1), Batch(id=2, name='B', center_id=2)])
+            db.add_all(
+                [
+                    Student(id=1, name='S1', batch_id=1, center_id=1),
+                    Student(id=2, name='S2', batch_id=1, center_id=1),
+                    Student(id=3, name='S3', batch_id=2, center_id=2),
+                ]
+            )
+            db.add_all(
+                [
+                    AttendanceRecord(student_id=1, attendance_date=DAY, status='Present', comment=''),
+                    AttendanceRecord(student_id=2, attendance_date=DAY, status='Absent', comment='sick'),
+                    AttendanceRecord(student_id=3, attendance_date=DAY, status='Present', comment=''),
+                    FeeRecord(id=10, student_id=1, due_date=DAY, amount=500, paid_amount=0, is_paid=False),
+                    FeeRecord(id=11, student_id=3, due_date=DAY, amount=700, paid_amount=0, is_paid=False),
+                ]
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _backup(self, db, *, overlap_seconds=0, now=None):
+        with patch('app.services.google_sheets_backup.settings.backup_sink', 'csv'), patch(
+            'app.services.google_sheets_backup.settings.backup_local_dir', str(self.out_dir)
+        ), patch('app.services.google_sheets_backup.settings.backup_overlap_seconds', overlap_seconds):
+            return run_incremental_backup(db, center_id=1, now=now)
+
+    def _csv_rows(self):
+        with (self.out_dir / 'backup-center-1.csv').open(newline='', encoding='utf-8') as handle:
+            return list(csv.reader(handle))
+
+    def test_second_run_appends_only_changed_rows(self):
+        db = self._session_factory()
+        try:
+            first = self._backup(db)
+            self.assertEqual((first.status, first.sink, first.rows_written), ('success', 'csv', 3))
+
+            fee = db.get(FeeRecord, 10)
+            fee.paid_amount = 500
+            fee.is_paid = True
+            db.add(AttendanceRecord(student_id=1, attendance_date=date(2026, 3, 3), status='Late', comment='bus'))
+            db.commit()
+
+            first_mark = first.high_water_mark
+            second = self._backup(db)
+            self.assertEqual(second.rows_written, 2)
+            self.assertGreater(second.high_water_mark, first_mark)
+            self.assertEqual(self._backup(db).rows_written, 0)
+        finally:
+            db.close()
+
+        rows = self._csv_rows()
+        self.assertEqual(rows[0], BACKUP_HEADER)
+        self.assertEqual([row[:3] for row in rows[1:]], [
+            ['attendance', '1', '1'],
+            ['attendance', '2', '2'],
+            ['fee', '10', '1'],
+            ['attendance', '4', '1'],
+            ['fee', '10', '1'],
+        ])
+        self.assertEqual(rows[-1][6], 'True')
+
+    def test_row_committed_after_the_run_but_stamped_before_it_is_not_skipped(self):
+        run_at = datetime.utcnow() + timedelta(hours=1)
+        db = self._session_factory()
+        try:
+            first = self._backup(db, overlap_seconds=300, now=run_at)
+            self.assertEqual(first.high_water_mark, run_at - timedelta(seconds=300))
+            # Flushed 10s before the run read its window, committed after it.
+            db.add(
+                AttendanceRecord(
+                    student_id=2,
+                    attendance_date=date(2026, 3, 4),
+                    status='Late',
+                    comment='',
+                    updated_at=run_at - timedelta(seconds=10),
+                )
+            )
+            db.commit()
+            first_mark = first.high_water_mark
+            second = self._backup(db, overlap_seconds=300, now=run_at + timedelta(minutes=1))
+            self.assertGreaterEqual(second.high_water_mark, first_mark)
+        finally:
+            db.close()
+        self.assertIn(['attendance', '4', '2'], [row[:3] for row in self._csv_rows()])
+
+    def test_rows_are_written_in_bounded_batches(self):
+        db = self._session_factory()
+        try:
+            db.add_all(
+                [AttendanceRecord(student_id=2, attendance_date=date(2026, 3, 10 + idx), status='Present', comment='') for idx in range(4)]
+            )
+            db.commit()
+            sink = _RecordingSink()
+            logged = run_incremental_backup(db, center_id=1, sink=sink, chunk_size=2)
+        finally:
+            db.close()
+        self.assertEqual([len(batch) for batch in sink.batches], [2, 2, 2, 1])
+        self.assertTrue(sink.closed)
+        self.assertEqual(logged.rows_written, 7)
+
+    def test_failed_run_keeps_previous_watermark(self):
+        db = self._session_factory()
+        try:
+            failed = run_incremental_backup(db, center_id=1, sink=_RecordingSink(fail_after=1), chunk_size=2)
+            self.assertEqual((failed.status, failed.rows_written, failed.high_water_mark), ('failed', 2, None))
+            self.assertIn('quota exceeded', failed.message)
+            retry = run_incremental_backup(db, center_id=1, sink=_RecordingSink(), chunk_size=2)
+            self.assertEqual(retry.rows_written, 3)
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import json
 import tempfile
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from sqlalchemy import create_engine
@@ -10,15 +10,18 @@ from sqlalchemy.orm import sessionmaker
 from app.db import Base
 from app.models import (
     AdminOpsSnapshot,
+    AttendanceRecord,
     AuthUser,
     Batch,
     Center,
+    SnapshotDirtyMark,
     Student,
     StudentDashboardSnapshot,
+    TeacherBatchMap,
     TeacherTodaySnapshot,
 )
 from app.services.observability_counters import clear_observability_events, count_observability_events
-from app.services.snapshot_rebuild_service import rebuild_snapshots_for_center
+from app.services.snapshot_rebuild_service import rebuild_dirty_snapshots_for_center, rebuild_snapshots_for_center
 
 
 class SnapshotRebuildTests(unittest.TestCase):
@@ -40,6 +43,9 @@ class SnapshotRebuildTests(unittest.TestCase):
         try:
             clear_observability_events()
             for table in (
+                SnapshotDirtyMark,
+                AttendanceRecord,
+                TeacherBatchMap,
                 StudentDashboardSnapshot,
                 TeacherTodaySnapshot,
                 AdminOpsSnapshot,
@@ -91,6 +97,60 @@ class SnapshotRebuildTests(unittest.TestCase):
         finally:
             db.close()
 
+    def test_incremental_rebuild_only_touches_dirty_entities(self):
+        db = self._session_factory()
+        try:
+            today = datetime.utcnow().date()
+            db.add(Center(id=1, name='Center A', slug='center-a'))
+            db.add(Batch(id=101, name='Batch A', subject='Math', academic_level='', start_time='09:00', center_id=1))
+            db.add(Batch(id=102, name='Batch B', subject='Math', academic_level='', start_time='10:00', center_id=1))
+            db.add(AuthUser(id=11, phone='9000000001', role='teacher', center_id=1))
+            db.add(AuthUser(id=12, phone='9000000002', role='teacher', center_id=1))
+            db.add(TeacherBatchMap(teacher_id=11, batch_id=101, center_id=1))
+            db.add(TeacherBatchMap(teacher_id=12, batch_id=102, center_id=1))
+            db.add(Student(id=21, name='Student A', guardian_phone='9999999999', batch_id=101, center_id=1))
+            db.add(Student(id=22, name='Student B', guardian_phone='9999999998', batch_id=102, center_id=1))
+            db.commit()
+
+            first = rebuild_dirty_snapshots_for_center(db, center_id=1, day=today, force_full=True)
+            self.assertEqual(first['mode'], 'full')
+            self.assertEqual(db.query(SnapshotDirtyMark).count(), 0)
+
+            quiet = rebuild_dirty_snapshots_for_center(db, center_id=1, day=today)
+            self.assertEqual(quiet['mode'], 'incremental')
+            self.assertEqual(quiet['rebuilt_count'], 0)
+            self.assertEqual(quiet['skipped_count'], 5)
+
+            db.add(AttendanceRecord(student_id=21, attendance_date=today, status='Absent'))
+            db.commit()
+            scopes = {(row.scope, row.entity_id) for row in db.query(SnapshotDirtyMark).all()}
+            self.assertIn(('student', 21), scopes)
+            self.assertIn(('center', 0), scopes)
+
+            touched = rebuild_dirty_snapshots_for_center(db, center_id=1, day=today)
+            self.assertEqual(touched['mode'], 'incremental')
+            self.assertEqual(touched['teacher']['rebuilt'], 1)
+            self.assertEqual(touched['student']['rebuilt'], 1)
+            self.assertEqual(touched['admin']['rebuilt'], 1)
+            self.assertEqual(touched['skipped_count'], 2)
+            self.assertEqual(db.query(SnapshotDirtyMark).count(), 0)
+            # Rewriting journaled snapshots is expected, not drift.
+            self.assertEqual(count_observability_events('snapshot_drift', window_hours=24), 0)
+
+            db.query(StudentDashboardSnapshot).filter(StudentDashboardSnapshot.student_id == 22).update(
+                {'data_json': json.dumps({'corrupted': True})}
+            )
+            db.add(AttendanceRecord(student_id=21, attendance_date=today - timedelta(days=1), status='Present'))
+            db.commit()
+            full = rebuild_dirty_snapshots_for_center(db, center_id=1, day=today, force_full=True)
+            self.assertEqual(full['mode'], 'full')
+            self.assertEqual(count_observability_events('snapshot_drift', window_hours=24), 1)
+
+            rollover = rebuild_dirty_snapshots_for_center(db, center_id=1, day=today + timedelta(days=1))
+            self.assertEqual(rollover['mode'], 'full')
+        finally:
+            db.close()
+
 
 if __name__ == '__main__':
     unittest.main()
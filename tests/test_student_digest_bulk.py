@@ -0,0 +1,169 @@
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import AttendanceRecord, CommunicationLog, Homework, HomeworkSubmission, RuleConfig, Student
+from app.services.student_automation_engine import send_daily_digest, send_weekly_motivation
+
+
+TODAY = date(2026, 3, 2)
+
+
+class _FixedTimeProvider:
+    def today(self) -> date:
+        return TODAY
+
+    def now(self):
+        return datetime(TODAY.year, TODAY.month, TODAY.day, 20, 30, tzinfo=timezone.utc)
+
+
+def _fake_batch_send(event_type, payload, recipients):  # noqa: ARG001
+    return [{'ok': True, 'status': 'sent', 'chat_id': row['chat_id'], 'log_id': None} for row in recipients]
+
+
+class StudentDigestBulkTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_student_digest_bulk.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        db = self._session_factory()
+        try:
+            for table in (CommunicationLog, HomeworkSubmission, Homework, AttendanceRecord, Student, RuleConfig):
+                db.query(table).delete()
+            db.add(RuleConfig(batch_id=None, quiet_hours_start='00:00', quiet_hours_end='00:00'))
+            db.commit()
+        finally:
+            db.close()
+
+    def _add_students(self, count: int, *, start_id: int = 1) -> list[int]:
+        db = self._session_factory()
+        try:
+            ids = list(range(start_id, start_id + count))
+            db.add_all(
+                [
+                    Student(id=sid, name=f'S{sid}', telegram_chat_id=f'chat-{sid}', batch_id=1 + sid % 3, center_id=1)
+                    for sid in ids
+                ]
+            )
+            db.add_all([AttendanceRecord(student_id=sid, attendance_date=TODAY, status='Present') for sid in ids])
+            db.commit()
+            return ids
+        finally:
+            db.close()
+
+    def _run_digest(self) -> tuple[dict, int]:
+        statements = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+            statements.append(statement)
+
+        db = self._session_factory()
+        event.listen(self._engine, 'before_cursor_execute', _count)
+        try:
+            with patch('app.services.comms_service.gateway_send_event_batch', side_effect=_fake_batch_send) as send:
+                result = send_daily_digest(db, center_id=1, time_provider=_FixedTimeProvider())
+        finally:
+            event.remove(self._engine, 'before_cursor_execute', _count)
+            db.close()
+        self.assertLessEqual(send.call_count, 1)
+        return result, len(statements)
+
+    def test_digest_query_count_does_not_grow_with_students(self):
+        self._add_students(3)
+        small, small_statements = self._run_digest()
+        self.setUp()
+        self._add_students(40)
+        large, large_statements = self._run_digest()
+
+        self.assertEqual(small, {'sent': 3, 'suppressed': 0})
+        self.assertEqual(large, {'sent': 40, 'suppressed': 0})
+        self.assertEqual(small_statements, large_statements)
+
+    def test_digest_content_and_suppression(self):
+        ids = self._add_students(2)
+        db = self._session_factory()
+        try:
+            idle = Student(id=50, name='Idle', telegram_chat_id='chat-50', batch_id=1, center_id=1)
+            capped = Student(id=51, name='Capped', telegram_chat_id='chat-51', batch_id=1, center_id=1)
+            db.add_all([idle, capped])
+            db.add(AttendanceRecord(student_id=51, attendance_date=TODAY, status='Present'))
+            homework = Homework(title='HW', due_date=TODAY + timedelta(days=3), created_at=datetime(2026, 3, 2, 9, 0))
+            db.add(homework)
+            db.flush()
+            db.add(HomeworkSubmission(homework_id=homework.id, student_id=ids[0]))
+            db.add_all(
+                [
+                    CommunicationLog(student_id=51, channel='telegram', message=f'm{n}', created_at=datetime(2026, 3, 2, 8, n))
+                    for n in range(2)
+                ]
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        result, _ = self._run_digest()
+        self.assertEqual(result, {'sent': 2, 'suppressed': 2})
+
+        db = self._session_factory()
+        try:
+            logs = {
+                row.student_id: row.message
+                for row in db.query(CommunicationLog).filter(CommunicationLog.notification_type == 'student_daily_digest')
+            }
+        finally:
+            db.close()
+        self.assertEqual(set(logs), set(ids))
+        self.assertIn('New homework today: 1 item(s)', logs[ids[0]])
+        self.assertNotIn('New homework', logs[ids[1]])
+
+        rerun, _ = self._run_digest()
+        self.assertEqual(rerun, {'sent': 0, 'suppressed': 4})
+
+    def test_weekly_motivation_only_for_full_attendance(self):
+        ids = self._add_students(3)
+        db = self._session_factory()
+        try:
+            for sid in ids:
+                db.add(AttendanceRecord(student_id=sid, attendance_date=TODAY - timedelta(days=2), status='Present'))
+            db.query(AttendanceRecord).filter(
+                AttendanceRecord.student_id == ids[1], AttendanceRecord.attendance_date == TODAY
+            ).update({'status': 'Absent'})
+            db.query(Student).filter(Student.id.in_(ids)).update({'enable_motivation_messages': True})
+            db.commit()
+        finally:
+            db.close()
+
+        db = self._session_factory()
+        try:
+            with patch('app.services.comms_service.gateway_send_event_batch', side_effect=_fake_batch_send):
+                first = send_weekly_motivation(db, center_id=1, time_provider=_FixedTimeProvider())
+                second = send_weekly_motivation(db, center_id=1, time_provider=_FixedTimeProvider())
+            sent_to = {
+                row.student_id
+                for row in db.query(CommunicationLog).filter(CommunicationLog.notification_type == 'student_motivation_weekly')
+            }
+        finally:
+            db.close()
+        self.assertEqual(first, {'sent': 2, 'suppressed': 1})
+        self.assertEqual(second, {'sent': 0, 'suppressed': 3})
+        self.assertEqual(sent_to, {ids[0], ids[2]})
+
+
+if __name__ == '__main__':
+    unittest.main()
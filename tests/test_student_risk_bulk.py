@@ -0,0 +1,174 @@
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import (
+    AttendanceRecord,
+    Batch,
+    Center,
+    FeeRecord,
+    Homework,
+    HomeworkSubmission,
+    PendingAction,
+    Student,
+    StudentRiskEvent,
+    StudentRiskProfile,
+)
+from app.services.student_risk_service import compute_student_risk, recompute_all_student_risk
+
+
+class _FixedTimeProvider:
+    def __init__(self, today: date):
+        self._today = today
+
+    def today(self) -> date:
+        return self._today
+
+    def now(self):
+        from datetime import datetime, timezone
+
+        return datetime(self._today.year, self._today.month, self._today.day, 20, 0, tzinfo=timezone.utc)
+
+
+class StudentRiskBulkTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / 'test_student_risk_bulk.db'
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        self.today = date(2026, 3, 2)
+        self.time_provider = _FixedTimeProvider(self.today)
+        db = self._session_factory()
+        try:
+            for table in (
+                PendingAction,
+                StudentRiskEvent,
+                StudentRiskProfile,
+                HomeworkSubmission,
+                Homework,
+                FeeRecord,
+                AttendanceRecord,
+                Student,
+                Batch,
+                Center,
+            ):
+                db.query(table).delete()
+            db.commit()
+
+            db.add(Center(id=1, name='Center A', slug='center-a'))
+            db.add(Center(id=2, name='Center B', slug='center-b'))
+            db.add(Batch(id=101, name='Batch A', subject='Math', academic_level='', start_time='09:00', center_id=1))
+            db.add(Batch(id=201, name='Batch B', subject='Math', academic_level='', start_time='09:00', center_id=2))
+            for student_id in range(1, 9):
+                db.add(Student(id=student_id, name=f'Student {student_id}', batch_id=101, center_id=1))
+            db.add(Student(id=99, name='Other Center', batch_id=201, center_id=2))
+            for hw_id in range(1, 13):
+                db.add(Homework(id=hw_id, title=f'HW {hw_id}', due_date=self.today - timedelta(days=hw_id)))
+            db.flush()
+
+            for student_id in range(1, 9):
+                for day_offset in range(student_id * 4):
+                    status = 'absent' if (day_offset + student_id) % 3 == 0 else 'present'
+                    if student_id == 8:
+                        status = 'absent'
+                    db.add(
+                        AttendanceRecord(
+                            student_id=student_id,
+                            attendance_date=self.today - timedelta(days=day_offset),
+                            status=status.upper() if day_offset % 5 == 0 else status,
+                        )
+                    )
+                for hw_id in range(1, 13):
+                    if (hw_id + student_id) % 2 == 0:
+                        db.add(HomeworkSubmission(homework_id=hw_id, student_id=student_id))
+            db.add(FeeRecord(student_id=2, due_date=self.today - timedelta(days=10), amount=500, is_paid=False))
+            db.add(FeeRecord(student_id=2, due_date=self.today - timedelta(days=30), amount=500, is_paid=False))
+            db.add(FeeRecord(student_id=3, due_date=self.today + timedelta(days=5), amount=500, is_paid=False))
+            db.add(FeeRecord(student_id=8, due_date=self.today - timedelta(days=90), amount=500, is_paid=False))
+            db.add(FeeRecord(student_id=4, due_date=self.today - timedelta(days=90), amount=500, is_paid=True))
+            db.add(StudentRiskProfile(student_id=1, risk_level='HIGH', final_risk_score=10.0))
+            db.commit()
+        finally:
+            db.close()
+
+    def _strip(self, payload: dict) -> dict:
+        clean = dict(payload)
+        clean['reasons'] = {k: v for k, v in payload['reasons'].items() if k != 'computed_at'}
+        return clean
+
+    def test_bulk_matches_per_student_computation(self):
+        db = self._session_factory()
+        try:
+            students = db.query(Student).filter(Student.center_id == 1).order_by(Student.id.asc()).all()
+            expected = {
+                int(student.id): self._strip(
+                    compute_student_risk(db, student, center_id=1, time_provider=self.time_provider)
+                )
+                for student in students
+            }
+
+            summary = recompute_all_student_risk(db, center_id=1, time_provider=self.time_provider, chunk_size=3)
+            self.assertEqual(summary['students'], 8)
+
+            profiles = {int(row.student_id): row for row in db.query(StudentRiskProfile).all()}
+            self.assertEqual(set(profiles), set(expected))
+            for student_id, payload in expected.items():
+                profile = profiles[student_id]
+                self.assertEqual(profile.final_risk_score, payload['final_risk_score'])
+                self.assertEqual(profile.risk_level, payload['risk_level'])
+                self.assertEqual(profile.attendance_score, payload['attendance_score'])
+                self.assertEqual(profile.homework_score, payload['homework_score'])
+                self.assertEqual(profile.fee_score, payload['fee_score'])
+            self.assertEqual(
+                summary['high'] + summary['medium'] + summary['low'],
+                len(expected),
+            )
+            self.assertEqual(summary['high'], sum(1 for p in expected.values() if p['risk_level'] == 'HIGH'))
+        finally:
+            db.close()
+
+    def test_bulk_records_events_only_on_level_change(self):
+        db = self._session_factory()
+        try:
+            recompute_all_student_risk(db, center_id=1, time_provider=self.time_provider)
+            first_events = db.query(StudentRiskEvent).count()
+            recompute_all_student_risk(db, center_id=1, time_provider=self.time_provider)
+            self.assertEqual(db.query(StudentRiskEvent).count(), first_events)
+            self.assertIsNone(db.query(StudentRiskProfile).filter(StudentRiskProfile.student_id == 99).first())
+        finally:
+            db.close()
+
+    def test_bulk_query_count_is_independent_of_enrollment(self):
+        statements = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append(statement)
+
+        db = self._session_factory()
+        event.listen(self._engine, 'before_cursor_execute', _count)
+        try:
+            recompute_all_student_risk(db, center_id=1, time_provider=self.time_provider, chunk_size=1000)
+        finally:
+            event.remove(self._engine, 'before_cursor_execute', _count)
+            db.close()
+        # Reads stay constant per chunk; only HIGH transitions add their own lookups.
+        self.assertLess(len(statements), 8 * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
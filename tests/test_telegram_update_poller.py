@@ -0,0 +1,155 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import AuthUser, Center, Parent, Role, TelegramPollState
+from app.services.telegram_update_poller import TelegramUpdatePoller
+
+
+def _contact_update(update_id, chat_id, phone):
+    return {
+        "update_id": update_id,
+        "message": {"chat": {"id": chat_id}, "from": {"id": chat_id}, "contact": {"phone_number": phone, "user_id": chat_id}},
+    }
+
+
+class TelegramUpdatePollerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        db_path = Path(cls._tmpdir.name) / "test_telegram_update_poller.db"
+        cls._engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        cls._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=cls._engine)
+        Base.metadata.create_all(bind=cls._engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._engine.dispose()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        db = self._session_factory()
+        try:
+            for table in (TelegramPollState, Parent, AuthUser, Center):
+                db.query(table).delete()
+            db.add_all(
+                [
+                    Center(id=1, name="Default", slug="default-center", timezone="UTC"),
+                    Center(id=2, name="North", slug="north", timezone="UTC"),
+                    AuthUser(phone="9000000002", role=Role.TEACHER.value, center_id=2, telegram_chat_id=""),
+                ]
+            )
+            db.commit()
+        finally:
+            db.close()
+        self.requests = []
+        self.batches = []
+
+    def _transport(self):
+        def _handler(request):
+            self.requests.append(dict(request.url.params))
+            result = self.batches.pop(0) if self.batches else []
+            return httpx.Response(200, json={"ok": True, "result": result})
+
+        return httpx.MockTransport(_handler)
+
+    def _poll(self):
+        poller = TelegramUpdatePoller(token="t0k", session_factory=self._session_factory, transport=self._transport(), long_poll_seconds=25)
+
+        async def _run():
+            try:
+                return await poller.poll_once()
+            finally:
+                await poller.aclose()
+
+        return asyncio.run(_run())
+
+    def test_single_fetch_routes_updates_to_their_center(self):
+        self.batches = [[_contact_update(41, 501, "+91 9000000002"), _contact_update(42, 502, "9999999999")]]
+        routed = []
+
+        def _process(db, update, *, center_id, **_kwargs):
+            routed.append((update["update_id"], center_id))
+            return {"ok": True, "linked": center_id == 2}
+
+        with patch("app.services.telegram_update_poller.process_link_update", side_effect=_process):
+            outcome = self._poll()
+
+        self.assertEqual(outcome, {"ok": True, "processed": 2, "linked": 1})
+        self.assertEqual(routed, [(41, 2), (42, 1)])
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0]["timeout"], "25")
+        self.assertNotIn("offset", self.requests[0])
+
+    def test_phone_known_in_two_centers_gets_one_reply(self):
+        db = self._session_factory()
+        try:
+            db.add(Parent(name="Guardian", phone="9000000002", center_id=1))
+            db.commit()
+        finally:
+            db.close()
+        self.batches = [[_contact_update(60, 501, "9000000002")]]
+        with patch("app.services.telegram_linking_service._send_linking_reply") as reply:
+            outcome = self._poll()
+
+        self.assertEqual(outcome["linked"], 1)
+        self.assertEqual(reply.call_count, 1)
+        db = self._session_factory()
+        try:
+            self.assertEqual(db.query(AuthUser.telegram_chat_id).scalar(), "501")
+            self.assertEqual(db.query(Parent.telegram_chat_id).scalar(), "501")
+        finally:
+            db.close()
+
+    def test_link_token_is_consumed_once(self):
+        db = self._session_factory()
+        try:
+            user_id = db.query(AuthUser.id).scalar()
+        finally:
+            db.close()
+        update = {"update_id": 61, "message": {"chat": {"id": 502}, "text": "/start tok"}}
+        self.batches = [[update]]
+        client = MagicMock()
+        client.consume_telegram_link_update.return_value = {
+            "matched": True,
+            "user_id": user_id,
+            "phone": "9000000002",
+            "chat_id": "502",
+        }
+        with patch("app.services.telegram_linking_service.get_communication_client", return_value=client), patch(
+            "app.services.telegram_linking_service._send_linking_reply"
+        ):
+            outcome = self._poll()
+
+        self.assertEqual(outcome["linked"], 1)
+        self.assertEqual(client.consume_telegram_link_update.call_count, 1)
+
+    def test_offset_survives_restart(self):
+        self.batches = [[_contact_update(77, 501, "9000000002")]]
+        with patch("app.services.telegram_update_poller.process_link_update", return_value={"ok": True, "linked": False}):
+            self._poll()
+            self._poll()
+        self.assertEqual(self.requests[1]["offset"], "78")
+
+    def test_failed_update_does_not_block_the_queue(self):
+        self.batches = [[_contact_update(90, 501, "9000000002")]]
+        with patch("app.services.telegram_update_poller.process_link_update", side_effect=RuntimeError("boom")):
+            outcome = self._poll()
+        self.assertEqual(outcome["processed"], 1)
+        db = self._session_factory()
+        try:
+            self.assertEqual(db.query(TelegramPollState.next_offset).scalar(), 91)
+            self.assertEqual(self.requests[0]["allowed_updates"], '["message","edited_message"]')
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.cache import cache, cache_key
+from app.core.request_identity import clear_request_identity_cache
 from app.db import Base
 from app.models import AuthUser, Center
 from app.services.auth_service import _encode_jwt
@@ -51,6 +52,7 @@ class TenantMiddlewareTests(unittest.TestCase):
         db = self._session_factory()
         try:
             cache.invalidate_prefix('tenant_probe')
+            clear_request_identity_cache()
             db.query(AuthUser).delete()
             db.query(Center).delete()
             db.commit()